@@ -6,5 +6,6 @@ using AI capabilities.
 """
 
 from .general_agent import GeneralAgent
+from .registry import AgentRegistry
 
-__all__ = ['GeneralAgent'] 
\ No newline at end of file
+__all__ = ['GeneralAgent', 'AgentRegistry'] 
\ No newline at end of file
@@ -6,17 +6,32 @@ knowledge base management, and task analysis using AI agents.
 """
 
 from agno.agent import Agent
-from agno.knowledge.pdf import PDFKnowledgeBase, PDFReader
-from agno.vectordb.qdrant import Qdrant
+from agno.knowledge.agent import AgentKnowledge
 from agno.models.openai import OpenAIChat
 from agno.embedder.openai import OpenAIEmbedder
-from agno.document.chunking.document import DocumentChunking
+import gc
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
+from api.embedding_cache import file_hash
+from api.embedding_pipeline import EmbeddingPipeline
+from api.pdf_extraction import iter_chunks
+from api.hybrid_search import AGENT_RETRIEVAL
+from api.knowledge import task_knowledge
+from api.metrics import record_usage, span, timed
+from api.text_index import recording
+from api.vector_backends import TaskQdrant
 
 # Collection name for the Qdrant vector database
 COLLECTION_NAME = "godolist"
 
+# Chat model the agent answers with
+CHAT_MODEL = "gpt-4"
+
+# Documents process_documents() indexes at once
+DOCUMENT_WORKERS = 4
+
 class GeneralAgent:
     """
     A general-purpose agent for processing documents and performing task analysis.
@@ -30,40 +45,49 @@ class GeneralAgent:
         qdrant_url (str): URL for the Qdrant vector database
         qdrant_api_key (str): API key for Qdrant services
         vector_db (Qdrant): Instance of Qdrant vector database
-        knowledge_base (PDFKnowledgeBase): Current knowledge base instance
+        knowledge_base (AgentKnowledge): Current knowledge base instance
         agent (Agent): Current AI agent instance
-        current_file_path (str): Path of the currently processed document
+        current_file_path (str): Paths of the documents the knowledge base covers
     """
     
-    def __init__(self, openai_api_key: str, qdrant_url: str, qdrant_api_key: str):
+    def __init__(self, openai_api_key: str, qdrant_url: str = None, qdrant_api_key: str = None,
+                 vector_db: TaskQdrant = None, openai_client=None, async_openai_client=None):
         """
         Initialize the GeneralAgent with required API keys and URLs.
         
         Args:
             openai_api_key (str): API key for OpenAI services
-            qdrant_url (str): URL for the Qdrant vector database
-            qdrant_api_key (str): API key for Qdrant services
+            qdrant_url (str, optional): URL for the Qdrant vector database
+            qdrant_api_key (str, optional): API key for Qdrant services
+            vector_db (TaskQdrant, optional): Existing vector database to reuse
+                instead of connecting to ``qdrant_url``
+            openai_client (OpenAI, optional): Existing OpenAI client whose
+                connection pool the chat model should share
+            async_openai_client (AsyncOpenAI, optional): Existing async
+                OpenAI client for the chat model's async runs
         """
         self.openai_api_key = openai_api_key
         self.qdrant_url = qdrant_url
         self.qdrant_api_key = qdrant_api_key
-        self.vector_db = self._init_qdrant()
+        self.openai_client = openai_client
+        self.async_openai_client = async_openai_client
+        self.vector_db = vector_db or self._init_qdrant()
         self.knowledge_base = None
         self.agent = None
         self.current_file_path = None
 
-    def _init_qdrant(self) -> Qdrant:
+    def _init_qdrant(self) -> TaskQdrant:
         """
         Initialize Qdrant client with configured settings.
         
         Returns:
-            Qdrant: Initialized Qdrant vector database instance
+            TaskQdrant: Initialized Qdrant vector database instance
             
         Raises:
             Exception: If Qdrant connection fails
         """
         try:
-            vector_db = Qdrant(
+            vector_db = TaskQdrant(
                 collection=COLLECTION_NAME,
                 url=self.qdrant_url,
                 api_key=self.qdrant_api_key,
@@ -89,34 +113,73 @@ class GeneralAgent:
         Raises:
             Exception: If document processing fails
         """
-        try:
-            # Store the current file path
-            self.current_file_path = file_path
+        return self.process_documents([file_path])
+
+    @timed('GeneralAgent.process_documents')
+    def process_documents(self, file_paths: list[str]) -> bool:
+        """
+        Index several documents and search all of them from one knowledge base.
+        
+        The documents are indexed concurrently; the knowledge base retrieves
+        from each of them at once (see api.knowledge).
+        
+        Args:
+            file_paths (list[str]): Paths to the documents to process
+            
+        Returns:
+            bool: True if processing was successful
             
-            # Check if the file has already been processed
-            if self.knowledge_base and self.knowledge_base.path == file_path:
-                # File already processed, just use existing knowledge base
+        Raises:
+            Exception: If document processing fails
+        """
+        try:
+            # Check if the files have already been processed
+            if self.knowledge_base and self.current_file_path == ", ".join(file_paths):
+                # Files already processed, just use existing knowledge base
                 return True
             
-            # Initialize knowledge base with the vector database
-            self.knowledge_base = PDFKnowledgeBase(
-                path=file_path,
-                vector_db=self.vector_db,
-                reader=PDFReader(),
-                chunking_strategy=DocumentChunking(
-                    chunk_size=1000,
-                    overlap=200
-                )
-            )
+            with ThreadPoolExecutor(max_workers=max(1, min(len(file_paths), DOCUMENT_WORKERS))) as executor:
+                digests = list(executor.map(self._index_document, file_paths))
             
-            # Load the documents into the knowledge base without recreating
-            self.knowledge_base.load(recreate=False, upsert=True)
+            # Search only these documents' chunks
+            self.knowledge_base = task_knowledge(self.vector_db, digests)
+            self.current_file_path = ", ".join(file_paths)
             
             return True
         except Exception as e:
             raise Exception(f"Error processing document: {str(e)}")
 
-    def _get_task_instructions(self, task_type: str) -> list[str]:
+    def _index_document(self, file_path: str) -> str:
+        """
+        Embed and upsert a document's chunks in batches without recreating the collection.
+        
+        Args:
+            file_path (str): Path to the document
+            
+        Returns:
+            str: Content hash of the document
+        """
+        digest = file_hash(file_path)
+        chunks = iter_chunks(file_path)
+        if AGENT_RETRIEVAL == 'hybrid':
+            # Add the chunks to the full-text index as they are embedded
+            chunks = recording(digest, chunks)
+        EmbeddingPipeline(self.vector_db.embedder).index(self.vector_db, chunks, tags={'file_hashes': digest})
+        return digest
+
+    def use_knowledge(self, knowledge_base: AgentKnowledge, file_paths: list[str]) -> None:
+        """
+        Use a knowledge base whose documents are already indexed.
+        
+        Args:
+            knowledge_base (AgentKnowledge): Knowledge base to search
+            file_paths (list[str]): Documents the knowledge base covers
+        """
+        self.knowledge_base = knowledge_base
+        self.current_file_path = ", ".join(file_paths)
+
+    @staticmethod
+    def _get_task_instructions(task_type: str) -> list[str]:
         """
         Get specific instructions based on task type.
         
@@ -152,6 +215,7 @@ class GeneralAgent:
         }
         return instructions.get(task_type.lower(), instructions["review"])
 
+    @timed('GeneralAgent.initialize_agent')
     def initialize_agent(self, task_type: str, task_description: str) -> None:
         """
         Initialize the agent with task-specific configuration.
@@ -174,8 +238,10 @@ class GeneralAgent:
             name="General Task Agent",
             role="Task analysis and processing specialist",
             model=OpenAIChat(
-                id="gpt-4",
-                api_key=self.openai_api_key
+                id=CHAT_MODEL,
+                api_key=self.openai_api_key,
+                client=self.openai_client,
+                async_client=self.async_openai_client
             ),
             tools=[],  # No tools for now
             knowledge=self.knowledge_base,
@@ -202,18 +268,113 @@ class GeneralAgent:
             raise Exception("Agent not initialized. Call initialize_agent first.")
 
         try:
-            response = self.agent.run(query)
+            with span('agent.run'):
+                response = self.agent.run(query)
+            record_usage(CHAT_MODEL, getattr(response, 'metrics', None))
             return response
         except Exception as e:
             raise Exception(f"Error processing task: {str(e)}")
 
+    def stream_task(self, query: str) -> Iterator[str]:
+        """
+        Process a task query, yielding the answer as the model produces it.
+        
+        Closing the generator stops the run and closes the model's stream.
+        
+        Args:
+            query (str): The query to process
+            
+        Yields:
+            str: Pieces of the agent's answer, in order
+            
+        Raises:
+            Exception: If agent is not initialized
+        """
+        if not self.agent:
+            raise Exception("Agent not initialized. Call initialize_agent first.")
+
+        with span('agent.run'):
+            stream = self.agent.run(query, stream=True)
+            finished = False
+            try:
+                for chunk in stream:
+                    if isinstance(chunk.content, str) and chunk.content:
+                        yield chunk.content
+                finished = True
+            finally:
+                stream.close()
+                run_response = getattr(self.agent, 'run_response', None)
+                record_usage(CHAT_MODEL, getattr(run_response, 'metrics', None))
+                if not finished:
+                    # agno's closed generators and the OpenAI stream they wrap sit in a
+                    # reference cycle; collect it now so the HTTP response is closed and
+                    # the model stops generating, instead of whenever the GC next runs
+                    gc.collect()
+
+    async def aprocess_task(self, query: str) -> str:
+        """
+        Process a task query from async code.
+        
+        The model call, query embedding and vector search use async clients,
+        so the event loop serves other requests while the model answers.
+        
+        Args:
+            query (str): The query to process
+            
+        Returns:
+            str: The agent's response to the query
+            
+        Raises:
+            Exception: If agent is not initialized
+        """
+        if not self.agent:
+            raise Exception("Agent not initialized. Call initialize_agent first.")
+
+        try:
+            with span('agent.run'):
+                response = await self.agent.arun(query)
+            record_usage(CHAT_MODEL, getattr(response, 'metrics', None))
+            return response
+        except Exception as e:
+            raise Exception(f"Error processing task: {str(e)}")
+
+    async def astream_task(self, query: str) -> AsyncIterator[str]:
+        """
+        Process a task query from async code, yielding the answer as the model produces it.
+        
+        Closing the generator (or cancelling the task iterating it) stops the
+        run and closes the model's stream.
+        
+        Args:
+            query (str): The query to process
+            
+        Yields:
+            str: Pieces of the agent's answer, in order
+            
+        Raises:
+            Exception: If agent is not initialized
+        """
+        if not self.agent:
+            raise Exception("Agent not initialized. Call initialize_agent first.")
+
+        with span('agent.run'):
+            stream = await self.agent.arun(query, stream=True)
+            try:
+                async for chunk in stream:
+                    if isinstance(chunk.content, str) and chunk.content:
+                        yield chunk.content
+            finally:
+                await stream.aclose()
+                run_response = getattr(self.agent, 'run_response', None)
+                record_usage(CHAT_MODEL, getattr(run_response, 'metrics', None))
+
 # Usage example:
 """
 # Initialize the agent
 agent = GeneralAgent(openai_api_key, qdrant_url, qdrant_api_key)
 
-# Process a document
-agent.process_document("path/to/document.pdf")
+# Process the task's documents
+agent.process_documents(["path/to/document.pdf", "path/to/appendix.pdf"])
 
 # Initialize for a specific task
 agent.initialize_agent("review", "Review the eBook and provide comprehensive analysis")
@@ -0,0 +1,275 @@
+"""
+Registry of long-lived GeneralAgents and the clients they share.
+
+Building a GeneralAgent per request creates a Qdrant client, an OpenAI
+embedder, an ``Agent`` and an ``OpenAIChat`` model, and opens fresh HTTP
+connections for each of them. The registry keeps one Qdrant store and one
+pooled OpenAI client (plus an async one for the ASGI mode, see api.asgi) for
+the whole process, one knowledge base per set of task files (searching only
+those files' chunks, by hybrid BM25 and vector retrieval unless
+``AGENT_RETRIEVAL`` is ``vector``), and a small pool of initialized agents
+per file set and task, so a warm request only pays for the model call itself.
+
+Idle agents and knowledge bases are dropped after ``AGENT_IDLE_TTL`` seconds.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+from api.knowledge import task_knowledge
+from .general_agent import GeneralAgent
+
+AGENT_IDLE_TTL = float(os.getenv('AGENT_IDLE_TTL', '600'))
+AGENT_POOL_SIZE = int(os.getenv('AGENT_POOL_SIZE', '4'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+
+
+class AgentRegistry:
+    """
+    Thread-safe pool of initialized GeneralAgents.
+
+    Agents are checked out for the duration of one request, so concurrent
+    requests never share an ``Agent``; requests for the same files and task
+    reuse agents other requests have returned.
+
+    Attributes:
+        ttl (float): Seconds an idle agent or knowledge base is kept
+        pool_size (int): Idle agents kept per file set and task
+        created (int): Agents built so far
+        reused (int): Checkouts served by an idle agent
+    """
+
+    def __init__(self, vector_db=None, openai_client=None, ttl=AGENT_IDLE_TTL, pool_size=AGENT_POOL_SIZE,
+                 clock=time.monotonic):
+        """
+        Initialize an empty registry; clients are created on first use.
+
+        Args:
+            vector_db (Qdrant, optional): Vector store to share, defaults to
+                the application's
+            openai_client (OpenAI, optional): OpenAI client to share,
+                defaults to one with a pooled HTTP client
+            ttl (float): Seconds an idle agent or knowledge base is kept
+            pool_size (int): Idle agents kept per file set and task
+            clock (callable): Monotonic time source
+        """
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.created = 0
+        self.reused = 0
+        self._vector_db = vector_db
+        self._openai_client = openai_client
+        self._clock = clock
+        self._knowledge = {}
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @property
+    def vector_db(self):
+        """Qdrant: Vector store shared by every agent."""
+        if self._vector_db is None:
+            from api.database import get_vector_db
+            self._vector_db = get_vector_db()
+        return self._vector_db
+
+    @property
+    def openai_client(self):
+        """OpenAI: Client whose keep-alive connections every agent shares."""
+        with self._lock:
+            if self._openai_client is None:
+                self._openai_client = OpenAI(
+                    api_key=os.getenv('OPENAI_API_KEY'),
+                    http_client=DefaultHttpxClient(limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                    ))
+                )
+            return self._openai_client
+
+    @property
+    def async_openai_client(self):
+        """AsyncOpenAI: Client every agent's async runs share, see api.async_clients."""
+        from api.async_clients import async_openai_client
+        return async_openai_client()
+
+    def knowledge(self, file_hashes):
+        """
+        Get the knowledge base for a set of files.
+
+        Args:
+            file_hashes (list[str]): Content hashes of the indexed files the
+                agent works on
+
+        Returns:
+            TaskKnowledge: Knowledge base over those files' chunks in the
+                shared vector store
+        """
+        key = frozenset(file_hashes)
+        with self._lock:
+            entry = self._knowledge.get(key)
+            if entry is None:
+                knowledge = task_knowledge(self.vector_db, sorted(key))
+                entry = self._knowledge[key] = [knowledge, 0.0]
+            entry[1] = self._clock()
+            return entry[0]
+
+    def _build(self, task_type, task_description, file_paths, file_hashes):
+        """
+        Build and initialize an agent.
+
+        Args:
+            task_type (str): Type of task to perform
+            task_description (str): Description of the task
+            file_paths (list[str]): Indexed files the agent works on
+            file_hashes (list[str]): Content hashes of those files
+
+        Returns:
+            GeneralAgent: Initialized agent
+        """
+        agent = GeneralAgent(
+            os.getenv('OPENAI_API_KEY'),
+            vector_db=self.vector_db,
+            openai_client=self.openai_client,
+            async_openai_client=self.async_openai_client
+        )
+        agent.use_knowledge(self.knowledge(file_hashes), sorted(file_paths))
+        agent.initialize_agent(task_type, task_description)
+        return agent
+
+    def _checkout(self, task_type, task_description, file_paths, file_hashes):
+        """
+        Take an idle agent for some files and task, building one if none is idle.
+
+        Args:
+            task_type (str): Type of task to perform
+            task_description (str): Description of the task
+            file_paths (list[str]): Indexed files the agent works on
+            file_hashes (list[str]): Content hashes of those files
+
+        Returns:
+            tuple: Pool key and the agent
+        """
+        key = (frozenset(file_hashes), frozenset(file_paths), task_type.lower(), task_description)
+        self.evict_idle()
+        with self._lock:
+            pool = self._idle.get(key)
+            agent = pool.pop()[0] if pool else None
+            if agent is not None:
+                self.reused += 1
+        if agent is None:
+            agent = self._build(task_type, task_description, file_paths, file_hashes)
+            with self._lock:
+                self.created += 1
+        return key, agent
+
+    def _checkin(self, key, agent):
+        """
+        Return a checked-out agent to its pool.
+
+        Args:
+            key (tuple): Pool key from _checkout()
+            agent (GeneralAgent): Agent to return
+        """
+        try:
+            # Runs are independent, so history from this one must not leak into the next;
+            # agno only creates the memory when a run starts
+            if agent.agent.memory is not None:
+                agent.agent.memory.clear()
+        finally:
+            with self._lock:
+                pool = self._idle.setdefault(key, [])
+                if len(pool) < self.pool_size:
+                    pool.append((agent, self._clock()))
+
+    @contextmanager
+    def agent(self, task_type, task_description, file_paths, file_hashes=()):
+        """
+        Check out an initialized agent for one request.
+
+        Args:
+            task_type (str): Type of task to perform
+            task_description (str): Description of the task
+            file_paths (list[str]): Indexed files the agent works on
+            file_hashes (list[str]): Content hashes of those files; the
+                agent only retrieves their chunks
+
+        Yields:
+            GeneralAgent: Agent no other request is using
+        """
+        key, agent = self._checkout(task_type, task_description, file_paths, file_hashes)
+        try:
+            yield agent
+        finally:
+            self._checkin(key, agent)
+
+    @asynccontextmanager
+    async def async_agent(self, task_type, task_description, file_paths, file_hashes=()):
+        """
+        Check out an initialized agent for one request, from async code.
+
+        Building an agent imports the agent stack and creates the shared
+        clients on first use, so it runs in a worker thread rather than on
+        the event loop.
+
+        Args:
+            task_type (str): Type of task to perform
+            task_description (str): Description of the task
+            file_paths (list[str]): Indexed files the agent works on
+            file_hashes (list[str]): Content hashes of those files; the
+                agent only retrieves their chunks
+
+        Yields:
+            GeneralAgent: Agent no other request is using
+        """
+        key, agent = await asyncio.get_running_loop().run_in_executor(
+            None, self._checkout, task_type, task_description, file_paths, file_hashes
+        )
+        try:
+            yield agent
+        finally:
+            self._checkin(key, agent)
+
+    def evict_idle(self):
+        """
+        Drop agents and knowledge bases idle for longer than the TTL.
+
+        Returns:
+            int: Number of agents dropped
+        """
+        cutoff = self._clock() - self.ttl
+        dropped = 0
+        with self._lock:
+            for key, pool in list(self._idle.items()):
+                kept = [(agent, used) for agent, used in pool if used >= cutoff]
+                dropped += len(pool) - len(kept)
+                if kept:
+                    self._idle[key] = kept
+                else:
+                    del self._idle[key]
+            in_use = {key[0] for key in self._idle}
+            for files, (_knowledge, used) in list(self._knowledge.items()):
+                if used < cutoff and files not in in_use:
+                    del self._knowledge[files]
+        return dropped
+
+    def stats(self):
+        """
+        Describe the registry's contents.
+
+        Returns:
+            dict: Idle agents, knowledge bases, agents created and reuses
+        """
+        with self._lock:
+            return {
+                'idle_agents': sum(len(pool) for pool in self._idle.values()),
+                'knowledge_bases': len(self._knowledge),
+                'created': self.created,
+                'reused': self.reused
+            }
+
+
+registry = AgentRegistry()
@@ -6,29 +6,48 @@ This package contains all the route handlers and business logic for the applicat
 from flask import Flask
 from flask_cors import CORS
 from .database import init_db
+from . import connection, ingest_queue, metrics, text_index, vector_gc, vector_store
 from .task_routes import task_bp
 from .folder_routes import folder_bp
 from .file_routes import file_bp
+from .change_routes import change_bp
+from .event_routes import event_bp
+from .search_routes import search_bp
+from .metrics_routes import metrics_bp
+
+# CORS settings, also applied by the async handlers in asgi
+CORS_OPTIONS = {
+    "origins": ["http://localhost:5173"],
+    "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "If-Modified-Since", "If-Range",
+                      "Range", "Upload-Offset", "X-Profile"],
+    "expose_headers": ["ETag", "Last-Modified", "Accept-Ranges", "Content-Range", "Content-Length",
+                       "Upload-Offset", "X-Profiled-Status"]
+}
 
 def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__)
     
     # Configure CORS
-    CORS(app, resources={
-        r"/*": {
-            "origins": ["http://localhost:5173"],
-            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
-        }
-    })
+    CORS(app, resources={r"/*": CORS_OPTIONS})
     
-    # Initialize database
+    # Request timing and profiling, then the database, pooled connections and background ingestion
+    metrics.init_app(app)
     init_db()
+    connection.init_app(app)
+    ingest_queue.init_app(app)
+    vector_store.init_app(app)
+    vector_gc.init_app(app)
+    text_index.init_app(app)
     
     # Register blueprints
     app.register_blueprint(task_bp)
     app.register_blueprint(folder_bp)
     app.register_blueprint(file_bp)
+    app.register_blueprint(change_bp)
+    app.register_blueprint(event_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(metrics_bp)
     
     return app 
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""
+ASGI serving mode for Go Do List.
+
+``uvicorn asgi:app`` (see asgi.py next to main.py) serves the app from an
+event loop. ``POST /process-task`` is answered by an async handler: the
+model call, query embedding and vector search go through the shared async
+clients in async_clients, and SQLite work runs on the bounded executor of
+connection.run_in_db(), so agent calls in flight hold no threads. Every
+other request is handed to the Flask app through a2wsgi, on its own pool of
+``ASGI_WSGI_THREADS`` threads that slow agent calls can no longer exhaust.
+"""
+
+import asyncio
+import importlib
+import json
+import os
+import time
+from contextlib import suppress
+from urllib.parse import parse_qs
+from a2wsgi import WSGIMiddleware
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+from . import CORS_OPTIONS, create_app
+from .async_clients import close_clients
+from .connection import get_connection, run_in_db
+from .metrics import METRICS_ENABLED, request_duration
+from .task_routes import process_context, remember_answer
+
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '32'))
+
+
+def _cors_headers(origin):
+    """
+    Build the CORS headers Flask-CORS would add for an origin.
+
+    Args:
+        origin (str|None): Request's Origin header
+
+    Returns:
+        list[tuple]: Raw ASGI response headers
+    """
+    if not origin or origin not in CORS_OPTIONS['origins']:
+        return []
+    return [
+        (b'access-control-allow-origin', origin.encode('latin-1')),
+        (b'access-control-expose-headers', ', '.join(CORS_OPTIONS['expose_headers']).encode('latin-1')),
+        (b'vary', b'Origin')
+    ]
+
+
+async def _read_body(receive):
+    """
+    Read a request body.
+
+    Args:
+        receive (callable): ASGI receive channel
+
+    Returns:
+        bytes|None: Body, or None if the client disconnected first
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send_json(send, status, body, headers):
+    """
+    Send a complete JSON response.
+
+    Args:
+        send (callable): ASGI send channel
+        status (int): HTTP status code
+        body (dict): Response body
+        headers (list[tuple]): Extra raw headers
+    """
+    payload = json.dumps(body).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode()),
+        *headers
+    ]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def _until_disconnected(receive):
+    """Wait until the client goes away."""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _cancel_on_disconnect(awaitable, receive):
+    """
+    Await something, cancelling it if the client disconnects first.
+
+    Cancelling an agent run closes its model request, so the model stops
+    generating for a client that is gone.
+
+    Args:
+        awaitable (Awaitable): Work to do for the client
+        receive (callable): ASGI receive channel, with the body already read
+
+    Returns:
+        tuple: Whether the work finished, and its result
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_until_disconnected(receive))
+    await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    watcher.cancel()
+    if not work.done():
+        work.cancel()
+        with suppress(asyncio.CancelledError):
+            await work
+        return False, None
+    return True, work.result()
+
+
+def _load_context(data):
+    """
+    Look up a /process-task request's context on a database thread.
+
+    Args:
+        data (dict): Request body
+
+    Returns:
+        dict|None: Context from task_routes.process_context()
+    """
+    with get_connection() as conn:
+        return process_context(conn, data)
+
+
+async def astream_answer(registry, context):
+    """
+    Stream an agent's answer to a task as NDJSON records, from async code.
+
+    The async counterpart of task_routes.stream_answer(), with the same
+    records.
+
+    Args:
+        registry (AgentRegistry): Registry to check an agent out of
+        context (dict): Request context from task_routes.process_context()
+
+    Yields:
+        str: One JSON record per line
+    """
+    task = context['task']
+    yield json.dumps({'type': 'task', 'task': task}) + '\n'
+    if context['cached'] is not None:
+        yield json.dumps({'type': 'token', 'content': context['cached']}) + '\n'
+        yield json.dumps({'type': 'done', 'cached': True}) + '\n'
+        return
+
+    answer = []
+    try:
+        async with registry.async_agent(context['task_type'], context['description'], context['file_paths'],
+                                        context['file_hashes']) as agent:
+            tokens = agent.astream_task(task['title'])
+            try:
+                async for token in tokens:
+                    answer.append(token)
+                    yield json.dumps({'type': 'token', 'content': token}) + '\n'
+            finally:
+                await tokens.aclose()
+        await run_in_db(remember_answer, context, ''.join(answer))
+    except Exception as e:
+        yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        return
+    yield json.dumps({'type': 'done', 'cached': False}) + '\n'
+
+
+async def process_task(scope, receive, send):
+    """
+    Answer ``POST /process-task`` without holding a thread.
+
+    Behaves like task_routes.process_task(), including the response cache
+    and NDJSON streaming.
+
+    Args:
+        scope (dict): ASGI connection scope
+        receive (callable): ASGI receive channel
+        send (callable): ASGI send channel
+
+    Returns:
+        int: Response status, 499 if the client went away first
+    """
+    from agents.registry import registry
+
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    cors = _cors_headers(headers.get('origin'))
+    body = await _read_body(receive)
+    if body is None:
+        return 499
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'task_id' not in data:
+        await _send_json(send, 400, {'error': 'Task ID is required'}, cors)
+        return 400
+
+    try:
+        context = await run_in_db(_load_context, data)
+        if context is None:
+            await _send_json(send, 404, {'error': 'Task not found'}, cors)
+            return 404
+        task = context['task']
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        accept = parse_accept_header(headers.get('accept'), MIMEAccept)
+        if query.get('stream', [''])[0] in ('1', 'true') or accept.best == 'application/x-ndjson':
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'application/x-ndjson'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors
+            ]})
+
+            async def pump():
+                async for record in astream_answer(registry, context):
+                    await send({'type': 'http.response.body', 'body': record.encode('utf-8'), 'more_body': True})
+
+            finished, _ = await _cancel_on_disconnect(pump(), receive)
+            if not finished:
+                return 499
+            await send({'type': 'http.response.body', 'body': b''})
+            return 200
+
+        if context['cached'] is not None:
+            await _send_json(send, 200, {'task': task, 'content': context['cached'], 'cached': True}, cors)
+            return 200
+
+        async def run():
+            async with registry.async_agent(context['task_type'], context['description'], context['file_paths'],
+                                            context['file_hashes']) as agent:
+                return await agent.aprocess_task(task['title'])
+
+        finished, response = await _cancel_on_disconnect(run(), receive)
+        if not finished:
+            return 499
+        await run_in_db(remember_answer, context, response.content)
+        await _send_json(send, 200, {'task': task, 'content': response.content, 'cached': False}, cors)
+        return 200
+    except Exception as e:
+        await _send_json(send, 500, {'error': str(e)}, cors)
+        return 500
+
+
+class AsgiApp:
+    """
+    ASGI application serving the Flask app, with async handlers for the
+    I/O-bound routes.
+
+    Attributes:
+        flask_app (Flask): Application serving every other route
+        wsgi (WSGIMiddleware): The Flask app adapted to ASGI
+    """
+
+    def __init__(self, flask_app, wsgi_threads=ASGI_WSGI_THREADS):
+        """
+        Wrap a Flask application.
+
+        Args:
+            flask_app (Flask): Application from create_app()
+            wsgi_threads (int): Threads serving the Flask app's requests
+        """
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_threads)
+
+    async def __call__(self, scope, receive, send):
+        """Handle an ASGI connection."""
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        # Profiled requests go through Flask, where the profiling middleware is
+        if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/process-task' \
+                and not any(name.lower() == b'x-profile' for name, _value in scope['headers']):
+            start = time.perf_counter()
+            status = await process_task(scope, receive, send)
+            if METRICS_ENABLED:
+                request_duration.observe(time.perf_counter() - start, method='POST', route='/process-task',
+                                         status=status)
+            return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        """
+        Answer the server's startup and shutdown events.
+
+        Startup imports the agent stack in a worker thread, so the first
+        agent call does not stall the event loop while it loads.
+
+        Args:
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, 'agents.registry')
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_clients()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app=None):
+    """
+    Create the ASGI application.
+
+    Args:
+        flask_app (Flask, optional): Application to serve, defaults to a new
+            one from create_app()
+
+    Returns:
+        AsgiApp: ASGI application
+    """
+    return AsgiApp(flask_app or create_app())
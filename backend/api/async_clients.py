@@ -0,0 +1,123 @@
+"""
+Shared async clients for the ASGI serving mode.
+
+Async handlers talk to OpenAI and Qdrant through one AsyncOpenAI client per
+API key and base URL, and one AsyncQdrantClient per vector store, so
+concurrent requests share their keep-alive connection pools instead of each
+opening its own. Stores without a server (in-process Qdrant, the local
+backends) are searched on a worker thread instead.
+
+openai and qdrant-client are imported on first use, like everywhere else.
+"""
+
+import asyncio
+import os
+import threading
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+
+# Qdrant store settings passed on to its async client
+_QDRANT_SETTINGS = ('url', 'host', 'port', 'grpc_port', 'prefer_grpc', 'https', 'api_key', 'prefix', 'timeout')
+
+_openai_clients = {}
+_qdrant_clients = {}
+_lock = threading.Lock()
+
+
+def async_openai_client(api_key=None, base_url=None):
+    """
+    Get the shared async OpenAI client for an API key and base URL.
+
+    Args:
+        api_key (str, optional): API key, defaults to ``OPENAI_API_KEY``
+        base_url (str, optional): API base URL, defaults to ``OPENAI_BASE_URL``
+            or OpenAI's
+
+    Returns:
+        AsyncOpenAI: Client with a pool of ``OPENAI_MAX_CONNECTIONS`` connections
+    """
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    key = (api_key, base_url)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            client = _openai_clients[key] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                ))
+            )
+        return client
+
+
+def async_qdrant_client(vector_db):
+    """
+    Get the shared async Qdrant client for a vector store.
+
+    Args:
+        vector_db (VectorDb): Store to connect to
+
+    Returns:
+        AsyncQdrantClient|None: Client for the store's server, or None for
+            stores that have no server
+    """
+    if getattr(vector_db, 'location', None) or getattr(vector_db, 'path', None) \
+            or not (getattr(vector_db, 'url', None) or getattr(vector_db, 'host', None)):
+        return None
+    from qdrant_client import AsyncQdrantClient
+
+    with _lock:
+        client = _qdrant_clients.get(id(vector_db))
+        if client is None:
+            settings = {name: getattr(vector_db, name, None) for name in _QDRANT_SETTINGS}
+            client = _qdrant_clients[id(vector_db)] = AsyncQdrantClient(
+                **{name: value for name, value in settings.items() if value is not None}
+            )
+        return client
+
+
+async def embed(embedder, text):
+    """
+    Embed text without blocking the event loop.
+
+    Args:
+        embedder (Embedder): Embedder to use; CachedEmbedder checks its
+            cache first and OpenAIEmbedder uses the shared async client
+        text (str): Text to embed
+
+    Returns:
+        tuple: Embedding and token usage
+    """
+    from agno.embedder.openai import OpenAIEmbedder
+    from .embedding_cache import CachedEmbedder
+
+    if isinstance(embedder, CachedEmbedder):
+        return await embedder.async_get_embedding_and_usage(text)
+    if isinstance(embedder, OpenAIEmbedder):
+        request = {'input': text, 'model': embedder.id, 'encoding_format': embedder.encoding_format}
+        # Same request as agno's OpenAIEmbedder
+        if embedder.id.startswith('text-embedding-3'):
+            request['dimensions'] = embedder.dimensions
+        if embedder.user is not None:
+            request['user'] = embedder.user
+        request.update(embedder.request_params or {})
+        client = async_openai_client(embedder.api_key, embedder.base_url)
+        response = await client.embeddings.create(**request)
+        return response.data[0].embedding, response.usage.model_dump() if response.usage else None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, embedder.get_embedding_and_usage, text)
+
+
+async def close_clients():
+    """Close every shared client, e.g. when the ASGI server shuts down."""
+    with _lock:
+        clients = [*_openai_clients.values(), *_qdrant_clients.values()]
+        _openai_clients.clear()
+        _qdrant_clients.clear()
+    for client in clients:
+        await client.close()
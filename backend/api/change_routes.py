@@ -0,0 +1,39 @@
+"""
+Change feed routes for Go Do List.
+"""
+
+from flask import Blueprint, request, jsonify
+from .connection import get_connection
+from .revisions import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, changes_since, current_revision
+
+change_bp = Blueprint('changes', __name__)
+
+@change_bp.route('/changes', methods=['GET'])
+def get_changes():
+    """
+    Get the task, folder and file changes made after a revision.
+    
+    Clients pass the ``revision`` from their previous response as ``since``
+    and keep polling while ``has_more`` is true. A 410 response means the
+    revision is no longer covered by the change log and the client should
+    reload everything.
+    
+    Returns:
+        Response: JSON response with the changes and the next revision
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', DEFAULT_CHANGES_LIMIT)), MAX_CHANGES_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    if since < 0 or limit < 1:
+        return jsonify({'error': 'since and limit must be positive'}), 400
+
+    with get_connection() as conn:
+        result = changes_since(conn, since, limit)
+        if result is None:
+            return jsonify({
+                'error': 'Revision is no longer available, reload everything',
+                'revision': current_revision(conn)
+            }), 410
+        return jsonify(result)
@@ -0,0 +1,245 @@
+"""
+SQLite connection management for Go Do List.
+
+Connections are opened once and reused: request handlers borrow one from a
+process-wide pool for the lifetime of the app context, while code running
+outside a request (startup, background workers, CLI commands) keeps one per
+thread. Every connection runs in WAL mode with a busy timeout so concurrent
+readers and writers wait for each other instead of failing with
+"database is locked".
+
+Async handlers (see asgi) run their SQLite work with run_in_db() on a bounded
+pool of threads, each keeping its own connection, so the event loop never
+blocks on the database.
+"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_app_context
+from .database import db_path
+from .metrics import connection_factory
+
+# Tunable pragmas, overridable through the environment
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-16000'))  # negative values are KiB
+MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+STATEMENT_CACHE_SIZE = int(os.getenv('SQLITE_STATEMENT_CACHE_SIZE', '256'))
+POOL_MAX_IDLE = int(os.getenv('SQLITE_POOL_MAX_IDLE', '16'))
+DB_EXECUTOR_THREADS = int(os.getenv('DB_EXECUTOR_THREADS', '8'))
+
+
+def open_connection(path=None):
+    """
+    Open a new SQLite connection with the application pragmas applied.
+
+    Rows are returned as ``sqlite3.Row`` so they can be read by index or by
+    column name. Prepared statements are cached per connection, which is what
+    makes reusing connections pay off. Statements are timed for the metrics
+    endpoint unless metrics are disabled.
+
+    Args:
+        path (str, optional): Database path, defaults to the application database
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    conn = sqlite3.connect(
+        path or db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        factory=connection_factory()
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA synchronous = {SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size = {CACHE_SIZE}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+class ConnectionPool:
+    """
+    A small LIFO pool of idle SQLite connections.
+
+    The pool is bound to the process that created it. After a fork (for example
+    gunicorn workers started with ``--preload``) the inherited idle connections
+    are dropped rather than shared with the parent.
+
+    Attributes:
+        path (str): Database path connections are opened against
+        max_idle (int): Maximum number of idle connections kept open
+    """
+
+    def __init__(self, path=None, max_idle=POOL_MAX_IDLE):
+        """
+        Initialize an empty pool.
+
+        Args:
+            path (str, optional): Database path, defaults to the application database
+            max_idle (int): Maximum number of idle connections kept open
+        """
+        self.path = path or db_path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """Forget connections inherited from a parent process."""
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+
+    def acquire(self):
+        """
+        Borrow a connection, opening a new one if none are idle.
+
+        Returns:
+            sqlite3.Connection: Connection owned by the caller until released
+        """
+        with self._lock:
+            self._check_pid()
+            if self._idle:
+                return self._idle.pop()
+        return open_connection(self.path)
+
+    def release(self, conn):
+        """
+        Return a borrowed connection to the pool.
+
+        Any transaction left open by the borrower is rolled back first.
+
+        Args:
+            conn (sqlite3.Connection): Connection previously returned by acquire()
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def idle_count(self):
+        """
+        Count the idle connections.
+
+        Returns:
+            int: Connections waiting in the pool
+        """
+        with self._lock:
+            self._check_pid()
+            return len(self._idle)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+pool = ConnectionPool()
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_connection():
+    """
+    Get the connection for the current request or thread.
+
+    The returned connection can be used as a context manager exactly like
+    ``sqlite3.connect()``: the block commits on success and rolls back on error,
+    but the connection itself stays open and is reused.
+
+    Returns:
+        sqlite3.Connection: Connection for the current app context or thread
+    """
+    if has_app_context():
+        conn = g.get('db_conn')
+        if conn is None:
+            conn = g.db_conn = pool.acquire()
+        return conn
+
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _local.conn = open_connection()
+        _local.pid = os.getpid()
+    return conn
+
+
+def release_connection(exception=None):
+    """
+    Return the app context's connection to the pool.
+
+    Registered as an app-context teardown handler by init_app().
+
+    Args:
+        exception (Exception, optional): Exception that ended the context, if any
+    """
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def close_thread_connection():
+    """Close the connection bound to the current thread outside of requests."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+
+def db_executor():
+    """
+    Get the thread pool async code runs SQLite work on, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool of ``DB_EXECUTOR_THREADS`` threads
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix='sqlite')
+    return _executor
+
+
+async def run_in_db(function, *args, **kwargs):
+    """
+    Run blocking database work from async code.
+
+    The function runs on db_executor(), where get_connection() returns the
+    worker thread's own connection, so at most ``DB_EXECUTOR_THREADS``
+    connections are in use however many requests are waiting.
+
+    Args:
+        function (callable): Function to call
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+
+    Returns:
+        Any: The function's result
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor(), functools.partial(function, *args, **kwargs))
+
+
+def init_app(app):
+    """
+    Register connection handling with a Flask application.
+
+    Args:
+        app (Flask): Application to configure
+    """
+    app.teardown_appcontext(release_connection)
@@ -1,12 +1,16 @@
 """
 Database initialization and setup for Go Do List.
+
+The vector store and its OpenAI embedder are created by get_vector_db() the
+first time something needs them, so importing the app, running a CLI
+command or booting a worker loads neither agno's vector stores, qdrant-client
+nor openai, and does not fail while Qdrant is unreachable.
+``database.vector_db`` still works and goes through get_vector_db().
 """
 
-import sqlite3
 import os
+import threading
 from dotenv import load_dotenv
-from agno.vectordb.qdrant import Qdrant
-from agno.embedder.openai import OpenAIEmbedder
 
 # Load environment variables
 load_dotenv()
@@ -19,20 +23,93 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Configuration
 COLLECTION_NAME = "godolist"
 
-# Initialize Qdrant with OpenAI embedder
-vector_db = Qdrant(
-    collection=COLLECTION_NAME,
-    url=os.getenv('QDRANT_URL', 'http://localhost:6333'),
-    api_key=os.getenv('QDRANT_API_KEY'),
-    embedder=OpenAIEmbedder(
-        id="text-embedding-3-small", 
-        api_key=os.getenv('OPENAI_API_KEY')
+_vector_db = None
+_vector_db_lock = threading.Lock()
+
+
+def create_default_vector_db():
+    """
+    Create the application's vector store.
+
+    The store selected by ``VECTOR_BACKEND`` (Qdrant unless it says
+    otherwise), with the OpenAI embedder, reusing vectors for text embedded
+    before.
+
+    Returns:
+        VectorDb: The new store
+    """
+    from agno.embedder.openai import OpenAIEmbedder
+    from .embedding_cache import CachedEmbedder
+    from .vector_store import create_vector_db
+
+    return create_vector_db(
+        collection=COLLECTION_NAME,
+        url=os.getenv('QDRANT_URL', 'http://localhost:6333'),
+        api_key=os.getenv('QDRANT_API_KEY'),
+        embedder=CachedEmbedder(
+            embedder=OpenAIEmbedder(
+                id="text-embedding-3-small", 
+                api_key=os.getenv('OPENAI_API_KEY')
+            )
+        )
     )
-)
+
+
+def get_vector_db():
+    """
+    Get the application's vector store, creating it on first use.
+
+    One store is shared by the whole process, including the background
+    threads that have no app context.
+
+    Returns:
+        VectorDb: The store
+    """
+    global _vector_db
+    if _vector_db is None:
+        with _vector_db_lock:
+            if _vector_db is None:
+                _vector_db = create_default_vector_db()
+    return _vector_db
+
+
+def set_vector_db(vector_db):
+    """
+    Replace the application's vector store, e.g. with a local one in benchmarks.
+
+    Args:
+        vector_db (VectorDb|None): Store to use, or None to create the
+            default one again on next use
+    """
+    global _vector_db
+    with _vector_db_lock:
+        _vector_db = vector_db
+
+
+def __getattr__(name):
+    """
+    Resolve ``vector_db`` lazily.
+
+    Args:
+        name (str): Attribute name
+
+    Returns:
+        VectorDb: The application's vector store
+
+    Raises:
+        AttributeError: For any other name
+    """
+    if name == 'vector_db':
+        return get_vector_db()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 def init_db():
-    """Initialize SQLite database with required tables."""
-    with sqlite3.connect(db_path) as conn:
+    """Initialize SQLite database with required tables and apply migrations."""
+    from .connection import get_connection
+    from .migrations import apply_migrations
+    from .revisions import prune_changes
+
+    with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS folders (
@@ -63,4 +140,6 @@ def init_db():
                 FOREIGN KEY (task_id) REFERENCES tasks (id)
             )
         ''')
-        conn.commit() 
\ No newline at end of file
+        conn.commit()
+        apply_migrations(conn)
+        prune_changes(conn)
@@ -0,0 +1,465 @@
+"""
+Content-addressed embedding cache for Go Do List.
+
+Chunk vectors are stored in SQLite keyed by the embedding model and the
+SHA-256 of the chunk text, so identical text is only sent to the embedding
+API once per model. Whole files are also recorded by their SHA-256, per model
+and vector collection, so re-uploading a PDF that is already indexed (for
+example the same document attached to another task) skips reading and
+chunking it altogether.
+
+Both tables are trimmed to ``EMBEDDING_CACHE_MAX_ENTRIES`` rows, evicting the
+least recently used entries first.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+from agno.embedder.base import Embedder
+from .metrics import record_embedding
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+
+# Seconds between last_used_at updates for the same entry, so cache hits
+# do not turn every read into a write
+TOUCH_INTERVAL = 60
+
+# New entries written between eviction passes
+_EVICT_EVERY = 500
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_HASH_CHUNK = 900
+
+_FILE_READ_SIZE = 1024 * 1024
+
+
+def content_hash(text):
+    """
+    Hash chunk text.
+
+    Args:
+        text (str): Chunk text
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_hash(file_path):
+    """
+    Hash a file's contents without reading it into memory at once.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_FILE_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def point_id(text):
+    """
+    Compute the Qdrant point ID agno assigns to a chunk.
+
+    Args:
+        text (str): Chunk text
+
+    Returns:
+        str: Hex MD5 digest of the cleaned text
+    """
+    return hashlib.md5(text.replace('\x00', '\ufffd').encode()).hexdigest()
+
+
+def model_key(embedder):
+    """
+    Identify the model an embedder produces vectors with.
+
+    Args:
+        embedder (Embedder): Embedder to identify
+
+    Returns:
+        str: Key combining the embedder class, model ID and dimensions
+    """
+    return f"{type(embedder).__name__}:{getattr(embedder, 'id', '')}:{embedder.dimensions}"
+
+
+class CacheStats:
+    """
+    In-process cache counters, periodically added to the database totals.
+
+    Attributes:
+        table (str): Table holding the totals, keyed by ``model``
+        fields (tuple[str]): Counter columns
+    """
+
+    def __init__(self, table, fields):
+        """
+        Initialize zeroed counters.
+
+        Args:
+            table (str): Table holding the totals, keyed by ``model``
+            fields (tuple[str]): Counter columns
+        """
+        self.table = table
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def add(self, model, field, count=1):
+        """
+        Increment a counter.
+
+        Args:
+            model (str): Model key
+            field (str): One of ``fields``
+            count (int): Amount to add
+        """
+        with self._lock:
+            counters = self._pending.setdefault(model, dict.fromkeys(self.fields, 0))
+            counters[field] += count
+
+    def flush(self, conn):
+        """
+        Add pending counts to the totals stored in the database.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with conn:
+            conn.executemany(
+                f'''INSERT INTO {self.table} (model, {', '.join(self.fields)})
+                    VALUES (?, {', '.join('?' * len(self.fields))})
+                    ON CONFLICT (model) DO UPDATE SET
+                        {', '.join(f'{field} = {field} + excluded.{field}' for field in self.fields)}''',
+                [(model, *(counters[field] for field in self.fields)) for model, counters in pending.items()]
+            )
+
+
+# Chunk hits and misses, and whole files skipped with their chunks
+stats = CacheStats('embedding_cache_stats', ('hits', 'misses', 'file_hits', 'chunks_skipped'))
+
+
+def cache_stats(conn):
+    """
+    Report cache effectiveness per model.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        list[dict]: Counters, ``hit_rate`` over chunk lookups, ``calls_saved``
+            and number of cached ``entries`` for each model
+    """
+    stats.flush(conn)
+    rows = conn.execute(
+        '''SELECT s.model, s.hits, s.misses, s.file_hits, s.chunks_skipped,
+                  (SELECT COUNT(*) FROM embedding_cache c WHERE c.model = s.model) AS entries
+           FROM embedding_cache_stats s ORDER BY s.model'''
+    ).fetchall()
+    report = []
+    for row in rows:
+        lookups = row['hits'] + row['misses']
+        report.append({
+            **dict(row),
+            'hit_rate': row['hits'] / lookups if lookups else None,
+            'calls_saved': row['hits'] + row['chunks_skipped']
+        })
+    return report
+
+
+def evict(conn, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+    """
+    Trim the cache tables to their least recently used ``max_entries`` rows.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        max_entries (int): Rows to keep in each table
+
+    Returns:
+        int: Number of rows deleted
+    """
+    deleted = 0
+    with conn:
+        for table in ('embedding_cache', 'embedded_files'):
+            cursor = conn.execute(
+                f'''DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )''',
+                (max_entries,)
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def _pack(vector):
+    """
+    Serialize a vector as float32.
+
+    Args:
+        vector (list[float]): Embedding
+
+    Returns:
+        bytes: Packed vector
+    """
+    return array('f', vector).tobytes()
+
+
+def _unpack(blob):
+    """
+    Deserialize a packed vector.
+
+    Args:
+        blob (bytes): Packed vector
+
+    Returns:
+        list[float]: Embedding
+    """
+    vector = array('f')
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+@dataclass
+class CachedEmbedder(Embedder):
+    """
+    Embedder that serves repeated texts from the SQLite cache.
+
+    Attributes:
+        embedder (Embedder): Embedder called on cache misses
+        max_entries (int): Cache size before least recently used entries are evicted
+    """
+
+    embedder: Optional[Embedder] = None
+    max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES
+
+    def __post_init__(self):
+        """Adopt the wrapped embedder's dimensions."""
+        self.dimensions = self.embedder.dimensions
+        self._writes = 0
+
+    @property
+    def model(self):
+        """str: Cache key of the wrapped embedder's model."""
+        return model_key(self.embedder)
+
+    def get_embedding(self, text):
+        """
+        Embed text, using the cache when possible.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list[float]: Embedding
+        """
+        return self.get_embedding_and_usage(text)[0]
+
+    def get_embedding_and_usage(self, text):
+        """
+        Embed text, using the cache when possible.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            tuple: Embedding and token usage (None for cache hits)
+        """
+        from .connection import get_connection
+
+        model = self.model
+        digest = content_hash(text)
+        conn = get_connection()
+        now = time.time()
+        row = conn.execute(
+            'SELECT vector, last_used_at FROM embedding_cache WHERE model = ? AND content_hash = ?',
+            (model, digest)
+        ).fetchone()
+        if row:
+            stats.add(model, 'hits')
+            if now - row['last_used_at'] > TOUCH_INTERVAL:
+                with conn:
+                    conn.execute(
+                        'UPDATE embedding_cache SET last_used_at = ? WHERE model = ? AND content_hash = ?',
+                        (now, model, digest)
+                    )
+            return _unpack(row['vector']), None
+
+        embedding, usage = self.embedder.get_embedding_and_usage(text)
+        record_embedding(getattr(self.embedder, 'id', type(self.embedder).__name__), 1, usage)
+        stats.add(model, 'misses')
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO embedding_cache
+                       (model, content_hash, vector, dimensions, point_id, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (model, digest, _pack(embedding), len(embedding), point_id(text), now)
+            )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            evict(conn, self.max_entries)
+        return embedding, usage
+
+    async def async_get_embedding(self, text):
+        """
+        Embed text from async code, using the cache when possible.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list[float]: Embedding
+        """
+        return (await self.async_get_embedding_and_usage(text))[0]
+
+    async def async_get_embedding_and_usage(self, text):
+        """
+        Embed text from async code, using the cache when possible.
+
+        The cache is read and written on the database executor, and misses
+        are embedded with the shared async OpenAI client (see async_clients).
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            tuple: Embedding and token usage (None for cache hits)
+        """
+        from .async_clients import embed
+        from .connection import run_in_db
+
+        cached = await run_in_db(self.lookup_many, [text])
+        if cached:
+            return cached[0], None
+        embedding, usage = await embed(self.embedder, text)
+        record_embedding(getattr(self.embedder, 'id', type(self.embedder).__name__), 1, usage)
+        await run_in_db(self.store_many, [text], [embedding])
+        return embedding, usage
+
+    def lookup_many(self, texts):
+        """
+        Look up cached vectors for several texts at once.
+
+        Args:
+            texts (list[str]): Texts to look up
+
+        Returns:
+            dict: Index into ``texts`` -> vector, for the texts that are cached
+        """
+        from .connection import get_connection
+
+        model = self.model
+        conn = get_connection()
+        digests = [content_hash(text) for text in texts]
+        found = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), _HASH_CHUNK):
+            chunk = unique[start:start + _HASH_CHUNK]
+            rows = conn.execute(
+                f'''SELECT content_hash, vector FROM embedding_cache
+                    WHERE model = ? AND content_hash IN ({', '.join('?' * len(chunk))})''',
+                (model, *chunk)
+            )
+            for row in rows:
+                found[row['content_hash']] = _unpack(row['vector'])
+        if found:
+            with conn:
+                conn.executemany(
+                    'UPDATE embedding_cache SET last_used_at = ? WHERE model = ? AND content_hash = ?',
+                    [(time.time(), model, digest) for digest in found]
+                )
+        vectors = {index: found[digest] for index, digest in enumerate(digests) if digest in found}
+        stats.add(model, 'hits', len(vectors))
+        return vectors
+
+    def store_many(self, texts, vectors):
+        """
+        Cache vectors computed outside this embedder.
+
+        Args:
+            texts (list[str]): Embedded texts
+            vectors (list[list[float]]): Their vectors, in the same order
+        """
+        from .connection import get_connection
+
+        if not texts:
+            return
+        model = self.model
+        conn = get_connection()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                '''INSERT OR REPLACE INTO embedding_cache
+                       (model, content_hash, vector, dimensions, point_id, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                [
+                    (model, content_hash(text), _pack(vector), len(vector), point_id(text), now)
+                    for text, vector in zip(texts, vectors)
+                ]
+            )
+        stats.add(model, 'misses', len(texts))
+        previous = self._writes
+        self._writes += len(texts)
+        if self._writes // _EVICT_EVERY != previous // _EVICT_EVERY:
+            evict(conn, self.max_entries)
+
+    def lookup_file(self, conn, collection, digest):
+        """
+        Check whether a file is already indexed in a collection with this model.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            collection (str): Vector collection name
+            digest (str): File SHA-256
+
+        Returns:
+            bool: True if the file can be skipped
+        """
+        model = self.model
+        row = conn.execute(
+            '''SELECT chunk_count FROM embedded_files
+               WHERE model = ? AND collection = ? AND content_hash = ?''',
+            (model, collection, digest)
+        ).fetchone()
+        if not row:
+            return False
+        with conn:
+            conn.execute(
+                '''UPDATE embedded_files SET last_used_at = ?
+                   WHERE model = ? AND collection = ? AND content_hash = ?''',
+                (time.time(), model, collection, digest)
+            )
+        stats.add(model, 'file_hits')
+        stats.add(model, 'chunks_skipped', row['chunk_count'])
+        return True
+
+    def record_file(self, conn, collection, digest, chunk_count):
+        """
+        Remember that a file has been fully indexed.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            collection (str): Vector collection name
+            digest (str): File SHA-256
+            chunk_count (int): Number of chunks indexed
+        """
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO embedded_files
+                       (model, collection, content_hash, chunk_count, last_used_at)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (self.model, collection, digest, chunk_count, time.time())
+            )
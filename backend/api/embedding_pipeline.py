@@ -0,0 +1,414 @@
+"""
+Batched, concurrent embedding for document ingestion.
+
+agno embeds and upserts documents one at a time, so ingestion throughput is
+bounded by the latency of a single embedding call. This pipeline instead:
+
+* packs chunks into requests of up to ``EMBED_BATCH_TOKENS`` estimated tokens
+  (and ``EMBED_BATCH_SIZE`` inputs),
+* runs up to ``EMBED_CONCURRENCY`` requests at once on a thread pool,
+* keeps within ``EMBED_TPM`` tokens and ``EMBED_RPM`` requests per minute,
+  slowing down when the API answers 429 and recovering gradually afterwards,
+* and upserts the embedded chunks to the vector store ``UPSERT_BATCH_SIZE``
+  points at a time, tagged with the documents they belong to.
+
+Chunks already in the embedding cache are never sent to the API.
+"""
+
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from agno.embedder.openai import OpenAIEmbedder
+from .embedding_cache import CachedEmbedder, point_id
+from .metrics import record_embedding, span
+from .vector_store import merge_tags
+
+EMBED_BATCH_TOKENS = int(os.getenv('EMBED_BATCH_TOKENS', '100000'))
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '256'))
+EMBED_CONCURRENCY = int(os.getenv('EMBED_CONCURRENCY', '4'))
+EMBED_TPM = int(os.getenv('EMBED_TPM', '1000000'))
+EMBED_RPM = int(os.getenv('EMBED_RPM', '3000'))
+EMBED_MAX_RETRIES = int(os.getenv('EMBED_MAX_RETRIES', '6'))
+UPSERT_BATCH_SIZE = int(os.getenv('UPSERT_BATCH_SIZE', '512'))
+
+# Rough characters per token for English text; errs towards overestimating
+CHARS_PER_TOKEN = 3
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a batch is still rate limited after every retry."""
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text without a tokenizer.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count, at least 1
+    """
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def pack_batches(texts, max_tokens=EMBED_BATCH_TOKENS, max_size=EMBED_BATCH_SIZE):
+    """
+    Group texts into request-sized batches, preserving order.
+
+    A single text larger than ``max_tokens`` gets a batch of its own.
+
+    Args:
+        texts (list[str]): Texts to embed
+        max_tokens (int): Estimated token budget per batch
+        max_size (int): Maximum number of texts per batch
+
+    Returns:
+        list[tuple[list[int], int]]: Indexes into ``texts`` and estimated
+            tokens for each batch
+    """
+    batches = []
+    indexes, tokens = [], 0
+    for index, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if indexes and (tokens + cost > max_tokens or len(indexes) >= max_size):
+            batches.append((indexes, tokens))
+            indexes, tokens = [], 0
+        indexes.append(index)
+        tokens += cost
+    if indexes:
+        batches.append((indexes, tokens))
+    return batches
+
+
+def _retry_after(error):
+    """
+    Read the delay an API asked for in a rate limit error.
+
+    Args:
+        error (Exception): Error raised by the embedder
+
+    Returns:
+        float|None: Seconds to wait, or None if the error is not a 429
+    """
+    if getattr(error, 'status_code', None) != 429:
+        return None
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, with adaptive slowdown.
+
+    Each 429 halves the rate actually used and pauses every caller; each
+    successful request restores a little of it, up to the configured limits.
+
+    Attributes:
+        tpm (int): Configured tokens per minute
+        rpm (int): Configured requests per minute
+        factor (float): Fraction of the configured rate currently in use
+    """
+
+    MIN_FACTOR = 0.05
+    RECOVERY = 1.05
+
+    def __init__(self, tpm=EMBED_TPM, rpm=EMBED_RPM):
+        """
+        Initialize full buckets.
+
+        Args:
+            tpm (int): Tokens per minute
+            rpm (int): Requests per minute
+        """
+        self.tpm = tpm
+        self.rpm = rpm
+        self.factor = 1.0
+        self._tokens = float(tpm)
+        self._requests = float(rpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """
+        Add the allowance accrued since the last update.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm * self.factor / 60)
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm * self.factor / 60)
+
+    def acquire(self, tokens):
+        """
+        Block until a request of ``tokens`` tokens may be sent.
+
+        Args:
+            tokens (int): Estimated tokens in the request
+        """
+        # A request larger than the whole bucket waits for a full bucket
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens and self._requests >= 1:
+                    self._tokens -= tokens
+                    self._requests -= 1
+                    return
+                rate = self.factor / 60
+                wait = max(
+                    self._paused_until - now,
+                    (tokens - self._tokens) / (self.tpm * rate),
+                    (1 - self._requests) / (self.rpm * rate),
+                    0.001
+                )
+            time.sleep(wait)
+
+    def success(self):
+        """Recover part of the rate after a successful request."""
+        with self._lock:
+            self.factor = min(1.0, self.factor * self.RECOVERY)
+
+    def throttled(self, delay):
+        """
+        Slow down after a 429.
+
+        Args:
+            delay (float): Seconds every caller should pause
+        """
+        with self._lock:
+            self.factor = max(self.MIN_FACTOR, self.factor / 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+
+def embed_batch(embedder, texts):
+    """
+    Embed several texts with as few API calls as the embedder allows.
+
+    OpenAI embedders send every text in one request; other embedders fall
+    back to one call per text.
+
+    Args:
+        embedder (Embedder): Embedder to use
+        texts (list[str]): Texts to embed
+
+    Returns:
+        list[list[float]]: One vector per text, in order
+    """
+    model = getattr(embedder, 'id', type(embedder).__name__)
+    if isinstance(embedder, OpenAIEmbedder):
+        response = embedder.response(text=texts)
+        record_embedding(model, len(texts), response.usage)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    vectors = []
+    for text in texts:
+        vector, usage = embedder.get_embedding_and_usage(text)
+        record_embedding(model, 1, usage)
+        vectors.append(vector)
+    return vectors
+
+
+class EmbeddingPipeline:
+    """
+    Embeds and indexes documents in concurrent, rate-limited batches.
+
+    Attributes:
+        embedder (Embedder): Embedder; a CachedEmbedder is consulted before
+            calling the embedder it wraps
+        concurrency (int): Maximum requests in flight
+        limiter (RateLimiter): Shared rate limiter
+        max_tokens (int): Estimated token budget per request
+        max_size (int): Maximum texts per request
+        max_retries (int): Attempts per batch before giving up on 429s
+    """
+
+    def __init__(self, embedder, concurrency=EMBED_CONCURRENCY, limiter=None,
+                 max_tokens=EMBED_BATCH_TOKENS, max_size=EMBED_BATCH_SIZE, max_retries=EMBED_MAX_RETRIES):
+        """
+        Initialize the pipeline.
+
+        Args:
+            embedder (Embedder): Embedder to use
+            concurrency (int): Maximum requests in flight
+            limiter (RateLimiter, optional): Limiter to share with other
+                pipelines, defaults to the process-wide one
+            max_tokens (int): Estimated token budget per request
+            max_size (int): Maximum texts per request
+            max_retries (int): Attempts per batch before giving up on 429s
+        """
+        self.embedder = embedder
+        self.concurrency = concurrency
+        self.limiter = limiter or default_limiter
+        self.max_tokens = max_tokens
+        self.max_size = max_size
+        self.max_retries = max_retries
+
+    def _embed_with_retry(self, embedder, texts, tokens):
+        """
+        Send one batch, backing off while the API is rate limiting us.
+
+        Args:
+            embedder (Embedder): Embedder that calls the API
+            texts (list[str]): Texts in the batch
+            tokens (int): Estimated tokens in the batch
+
+        Returns:
+            list[list[float]]: One vector per text
+
+        Raises:
+            RateLimitExceeded: If every attempt was rate limited
+        """
+        for attempt in range(self.max_retries):
+            self.limiter.acquire(tokens)
+            try:
+                vectors = embed_batch(embedder, texts)
+            except Exception as e:
+                delay = _retry_after(e)
+                if delay is None:
+                    raise
+                self.limiter.throttled(delay or random.uniform(0, min(60, 2 ** attempt)))
+                continue
+            self.limiter.success()
+            return vectors
+        raise RateLimitExceeded(f'Embedding batch of {len(texts)} texts was rate limited {self.max_retries} times')
+
+    def embed(self, texts):
+        """
+        Embed texts, reusing cached vectors where possible.
+
+        Args:
+            texts (list[str]): Texts to embed
+
+        Returns:
+            list[list[float]]: One vector per text, in order
+        """
+        vectors = [None] * len(texts)
+        embedder = self.embedder
+        if isinstance(embedder, CachedEmbedder):
+            for index, vector in embedder.lookup_many(texts).items():
+                vectors[index] = vector
+            embedder = embedder.embedder
+
+        # Repeated texts (headers, boilerplate) are only sent once
+        missing = list(dict.fromkeys(texts[index] for index, vector in enumerate(vectors) if vector is None))
+        computed = {}
+        batches = pack_batches(missing, self.max_tokens, self.max_size)
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                futures = [
+                    (positions, executor.submit(
+                        self._embed_with_retry, embedder, [missing[p] for p in positions], tokens
+                    ))
+                    for positions, tokens in batches
+                ]
+                for positions, future in futures:
+                    for position, vector in zip(positions, future.result()):
+                        computed[missing[position]] = vector
+
+            if isinstance(self.embedder, CachedEmbedder):
+                self.embedder.store_many(missing, [computed[text] for text in missing])
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+    def embed_documents(self, documents):
+        """
+        Set the embedding of each document.
+
+        Args:
+            documents (list[Document]): Documents to embed
+        """
+        vectors = self.embed([document.content for document in documents])
+        for document, vector in zip(documents, vectors):
+            document.embedding = vector
+
+    def index(self, vector_db, documents, batch_size=UPSERT_BATCH_SIZE, tags=None):
+        """
+        Embed documents and upsert them into a vector store.
+
+        Documents may be a generator: they are consumed in windows large
+        enough to keep every concurrent request busy, and each window is
+        embedded and upserted before the next is read, so indexing starts
+        before the producer has finished.
+
+        Points use the same IDs and payload as agno's own insert, plus the
+        chunk's ``content_hash`` and the document tags, merged with those of
+        any existing point for the same content.
+
+        Args:
+            vector_db (TaskQdrant|LocalVectorDb): Vector store to write to
+            documents (Iterable[Document]): Documents to index
+            batch_size (int): Points per upsert request
+            tags (dict, optional): ``file_hashes``, ``task_ids`` and
+                ``file_ids`` value of the document being indexed
+
+        Returns:
+            int: Number of documents indexed
+        """
+        window_size = max(batch_size, self.max_size * self.concurrency)
+        count = 0
+        window = []
+        # Includes reading the documents, which for PDFs is parsing them
+        with span('embedding_pipeline.index'):
+            for document in documents:
+                window.append(document)
+                if len(window) >= window_size:
+                    count += self._index_window(vector_db, window, batch_size, tags)
+                    window = []
+            if window:
+                count += self._index_window(vector_db, window, batch_size, tags)
+        return count
+
+    def _index_window(self, vector_db, documents, batch_size, tags):
+        """
+        Embed and upsert one window of documents.
+
+        Tags are merged with a read-modify-write of the existing payloads, so
+        two files sharing a chunk and indexed at the same instant may lose one
+        tag; ``flask vectors backfill-tags`` restores it.
+
+        Args:
+            vector_db (TaskQdrant|LocalVectorDb): Vector store to write to
+            documents (list[Document]): Documents to index
+            batch_size (int): Points per upsert request
+            tags (dict|None): Document tags to merge into each point
+
+        Returns:
+            int: Number of documents indexed
+        """
+        if not vector_db.exists():
+            vector_db.create()
+        with span('embedding_pipeline.embed'):
+            self.embed_documents(documents)
+        ids = [point_id(document.content) for document in documents]
+        existing = vector_db.get_payloads(list(dict.fromkeys(ids))) if tags else {}
+        points = {}
+        for id_, document in zip(ids, documents):
+            payload = {
+                'name': document.name,
+                'meta_data': document.meta_data,
+                'content': document.content.replace('\x00', '\ufffd'),
+                'usage': document.usage,
+                'content_hash': hashlib.sha256(document.content.encode('utf-8')).hexdigest()
+            }
+            if tags:
+                payload.update(merge_tags(existing.get(id_), tags))
+            points[id_] = (id_, document.embedding, payload)
+        points = list(points.values())
+        with span('vector_db.upsert'):
+            for start in range(0, len(points), batch_size):
+                vector_db.upsert_points(points[start:start + batch_size])
+        return len(documents)
+
+
+default_limiter = RateLimiter()
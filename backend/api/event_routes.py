@@ -0,0 +1,70 @@
+"""
+Server-sent events route for Go Do List.
+"""
+
+import os
+from flask import Blueprint, Response, request, stream_with_context
+from .connection import get_connection, release_connection
+from .events import broker, format_event
+from .revisions import changes_since, current_revision
+
+event_bp = Blueprint('events', __name__)
+
+HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+
+@event_bp.route('/events', methods=['GET'])
+def stream_events():
+    """
+    Stream task, folder and file changes as server-sent events.
+    
+    Each ``change`` event carries the same payload as an entry of
+    ``GET /changes`` and uses its revision as the event ID, so a reconnecting
+    browser resumes through the Last-Event-ID header. A ``resync`` event tells
+    the client it missed changes and should catch up through ``GET /changes``.
+    
+    Every open stream holds a worker thread; serve this route with a
+    threaded or async worker class when many clients are connected.
+    
+    Returns:
+        Response: Streaming ``text/event-stream`` response
+    """
+    subscription = broker.subscribe()
+    last_event_id = request.headers.get('Last-Event-ID')
+
+    # Send anything the client missed while disconnected before going live
+    backlog = []
+    with get_connection() as conn:
+        if last_event_id and last_event_id.isdigit():
+            result = changes_since(conn, int(last_event_id))
+            if result is None or result['has_more']:
+                backlog.append({'event': 'resync', 'id': None, 'data': {}})
+            else:
+                backlog.extend(
+                    {'event': 'change', 'id': change['revision'], 'data': change}
+                    for change in result['changes']
+                )
+        revision = current_revision(conn)
+        broker.prime(revision)
+        backlog.append({'event': 'hello', 'id': None, 'data': {'revision': revision}})
+    # Do not hold a pooled connection for the lifetime of the stream
+    release_connection()
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            for event in backlog:
+                yield format_event(event)
+            while True:
+                event = subscription.get(HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,250 @@
+"""
+In-process publish/subscribe for pushing changes to clients.
+
+Writes to tasks, folders and files are recorded in the change log by
+triggers. After a write request commits, its blueprint calls
+publish_changes(), which wakes a single tailer thread that reads the new
+change log entries and fans them out to every subscriber. Because the tailer
+reads the shared database, it also picks up (on its next poll) writes made by
+other worker processes.
+
+Each subscriber has a bounded queue. A subscriber that falls behind has its
+backlog dropped and receives a single ``resync`` event instead, so one slow
+client can never hold memory or block publishing for the others.
+"""
+
+import json
+import os
+import queue
+import threading
+from flask import request
+from .connection import open_connection
+from .revisions import changes_since, current_revision
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '256'))
+POLL_INTERVAL = float(os.getenv('SSE_POLL_INTERVAL', '1.0'))
+
+# Change log rows read per tailer pass
+_TAIL_BATCH = 500
+
+
+class Subscription:
+    """
+    A single subscriber's bounded event queue.
+
+    Attributes:
+        queue (queue.Queue): Pending events, at most ``maxsize`` of them
+        dropped (int): Number of events discarded because the queue was full
+    """
+
+    def __init__(self, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        """
+        Initialize an empty subscription.
+
+        Args:
+            maxsize (int): Maximum number of pending events
+        """
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event):
+        """
+        Queue an event without blocking the publisher.
+
+        When the queue is full the backlog is discarded and replaced with a
+        ``resync`` event telling the client to catch up through GET /changes.
+
+        Args:
+            event (dict): Event with ``event``, ``id`` and ``data`` keys
+        """
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            self.queue.put_nowait({'event': 'resync', 'id': None, 'data': {}})
+
+    def get(self, timeout):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float): Seconds to wait
+
+        Returns:
+            dict|None: Next event, or None if the wait timed out
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """
+    Fans change log entries out to subscribers.
+
+    Attributes:
+        poll_interval (float): Seconds between change log polls when idle
+        revision (int|None): Last revision published, None before the first poll
+    """
+
+    def __init__(self, connect=None, poll_interval=POLL_INTERVAL):
+        """
+        Initialize the broker.
+
+        Args:
+            connect (Callable, optional): Returns the connection the tailer
+                thread reads the change log with
+            poll_interval (float): Seconds between change log polls when idle
+        """
+        self.poll_interval = poll_interval
+        self.revision = None
+        self._connect = connect
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self):
+        """
+        Register a new subscriber and make sure the tailer is running.
+
+        Returns:
+            Subscription: The subscriber's queue
+        """
+        subscription = Subscription()
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-tailer', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscriber.
+
+        Args:
+            subscription (Subscription): Subscription returned by subscribe()
+        """
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        """int: Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def prime(self, revision):
+        """
+        Make sure changes after a revision a new subscriber has seen are published.
+
+        Moving the revision back may publish a few changes twice; clients
+        apply them as idempotent upserts and deletes.
+
+        Args:
+            revision (int): Revision the subscriber was told is current
+        """
+        with self._lock:
+            if self.revision is None or revision < self.revision:
+                self.revision = revision
+
+    def broadcast(self, event):
+        """
+        Offer an event to every subscriber.
+
+        Args:
+            event (dict): Event with ``event``, ``id`` and ``data`` keys
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def notify(self):
+        """Wake the tailer so new changes are published immediately."""
+        self._wake.set()
+
+    def poll(self, conn):
+        """
+        Publish every change made since the last poll.
+
+        Args:
+            conn (sqlite3.Connection): Connection to read the change log with
+        """
+        with self._lock:
+            if self.revision is None:
+                self.revision = current_revision(conn)
+                return
+        while True:
+            result = changes_since(conn, self.revision, _TAIL_BATCH)
+            if result is None:
+                # Log was pruned or reset underneath us
+                self.revision = current_revision(conn)
+                self.broadcast({'event': 'resync', 'id': None, 'data': {}})
+                return
+            for change in result['changes']:
+                self.broadcast({'event': 'change', 'id': change['revision'], 'data': change})
+            self.revision = result['revision']
+            if not result['has_more']:
+                return
+
+    def _run(self):
+        """Tail the change log while anyone is subscribed."""
+        conn = self._connect()
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        self.revision = None
+                        return
+                try:
+                    self.poll(conn)
+                except Exception as e:
+                    print(f"Error publishing changes: {str(e)}")
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            conn.close()
+
+
+def format_event(event):
+    """
+    Serialize an event in the text/event-stream format.
+
+    Args:
+        event (dict): Event with ``event``, ``id`` and ``data`` keys
+
+    Returns:
+        str: SSE frame
+    """
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+broker = EventBroker(connect=open_connection)
+
+
+def publish_changes(response):
+    """
+    Blueprint ``after_request`` hook publishing committed writes.
+
+    Args:
+        response (Response): Outgoing response
+
+    Returns:
+        Response: The same response
+    """
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        broker.notify()
+    return response
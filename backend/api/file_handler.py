@@ -2,10 +2,12 @@
 File handling and processing for Go Do List.
 """
 
-from agno.knowledge.pdf import PDFKnowledgeBase, PDFReader
-from agno.document.chunking.document import DocumentChunking
-from .database import vector_db, db_path
-import sqlite3
+from . import database
+from .connection import get_connection
+from .embedding_cache import CachedEmbedder, file_hash, stats
+from .metrics import timed
+from .text_index import has_chunks, recording
+from .vector_store import tag_points
 
 # Configuration
 ALLOWED_EXTENSIONS = {'pdf'}
@@ -22,13 +24,29 @@ def allowed_file(filename):
     """
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def process_file(file_path, task_id):
+@timed('process_file')
+def process_file(file_path, task_id, vector_db=None, file_id=None):
     """
-    Process PDF file using Agno's PDFKnowledgeBase.
+    Extract, chunk, embed and index a PDF file.
+    
+    Chunks match Agno's PDFReader with DocumentChunking(1000, 200); pages
+    are extracted in parallel and embedded while later pages are still being
+    read.
+    
+    Files whose contents were already indexed into the same collection with
+    the same embedding model are skipped, and their chunks are only tagged
+    with this task and file; chunk vectors come from the embedding cache when
+    the vector store uses a CachedEmbedder. Chunk text is added to the
+    full-text index (see text_index).
     
     Args:
         file_path (str): Path to the PDF file
         task_id (int): ID of the associated task
+        vector_db (VectorDb, optional): Vector store to load into, defaults to
+            the application's Qdrant collection
+        file_id (int, optional): ID of the file's ``task_files`` row; without
+            it the row is looked up by path, which is ambiguous when the
+            same content was uploaded to the task twice
         
     Returns:
         str: Embedding ID for the processed file
@@ -36,33 +54,52 @@ def process_file(file_path, task_id):
     Raises:
         Exception: If file processing fails
     """
+    # The PDF and embedding stack is only loaded by processes that ingest
+    from .embedding_pipeline import EmbeddingPipeline
+    from .pdf_extraction import iter_chunks
+
     try:
-        # Check if the file has already been processed
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT embedding_id FROM task_files 
-                WHERE file_path = ? AND embedding_id IS NOT NULL
-            ''', (file_path,))
-            result = cursor.fetchone()
-            
-            if result:
-                # File has already been processed, return existing embedding_id
-                return result[0]
+        vector_db = vector_db or database.get_vector_db()
+        embedder = vector_db.embedder if isinstance(vector_db.embedder, CachedEmbedder) else None
 
-        # Create a knowledge base for the file
-        knowledge_base = PDFKnowledgeBase(
-            path=file_path,
-            vector_db=vector_db,
-            reader=PDFReader(),
-            chunking_strategy=DocumentChunking(
-                chunk_size=1000,
-                overlap=200
+        # Check if identical content has already been processed
+        with get_connection() as conn:
+            if file_id is not None:
+                row = conn.execute('SELECT id, content_hash FROM task_files WHERE id = ?', (file_id,)).fetchone()
+            else:
+                row = conn.execute(
+                    'SELECT id, content_hash FROM task_files WHERE file_path = ? AND task_id = ?', (file_path, task_id)
+                ).fetchone()
+            # Uploads record their hash as they are stored; older files are hashed here
+            digest = row['content_hash'] if row and row['content_hash'] else file_hash(file_path)
+            conn.execute(
+                'UPDATE task_files SET content_hash = ? WHERE file_path = ? AND content_hash IS NULL',
+                (digest, file_path)
             )
+            conn.commit()
+            tags = {'file_hashes': digest, 'task_ids': task_id}
+            if row:
+                tags['file_ids'] = row['id']
+            # Points indexed before they were tagged are indexed again, from cached vectors
+            if (embedder and embedder.lookup_file(conn, vector_db.collection, digest)
+                    and tag_points(vector_db, 'file_hashes', digest, tags)):
+                stats.flush(conn)
+                if not has_chunks(conn, digest):
+                    # Indexed before full-text search existed
+                    for _chunk in recording(digest, iter_chunks(file_path)):
+                        pass
+                return str(task_id)
+
+        # Embed chunks in concurrent batches as pages are extracted, upserting them in bulk
+        # and adding them to the full-text index on the way
+        chunk_count = EmbeddingPipeline(vector_db.embedder).index(
+            vector_db, recording(digest, iter_chunks(file_path)), tags=tags
         )
         
-        # Load the document into the knowledge base without recreating the collection
-        knowledge_base.load(recreate=False, upsert=True)
+        with get_connection() as conn:
+            if embedder:
+                embedder.record_file(conn, vector_db.collection, digest, chunk_count)
+            stats.flush(conn)
         
         # Return the task_id as embedding_id for consistency
         return str(task_id)
@@ -2,25 +2,36 @@
 File upload and download routes for Go Do List.
 """
 
-import sqlite3
-import os
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-from .database import db_path, UPLOAD_FOLDER
-from .file_handler import allowed_file, process_file
+from .connection import get_connection
+from .events import publish_changes
+from .revisions import is_not_modified, not_modified_response, revision_etag, tag_response
+from .embedding_cache import cache_stats
+from .file_handler import allowed_file
+from .file_serving import serve_file
+from .vector_gc import delete_file as delete_file_rows, release_files
+from . import database, ingest_queue, upload_store
 
 file_bp = Blueprint('files', __name__)
+file_bp.after_request(publish_changes)
 
 @file_bp.route('/tasks/<int:task_id>/files', methods=['POST'])
 def upload_file(task_id):
     """
-    Upload a file for a task.
+    Upload a file for a task and queue it for ingestion.
+    
+    The file is streamed to content-addressed storage; a file whose contents
+    are already stored is shared rather than written again. It is embedded
+    in the background; poll GET /files/<id>/status or watch the file's
+    change events to see when it is ready. Large files are better sent with
+    the resumable protocol starting at POST /tasks/<id>/uploads.
     
     Args:
         task_id (int): ID of the task to attach file to
         
     Returns:
-        Response: JSON response with file data
+        Response: JSON response with file data and 202 status code
     """
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -33,54 +44,161 @@ def upload_file(task_id):
         return jsonify({'error': 'File type not allowed'}), 400
         
     try:
-        # Verify task exists
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id FROM tasks WHERE id = ?', (task_id,))
-            if not cursor.fetchone():
-                return jsonify({'error': 'Task not found'}), 404
+        with get_connection() as conn:
+            result = upload_store.store_upload(conn, task_id, secure_filename(file.filename), file.stream)
+        ingest_queue.worker.notify()
+        return jsonify(result), 202
+    except upload_store.UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            # Generate unique filename to prevent conflicts
-            base_filename = secure_filename(file.filename)
-            filename = f"{task_id}_{base_filename}"
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            
-            # Check if file already exists for this task
-            cursor.execute(
-                'SELECT id FROM task_files WHERE task_id = ? AND filename = ?',
-                (task_id, base_filename)
-            )
-            if cursor.fetchone():
-                return jsonify({'error': 'File already exists for this task'}), 400
+def _upload_error(e):
+    """
+    Turn an upload error into a response telling the client where to resume.
+    
+    Args:
+        e (UploadError): Error to report
+        
+    Returns:
+        tuple: JSON response and status code
+    """
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    response = jsonify(body)
+    if e.offset is not None:
+        response.headers['Upload-Offset'] = str(e.offset)
+    return response, e.status
 
-            file.save(file_path)
-            
-            cursor.execute(
-                '''INSERT INTO task_files (task_id, filename, file_path) 
-                   VALUES (?, ?, ?)''',
-                (task_id, base_filename, file_path)
-            )
-            file_id = cursor.lastrowid
-            conn.commit()
-            
-            # Process the file
-            embedding_id = process_file(file_path, task_id)
-            
-            # Update the file record with the embedding_id
-            cursor.execute(
-                'UPDATE task_files SET embedding_id = ? WHERE id = ?',
-                (embedding_id, file_id)
-            )
-            conn.commit()
-            
-            return jsonify({
-                'id': file_id,
-                'task_id': task_id,
-                'filename': base_filename,
-                'file_path': file_path,
-                'embedding_id': embedding_id
-            }), 201
-            
+@file_bp.route('/tasks/<int:task_id>/uploads', methods=['POST'])
+def create_upload(task_id):
+    """
+    Start a resumable upload of a file for a task.
+    
+    Expects JSON with ``filename`` and ``size`` in bytes. Send the file with
+    PUT /uploads/<upload_id> in chunks of up to ``chunk_size`` bytes, each
+    at the ``offset`` the server reports, then POST
+    /uploads/<upload_id>/complete. After a dropped connection,
+    GET /uploads/<upload_id> tells where to resume.
+    
+    Args:
+        task_id (int): ID of the task to attach the file to
+        
+    Returns:
+        Response: JSON response with the upload session and 201 status code
+    """
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(str(data.get('filename') or ''))
+    if not filename:
+        return jsonify({'error': 'filename is required'}), 400
+    if not allowed_file(filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    size = data.get('size')
+    if not isinstance(size, int) or isinstance(size, bool):
+        return jsonify({'error': 'size must be an integer'}), 400
+        
+    try:
+        with get_connection() as conn:
+            session = upload_store.create_session(conn, task_id, filename, size)
+            return jsonify(upload_store.session_to_dict(session)), 201
+    except upload_store.UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@file_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """
+    Get a resumable upload's progress.
+    
+    Args:
+        upload_id (str): ID of the upload session
+        
+    Returns:
+        Response: JSON response with the session, whose ``offset`` is where
+            the next chunk starts
+    """
+    try:
+        with get_connection() as conn:
+            session = upload_store.get_session(conn, upload_id)
+            response = jsonify(upload_store.session_to_dict(session))
+            response.headers['Upload-Offset'] = str(session['received'])
+            return response
+    except upload_store.UploadError as e:
+        return _upload_error(e)
+
+@file_bp.route('/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """
+    Write a chunk of a resumable upload.
+    
+    The raw request body is the chunk, and its position in the file is
+    given by the ``Upload-Offset`` header or the ``offset`` query parameter.
+    It is streamed to disk rather than buffered. A chunk at the wrong offset
+    is rejected with 409, and an interrupted one keeps the bytes that
+    arrived; both responses carry the offset to continue from.
+    
+    Args:
+        upload_id (str): ID of the upload session
+        
+    Returns:
+        Response: JSON response with the session
+    """
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset header or offset parameter must be an integer'}), 400
+        
+    try:
+        with get_connection() as conn:
+            session = upload_store.write_chunk(conn, upload_id, offset, request.stream, request.content_length)
+            response = jsonify(upload_store.session_to_dict(session))
+            response.headers['Upload-Offset'] = str(session['received'])
+            return response
+    except upload_store.UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@file_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """
+    Finish a resumable upload and queue the file for ingestion.
+    
+    Args:
+        upload_id (str): ID of the upload session
+        
+    Returns:
+        Response: JSON response with file data and 202 status code
+    """
+    try:
+        with get_connection() as conn:
+            result = upload_store.finalize(conn, upload_id)
+        ingest_queue.worker.notify()
+        return jsonify(result), 202
+    except upload_store.UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@file_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """
+    Cancel a resumable upload.
+    
+    Args:
+        upload_id (str): ID of the upload session
+        
+    Returns:
+        Response: Empty response with 204 status code
+    """
+    try:
+        with get_connection() as conn:
+            upload_store.abort(conn, upload_id)
+        return '', 204
+    except upload_store.UploadError as e:
+        return _upload_error(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -95,10 +213,14 @@ def get_task_files(task_id):
     Returns:
         Response: JSON response with file data
     """
-    with sqlite3.connect(db_path) as conn:
+    with get_connection() as conn:
+        etag = revision_etag(conn)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
         cursor = conn.cursor()
         cursor.execute(
-            'SELECT id, filename, file_path, embedding_id FROM task_files WHERE task_id = ?',
+            'SELECT id, filename, file_path, embedding_id, status FROM task_files WHERE task_id = ?',
             (task_id,)
         )
         files = [
@@ -106,37 +228,75 @@ def get_task_files(task_id):
                 'id': row[0],
                 'filename': row[1],
                 'file_path': row[2],
-                'embedding_id': row[3]
+                'embedding_id': row[3],
+                'status': row[4]
             }
             for row in cursor.fetchall()
         ]
-        return jsonify(files)
+        return tag_response(jsonify(files), etag)
+
+@file_bp.route('/files/<int:file_id>/status', methods=['GET'])
+def get_file_status(file_id):
+    """
+    Get the ingestion status of a file.
+    
+    Args:
+        file_id (int): ID of the file
+        
+    Returns:
+        Response: JSON response with status, attempts and last error
+    """
+    with get_connection() as conn:
+        status = ingest_queue.get_status(conn, file_id)
+        if status is None:
+            return jsonify({'error': 'File not found'}), 404
+        return jsonify(status)
+
+@file_bp.route('/files/embedding-cache', methods=['GET'])
+def get_embedding_cache_stats():
+    """
+    Get embedding cache hit rates and the embedding calls they saved.
+    
+    Returns:
+        Response: JSON response with one entry per embedding model
+    """
+    try:
+        with get_connection() as conn:
+            return jsonify(cache_stats(conn))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @file_bp.route('/files/<int:file_id>', methods=['GET'])
 def download_file(file_id):
     """
     Download a file.
     
+    Supports byte ranges and revalidation with If-None-Match or
+    If-Modified-Since; ``?inline=1`` lets the browser display the PDF
+    instead of saving it.
+    
     Args:
         file_id (int): ID of the file to download
         
     Returns:
         Response: File download response
     """
-    with sqlite3.connect(db_path) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT filename, file_path FROM task_files WHERE id = ?', (file_id,))
+        cursor.execute('SELECT filename, file_path, content_hash FROM task_files WHERE id = ?', (file_id,))
         row = cursor.fetchone()
         
-        if row:
-            return send_file(row[1], as_attachment=True, download_name=row[0])
-        else:
-            return jsonify({'error': 'File not found'}), 404
+    if row:
+        as_attachment = request.args.get('inline') not in ('1', 'true')
+        response = serve_file(row[1], row[0], content_hash=row[2], as_attachment=as_attachment)
+        if response is not None:
+            return response
+    return jsonify({'error': 'File not found'}), 404
 
 @file_bp.route('/files/<int:file_id>', methods=['DELETE'])
 def delete_file(file_id):
     """
-    Delete a file.
+    Delete a file, its upload and the chunks no other file shares.
     
     Args:
         file_id (int): ID of the file to delete
@@ -145,26 +305,17 @@ def delete_file(file_id):
         Response: Empty response with 204 status code
     """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            # Get file path before deleting
-            cursor.execute('SELECT file_path FROM task_files WHERE id = ?', (file_id,))
-            row = cursor.fetchone()
-            
-            if not row:
+        with get_connection() as conn:
+            # Delete from database, along with any pending ingestion job
+            files = delete_file_rows(conn, file_id)
+            if not files:
                 return jsonify({'error': 'File not found'}), 404
-                
-            file_path = row[0]
-            
-            # Delete from database
-            cursor.execute('DELETE FROM task_files WHERE id = ?', (file_id,))
             conn.commit()
             
-            # Delete physical file
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Delete the physical file and the file's vectors
+            release_files(conn, database.get_vector_db(), files)
                 
             return '', 204
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
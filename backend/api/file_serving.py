@@ -0,0 +1,137 @@
+"""
+Download serving for uploaded files.
+
+Responses are conditional and support single byte ranges, so PDF viewers
+can fetch the pages they show and browsers revalidate cached copies with
+``If-None-Match`` or ``If-Modified-Since`` instead of downloading them again.
+The ETag is the file's SHA-256 once ingestion has recorded it.
+
+``FILE_OFFLOAD`` keeps the bytes out of the Python worker entirely:
+
+* ``x-sendfile``: Apache's mod_xsendfile (or lighttpd) sends the file named
+  in the ``X-Sendfile`` header,
+* ``x-accel-redirect``: nginx serves the file from an ``internal`` location
+  mapped to ``FILE_ACCEL_PREFIX``, e.g.::
+
+      location /protected-uploads/ { internal; alias /srv/godolist/uploads/; }
+
+Otherwise the file is served directly. Under a server that provides
+``wsgi.file_wrapper`` (gunicorn, uWSGI) both full and partial bodies are
+handed to it as open files, which gunicorn sends with ``os.sendfile()``
+without copying through user space.
+"""
+
+import os
+from urllib.parse import quote
+from flask import current_app, request
+from werkzeug.utils import send_file
+from .database import UPLOAD_FOLDER
+
+FILE_OFFLOAD = os.getenv('FILE_OFFLOAD', '')
+FILE_ACCEL_PREFIX = os.getenv('FILE_ACCEL_PREFIX', '/protected-uploads/')
+FILE_MAX_AGE = int(os.getenv('FILE_MAX_AGE', '3600'))
+FILE_BLOCK_SIZE = int(os.getenv('FILE_BLOCK_SIZE', str(256 * 1024)))
+
+
+def _zero_copy_range(response, path):
+    """
+    Hand a partial response's body to the server's file wrapper.
+
+    werkzeug serves ranges through a Python iterator that reads and copies
+    the file; a file wrapper over a file positioned at the start of the range
+    lets the server send exactly ``Content-Length`` bytes from there with
+    ``sendfile()`` instead.
+
+    Args:
+        response (Response): Response from send_file()
+        path (str): File being served
+
+    Returns:
+        Response: The response, with its body replaced when possible
+    """
+    file_wrapper = request.environ.get('wsgi.file_wrapper')
+    content_range = response.content_range
+    if response.status_code != 206 or file_wrapper is None or content_range.start is None:
+        return response
+    f = open(path, 'rb')
+    f.seek(content_range.start)
+    response.close()
+    response.response = file_wrapper(f, FILE_BLOCK_SIZE)
+    response.direct_passthrough = True
+    return response
+
+
+def _accel_response(path, download_name, mimetype, as_attachment, etag, last_modified):
+    """
+    Build a response telling nginx to serve the file.
+
+    Conditional requests are still answered here, so a 304 costs nginx
+    nothing; nginx handles ranges itself.
+
+    Args:
+        path (str): File to serve
+        download_name (str): File name offered to the browser
+        mimetype (str): Content type
+        as_attachment (bool): Ask the browser to save rather than display
+        etag (str|None): Entity tag
+        last_modified (float): Modification time
+
+    Returns:
+        Response: Empty response carrying ``X-Accel-Redirect``
+    """
+    response = current_app.response_class(mimetype=mimetype)
+    location = os.path.relpath(path, os.path.abspath(UPLOAD_FOLDER)).replace(os.sep, '/')
+    response.headers['X-Accel-Redirect'] = FILE_ACCEL_PREFIX.rstrip('/') + '/' + quote(location)
+    response.headers.set(
+        'Content-Disposition', 'attachment' if as_attachment else 'inline', filename=download_name
+    )
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.max_age = FILE_MAX_AGE
+    return response.make_conditional(request.environ)
+
+
+def serve_file(path, download_name, content_hash=None, as_attachment=True, mimetype='application/pdf'):
+    """
+    Serve a stored file with conditional, range and offload support.
+
+    Args:
+        path (str): File to serve
+        download_name (str): File name offered to the browser
+        content_hash (str, optional): SHA-256 of the file, used as ETag
+        as_attachment (bool): Ask the browser to save rather than display
+        mimetype (str): Content type
+
+    Returns:
+        Response|None: File response, or None if the file is missing
+    """
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    if FILE_OFFLOAD == 'x-accel-redirect':
+        return _accel_response(path, download_name, mimetype, as_attachment, content_hash, stat.st_mtime)
+
+    # Without a content hash werkzeug derives the ETag from mtime, size and path
+    response = send_file(
+        path,
+        request.environ,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=content_hash or True,
+        last_modified=stat.st_mtime,
+        max_age=FILE_MAX_AGE,
+        use_x_sendfile=FILE_OFFLOAD == 'x-sendfile',
+        response_class=current_app.response_class
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if FILE_OFFLOAD != 'x-sendfile':
+        response = _zero_copy_range(response, path)
+    return response
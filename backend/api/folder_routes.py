@@ -3,10 +3,12 @@ Folder management routes for Go Do List.
 """
 
 from flask import Blueprint, request, jsonify
-from .database import db_path
-import sqlite3
+from .connection import get_connection
+from .events import publish_changes
+from .revisions import is_not_modified, not_modified_response, revision_etag, tag_response
 
 folder_bp = Blueprint('folders', __name__)
+folder_bp.after_request(publish_changes)
 
 @folder_bp.route('/folders', methods=['GET', 'POST'])
 def manage_folders():
@@ -17,15 +19,19 @@ def manage_folders():
         Response: JSON response with folder data
     """
     if request.method == 'GET':
-        with sqlite3.connect(db_path) as conn:
+        with get_connection() as conn:
+            etag = revision_etag(conn)
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+
             cursor = conn.cursor()
             cursor.execute('SELECT id, name FROM folders')
             folders = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
-            return jsonify(folders)
+            return tag_response(jsonify(folders), etag)
 
     if request.method == 'POST':
         data = request.json
-        with sqlite3.connect(db_path) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('INSERT INTO folders (name) VALUES (?)', (data['name'],))
             folder_id = cursor.lastrowid
@@ -0,0 +1,195 @@
+"""
+Hybrid lexical and vector search for Go Do List.
+
+BM25 rankings from the FTS5 index (see text_index) and nearest-neighbour
+rankings from the vector store are combined with reciprocal-rank fusion:
+a result scores ``sum(1 / (RRF_K + rank))`` over the rankings it appears
+in. Fusion only looks at ranks, so BM25 and cosine scores never need to be
+calibrated against each other.
+
+Each ranking is cut at ``SEARCH_DEPTH`` candidates, which also bounds how
+far ``GET /search`` can page. Agents retrieve through
+knowledge.HybridKnowledge when ``AGENT_RETRIEVAL`` is ``hybrid`` (the
+default), or through vector search alone when it is ``vector``.
+"""
+
+import json
+import os
+from .task_queries import row_to_task
+from .text_index import chunk_files, search_chunks, search_tasks
+
+SEARCH_DEPTH = int(os.getenv('SEARCH_DEPTH', '200'))
+RRF_K = int(os.getenv('RRF_K', '60'))
+AGENT_RETRIEVAL = os.getenv('AGENT_RETRIEVAL', 'hybrid')
+
+# Candidates each ranking contributes per document an agent asks for
+AGENT_CANDIDATES = 4
+
+MODES = ('hybrid', 'lexical', 'vector')
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse rankings by reciprocal rank.
+
+    Args:
+        rankings (dict): Ranking name -> keys, best first
+        k (int): Rank offset damping the weight of the top ranks
+
+    Returns:
+        list[tuple]: Key, fused score and ranking name -> 1-based rank of
+            each key, best first
+    """
+    scores = {}
+    ranks = {}
+    for name, keys in rankings.items():
+        for rank, key in enumerate(keys, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            ranks.setdefault(key, {})[name] = rank
+    order = sorted(scores, key=lambda key: -scores[key])
+    return [(key, scores[key], ranks[key]) for key in order]
+
+
+def point_key(id_):
+    """
+    Normalize a point ID to the hex form used by the text index.
+
+    Qdrant returns the IDs agno assigns as hyphenated UUIDs.
+
+    Args:
+        id_ (str): Point ID from the vector store
+
+    Returns:
+        str: 32-character hex ID
+    """
+    return str(id_).replace('-', '')
+
+
+def _scope_hashes(conn, task_id=None, folder_id=None):
+    """
+    Find the file contents a search is limited to.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_id (int, optional): Limit to this task's files
+        folder_id (int, optional): Limit to the files of this folder's tasks
+
+    Returns:
+        list[str]|None: SHA-256 of the files, or None for no limit
+    """
+    if task_id is not None:
+        rows = conn.execute(
+            'SELECT DISTINCT content_hash FROM task_files WHERE task_id = ? AND content_hash IS NOT NULL', (task_id,)
+        )
+    elif folder_id is not None:
+        rows = conn.execute(
+            '''SELECT DISTINCT f.content_hash FROM task_files f JOIN tasks t ON t.id = f.task_id
+               WHERE t.folder_id = ? AND f.content_hash IS NOT NULL''',
+            (folder_id,)
+        )
+    else:
+        return None
+    return [row[0] for row in rows]
+
+
+def _vector_hits(vector_db, query, depth, file_hashes):
+    """
+    Rank chunks by similarity to a query.
+
+    Args:
+        vector_db (VectorDb): Vector store
+        query (str): Search text
+        depth (int): Number of hits
+        file_hashes (list[str]|None): Limit to these files' chunks
+
+    Returns:
+        list[tuple]: Point ID, score and payload of each hit, best first
+    """
+    if file_hashes is not None and not file_hashes:
+        return []
+    filters = None if file_hashes is None else {'file_hashes': file_hashes}
+    return vector_db.search_by_vector(vector_db.embedder.get_embedding(query), depth, filters)
+
+
+def hybrid_search(conn, vector_db, query, limit=20, offset=0, mode='hybrid', task_id=None, folder_id=None,
+                  depth=SEARCH_DEPTH):
+    """
+    Search tasks and document chunks, fusing BM25 and vector rankings.
+
+    Tasks are only matched lexically, on title and notes; chunks both
+    lexically and by vector. With ``task_id`` only that task's chunks are
+    searched; with ``folder_id`` only that folder's tasks and their chunks.
+    In hybrid mode a failing vector search (store or embedding API down)
+    leaves the lexical results, flagged as ``degraded``.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        vector_db (VectorDb): Vector store
+        query (str): Search text
+        limit (int): Results per page
+        offset (int): Results to skip
+        mode (str): ``hybrid``, ``lexical`` or ``vector``
+        task_id (int, optional): Limit to this task's chunks
+        folder_id (int, optional): Limit to this folder
+        depth (int): Candidates per ranking
+
+    Returns:
+        dict: ``results`` for the page, ``next_offset`` (None on the last
+            page) and ``degraded``
+    """
+    file_hashes = _scope_hashes(conn, task_id, folder_id)
+    rankings = {}
+    tasks = {}
+    chunks = {}
+    degraded = False
+
+    if mode in ('hybrid', 'lexical'):
+        if task_id is None:
+            rows = search_tasks(conn, query, depth, folder_id)
+            tasks = {('task', row['id']): row for row in rows}
+            rankings['tasks'] = list(tasks)
+        rows = search_chunks(conn, query, depth, file_hashes)
+        for row in rows:
+            chunks[('chunk', row['point_id'])] = {
+                'name': row['name'],
+                'meta_data': json.loads(row['meta_data'] or '{}'),
+                'snippet': row['snippet']
+            }
+        rankings['lexical'] = [('chunk', row['point_id']) for row in rows]
+
+    if mode in ('hybrid', 'vector'):
+        try:
+            hits = _vector_hits(vector_db, query, depth, file_hashes)
+        except Exception as e:
+            if mode == 'vector':
+                raise
+            print(f"Error in vector search, returning lexical results: {str(e)}")
+            hits, degraded = [], True
+        for id_, _score, payload in hits:
+            chunks.setdefault(('chunk', point_key(id_)), {
+                'name': payload.get('name'),
+                'meta_data': payload.get('meta_data') or {},
+                'snippet': (payload.get('content') or '')[:300]
+            })
+        rankings['vector'] = [('chunk', point_key(id_)) for id_, _score, _payload in hits]
+
+    fused = reciprocal_rank_fusion(rankings)
+    page = fused[offset:offset + limit]
+    files = chunk_files(conn, [id_ for (kind, id_), _score, _ranks in page if kind == 'chunk'])
+
+    results = []
+    for key, score, ranks in page:
+        kind, id_ = key
+        result = {'type': kind, 'id': id_, 'score': score, 'ranks': ranks}
+        if kind == 'task':
+            result['task'] = row_to_task(tasks[key])
+        else:
+            result.update(chunks[key])
+            result['files'] = files.get(id_, [])
+        results.append(result)
+
+    return {
+        'results': results,
+        'next_offset': offset + limit if offset + limit < len(fused) else None,
+        'degraded': degraded
+    }
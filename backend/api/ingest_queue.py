@@ -0,0 +1,376 @@
+"""
+Background document ingestion for Go Do List.
+
+Uploads are recorded as rows in the ``ingest_jobs`` table and processed by a
+pool of worker processes, so the upload request returns as soon as the file
+is on disk. A dispatcher thread claims due jobs, hands them to the pool and
+records the outcome. Failed jobs are retried with exponential backoff up to
+a maximum number of attempts. The job state is mirrored on the file's
+``task_files.status`` column (queued, processing, ready or failed).
+
+Jobs are claimed atomically, so several dispatchers (for example one per
+gunicorn worker, or a dedicated ``flask ingest-worker`` process) can share
+the same queue. A claimed job that is not finished within the lease (because
+its dispatcher died) becomes claimable again.
+"""
+
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from .connection import open_connection
+
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '2'))
+# The local vector backends live in this process, so ingestion must run in threads
+INGEST_EXECUTOR = os.getenv(
+    'INGEST_EXECUTOR', 'thread' if os.getenv('VECTOR_BACKEND', 'qdrant') in ('numpy', 'hnsw') else 'process'
+)
+MAX_ATTEMPTS = int(os.getenv('INGEST_MAX_ATTEMPTS', '5'))
+BACKOFF_BASE = float(os.getenv('INGEST_BACKOFF_BASE', '2.0'))
+BACKOFF_MAX = float(os.getenv('INGEST_BACKOFF_MAX', '300'))
+POLL_INTERVAL = float(os.getenv('INGEST_POLL_INTERVAL', '1.0'))
+JOB_LEASE = float(os.getenv('INGEST_JOB_LEASE', '1800'))
+JOB_STATUSES = ('queued', 'processing', 'done', 'failed')
+
+
+def enqueue(conn, file_id):
+    """
+    Queue a file for ingestion.
+
+    Runs in the caller's transaction, so the job is only visible once the
+    file row that references it is committed.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_id (int): ID of the task_files row to ingest
+
+    Returns:
+        int: Job ID
+    """
+    now = time.time()
+    cursor = conn.execute(
+        '''INSERT INTO ingest_jobs (file_id, status, attempts, next_attempt_at, created_at, updated_at)
+           VALUES (?, 'queued', 0, ?, ?, ?)''',
+        (file_id, now, now, now)
+    )
+    conn.execute("UPDATE task_files SET status = 'queued' WHERE id = ?", (file_id,))
+    return cursor.lastrowid
+
+
+def get_status(conn, file_id):
+    """
+    Get the ingestion status of a file.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_id (int): ID of the task_files row
+
+    Returns:
+        dict|None: Status details, or None if the file does not exist
+    """
+    row = conn.execute(
+        '''SELECT f.id, f.status, f.embedding_id, j.attempts, j.last_error, j.next_attempt_at
+           FROM task_files f
+           LEFT JOIN ingest_jobs j ON j.id = (
+               SELECT MAX(id) FROM ingest_jobs WHERE file_id = f.id
+           )
+           WHERE f.id = ?''',
+        (file_id,)
+    ).fetchone()
+    if not row:
+        return None
+    return {
+        'id': row['id'],
+        'status': row['status'],
+        'embedding_id': row['embedding_id'],
+        'attempts': row['attempts'] or 0,
+        'error': row['last_error'],
+        'next_attempt_at': row['next_attempt_at'] if row['status'] == 'queued' else None
+    }
+
+
+def backoff_delay(attempts, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """
+    Delay before retrying a job, with full jitter.
+
+    Args:
+        attempts (int): Attempts made so far
+        base (float): Delay after the first failure, in seconds
+        maximum (float): Upper bound on the delay, in seconds
+
+    Returns:
+        float: Delay in seconds
+    """
+    return random.uniform(0, min(maximum, base * 2 ** (attempts - 1)))
+
+
+def _ingest(file_path, task_id, file_id=None):
+    """
+    Default job processor: embed a file into the vector store.
+
+    Imported lazily so worker processes only load the document stack when
+    they actually run a job.
+
+    Args:
+        file_path (str): Path to the uploaded file
+        task_id (int): ID of the task the file belongs to
+        file_id (int, optional): ID of the file's ``task_files`` row
+
+    Returns:
+        str: Embedding ID for the file
+    """
+    from .file_handler import process_file
+    return process_file(file_path, task_id, file_id=file_id)
+
+
+class IngestWorker:
+    """
+    Dispatches queued ingestion jobs to a worker pool.
+
+    Attributes:
+        workers (int): Size of the worker pool
+        processor (Callable): ``processor(file_path, task_id, file_id=...)``
+            returning the embedding ID; must be picklable when using processes
+        max_attempts (int): Attempts before a job is marked failed
+        poll_interval (float): Seconds between queue polls when idle
+        lease (float): Seconds after which a claimed job may be reclaimed
+        backoff_base (float): Retry delay after the first failure, in seconds
+        backoff_max (float): Upper bound on the retry delay, in seconds
+    """
+
+    def __init__(self, workers=INGEST_WORKERS, processor=_ingest, executor=INGEST_EXECUTOR,
+                 max_attempts=MAX_ATTEMPTS, poll_interval=POLL_INTERVAL, lease=JOB_LEASE,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, connect=open_connection):
+        """
+        Initialize the worker without starting it.
+
+        Args:
+            workers (int): Size of the worker pool
+            processor (Callable): Job processor, see class attributes
+            executor (str): ``process`` for a process pool or ``thread`` for a
+                thread pool (useful with in-memory fakes in tests)
+            max_attempts (int): Attempts before a job is marked failed
+            poll_interval (float): Seconds between queue polls when idle
+            lease (float): Seconds after which a claimed job may be reclaimed
+            backoff_base (float): Retry delay after the first failure, in seconds
+            backoff_max (float): Upper bound on the retry delay, in seconds
+            connect (Callable): Returns the dispatcher's database connection
+        """
+        self.workers = workers
+        self.processor = processor
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor_kind = executor
+        self._connect = connect
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _make_executor(self):
+        """
+        Create the worker pool.
+
+        Returns:
+            Executor: Process or thread pool
+        """
+        if self._executor_kind == 'thread':
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ingest')
+        # Spawned children do not inherit the dispatcher's threads or connections
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def start(self):
+        """Start the dispatcher thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ingest-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop dispatching and wait for running jobs to finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the dispatcher
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self):
+        """Wake the dispatcher so a newly queued job starts immediately."""
+        self._wake.set()
+
+    def claim(self, conn):
+        """
+        Atomically claim the next due job, or one whose lease has expired.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+
+        Returns:
+            sqlite3.Row|None: Claimed job with file path and task ID, or None
+        """
+        now = time.time()
+        conn.commit()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            job = conn.execute(
+                '''SELECT j.id, j.file_id, j.attempts, f.file_path, f.task_id
+                   FROM ingest_jobs j JOIN task_files f ON f.id = j.file_id
+                   WHERE (j.status = 'queued' AND j.next_attempt_at <= ?)
+                      OR (j.status = 'processing' AND j.updated_at <= ?)
+                   ORDER BY j.next_attempt_at, j.id LIMIT 1''',
+                (now, now - self.lease)
+            ).fetchone()
+            if job:
+                conn.execute(
+                    '''UPDATE ingest_jobs SET status = 'processing', attempts = attempts + 1, updated_at = ?
+                       WHERE id = ?''',
+                    (now, job['id'])
+                )
+                conn.execute("UPDATE task_files SET status = 'processing' WHERE id = ?", (job['file_id'],))
+            conn.commit()
+            return job
+        except Exception:
+            conn.rollback()
+            raise
+
+    def complete(self, conn, job, embedding_id):
+        """
+        Record a successful job.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            job (sqlite3.Row): Job returned by claim()
+            embedding_id (str): Embedding ID returned by the processor
+        """
+        with conn:
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job['id'])
+            )
+            conn.execute(
+                "UPDATE task_files SET status = 'ready', embedding_id = ? WHERE id = ?",
+                (embedding_id, job['file_id'])
+            )
+
+    def fail(self, conn, job, error):
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            job (sqlite3.Row): Job returned by claim()
+            error (Exception): Error raised by the processor
+        """
+        attempts = job['attempts'] + 1
+        now = time.time()
+        with conn:
+            if attempts < self.max_attempts:
+                conn.execute(
+                    '''UPDATE ingest_jobs
+                       SET status = 'queued', last_error = ?, next_attempt_at = ?, updated_at = ?
+                       WHERE id = ?''',
+                    (str(error), now + backoff_delay(attempts, self.backoff_base, self.backoff_max), now, job['id'])
+                )
+                conn.execute("UPDATE task_files SET status = 'queued' WHERE id = ?", (job['file_id'],))
+            else:
+                conn.execute(
+                    "UPDATE ingest_jobs SET status = 'failed', last_error = ?, updated_at = ? WHERE id = ?",
+                    (str(error), now, job['id'])
+                )
+                conn.execute("UPDATE task_files SET status = 'failed' WHERE id = ?", (job['file_id'],))
+
+    def _run(self):
+        """Claim jobs while there is pool capacity and record their results."""
+        conn = self._connect()
+        executor = self._make_executor()
+        running = {}
+        try:
+            while not self._stop.is_set():
+                while len(running) < self.workers:
+                    try:
+                        job = self.claim(conn)
+                    except Exception as e:
+                        print(f"Error claiming ingestion job: {str(e)}")
+                        break
+                    if job is None:
+                        break
+                    try:
+                        future = executor.submit(
+                            self.processor, job['file_path'], job['task_id'], file_id=job['file_id']
+                        )
+                    except BrokenExecutor as e:
+                        # A worker process died; replace the pool and retry later
+                        self.fail(conn, job, e)
+                        executor.shutdown(wait=False)
+                        executor = self._make_executor()
+                        break
+                    running[future] = job
+
+                if running:
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        error = future.exception()
+                        if error is None:
+                            self.complete(conn, job, future.result())
+                        else:
+                            print(f"Error processing file: {str(error)}")
+                            self.fail(conn, job, error)
+                    except Exception as e:
+                        print(f"Error recording ingestion result: {str(e)}")
+        finally:
+            for future, job in running.items():
+                try:
+                    self.complete(conn, job, future.result())
+                except Exception as e:
+                    self.fail(conn, job, e)
+            executor.shutdown(wait=True)
+            conn.close()
+
+
+worker = IngestWorker()
+
+
+def init_app(app):
+    """
+    Start the in-app ingestion dispatcher and register the CLI command.
+
+    The dispatcher is not started when ``INGEST_WORKERS`` is 0 (jobs are then
+    left to a separate ``flask ingest-worker`` process) or when the app is in
+    testing mode.
+
+    Args:
+        app (Flask): Application to configure
+    """
+    @app.cli.command('ingest-worker')
+    def ingest_worker_command():
+        """Run an ingestion dispatcher in the foreground."""
+        worker.workers = max(worker.workers, 1)
+        worker.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            worker.stop()
+
+    if worker.workers > 0 and not app.testing:
+        worker.start()
@@ -0,0 +1,326 @@
+"""
+Agent knowledge bases for Go Do List.
+
+Agents retrieve only from the chunks of the files attached to their task:
+TaskKnowledge filters vector search on the files' content hashes, and
+HybridKnowledge also ranks the same chunks by BM25 and fuses both rankings
+(see hybrid_search). Kept apart from the search code because it builds on
+agno's knowledge classes, which only agents need.
+
+A task with several files is searched one file at a time, concurrently
+(``AGENT_PER_FILE_RETRIEVAL``, on ``AGENT_RETRIEVAL_THREADS`` threads), with
+the query embedded once. The per-file hits are merged by score, chunks
+found through more than one file are kept once, and the chunks handed to the
+model are cut to about ``AGENT_CONTEXT_TOKENS`` tokens.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from agno.document import Document
+from agno.knowledge.agent import AgentKnowledge
+from .connection import get_connection, run_in_db
+from .embedding_pipeline import estimate_tokens
+from .hybrid_search import AGENT_CANDIDATES, AGENT_RETRIEVAL, point_key, reciprocal_rank_fusion
+from .text_index import search_chunks
+from .vector_backends import hits_to_documents
+
+AGENT_PER_FILE_RETRIEVAL = os.getenv('AGENT_PER_FILE_RETRIEVAL', '1').lower() not in ('0', 'false')
+AGENT_RETRIEVAL_THREADS = int(os.getenv('AGENT_RETRIEVAL_THREADS', '8'))
+AGENT_CONTEXT_TOKENS = int(os.getenv('AGENT_CONTEXT_TOKENS', '6000'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _retrieval_pool():
+    """
+    Get the thread pool per-file searches run on, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool of ``AGENT_RETRIEVAL_THREADS`` threads
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=AGENT_RETRIEVAL_THREADS, thread_name_prefix='retrieval')
+    return _pool
+
+
+def merge_hits(hit_lists, limit):
+    """
+    Merge the hits of several searches into one ranking.
+
+    A point found by more than one search (a chunk whose text appears in
+    several files) is kept once, with its best score.
+
+    Args:
+        hit_lists (Iterable[list[tuple]]): Point ID, score and payload of
+            each hit, per search
+        limit (int): Number of hits to keep
+
+    Returns:
+        list[tuple]: Point ID, score and payload of each hit, best first
+    """
+    best = {}
+    for hits in hit_lists:
+        for hit in hits:
+            key = point_key(hit[0])
+            if key not in best or hit[1] > best[key][1]:
+                best[key] = hit
+    return sorted(best.values(), key=lambda hit: -hit[1])[:limit]
+
+
+def fit_context(documents, max_tokens=AGENT_CONTEXT_TOKENS):
+    """
+    Cut ranked chunks to the model's context budget.
+
+    Chunks with the same text as a better-ranked one are dropped, and the
+    rest are kept in order until the next one would take the estimated
+    total past ``max_tokens``. The best chunk is always kept.
+
+    Args:
+        documents (list[Document]): Chunks, best first
+        max_tokens (int): Estimated token budget
+
+    Returns:
+        list[Document]: Chunks to hand to the model, best first
+    """
+    kept, seen, tokens = [], set(), 0
+    for document in documents:
+        if document.content in seen:
+            continue
+        cost = estimate_tokens(document.content)
+        if kept and tokens + cost > max_tokens:
+            break
+        seen.add(document.content)
+        kept.append(document)
+        tokens += cost
+    return kept
+
+
+class TaskKnowledge(AgentKnowledge):
+    """
+    Knowledge base limited to the chunks of some files.
+
+    Attributes:
+        file_hashes (list[str]): Content hashes of the files to search
+        per_file (bool): Search several files one at a time, concurrently,
+            instead of with one query filtered on all of them
+    """
+
+    file_hashes: List[str] = []
+    per_file: bool = AGENT_PER_FILE_RETRIEVAL
+
+    def _scoped(self, filters, file_hashes=None):
+        """
+        Add the file filter to a search's filters.
+
+        Args:
+            filters (dict|None): Extra filters
+            file_hashes (str|list[str], optional): Files to search, defaults
+                to ``file_hashes``
+
+        Returns:
+            dict: Filters limited to the files
+        """
+        return {**(filters or {}), 'file_hashes': self.file_hashes if file_hashes is None else file_hashes}
+
+    def _scopes(self, filters):
+        """
+        Split a search into the searches to run.
+
+        Args:
+            filters (dict|None): Extra filters
+
+        Returns:
+            list[dict]: Filters of each search, one per file when searching
+                per file
+        """
+        if self.per_file and len(self.file_hashes) > 1:
+            return [self._scoped(filters, digest) for digest in self.file_hashes]
+        return [self._scoped(filters)]
+
+    def _vector_hits(self, vector, limit, filters):
+        """
+        Find the files' chunks nearest to a vector.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict|None): Extra filters
+
+        Returns:
+            list[tuple]: Point ID, score and payload of each hit, best first
+        """
+        scopes = self._scopes(filters)
+        if len(scopes) == 1:
+            return self.vector_db.search_by_vector(vector, limit, scopes[0])
+        pool = _retrieval_pool()
+        futures = [pool.submit(self.vector_db.search_by_vector, vector, limit, scope) for scope in scopes]
+        return merge_hits((future.result() for future in futures), limit)
+
+    async def _async_vector_hits(self, vector, limit, filters):
+        """Find the files' chunks nearest to a vector, searching the files concurrently."""
+        scopes = self._scopes(filters)
+        results = await asyncio.gather(*(
+            self.vector_db.async_search_by_vector(vector, limit, scope) for scope in scopes
+        ))
+        return merge_hits(results, limit)
+
+    def _documents(self, query, hits):
+        """
+        Turn vector hits into documents, reranking them if the store has a reranker.
+
+        Args:
+            query (str): Query text
+            hits (list[tuple]): Point ID, score and payload of each hit
+
+        Returns:
+            list[Document]: Chunks, best first
+        """
+        documents = hits_to_documents(hits, self.vector_db.embedder)
+        reranker = getattr(self.vector_db, 'reranker', None)
+        if reranker:
+            documents = reranker.rerank(query=query, documents=documents)
+        return documents
+
+    def _vector_documents(self, query, limit, filters):
+        """
+        Rank the files' chunks by vector similarity, before the context budget.
+
+        Args:
+            query (str): Query text
+            limit (int): Number of results
+            filters (dict|None): Extra filters
+
+        Returns:
+            list[Document]: Chunks, best first
+        """
+        vector = self.vector_db.embedder.get_embedding(query)
+        return self._documents(query, self._vector_hits(vector, limit, filters))
+
+    async def _async_vector_documents(self, query, limit, filters):
+        """Rank the files' chunks by vector similarity, before the context budget."""
+        from .async_clients import embed
+
+        vector, _usage = await embed(self.vector_db.embedder, query)
+        return self._documents(query, await self._async_vector_hits(vector, limit, filters))
+
+    def search(self, query: str, num_documents: Optional[int] = None,
+               filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search the files' chunks.
+
+        Args:
+            query (str): Query text
+            num_documents (int, optional): Number of results
+            filters (dict, optional): Extra filters
+
+        Returns:
+            list[Document]: Matching chunks within the context budget, or
+                none when there are no files
+        """
+        if not self.file_hashes:
+            return []
+        return fit_context(self._vector_documents(query, num_documents or self.num_documents, filters))
+
+    async def async_search(self, query: str, num_documents: Optional[int] = None,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search the files' chunks."""
+        if not self.file_hashes:
+            return []
+        return fit_context(await self._async_vector_documents(query, num_documents or self.num_documents, filters))
+
+
+class HybridKnowledge(TaskKnowledge):
+    """
+    Knowledge base limited to some files' chunks, ranked by fusing vector
+    search with BM25 over the same chunks.
+    """
+
+    def _fuse(self, limit, vector_documents, rows):
+        """
+        Fuse the vector and BM25 rankings of the files' chunks.
+
+        Args:
+            limit (int): Number of results
+            vector_documents (list[Document]): Vector search results, best first
+            rows (list[sqlite3.Row]): BM25 results, best first
+
+        Returns:
+            list[Document]: Matching chunks, best first
+        """
+        documents = {point_key(document.id): document for document in vector_documents}
+        rankings = {'vector': list(documents)}
+        for row in rows:
+            documents.setdefault(row['point_id'], Document(
+                id=row['point_id'],
+                name=row['name'],
+                meta_data=json.loads(row['meta_data'] or '{}'),
+                content=row['content'],
+                embedder=self.vector_db.embedder
+            ))
+        rankings['lexical'] = [row['point_id'] for row in rows]
+        fused = reciprocal_rank_fusion(rankings)
+        return [documents[key] for key, _score, _ranks in fused[:limit]]
+
+    def search(self, query: str, num_documents: Optional[int] = None,
+               filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search the files' chunks.
+
+        Args:
+            query (str): Query text
+            num_documents (int, optional): Number of results
+            filters (dict, optional): Extra filters for the vector search
+
+        Returns:
+            list[Document]: Matching chunks within the context budget, best first
+        """
+        if not self.file_hashes:
+            return []
+        limit = num_documents or self.num_documents
+        depth = limit * AGENT_CANDIDATES
+        vector_documents = self._vector_documents(query, depth, filters)
+        rows = search_chunks(get_connection(), query, depth, self.file_hashes)
+        return fit_context(self._fuse(limit, vector_documents, rows))
+
+    async def async_search(self, query: str, num_documents: Optional[int] = None,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search the files' chunks, running BM25 on the database executor meanwhile."""
+        if not self.file_hashes:
+            return []
+        limit = num_documents or self.num_documents
+        depth = limit * AGENT_CANDIDATES
+        vector_documents, rows = await asyncio.gather(
+            self._async_vector_documents(query, depth, filters),
+            run_in_db(lambda: search_chunks(get_connection(), query, depth, self.file_hashes))
+        )
+        return fit_context(self._fuse(limit, vector_documents, rows))
+
+
+def task_knowledge(vector_db, file_hashes, retrieval=AGENT_RETRIEVAL, per_file=None):
+    """
+    Create the knowledge base agents use for some files.
+
+    Args:
+        vector_db (VectorDb): Vector store holding the chunks
+        file_hashes (list[str]): Content hashes of the files
+        retrieval (str): ``hybrid`` or ``vector``
+        per_file (bool, optional): Search the files one at a time,
+            concurrently; defaults to ``AGENT_PER_FILE_RETRIEVAL``
+
+    Returns:
+        TaskKnowledge: HybridKnowledge or vector-only TaskKnowledge
+    """
+    knowledge = HybridKnowledge if retrieval == 'hybrid' else TaskKnowledge
+    return knowledge(
+        vector_db=vector_db,
+        file_hashes=list(file_hashes),
+        per_file=AGENT_PER_FILE_RETRIEVAL if per_file is None else per_file
+    )
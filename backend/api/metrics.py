@@ -0,0 +1,615 @@
+"""
+Request and hot-path instrumentation for Go Do List.
+
+Metrics are kept in process memory and rendered in the Prometheus text format
+by ``GET /metrics`` (see metrics_routes). They cover:
+
+* latency of every request by method, route and status, measured until the
+  response body has been sent, so streamed answers are timed in full;
+* the time SQLite spends executing each statement, by statement kind, on
+  connections opened by connection.open_connection();
+* spans around the expensive steps of ingestion and answering (file
+  processing, document indexing, agent setup and the model call);
+* embedding requests, embedded texts and OpenAI tokens, by model.
+
+Each worker process keeps its own metrics, so scrape every worker (or run one
+process) when serving with several. ``METRICS_ENABLED=0`` turns off request
+and SQLite timing.
+
+When ``PROFILE_REQUESTS=1``, a request carrying ``X-Profile: cprofile`` (or
+``pyinstrument``, if it is installed) is run under a profiler and answered with
+the profile report instead of its normal response; the original status is in
+the ``X-Profiled-Status`` header.
+"""
+
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '0') == '1'
+PROFILE_REPORT_LINES = int(os.getenv('PROFILE_REPORT_LINES', '60'))
+
+# Upper bounds in seconds; +Inf is always added
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+SPAN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    """
+    Escape a label value for the text format.
+
+    Args:
+        value: Label value
+
+    Returns:
+        str: Escaped value
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    """
+    Format a label set.
+
+    Args:
+        names (tuple[str]): Label names
+        values (tuple): Label values, in the same order
+        extra (tuple): Additional (name, value) pairs
+
+    Returns:
+        str: ``{name="value",...}``, or an empty string without labels
+    """
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    """
+    Format a sample value.
+
+    Args:
+        value (float): Sample value
+
+    Returns:
+        str: Value as Prometheus expects it
+    """
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class for a metric family with a fixed set of label names.
+
+    Attributes:
+        name (str): Metric name
+        help (str): Description shown in the exposition
+        labels (tuple[str]): Label names
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        """
+        Initialize an empty metric.
+
+        Args:
+            name (str): Metric name
+            help (str): Description shown in the exposition
+            labels (tuple[str]): Label names
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """
+        Order label values by label name.
+
+        Args:
+            labels (dict): Label values by name
+
+        Returns:
+            tuple: Label values
+        """
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def samples(self):
+        """
+        List the samples to expose.
+
+        Returns:
+            list[tuple]: (name suffix, label values, extra labels, value)
+        """
+        with self._lock:
+            return [('', key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        """
+        Render the metric in the Prometheus text format.
+
+        Returns:
+            list[str]: Exposition lines
+        """
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, key, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the counter.
+
+        Args:
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that is set to its current reading."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """
+        Set the gauge.
+
+        Args:
+            value (float): Current value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Attributes:
+        buckets (tuple[float]): Bucket upper bounds, ending with +Inf
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=REQUEST_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            name (str): Metric name
+            help (str): Description shown in the exposition
+            labels (tuple[str]): Label names
+            buckets (tuple[float]): Bucket upper bounds
+        """
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        """
+        Record one observation.
+
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        """
+        List bucket, sum and count samples.
+
+        Returns:
+            list[tuple]: (name suffix, label values, extra labels, value)
+        """
+        samples = []
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', key, (('le', _format_value(bound)),), cumulative))
+            samples.append(('_sum', key, (), total))
+            samples.append(('_count', key, (), count))
+        return samples
+
+
+class Registry:
+    """Collection of metrics exposed together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics = []
+
+    def register(self, metric):
+        """
+        Add a metric to the exposition.
+
+        Args:
+            metric (Metric): Metric to add
+
+        Returns:
+            Metric: The same metric
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    'godolist_http_request_duration_seconds', 'Time from request start until the response body was sent.',
+    ('method', 'route', 'status')
+))
+query_duration = registry.register(Histogram(
+    'godolist_sqlite_query_duration_seconds', 'Time SQLite spent executing a statement, by statement kind.',
+    ('statement',), QUERY_BUCKETS
+))
+span_duration = registry.register(Histogram(
+    'godolist_span_duration_seconds', 'Duration of instrumented steps of ingestion and answering.',
+    ('span', 'outcome'), SPAN_BUCKETS
+))
+embedding_requests = registry.register(Counter(
+    'godolist_embedding_requests_total', 'Embedding API requests.', ('model',)
+))
+embedding_texts = registry.register(Counter(
+    'godolist_embedding_texts_total', 'Texts sent to the embedding API.', ('model',)
+))
+openai_tokens = registry.register(Counter(
+    'godolist_openai_tokens_total', 'OpenAI tokens used, by model and kind (prompt, completion).',
+    ('model', 'kind')
+))
+ingest_jobs = registry.register(Gauge(
+    'godolist_ingest_jobs', 'Ingestion jobs by status.', ('status',)
+))
+pool_idle_connections = registry.register(Gauge(
+    'godolist_sqlite_pool_idle_connections', 'Idle pooled SQLite connections.'
+))
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block as a named span.
+
+    Args:
+        name (str): Span name
+
+    Yields:
+        None
+    """
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        span_duration.observe(time.perf_counter() - start, span=name, outcome=outcome)
+
+
+def timed(name):
+    """
+    Decorate a function so every call is timed as a span.
+
+    Args:
+        name (str): Span name
+
+    Returns:
+        callable: Decorator
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _token_count(value):
+    """
+    Read a token count that agno may report as a number or a list of numbers.
+
+    Args:
+        value: Count, list of counts or None
+
+    Returns:
+        int: Total
+    """
+    if isinstance(value, (list, tuple)):
+        return sum(item or 0 for item in value)
+    return value or 0
+
+
+def record_usage(model, usage):
+    """
+    Count the tokens in an OpenAI or agno usage report.
+
+    Args:
+        model (str): Model the tokens were used with
+        usage (dict|object|None): Usage with ``prompt_tokens`` /
+            ``completion_tokens`` or agno's ``input_tokens`` / ``output_tokens``
+    """
+    if not usage:
+        return
+    read = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    prompt = _token_count(read('prompt_tokens') or read('input_tokens'))
+    completion = _token_count(read('completion_tokens') or read('output_tokens'))
+    if prompt:
+        openai_tokens.inc(prompt, model=model, kind='prompt')
+    if completion:
+        openai_tokens.inc(completion, model=model, kind='completion')
+
+
+def record_embedding(model, texts, usage=None):
+    """
+    Count one embedding request.
+
+    Args:
+        model (str): Embedding model
+        texts (int): Number of texts embedded
+        usage (dict|object, optional): Token usage reported by the API
+    """
+    embedding_requests.inc(model=model)
+    embedding_texts.inc(texts, model=model)
+    record_usage(model, usage)
+
+
+def _statement_kind(sql):
+    """
+    Find the leading keyword of a statement.
+
+    Args:
+        sql (str): SQL text
+
+    Returns:
+        str: Upper-case keyword, e.g. ``SELECT``
+    """
+    words = sql.lstrip(' \n\t(').split(None, 1)
+    return words[0].upper() if words else ''
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records how long each statement takes to execute."""
+
+    def execute(self, sql, parameters=()):
+        """Execute a statement, timing it."""
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_duration.observe(time.perf_counter() - start, statement=_statement_kind(sql))
+
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for each parameter set, timing them together."""
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_duration.observe(time.perf_counter() - start, statement=_statement_kind(sql))
+
+    def executescript(self, sql_script):
+        """Execute a script, timing it as one statement."""
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            query_duration.observe(time.perf_counter() - start, statement='SCRIPT')
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose statements are timed.
+
+    Rows read lazily after execute() (by iterating a cursor) are not
+    included, so SELECT timings cover finding the first row.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        """Open a timed cursor."""
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        """Execute a statement on a new timed cursor."""
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for each parameter set on a new timed cursor."""
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        """Execute a script on a new timed cursor."""
+        return self.cursor().executescript(sql_script)
+
+
+def connection_factory():
+    """
+    Get the connection class for open_connection().
+
+    Returns:
+        type: TimedConnection when metrics are enabled, else sqlite3.Connection
+    """
+    return TimedConnection if METRICS_ENABLED else sqlite3.Connection
+
+
+def _start_profiler(mode):
+    """
+    Start profiling the current thread.
+
+    Args:
+        mode (str): ``pyinstrument`` to use pyinstrument when it is installed;
+            anything else uses cProfile
+
+    Returns:
+        object: Running profiler
+    """
+    if mode.lower() == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            pass
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler):
+    """
+    Stop a profiler and format its report.
+
+    Args:
+        profiler (object): Profiler returned by _start_profiler()
+
+    Returns:
+        str: Text report, slowest calls first
+    """
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_REPORT_LINES)
+        return output.getvalue()
+    profiler.stop()
+    return profiler.output_text()
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware answering ``X-Profile`` requests with a profile report.
+
+    The wrapped response is read to the end under the profiler, so streamed
+    responses are profiled in full, and then discarded.
+    """
+
+    def __init__(self, app):
+        """
+        Wrap a WSGI application.
+
+        Args:
+            app (callable): WSGI application
+        """
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        """Handle a request, profiling it when asked to."""
+        mode = environ.get('HTTP_X_PROFILE')
+        if not mode:
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            return lambda data: None
+
+        profiler = _start_profiler(mode)
+        try:
+            body = self.app(environ, capture)
+            try:
+                for _chunk in body:
+                    pass
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+        finally:
+            report = _stop_profiler(profiler).encode()
+        start_response('200 OK', [
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(report))),
+            ('X-Profiled-Status', captured.get('status', ''))
+        ])
+        return [report]
+
+
+def _start_timer():
+    """Remember when the request started."""
+    from flask import g
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    """
+    Record the request's latency once its body has been sent.
+
+    Args:
+        response (Response): Outgoing response
+
+    Returns:
+        Response: The same response
+    """
+    from flask import g, request
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    labels = {
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule else '<unmatched>',
+        'status': response.status_code
+    }
+    response.call_on_close(lambda: request_duration.observe(time.perf_counter() - start, **labels))
+    return response
+
+
+def init_app(app):
+    """
+    Instrument a Flask application.
+
+    Args:
+        app (Flask): Application to configure
+    """
+    if METRICS_ENABLED:
+        app.before_request(_start_timer)
+        app.after_request(_observe_request)
+    if PROFILE_REQUESTS:
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app)
@@ -0,0 +1,31 @@
+"""
+Prometheus metrics route for Go Do List.
+"""
+
+from flask import Blueprint, Response
+from .connection import get_connection, pool
+from .ingest_queue import JOB_STATUSES
+from .metrics import ingest_jobs, pool_idle_connections, registry
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Get this process's metrics in the Prometheus text format.
+    
+    Gauges are read when scraped; see the metrics module for what is
+    recorded.
+    
+    Returns:
+        Response: ``text/plain`` exposition
+    """
+    with get_connection() as conn:
+        # Statuses with no jobs left must read 0, not their last count
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        for row in conn.execute('SELECT status, COUNT(*) AS jobs FROM ingest_jobs GROUP BY status'):
+            counts[row['status']] = row['jobs']
+    for status, jobs in counts.items():
+        ingest_jobs.set(jobs, status=status)
+    pool_idle_connections.set(pool.idle_count())
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
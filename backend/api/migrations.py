@@ -0,0 +1,351 @@
+"""
+Versioned schema migrations for Go Do List.
+
+The schema version is stored in SQLite's ``PRAGMA user_version``. Each entry in
+MIGRATIONS upgrades the database by exactly one version, and apply_migrations()
+runs every migration newer than the stored version in order, bumping the
+version in the same transaction as the migration itself.
+"""
+
+def _change_triggers(table, entity, parent):
+    """
+    Build triggers that record every write to a table in the change log.
+
+    Args:
+        table (str): Table to watch
+        entity (str): Entity name stored in the change log
+        parent (str): SQL for the parent ID, with ``{row}`` standing for NEW/OLD
+
+    Returns:
+        list[str]: CREATE TRIGGER statements for insert, update and delete
+    """
+    statements = []
+    for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{op}_changes AFTER {op.upper()} ON {table}
+            BEGIN
+                INSERT INTO changes (entity, entity_id, parent_id, op)
+                VALUES ('{entity}', {row}.id, {parent.format(row=row)}, '{op}');
+            END
+        ''')
+    return statements
+
+
+def _task_count_statements(row, delta):
+    """
+    Build statements that add or remove one task row from the task counts.
+
+    Args:
+        row (str): ``NEW`` or ``OLD``
+        delta (int): 1 to count the row, -1 to uncount it
+
+    Returns:
+        list[str]: Statements for a trigger body
+    """
+    folder = f'COALESCE({row}.folder_id, 0)'
+    due = f'substr({row}.due_date, 1, 10)'
+    completed = f'({row}.completed = 1)'
+    important = f'({row}.is_important = 1)'
+    is_open_due = f"{row}.completed = 0 AND COALESCE({row}.due_date, '') != ''"
+    if delta > 0:
+        return [
+            f'''INSERT INTO task_counts (folder_id, total, completed, important)
+               VALUES ({folder}, 1, {completed}, {important})
+               ON CONFLICT (folder_id) DO UPDATE SET
+                   total = total + 1,
+                   completed = completed + excluded.completed,
+                   important = important + excluded.important;''',
+            f'''INSERT INTO task_due_counts (folder_id, due_date, open)
+               SELECT {folder}, {due}, 1 WHERE {is_open_due}
+               ON CONFLICT (folder_id, due_date) DO UPDATE SET open = open + 1;''',
+        ]
+    return [
+        f'''UPDATE task_counts SET
+               total = total - 1,
+               completed = completed - {completed},
+               important = important - {important}
+           WHERE folder_id = {folder};''',
+        f'DELETE FROM task_counts WHERE folder_id = {folder} AND total <= 0;',
+        f'''UPDATE task_due_counts SET open = open - 1
+           WHERE folder_id = {folder} AND due_date = {due} AND {is_open_due};''',
+        f'DELETE FROM task_due_counts WHERE folder_id = {folder} AND due_date = {due} AND open <= 0;',
+    ]
+
+
+def _task_count_triggers():
+    """
+    Build triggers that keep task_counts and task_due_counts in step with tasks.
+
+    Returns:
+        list[str]: CREATE TRIGGER statements for insert, update and delete
+    """
+    bodies = (
+        ('insert', 'AFTER INSERT', _task_count_statements('NEW', 1)),
+        ('update', 'AFTER UPDATE OF folder_id, completed, is_important, due_date',
+         _task_count_statements('OLD', -1) + _task_count_statements('NEW', 1)),
+        ('delete', 'AFTER DELETE', _task_count_statements('OLD', -1)),
+    )
+    triggers = []
+    for op, event, statements in bodies:
+        body = '\n'.join(statements)
+        triggers.append(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_{op}_counts {event} ON tasks
+            BEGIN
+                {body}
+            END
+        ''')
+    return triggers
+
+
+MIGRATIONS = [
+    # 1: indexes for the hot task, folder and file lookups
+    [
+        'CREATE INDEX IF NOT EXISTS idx_tasks_folder_id ON tasks (folder_id)',
+        'CREATE INDEX IF NOT EXISTS idx_task_files_task_id ON task_files (task_id)',
+        'CREATE INDEX IF NOT EXISTS idx_task_files_file_path ON task_files (file_path)',
+        '''CREATE INDEX IF NOT EXISTS idx_tasks_open
+           ON tasks (folder_id, created_at) WHERE completed = 0''',
+        '''CREATE INDEX IF NOT EXISTS idx_tasks_important
+           ON tasks (folder_id, created_at) WHERE is_important = 1''',
+    ],
+    # 2: keyset pagination on (created_at, id), optionally within a folder
+    [
+        'CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_tasks_folder_created ON tasks (folder_id, created_at, id)',
+        'DROP INDEX IF EXISTS idx_tasks_folder_id',
+    ],
+    # 3: change log whose revision numbers drive ETags and GET /changes
+    [
+        '''CREATE TABLE IF NOT EXISTS changes (
+               revision INTEGER PRIMARY KEY AUTOINCREMENT,
+               entity TEXT NOT NULL,
+               entity_id INTEGER NOT NULL,
+               parent_id INTEGER,
+               op TEXT NOT NULL
+           )''',
+        *_change_triggers('tasks', 'task', 'NULL'),
+        *_change_triggers('folders', 'folder', 'NULL'),
+        *_change_triggers('task_files', 'file', '{row}.task_id'),
+    ],
+    # 4: background ingestion jobs and per-file ingestion status
+    [
+        "ALTER TABLE task_files ADD COLUMN status TEXT NOT NULL DEFAULT 'ready'",
+        "UPDATE task_files SET status = 'failed' WHERE embedding_id IS NULL",
+        '''CREATE TABLE IF NOT EXISTS ingest_jobs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               file_id INTEGER NOT NULL,
+               status TEXT NOT NULL DEFAULT 'queued',
+               attempts INTEGER NOT NULL DEFAULT 0,
+               last_error TEXT,
+               next_attempt_at REAL NOT NULL,
+               created_at REAL NOT NULL,
+               updated_at REAL NOT NULL,
+               FOREIGN KEY (file_id) REFERENCES task_files (id)
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_ingest_jobs_due ON ingest_jobs (status, next_attempt_at)',
+        'CREATE INDEX IF NOT EXISTS idx_ingest_jobs_file_id ON ingest_jobs (file_id)',
+    ],
+    # 5: content-addressed embedding cache
+    [
+        'ALTER TABLE task_files ADD COLUMN content_hash TEXT',
+        'CREATE INDEX IF NOT EXISTS idx_task_files_content_hash ON task_files (content_hash)',
+        '''CREATE TABLE IF NOT EXISTS embedding_cache (
+               model TEXT NOT NULL,
+               content_hash TEXT NOT NULL,
+               vector BLOB NOT NULL,
+               dimensions INTEGER NOT NULL,
+               point_id TEXT NOT NULL,
+               last_used_at REAL NOT NULL,
+               PRIMARY KEY (model, content_hash)
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_embedding_cache_lru ON embedding_cache (last_used_at)',
+        '''CREATE TABLE IF NOT EXISTS embedded_files (
+               model TEXT NOT NULL,
+               collection TEXT NOT NULL,
+               content_hash TEXT NOT NULL,
+               chunk_count INTEGER NOT NULL,
+               last_used_at REAL NOT NULL,
+               PRIMARY KEY (model, collection, content_hash)
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_embedded_files_lru ON embedded_files (last_used_at)',
+        '''CREATE TABLE IF NOT EXISTS embedding_cache_stats (
+               model TEXT PRIMARY KEY,
+               hits INTEGER NOT NULL DEFAULT 0,
+               misses INTEGER NOT NULL DEFAULT 0,
+               file_hits INTEGER NOT NULL DEFAULT 0,
+               chunks_skipped INTEGER NOT NULL DEFAULT 0
+           )''',
+    ],
+    # 6: agent response cache, cleared for a task whenever its files or the task change
+    [
+        '''CREATE TABLE IF NOT EXISTS response_cache (
+               key TEXT PRIMARY KEY,
+               task_id INTEGER NOT NULL,
+               model TEXT NOT NULL,
+               scope TEXT NOT NULL,
+               query TEXT NOT NULL,
+               query_vector BLOB,
+               response TEXT NOT NULL,
+               created_at REAL NOT NULL,
+               last_used_at REAL NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_response_cache_task_id ON response_cache (task_id)',
+        'CREATE INDEX IF NOT EXISTS idx_response_cache_scope ON response_cache (scope, last_used_at)',
+        'CREATE INDEX IF NOT EXISTS idx_response_cache_lru ON response_cache (last_used_at)',
+        '''CREATE TABLE IF NOT EXISTS response_cache_stats (
+               model TEXT PRIMARY KEY,
+               hits INTEGER NOT NULL DEFAULT 0,
+               similar_hits INTEGER NOT NULL DEFAULT 0,
+               misses INTEGER NOT NULL DEFAULT 0
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_task_files_insert_response_cache AFTER INSERT ON task_files
+           BEGIN
+               DELETE FROM response_cache WHERE task_id = NEW.task_id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_task_files_update_response_cache
+           AFTER UPDATE OF task_id, file_path, embedding_id, content_hash ON task_files
+           BEGIN
+               DELETE FROM response_cache WHERE task_id IN (OLD.task_id, NEW.task_id);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_task_files_delete_response_cache AFTER DELETE ON task_files
+           BEGIN
+               DELETE FROM response_cache WHERE task_id = OLD.task_id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_delete_response_cache AFTER DELETE ON tasks
+           BEGIN
+               DELETE FROM response_cache WHERE task_id = OLD.id;
+           END''',
+    ],
+    # 7: FTS5 full-text indexes over task titles and notes, and over document chunks
+    [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+               title, notes, content='tasks', content_rowid='id', tokenize='porter unicode61'
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_insert_fts AFTER INSERT ON tasks
+           BEGIN
+               INSERT INTO tasks_fts (rowid, title, notes) VALUES (NEW.id, NEW.title, NEW.notes);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_update_fts AFTER UPDATE OF title, notes ON tasks
+           BEGIN
+               INSERT INTO tasks_fts (tasks_fts, rowid, title, notes) VALUES ('delete', OLD.id, OLD.title, OLD.notes);
+               INSERT INTO tasks_fts (rowid, title, notes) VALUES (NEW.id, NEW.title, NEW.notes);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_delete_fts AFTER DELETE ON tasks
+           BEGIN
+               INSERT INTO tasks_fts (tasks_fts, rowid, title, notes) VALUES ('delete', OLD.id, OLD.title, OLD.notes);
+           END''',
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+        '''CREATE TABLE IF NOT EXISTS chunk_text (
+               id INTEGER PRIMARY KEY,
+               point_id TEXT NOT NULL UNIQUE,
+               name TEXT,
+               meta_data TEXT,
+               content TEXT NOT NULL
+           )''',
+        '''CREATE TABLE IF NOT EXISTS file_chunks (
+               file_hash TEXT NOT NULL,
+               chunk_id INTEGER NOT NULL,
+               position INTEGER NOT NULL,
+               PRIMARY KEY (file_hash, chunk_id),
+               FOREIGN KEY (chunk_id) REFERENCES chunk_text (id)
+           ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_file_chunks_chunk_id ON file_chunks (chunk_id)',
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+               content, content='chunk_text', content_rowid='id', tokenize='porter unicode61'
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_chunk_text_insert_fts AFTER INSERT ON chunk_text
+           BEGIN
+               INSERT INTO chunks_fts (rowid, content) VALUES (NEW.id, NEW.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_chunk_text_delete_fts AFTER DELETE ON chunk_text
+           BEGIN
+               INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+           END''',
+    ],
+    # 8: resumable upload sessions; stored files are shared by content, counted by file_path
+    [
+        '''CREATE TABLE IF NOT EXISTS upload_sessions (
+               id TEXT PRIMARY KEY,
+               task_id INTEGER NOT NULL,
+               filename TEXT NOT NULL,
+               size INTEGER NOT NULL,
+               received INTEGER NOT NULL DEFAULT 0,
+               created_at REAL NOT NULL,
+               updated_at REAL NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_upload_sessions_updated_at ON upload_sessions (updated_at)',
+    ],
+    # 9: per-folder task counts and open tasks per due date, maintained by triggers for GET /tasks/stats
+    [
+        '''CREATE TABLE IF NOT EXISTS task_counts (
+               folder_id INTEGER PRIMARY KEY,
+               total INTEGER NOT NULL DEFAULT 0,
+               completed INTEGER NOT NULL DEFAULT 0,
+               important INTEGER NOT NULL DEFAULT 0
+           )''',
+        '''CREATE TABLE IF NOT EXISTS task_due_counts (
+               folder_id INTEGER NOT NULL,
+               due_date TEXT NOT NULL,
+               open INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (folder_id, due_date)
+           ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_task_due_counts_due_date ON task_due_counts (due_date)',
+        *_task_count_triggers(),
+        '''INSERT INTO task_counts (folder_id, total, completed, important)
+           SELECT COALESCE(folder_id, 0), COUNT(*), SUM(completed = 1), SUM(is_important = 1)
+           FROM tasks GROUP BY COALESCE(folder_id, 0)''',
+        '''INSERT INTO task_due_counts (folder_id, due_date, open)
+           SELECT COALESCE(folder_id, 0), substr(due_date, 1, 10), COUNT(*)
+           FROM tasks WHERE completed = 0 AND COALESCE(due_date, '') != ''
+           GROUP BY COALESCE(folder_id, 0), substr(due_date, 1, 10)''',
+        # Due today and overdue listings
+        'CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks (due_date, id) WHERE completed = 0',
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    """
+    Read the schema version stored in the database.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Current schema version
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """
+    Upgrade the database to the latest schema version.
+
+    Each migration runs in its own transaction together with the version bump,
+    so an interrupted upgrade resumes from the last completed step.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Schema version after upgrading
+    """
+    conn.commit()
+    version = get_schema_version(conn)
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have migrated while we waited for the lock
+            if get_schema_version(conn) >= target:
+                conn.commit()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {target}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return get_schema_version(conn)
@@ -0,0 +1,166 @@
+"""
+Streaming, page-parallel PDF text extraction and chunking.
+
+Produces exactly the chunks agno's ``PDFReader`` with
+``DocumentChunking(chunk_size=1000, overlap=200)`` produces: the PDF is read
+page by page, each page becomes one document named after the file, and
+each page is chunked on its own. Because no chunk spans pages, page ranges
+can be extracted and chunked independently.
+
+The file is memory-mapped rather than read into memory, page ranges are
+spread over a process pool, and chunks are yielded in page order as soon as
+the range containing them is done, so embedding can start while later pages
+are still being extracted.
+"""
+
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from pypdf import PdfReader
+from agno.document import Document
+from agno.document.chunking.document import DocumentChunking
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '16'))
+
+
+def document_name(file_path):
+    """
+    Name documents the way agno's PDFReader names them for a path.
+
+    Args:
+        file_path (str): Path to the PDF
+
+    Returns:
+        str: File name up to the first dot
+    """
+    return Path(file_path).name.split('.')[0]
+
+
+class _MappedPdf:
+    """
+    Context manager opening a PDF through a read-only memory map.
+
+    Attributes:
+        reader (PdfReader): Reader over the mapped file
+    """
+
+    def __init__(self, file_path):
+        """
+        Remember the file to open.
+
+        Args:
+            file_path (str): Path to the PDF
+        """
+        self.file_path = file_path
+        self.reader = None
+
+    def __enter__(self):
+        """Map the file and open a reader over it."""
+        self._file = open(self.file_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.reader = PdfReader(self._map)
+        return self
+
+    def __exit__(self, *exc):
+        """Release the reader, the map and the file."""
+        self.reader = None
+        self._map.close()
+        self._file.close()
+
+
+def count_pages(file_path):
+    """
+    Count the pages of a PDF.
+
+    Args:
+        file_path (str): Path to the PDF
+
+    Returns:
+        int: Number of pages
+    """
+    with _MappedPdf(file_path) as pdf:
+        return len(pdf.reader.pages)
+
+
+def extract_pages(file_path, start, stop, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    Extract and chunk a range of pages.
+
+    Runs in pool workers, so it only takes and returns picklable values.
+
+    Args:
+        file_path (str): Path to the PDF
+        start (int): First page, 1-based
+        stop (int): Page after the last one, 1-based
+        chunk_size (int): Maximum chunk size in characters
+        overlap (int): Characters repeated from the previous chunk
+
+    Returns:
+        list[Document]: Chunks of the pages, in order
+    """
+    name = document_name(file_path)
+    chunking = DocumentChunking(chunk_size=chunk_size, overlap=overlap)
+    chunks = []
+    with _MappedPdf(file_path) as pdf:
+        for page_number in range(start, stop):
+            page = Document(
+                name=name,
+                id=f'{name}_{page_number}',
+                meta_data={'page': page_number},
+                content=pdf.reader.pages[page_number - 1].extract_text()
+            )
+            chunks.extend(chunking.chunk(page))
+    return chunks
+
+
+def iter_chunks(file_path, workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK,
+                chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    Yield the chunks of a PDF in page order while later pages are extracted.
+
+    Files of a single range, or ``workers`` of 1, are extracted in the calling
+    process one range at a time.
+
+    Args:
+        file_path (str): Path to the PDF
+        workers (int): Extraction processes
+        pages_per_task (int): Pages per unit of work
+        chunk_size (int): Maximum chunk size in characters
+        overlap (int): Characters repeated from the previous chunk
+
+    Yields:
+        Document: Chunks, identical to PDFReader with DocumentChunking
+    """
+    pages = count_pages(file_path)
+    ranges = [(start, min(start + pages_per_task, pages + 1)) for start in range(1, pages + 1, pages_per_task)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield from extract_pages(file_path, start, stop, chunk_size, overlap)
+        return
+
+    # Spawning the pool costs about a second, so it only pays off for long files
+    context = multiprocessing.get_context('spawn')
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context)
+    # Keep a bounded number of ranges in flight so memory stays flat on huge files
+    pending = []
+    remaining = iter(ranges)
+    for start, stop in remaining:
+        pending.append(pool.submit(extract_pages, file_path, start, stop, chunk_size, overlap))
+        if len(pending) >= workers * 2:
+            break
+    try:
+        while pending:
+            chunks = pending.pop(0).result()
+            for start, stop in remaining:
+                pending.append(pool.submit(extract_pages, file_path, start, stop, chunk_size, overlap))
+                break
+            yield from chunks
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,286 @@
+"""
+Cache of agent answers for Go Do List.
+
+Answers are stored in SQLite under a key combining the chat model, the task
+instructions (which follow from the task type), the task description, the
+content hashes of the task's indexed documents and the normalized query, so
+re-processing an unchanged task returns instantly without retrieval or a
+completion.
+
+Optionally, a query that misses can still be served by a cached answer to a
+near-duplicate query in the same scope (same model, instructions,
+description and documents) when their embeddings are at least
+``RESPONSE_CACHE_SIMILARITY`` apart by cosine similarity.
+
+Entries expire after ``RESPONSE_CACHE_TTL`` seconds, the table is trimmed to
+``RESPONSE_CACHE_MAX_ENTRIES`` least recently used rows, and triggers clear a
+task's entries whenever its files change or the task is deleted.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from array import array
+from .embedding_cache import CacheStats, TOUCH_INTERVAL
+
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '86400'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+# Minimum cosine similarity for a near-duplicate query; 0 disables the lookup
+RESPONSE_CACHE_SIMILARITY = float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0'))
+
+# Most recent entries in a scope compared against a query
+SIMILARITY_CANDIDATES = 200
+
+# New entries written between eviction passes
+_EVICT_EVERY = 100
+
+# Exact hits, near-duplicate hits and misses
+stats = CacheStats('response_cache_stats', ('hits', 'similar_hits', 'misses'))
+
+
+def normalize_query(query):
+    """
+    Normalize a query so trivially different spellings share an entry.
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        str: Case-folded query with collapsed whitespace and no trailing
+            punctuation
+    """
+    query = unicodedata.normalize('NFKC', query).casefold()
+    return re.sub(r'\s+', ' ', query).strip().rstrip('.!?').strip()
+
+
+def scope_key(model, instructions, description, content_hashes):
+    """
+    Identify everything an answer depends on besides the query.
+
+    Args:
+        model (str): Chat model ID
+        instructions (list[str]): Task instructions for the task type
+        description (str): Task description
+        content_hashes (list[str]): SHA-256 of each indexed document
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([model, instructions, description or '', sorted(set(content_hashes))])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_key(scope, query):
+    """
+    Key an entry by its scope and normalized query.
+
+    Args:
+        scope (str): Scope key
+        query (str): Normalized query
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(f'{scope}\x00{query}'.encode('utf-8')).hexdigest()
+
+
+def _cosine(a, b):
+    """
+    Cosine similarity of two vectors.
+
+    Args:
+        a (Sequence[float]): First vector
+        b (Sequence[float]): Second vector
+
+    Returns:
+        float: Similarity in [-1, 1], or 0 for a zero vector
+    """
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of agent answers.
+
+    Attributes:
+        ttl (float): Seconds an entry stays valid
+        max_entries (int): Entries kept before least recently used ones are evicted
+        similarity (float): Minimum cosine similarity for near-duplicate
+            hits; 0 disables them
+        embedder (Embedder|None): Embedder for queries, needed for
+            near-duplicate hits
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 similarity=RESPONSE_CACHE_SIMILARITY, embedder=None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds an entry stays valid
+            max_entries (int): Entries kept before least recently used ones are evicted
+            similarity (float): Minimum cosine similarity for near-duplicate hits
+            embedder (Embedder, optional): Embedder for queries; defaults to
+                the vector store's when near-duplicate hits are enabled
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.embedder = embedder
+        self._writes = 0
+
+    def _embed(self, query):
+        """
+        Embed a normalized query for near-duplicate lookups.
+
+        Args:
+            query (str): Normalized query
+
+        Returns:
+            list[float]|None: Vector, or None when near-duplicate hits are off
+        """
+        if not self.similarity:
+            return None
+        if self.embedder is None:
+            from .database import get_vector_db
+            self.embedder = get_vector_db().embedder
+        return self.embedder.get_embedding(query)
+
+    def lookup(self, conn, model, scope, query):
+        """
+        Find a cached answer.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            model (str): Chat model ID, for the hit/miss counters
+            scope (str): Key from scope_key()
+            query (str): Query as asked
+
+        Returns:
+            tuple: Cached answer or None, and the query vector to pass to
+                store() (None unless near-duplicate hits are enabled)
+        """
+        query = normalize_query(query)
+        now = time.time()
+        key = _entry_key(scope, query)
+        row = conn.execute(
+            'SELECT response, last_used_at FROM response_cache WHERE key = ? AND created_at > ?',
+            (key, now - self.ttl)
+        ).fetchone()
+        if row:
+            stats.add(model, 'hits')
+            if now - row['last_used_at'] > TOUCH_INTERVAL:
+                with conn:
+                    conn.execute('UPDATE response_cache SET last_used_at = ? WHERE key = ?', (now, key))
+            return row['response'], None
+
+        vector = self._embed(query)
+        if vector is not None:
+            best, best_key, best_similarity = None, None, self.similarity
+            candidates = conn.execute(
+                '''SELECT key, query_vector, response FROM response_cache
+                   WHERE scope = ? AND created_at > ? AND query_vector IS NOT NULL
+                   ORDER BY last_used_at DESC LIMIT ?''',
+                (scope, now - self.ttl, SIMILARITY_CANDIDATES)
+            )
+            for candidate in candidates:
+                similarity = _cosine(vector, array('f', candidate['query_vector']))
+                if similarity >= best_similarity:
+                    best, best_key, best_similarity = candidate['response'], candidate['key'], similarity
+            if best is not None:
+                stats.add(model, 'similar_hits')
+                with conn:
+                    conn.execute('UPDATE response_cache SET last_used_at = ? WHERE key = ?', (now, best_key))
+                return best, vector
+
+        stats.add(model, 'misses')
+        return None, vector
+
+    def store(self, conn, task_id, model, scope, query, response, vector=None):
+        """
+        Cache an answer.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            task_id (int): Task the answer was produced for
+            model (str): Chat model ID
+            scope (str): Key from scope_key()
+            query (str): Query as asked
+            response (str): The agent's answer
+            vector (list[float], optional): Query vector returned by lookup()
+        """
+        query = normalize_query(query)
+        if vector is None and self.similarity:
+            vector = self._embed(query)
+        now = time.time()
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO response_cache
+                       (key, task_id, model, scope, query, query_vector, response, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (_entry_key(scope, query), task_id, model, scope, query,
+                 array('f', vector).tobytes() if vector is not None else None, response, now, now)
+            )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict(conn)
+        stats.flush(conn)
+
+    def evict(self, conn, max_entries=None):
+        """
+        Delete expired entries and trim the rest to the most recently used.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            max_entries (int, optional): Entries to keep, defaults to ``max_entries``
+
+        Returns:
+            int: Number of entries deleted
+        """
+        with conn:
+            deleted = conn.execute(
+                'DELETE FROM response_cache WHERE created_at <= ?', (time.time() - self.ttl,)
+            ).rowcount
+            deleted += conn.execute(
+                '''DELETE FROM response_cache WHERE rowid IN (
+                       SELECT rowid FROM response_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                   )''',
+                (self.max_entries if max_entries is None else max_entries,)
+            ).rowcount
+        return deleted
+
+
+response_cache = ResponseCache()
+
+
+def response_cache_stats(conn):
+    """
+    Report response cache effectiveness per chat model.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        list[dict]: Counters, ``hit_rate`` over all lookups and number of
+            cached ``entries`` for each model
+    """
+    stats.flush(conn)
+    rows = conn.execute(
+        '''SELECT s.model, s.hits, s.similar_hits, s.misses,
+                  (SELECT COUNT(*) FROM response_cache c WHERE c.model = s.model) AS entries
+           FROM response_cache_stats s ORDER BY s.model'''
+    ).fetchall()
+    report = []
+    for row in rows:
+        lookups = row['hits'] + row['similar_hits'] + row['misses']
+        report.append({
+            **dict(row),
+            'hit_rate': (row['hits'] + row['similar_hits']) / lookups if lookups else None
+        })
+    return report
@@ -0,0 +1,219 @@
+"""
+Revision tracking and conditional GET support for Go Do List.
+
+Triggers installed by the migrations append a row to the ``changes`` table for
+every insert, update and delete on tasks, folders and task files. The highest
+revision number therefore identifies the state of the whole database and is
+used as the ETag of list responses, and the log itself backs ``GET /changes``.
+"""
+
+import os
+from flask import request
+from .task_queries import TASK_FIELDS, row_to_task
+
+# Number of change log rows kept when the log is pruned at startup
+CHANGE_LOG_RETENTION = int(os.getenv('CHANGE_LOG_RETENTION', '100000'))
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_ID_CHUNK = 900
+
+
+def current_revision(conn):
+    """
+    Get the latest revision number.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Latest revision, 0 for an empty log
+    """
+    return conn.execute('SELECT COALESCE(MAX(revision), 0) FROM changes').fetchone()[0]
+
+
+def oldest_revision(conn):
+    """
+    Get the oldest revision still held in the change log.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int|None: Oldest retained revision, or None for an empty log
+    """
+    return conn.execute('SELECT MIN(revision) FROM changes').fetchone()[0]
+
+
+def revision_etag(conn):
+    """
+    Build the ETag for list responses at the current revision.
+
+    The revision is read before the caller runs its query, so at worst the
+    tag is older than the data and the client fetches once more.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        str: Unquoted ETag value
+    """
+    return f'r{current_revision(conn)}'
+
+
+def is_not_modified(etag):
+    """
+    Check whether the client already holds the response for an ETag.
+
+    Args:
+        etag (str): Unquoted ETag value
+
+    Returns:
+        bool: True if the request's If-None-Match matches
+    """
+    return request.if_none_match.contains(etag)
+
+
+def not_modified_response(etag):
+    """
+    Build an empty 304 response.
+
+    Args:
+        etag (str): Unquoted ETag value
+
+    Returns:
+        tuple: Flask response tuple
+    """
+    return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+
+
+def tag_response(response, etag):
+    """
+    Attach the ETag to a response and ask clients to revalidate every time.
+
+    Args:
+        response (Response): Response to tag
+        etag (str): Unquoted ETag value
+
+    Returns:
+        Response: The same response
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def prune_changes(conn, keep=CHANGE_LOG_RETENTION):
+    """
+    Drop all but the newest ``keep`` change log rows.
+
+    Clients syncing from a pruned revision are told to reload everything.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        keep (int): Number of rows to keep
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cursor = conn.execute(
+        'DELETE FROM changes WHERE revision <= (SELECT MAX(revision) FROM changes) - ?',
+        (keep,)
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def _load(conn, sql, ids, convert):
+    """
+    Load current rows for a set of IDs.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        sql (str): Query with an ``{ids}`` placeholder for the IN list
+        ids (list[int]): IDs to load
+        convert (Callable): Row -> API dict
+
+    Returns:
+        dict: ID -> API dict for the rows that still exist
+    """
+    loaded = {}
+    for start in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[start:start + _ID_CHUNK]
+        for row in conn.execute(sql.format(ids=', '.join('?' * len(chunk))), chunk):
+            loaded[row['id']] = convert(row)
+    return loaded
+
+
+def changes_since(conn, since, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Collect the changes made after a revision.
+
+    Several changes to the same entity are collapsed into one entry with
+    ``op: "upsert"`` and the entity's current data, or ``op: "delete"`` if it
+    no longer exists.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        since (int): Last revision the client has seen
+        limit (int): Maximum number of change log rows to read
+
+    Returns:
+        dict|None: ``revision`` to pass as ``since`` next time, ``has_more``
+            and the collapsed ``changes``; None if ``since`` is not covered by
+            the log and the client must reload everything
+    """
+    oldest = oldest_revision(conn)
+    if since > current_revision(conn):
+        # The client has seen revisions this database never issued
+        return None
+    if oldest is not None and since < oldest - 1:
+        return None
+
+    rows = conn.execute(
+        '''SELECT revision, entity, entity_id, parent_id, op FROM changes
+           WHERE revision > ? ORDER BY revision LIMIT ?''',
+        (since, limit + 1)
+    ).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for row in rows:
+        latest[(row['entity'], row['entity_id'])] = row
+
+    ids = {'task': [], 'folder': [], 'file': []}
+    for (entity, entity_id), row in latest.items():
+        if row['op'] != 'delete':
+            ids[entity].append(entity_id)
+
+    task_columns = ', '.join(TASK_FIELDS.values())
+    current = {
+        'task': _load(conn, f'SELECT {task_columns} FROM tasks WHERE id IN ({{ids}})', ids['task'], row_to_task),
+        'folder': _load(conn, 'SELECT id, name FROM folders WHERE id IN ({ids})', ids['folder'], dict),
+        'file': _load(
+            conn,
+            'SELECT id, task_id, filename, file_path, embedding_id, status FROM task_files WHERE id IN ({ids})',
+            ids['file'],
+            dict
+        )
+    }
+
+    changes = []
+    for (entity, entity_id), row in sorted(latest.items(), key=lambda item: item[1]['revision']):
+        data = current[entity].get(entity_id)
+        change = {
+            'revision': row['revision'],
+            'entity': entity,
+            'id': entity_id,
+            'op': 'delete' if data is None else 'upsert',
+            'data': data
+        }
+        if entity == 'file':
+            change['task_id'] = row['parent_id']
+        changes.append(change)
+
+    revision = rows[-1]['revision'] if rows else since
+    return {'revision': revision, 'has_more': has_more, 'changes': changes}
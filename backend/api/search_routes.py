@@ -0,0 +1,53 @@
+"""
+Search routes for Go Do List.
+"""
+
+from flask import Blueprint, request, jsonify
+from . import database
+from .connection import get_connection
+from .hybrid_search import MODES, SEARCH_DEPTH, hybrid_search
+
+search_bp = Blueprint('search', __name__)
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+@search_bp.route('/search', methods=['GET'])
+def search():
+    """
+    Search task titles and notes and document chunks.
+
+    Query parameters: ``q`` (required), ``mode`` (``hybrid``, ``lexical`` or
+    ``vector``, default hybrid), ``limit``, ``offset``, and ``task_id`` or
+    ``folder_id`` to narrow the search. Lexical matches are ranked by BM25,
+    chunks are also ranked by vector similarity, and the rankings are merged
+    by reciprocal-rank fusion. Pass ``next_offset`` back as ``offset`` for the
+    next page; results end after ``SEARCH_DEPTH`` candidates.
+
+    Returns:
+        Response: JSON response with the page of results
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    mode = request.args.get('mode', 'hybrid')
+    if mode not in MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MODES)}"}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+        offset = int(request.args.get('offset', 0))
+        task_id = request.args.get('task_id', type=int)
+        folder_id = request.args.get('folder_id', type=int)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= MAX_SEARCH_LIMIT or offset < 0:
+        return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_LIMIT} and offset positive'}), 400
+
+    try:
+        with get_connection() as conn:
+            result = hybrid_search(
+                conn, database.get_vector_db(), query, limit, offset, mode, task_id, folder_id, SEARCH_DEPTH
+            )
+            return jsonify({'query': query, 'mode': mode, **result})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
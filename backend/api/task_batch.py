@@ -0,0 +1,238 @@
+"""
+Batched task mutations for Go Do List.
+
+Applies a list of create, patch and delete operations in a single
+transaction. Operations of the same kind are grouped so that each group is
+written with one ``executemany``; patches are further grouped by the set of
+columns they change.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from .task_queries import TASK_FIELDS, row_to_task
+from .task_transfer import reserve_ids
+from .vector_gc import delete_task_files, release_files
+
+MAX_OPERATIONS = 5000
+
+# Fields a client may set on create or patch
+WRITABLE_FIELDS = ['folder_id', 'title', 'completed', 'isImportant', 'notes', 'dueDate']
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_ID_CHUNK = 900
+
+
+class BatchError(ValueError):
+    """Raised when a batch request is malformed as a whole."""
+
+
+def _normalize_folder_id(folder_id):
+    """
+    Convert the frontend's "no folder" values to None.
+
+    Args:
+        folder_id: Folder ID from the request
+
+    Returns:
+        Folder ID, or None for unassigned
+    """
+    if folder_id == '' or folder_id == 'unassigned':
+        return None
+    return folder_id
+
+
+def _changes_to_columns(changes):
+    """
+    Map writable API fields in a payload to column values.
+
+    Args:
+        changes (dict): Fields from the request
+
+    Returns:
+        dict: Column name -> value for each writable field present
+    """
+    columns = {}
+    for field in WRITABLE_FIELDS:
+        if field in changes:
+            value = changes[field]
+            if field == 'folder_id':
+                value = _normalize_folder_id(value)
+            columns[TASK_FIELDS[field]] = value
+    return columns
+
+
+def _task_id(operation):
+    """
+    Read the integer task ID from an operation.
+
+    Args:
+        operation (dict): Patch or delete operation
+
+    Returns:
+        int|None: Task ID, or None if missing or not an integer
+    """
+    try:
+        return int(operation['id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _fetch_tasks(conn, ids):
+    """
+    Load tasks by ID.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        ids (Iterable[int]): Task IDs
+
+    Returns:
+        dict: Task ID -> task data for the tasks that exist
+    """
+    ids = list(ids)
+    columns = ', '.join(TASK_FIELDS.values())
+    tasks = {}
+    for start in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[start:start + _ID_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT {columns} FROM tasks WHERE id IN ({placeholders})', chunk)
+        for row in rows:
+            tasks[row['id']] = row_to_task(row)
+    return tasks
+
+
+def apply_batch(conn, operations, vector_db=None):
+    """
+    Apply task operations in one transaction.
+
+    Each operation is one of::
+
+        {"op": "create", "task": {...}}
+        {"op": "patch", "id": 1, "changes": {...}}
+        {"op": "delete", "id": 1}
+
+    Creates run first, then patches, then deletes. Invalid items and patches
+    or deletes of missing tasks are reported in their result without
+    affecting the rest of the batch; a database error rolls back everything.
+    Deleting a task also deletes its files, their uploads and their vectors.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        operations (list[dict]): Operations to apply
+        vector_db (VectorDb, optional): Store to remove deleted files'
+            chunks from; without one only the uploads are removed
+
+    Returns:
+        list[dict]: One result per operation, in request order, with the
+            ``index`` of the operation, an HTTP-style ``status`` and either the
+            resulting ``task`` or an ``error``
+
+    Raises:
+        BatchError: If the request is not a list of operations or is too large
+    """
+    if not isinstance(operations, list):
+        raise BatchError('operations must be a list')
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f'At most {MAX_OPERATIONS} operations are allowed per batch')
+
+    results = [None] * len(operations)
+    creates = []
+    patches = defaultdict(list)
+    deletes = []
+
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op == 'create':
+            task = operation.get('task')
+            if not isinstance(task, dict) or not task.get('title'):
+                results[index] = {'index': index, 'status': 400, 'error': 'Title is required'}
+                continue
+            creates.append((index, task))
+        elif op == 'patch':
+            changes = operation.get('changes')
+            columns = _changes_to_columns(changes) if isinstance(changes, dict) else {}
+            task_id = _task_id(operation)
+            if task_id is None or not columns:
+                results[index] = {'index': index, 'status': 400, 'error': 'Task ID and valid fields are required'}
+                continue
+            patches[tuple(sorted(columns))].append((index, task_id, columns))
+        elif op == 'delete':
+            task_id = _task_id(operation)
+            if task_id is None:
+                results[index] = {'index': index, 'status': 400, 'error': 'Task ID is required'}
+                continue
+            deletes.append((index, task_id))
+        else:
+            results[index] = {'index': index, 'status': 400, 'error': f'Unknown op: {op}'}
+
+    patch_ids = {task_id for group in patches.values() for _, task_id, _ in group}
+    delete_ids = {task_id for _, task_id in deletes}
+
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        existing = set(_fetch_tasks(conn, patch_ids | delete_ids))
+
+        created_ids = []
+        if creates:
+            created_ids = list(reserve_ids(conn, 'tasks', len(creates)))
+            now = datetime.now().isoformat()
+            conn.executemany(
+                '''INSERT INTO tasks (id, folder_id, title, completed, is_important, notes, due_date, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                [
+                    (
+                        task_id,
+                        _normalize_folder_id(task.get('folder_id')),
+                        task['title'],
+                        task.get('completed', False),
+                        task.get('isImportant', False),
+                        task.get('notes', ''),
+                        task.get('dueDate'),
+                        now
+                    )
+                    for task_id, (_, task) in zip(created_ids, creates)
+                ]
+            )
+
+        patched = []
+        for column_set, group in patches.items():
+            rows = []
+            for index, task_id, columns in group:
+                if task_id not in existing:
+                    results[index] = {'index': index, 'status': 404, 'error': 'Task not found'}
+                    continue
+                rows.append([columns[column] for column in column_set] + [task_id])
+                patched.append((index, task_id))
+            if rows:
+                assignments = ', '.join(f'{column} = ?' for column in column_set)
+                conn.executemany(f'UPDATE tasks SET {assignments} WHERE id = ?', rows)
+
+        deleted = [task_id for _, task_id in deletes if task_id in existing]
+        files = []
+        if deleted:
+            files = delete_task_files(conn, deleted)
+            conn.executemany('DELETE FROM tasks WHERE id = ?', [(task_id,) for task_id in deleted])
+
+        tasks = _fetch_tasks(conn, set(created_ids) | {task_id for _, task_id in patched})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    release_files(conn, vector_db, files)
+
+    for task_id, (index, _) in zip(created_ids, creates):
+        results[index] = {'index': index, 'status': 201, 'task': tasks[task_id]}
+    for index, task_id in patched:
+        if task_id in delete_ids and task_id in existing:
+            # Deleted later in the same batch
+            results[index] = {'index': index, 'status': 200, 'task': None}
+        else:
+            results[index] = {'index': index, 'status': 200, 'task': tasks[task_id]}
+    for index, task_id in deletes:
+        if task_id in existing:
+            results[index] = {'index': index, 'status': 204, 'task': None}
+        else:
+            results[index] = {'index': index, 'status': 404, 'error': 'Task not found'}
+
+    return results
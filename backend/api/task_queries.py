@@ -0,0 +1,361 @@
+"""
+Task query building and serialization for Go Do List.
+
+Translates the filter, sort, projection and keyset-pagination parameters
+accepted by ``GET /tasks`` into SQL, and turns task rows into the JSON shape
+the frontend expects. Also reads the per-folder and per-view counts served by
+``GET /tasks/stats`` from the summary tables kept by triggers (see
+migrations).
+"""
+
+import base64
+import json
+import re
+from datetime import date, timedelta
+from .text_index import fts_query
+
+# API field name -> tasks column
+TASK_FIELDS = {
+    'id': 'id',
+    'folder_id': 'folder_id',
+    'title': 'title',
+    'completed': 'completed',
+    'isImportant': 'is_important',
+    'notes': 'notes',
+    'dueDate': 'due_date',
+    'createdAt': 'created_at'
+}
+BOOLEAN_FIELDS = {'completed', 'isImportant'}
+
+# Sort name -> SQL expression; every sort is tie-broken on id for the keyset
+SORT_KEYS = {
+    'created_at': 'created_at',
+    'due_date': "COALESCE(due_date, '')",
+    'title': 'title'
+}
+DEFAULT_SORT = 'created_at'
+
+# Server-side views; due dates compare on their leading YYYY-MM-DD
+TASK_VIEWS = ('all', 'important', 'completed', 'due_today', 'overdue')
+# Views whose results depend on the date they are relative to
+DUE_DATE_VIEWS = ('due_today', 'overdue')
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class QueryError(ValueError):
+    """Raised when request parameters cannot be turned into a task query."""
+
+
+def row_to_task(row, fields=None):
+    """
+    Convert a task row into its API representation.
+
+    Args:
+        row (sqlite3.Row): Row selected with column names from TASK_FIELDS
+        fields (list[str], optional): API fields to include, defaults to all
+
+    Returns:
+        dict: Task data keyed by API field name
+    """
+    task = {}
+    for field in fields or TASK_FIELDS:
+        value = row[TASK_FIELDS[field]]
+        task[field] = bool(value) if field in BOOLEAN_FIELDS else value
+    return task
+
+
+def _parse_bool(value, name):
+    """
+    Parse a boolean query parameter.
+
+    Args:
+        value (str): Raw parameter value
+        name (str): Parameter name, used in error messages
+
+    Returns:
+        bool: Parsed value
+
+    Raises:
+        QueryError: If the value is not a recognised boolean
+    """
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes'):
+        return True
+    if lowered in ('0', 'false', 'no'):
+        return False
+    raise QueryError(f'Invalid value for {name}: {value}')
+
+
+def parse_fields(value):
+    """
+    Parse a ``fields=`` projection.
+
+    Args:
+        value (str|None): Comma-separated API field names
+
+    Returns:
+        list[str]: Requested fields, or all fields when no projection is given
+
+    Raises:
+        QueryError: If an unknown field is requested
+    """
+    if not value:
+        return list(TASK_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in TASK_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_today(value):
+    """
+    Parse the ``today`` parameter that due-date views are relative to.
+
+    Clients pass their local date so that "due today" follows their
+    timezone rather than the server's.
+
+    Args:
+        value (str|None): ISO date (YYYY-MM-DD)
+
+    Returns:
+        str: The date, or the server's current date when none is given
+
+    Raises:
+        QueryError: If the value is not an ISO date
+    """
+    if not value:
+        return date.today().isoformat()
+    try:
+        if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+            raise ValueError(value)
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise QueryError(f'Invalid date for today: {value}')
+
+
+def view_conditions(view, today):
+    """
+    Build the WHERE conditions selecting the tasks in a view.
+
+    Conditions are written to match the partial indexes on open and
+    important tasks, and agree with the counts in task_stats().
+
+    Args:
+        view (str): One of TASK_VIEWS
+        today (str): ISO date the due-date views are relative to
+
+    Returns:
+        tuple: (list of SQL conditions, list of parameters)
+
+    Raises:
+        QueryError: If the view is unknown
+    """
+    if view not in TASK_VIEWS:
+        raise QueryError(f'Invalid view: {view}')
+    if view == 'important':
+        return ['is_important = 1'], []
+    if view == 'completed':
+        return ['completed = 1'], []
+    if view == 'due_today':
+        tomorrow = (date.fromisoformat(today) + timedelta(days=1)).isoformat()
+        return ['completed = 0', 'due_date >= ?', 'due_date < ?'], [today, tomorrow]
+    if view == 'overdue':
+        return ['completed = 0', "due_date != ''", 'due_date < ?'], [today]
+    return [], []
+
+
+def task_stats(conn, today):
+    """
+    Read task counts per folder and per view.
+
+    The counts come from task_counts and task_due_counts in one grouped
+    query, so reading them costs one row per folder (plus one per folder and
+    past due date with open tasks) however many tasks there are.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        today (str): ISO date the due-date counts are relative to
+
+    Returns:
+        dict: ``views`` with a count for each of TASK_VIEWS, ``folders``
+            with the same counts keyed by folder ID, ``unassigned`` for tasks
+            without a folder, and ``today``
+    """
+    rows = conn.execute(
+        '''SELECT c.folder_id, c.total, c.completed, c.important,
+                  COALESCE(d.due_today, 0) AS due_today, COALESCE(d.overdue, 0) AS overdue
+           FROM task_counts c
+           LEFT JOIN (
+               SELECT folder_id,
+                      SUM(CASE WHEN due_date = :today THEN open ELSE 0 END) AS due_today,
+                      SUM(CASE WHEN due_date < :today THEN open ELSE 0 END) AS overdue
+               FROM task_due_counts WHERE due_date <= :today
+               GROUP BY folder_id
+           ) d ON d.folder_id = c.folder_id''',
+        {'today': today}
+    ).fetchall()
+
+    views = dict.fromkeys(TASK_VIEWS, 0)
+    folders = {}
+    unassigned = dict(views)
+    for row in rows:
+        counts = {
+            'all': row['total'],
+            'important': row['important'],
+            'completed': row['completed'],
+            'due_today': row['due_today'],
+            'overdue': row['overdue']
+        }
+        for view, count in counts.items():
+            views[view] += count
+        if row['folder_id']:
+            folders[str(row['folder_id'])] = counts
+        else:
+            unassigned = counts
+    return {'today': today, 'views': views, 'folders': folders, 'unassigned': unassigned}
+
+
+def encode_cursor(sort, value, task_id):
+    """
+    Encode a keyset position as an opaque cursor string.
+
+    Args:
+        sort (str): Sort specification the cursor belongs to
+        value: Sort key of the last task on the page
+        task_id (int): ID of the last task on the page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps([sort, value, task_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Args:
+        cursor (str): Cursor from a previous page
+        sort (str): Sort specification of the current request
+
+    Returns:
+        tuple: (sort key value, task id)
+
+    Raises:
+        QueryError: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        task_id = int(task_id)
+    except (ValueError, TypeError):
+        raise QueryError('Invalid cursor')
+    # The value is bound as a query parameter, so it must be a scalar
+    if value is not None and not isinstance(value, (str, int, float)):
+        raise QueryError('Invalid cursor')
+    if cursor_sort != sort:
+        raise QueryError('Cursor does not match the requested sort')
+    return value, task_id
+
+
+def build_task_query(args):
+    """
+    Build the SQL for a task listing request.
+
+    Supported parameters: ``view`` (one of TASK_VIEWS, with due-date views
+    relative to ``today``), ``folder_id``, ``completed``, ``important``,
+    ``due_after`` / ``due_before`` (inclusive ISO dates), ``q`` (full-text
+    search of titles and notes), ``sort`` (one of SORT_KEYS, prefixed with
+    ``-`` for descending), ``fields`` and the pagination parameters ``limit``
+    and ``cursor``.
+
+    Args:
+        args (Mapping): Request query parameters
+
+    Returns:
+        dict: ``sql`` and ``params`` for the query, the API ``fields`` to
+            return, ``sort``, when paginating, the page ``limit`` and, for
+            due-date views, the ``today`` they are relative to (otherwise
+            None)
+
+    Raises:
+        QueryError: If any parameter is invalid
+    """
+    fields = parse_fields(args.get('fields'))
+
+    sort = args.get('sort') or DEFAULT_SORT
+    descending = sort.startswith('-')
+    sort_name = sort.lstrip('-')
+    if sort_name not in SORT_KEYS:
+        raise QueryError(f'Invalid sort: {sort}')
+    sort_expr = SORT_KEYS[sort_name]
+
+    view = args.get('view') or 'all'
+    today = parse_today(args.get('today'))
+    where, params = view_conditions(view, today)
+
+    folder_id = args.get('folder_id')
+    if folder_id:
+        where.append('folder_id = ?')
+        params.append(folder_id)
+
+    if args.get('completed') is not None:
+        where.append('completed = ?')
+        params.append(int(_parse_bool(args['completed'], 'completed')))
+
+    if args.get('important') is not None:
+        where.append('is_important = ?')
+        params.append(int(_parse_bool(args['important'], 'important')))
+
+    if args.get('due_after'):
+        where.append('due_date >= ?')
+        params.append(args['due_after'])
+
+    if args.get('due_before'):
+        where.append('due_date <= ?')
+        params.append(args['due_before'])
+
+    if args.get('q'):
+        match = fts_query(args['q'])
+        # Text without any words matches nothing
+        where.append('id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)' if match else '0')
+        if match:
+            params.append(match)
+
+    limit = None
+    cursor = args.get('cursor')
+    if args.get('limit') or cursor:
+        try:
+            limit = int(args.get('limit') or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            raise QueryError(f"Invalid limit: {args.get('limit')}")
+        if limit < 1:
+            raise QueryError(f'Invalid limit: {limit}')
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    if cursor:
+        value, task_id = decode_cursor(cursor, sort)
+        operator = '<' if descending else '>'
+        where.append(f'({sort_expr}, id) {operator} (?, ?)')
+        params.extend([value, task_id])
+
+    columns = {TASK_FIELDS[field] for field in fields} | {'id'}
+    select = ', '.join(sorted(columns))
+    direction = 'DESC' if descending else 'ASC'
+    sql = f'SELECT {select}, {sort_expr} AS sort_key FROM tasks'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {sort_expr} {direction}, id {direction}'
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        sql += ' LIMIT ?'
+        params.append(limit + 1)
+
+    return {
+        'sql': sql, 'params': params, 'fields': fields, 'sort': sort, 'limit': limit,
+        'today': today if view in DUE_DATE_VIEWS else None
+    }
@@ -2,47 +2,70 @@
 Task management routes for Go Do List.
 """
 
-from flask import Blueprint, request, jsonify
-from .database import db_path
+import io
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from . import database
+from .connection import get_connection
+from .events import publish_changes
+from .response_cache import response_cache, response_cache_stats, scope_key
+from .revisions import is_not_modified, not_modified_response, revision_etag, tag_response
+from .task_queries import QueryError, build_task_query, encode_cursor, parse_today, row_to_task, task_stats
+from .task_batch import BatchError, apply_batch
+from .task_transfer import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, TransferError, export_records, import_lines
+from .vector_gc import delete_task_files, release_files
 from datetime import datetime
-import sqlite3
 
 task_bp = Blueprint('tasks', __name__)
+task_bp.after_request(publish_changes)
 
 @task_bp.route('/tasks', methods=['GET', 'POST', 'PATCH', 'DELETE'])
 def manage_tasks():
     """
     Manage tasks (GET: list tasks, POST: create task, PATCH: update task, DELETE: delete task).
     
+    GET accepts the view, filter, search, sort and ``fields`` parameters
+    described in task_queries.build_task_query(). Passing ``limit`` or ``cursor`` switches
+    the response to a page object ``{"tasks": [...], "next_cursor": ...}``;
+    without them the full list is returned as before. Responses carry the
+    current revision (and, for due-date views, the date they are relative
+    to) as their ETag and answer 304 to a matching If-None-Match.
+    
     Returns:
         Response: JSON response with task data
     """
     if request.method == 'GET':
-        folder_id = request.args.get('folder_id')
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        try:
+            query = build_task_query(request.args)
+        except QueryError as e:
+            return jsonify({'error': str(e)}), 400
+
+        with get_connection() as conn:
+            etag = revision_etag(conn)
+            if query['today']:
+                # The same revision matches other tasks on another day
+                etag = f"{etag}-{query['today']}"
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+
             cursor = conn.cursor()
-            if folder_id:
-                cursor.execute('''
-                    SELECT id, folder_id, title, completed, is_important, notes, due_date, created_at 
-                    FROM tasks WHERE folder_id = ?
-                ''', (folder_id,))
-            else:
-                cursor.execute('SELECT id, folder_id, title, completed, is_important, notes, due_date, created_at FROM tasks')
-            
-            tasks = []
-            for row in cursor.fetchall():
-                tasks.append({
-                    'id': row['id'],
-                    'folder_id': row['folder_id'],
-                    'title': row['title'],
-                    'completed': bool(row['completed']),
-                    'isImportant': bool(row['is_important']),
-                    'notes': row['notes'],
-                    'dueDate': row['due_date'],
-                    'createdAt': row['created_at']
-                })
-            return jsonify(tasks)
+            cursor.execute(query['sql'], query['params'])
+
+            # Unpaginated requests keep returning a plain list for existing clients
+            if query['limit'] is None:
+                return tag_response(jsonify([row_to_task(row, query['fields']) for row in cursor]), etag)
+
+            rows = cursor.fetchmany(query['limit'] + 1)
+            next_cursor = None
+            if len(rows) > query['limit']:
+                rows = rows[:query['limit']]
+                last = rows[-1]
+                next_cursor = encode_cursor(query['sort'], last['sort_key'], last['id'])
+
+            return tag_response(jsonify({
+                'tasks': [row_to_task(row, query['fields']) for row in rows],
+                'next_cursor': next_cursor
+            }), etag)
 
     if request.method == 'POST':
         data = request.json
@@ -50,7 +73,7 @@ def manage_tasks():
             return jsonify({'error': 'Title is required'}), 400
             
         try:
-            with sqlite3.connect(db_path) as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 # Convert empty string or 'unassigned' to None for folder_id
                 folder_id = data.get('folder_id')
@@ -98,7 +121,7 @@ def manage_tasks():
             return jsonify({'error': 'No update data provided'}), 400
             
         try:
-            with sqlite3.connect(db_path) as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Build update query dynamically based on provided fields
@@ -177,60 +200,310 @@ def manage_tasks():
             return jsonify({'error': 'Task ID is required'}), 400
             
         try:
-            with sqlite3.connect(db_path) as conn:
+            with get_connection() as conn:
                 cursor = conn.cursor()
+                # Cascade to the task's files, then clean up their uploads and vectors
+                files = delete_task_files(conn, [task_id])
                 cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
                 conn.commit()
+                release_files(conn, database.get_vector_db(), files)
                 return '', 204
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+@task_bp.route('/tasks/stats', methods=['GET'])
+def get_task_stats():
+    """
+    Get task counts per folder and per view.
+    
+    Counts are read from summary tables kept up to date by triggers, so the
+    cost does not grow with the number of tasks. Due-date counts are
+    relative to the ``today`` query parameter (YYYY-MM-DD), defaulting to
+    the server's date.
+    
+    Returns:
+        Response: JSON response with ``views``, ``folders`` and ``unassigned``
+            counts
+    """
+    try:
+        today = parse_today(request.args.get('today'))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    with get_connection() as conn:
+        # The same revision gives different due-date counts on another day
+        etag = f'{revision_etag(conn)}-{today}'
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        return tag_response(jsonify(task_stats(conn, today)), etag)
+
+@task_bp.route('/tasks/export', methods=['GET'])
+def export_tasks():
+    """
+    Export all folders, tasks and file metadata as streamed NDJSON.
+    
+    Returns:
+        Response: Streaming ``application/x-ndjson`` response
+    """
+    conn = get_connection()
+    return Response(
+        stream_with_context(export_records(conn)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=godolist-export.ndjson'}
+    )
+
+@task_bp.route('/tasks/import', methods=['POST'])
+def import_tasks():
+    """
+    Import folders, tasks and file metadata from an NDJSON request body.
+    
+    The body is read line by line and written in batched transactions of
+    ``batch_size`` records (query parameter). IDs are reassigned on import.
+    
+    Returns:
+        Response: JSON response with the number of records imported
+    """
+    try:
+        batch_size = int(request.args.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid batch_size'}), 400
+    if batch_size < 1 or batch_size > MAX_BATCH_SIZE:
+        return jsonify({'error': f'batch_size must be between 1 and {MAX_BATCH_SIZE}'}), 400
+
+    try:
+        # Buffer the raw request stream so lines are not read byte by byte
+        lines = io.BufferedReader(request.stream, buffer_size=64 * 1024)
+        counts = import_lines(get_connection(), lines, batch_size)
+        return jsonify(counts), 201
+    except TransferError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@task_bp.route('/tasks/batch', methods=['POST'])
+def batch_tasks():
+    """
+    Apply several task creates, patches and deletes in one transaction.
+    
+    Expects ``{"operations": [...]}`` as described in task_batch.apply_batch().
+    
+    Returns:
+        Response: JSON response with one result per operation
+    """
+    data = request.json
+    if not data or 'operations' not in data:
+        return jsonify({'error': 'Operations are required'}), 400
+
+    try:
+        with get_connection() as conn:
+            results = apply_batch(conn, data['operations'], vector_db=database.get_vector_db())
+            return jsonify({'results': results})
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @task_bp.route('/process-task', methods=['POST'])
 def process_task():
     """
     Process a task using the general agent.
     
+    Agents come from the shared registry, so repeated requests for the same
+    task and files reuse an initialized agent and its pooled connections.
+    The agent only retrieves chunks of the task's own files.
+    Answers are cached per task type, description, query, document contents
+    and model (see response_cache); ``"no_cache": true`` in the body forces
+    a fresh answer, which then replaces the cached one.
+    
+    With ``?stream=1``, or ``Accept: application/x-ndjson``, the answer is
+    streamed as NDJSON while the model produces it: a ``task`` record, one
+    ``token`` record per piece of the answer, then ``done`` (or ``error``).
+    The model run is stopped if the client disconnects.
+    
+    Under the ASGI server this route is answered by asgi.process_task()
+    instead, which behaves the same without holding a thread.
+    
     Returns:
-        Response: JSON response with processing results
+        Response: JSON response with the task and the agent's answer, or a
+            streaming ``application/x-ndjson`` response
     """
     data = request.json
     if not data or 'task_id' not in data:
         return jsonify({'error': 'Task ID is required'}), 400
         
     try:
-        # Get task details
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, title, notes 
-                FROM tasks WHERE id = ?
-            ''', (data['task_id'],))
-            row = cursor.fetchone()
-            
-            if not row:
-                return jsonify({'error': 'Task not found'}), 404
-                
-            task = {
-                'id': row[0],
-                'title': row[1],
-                'notes': row[2]
-            }
-            
-            # Get associated files
-            cursor.execute('''
-                SELECT file_path, embedding_id 
-                FROM task_files 
-                WHERE task_id = ? AND embedding_id IS NOT NULL
-            ''', (data['task_id'],))
-            files = cursor.fetchall()
-            
-            # Process task with general agent
-            from agents.general_agent import GeneralAgent
-            from .database import vector_db
-            agent = GeneralAgent(vector_db)
-            result = agent.process_task(task, files)
-            
-            return jsonify(result)
+        from agents.registry import registry
+
+        with get_connection() as conn:
+            context = process_context(conn, data)
+        if context is None:
+            return jsonify({'error': 'Task not found'}), 404
+        task = context['task']
+
+        def remember(content):
+            remember_answer(context, content)
+
+        if request.args.get('stream') in ('1', 'true') or \
+                request.accept_mimetypes.best == 'application/x-ndjson':
+            return Response(
+                stream_answer(registry, task, context['task_type'], context['description'],
+                              context['file_paths'], context['file_hashes'], context['cached'], remember),
+                mimetype='application/x-ndjson',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        if context['cached'] is not None:
+            return jsonify({'task': task, 'content': context['cached'], 'cached': True})
+
+        # Run the agent without holding a database connection
+        with registry.agent(context['task_type'], context['description'], context['file_paths'],
+                            context['file_hashes']) as agent:
+            response = agent.process_task(task['title'])
+        remember(response.content)
+
+        return jsonify({'task': task, 'content': response.content, 'cached': False})
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+def process_context(conn, data):
+    """
+    Look up what answering a /process-task request needs.
+    
+    Shared by the Flask view and the async handler in asgi.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        data (dict): Request body, with ``task_id`` and optional
+            ``task_type`` and ``no_cache``
+        
+    Returns:
+        dict|None: ``task``, ``task_type``, ``description``, the task's
+            indexed ``file_paths`` and ``file_hashes``, the response cache
+            ``scope``, the ``cached`` answer (None on a miss or with
+            ``no_cache``) and the ``query_vector`` to store the answer with;
+            None if the task does not exist
+    """
+    from agents.general_agent import CHAT_MODEL, GeneralAgent
+
+    # Get task details
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, title, notes 
+        FROM tasks WHERE id = ?
+    ''', (data['task_id'],))
+    row = cursor.fetchone()
+    
+    if not row:
+        return None
+        
+    task = {
+        'id': row[0],
+        'title': row[1],
+        'notes': row[2]
+    }
+    
+    # Get associated files that finished indexing
+    cursor.execute('''
+        SELECT file_path, content_hash 
+        FROM task_files 
+        WHERE task_id = ? AND embedding_id IS NOT NULL
+    ''', (data['task_id'],))
+    files = cursor.fetchall()
+
+    task_type = data.get('task_type') or 'review'
+    description = task['notes'] or task['title']
+    scope = scope_key(
+        CHAT_MODEL,
+        GeneralAgent._get_task_instructions(task_type),
+        description,
+        # Files indexed before content hashing are identified by path
+        [file_row[1] or file_row[0] for file_row in files]
+    )
+    cached, query_vector = None, None
+    if not data.get('no_cache'):
+        cached, query_vector = response_cache.lookup(conn, CHAT_MODEL, scope, task['title'])
+    return {
+        'task': task,
+        'task_type': task_type,
+        'description': description,
+        'file_paths': [file_row[0] for file_row in files],
+        'file_hashes': [file_row[1] for file_row in files if file_row[1]],
+        'scope': scope,
+        'cached': cached,
+        'query_vector': query_vector
+    }
+
+def remember_answer(context, content):
+    """
+    Cache an agent's answer to a /process-task request.
+    
+    Args:
+        context (dict): Request context from process_context()
+        content (str): The answer
+    """
+    from agents.general_agent import CHAT_MODEL
+
+    with get_connection() as conn:
+        response_cache.store(conn, context['task']['id'], CHAT_MODEL, context['scope'], context['task']['title'],
+                             content, context['query_vector'])
+
+@task_bp.route('/process-task/cache', methods=['GET'])
+def get_response_cache_stats():
+    """
+    Get agent response cache hit rates.
+    
+    Returns:
+        Response: JSON response with one entry per chat model
+    """
+    try:
+        with get_connection() as conn:
+            return jsonify(response_cache_stats(conn))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def stream_answer(registry, task, task_type, description, file_paths, file_hashes=(), cached=None,
+                  remember=None):
+    """
+    Stream an agent's answer to a task as NDJSON records.
+    
+    The agent stays checked out of the registry until the stream ends or
+    the server closes it because the client went away, which also closes
+    the model's stream.
+    
+    Args:
+        registry (AgentRegistry): Registry to check an agent out of
+        task (dict): Task being processed
+        task_type (str): Type of task to perform
+        description (str): Description of the task
+        file_paths (list[str]): Indexed files of the task
+        file_hashes (list[str]): Content hashes of those files
+        cached (str, optional): Cached answer to send instead of running the agent
+        remember (callable, optional): Called with the complete answer once
+            the model has finished
+        
+    Yields:
+        str: One JSON record per line
+    """
+    yield json.dumps({'type': 'task', 'task': task}) + '\n'
+    if cached is not None:
+        yield json.dumps({'type': 'token', 'content': cached}) + '\n'
+        yield json.dumps({'type': 'done', 'cached': True}) + '\n'
+        return
+
+    answer = []
+    try:
+        with registry.agent(task_type, description, file_paths, file_hashes) as agent:
+            tokens = agent.stream_task(task['title'])
+            try:
+                for token in tokens:
+                    answer.append(token)
+                    yield json.dumps({'type': 'token', 'content': token}) + '\n'
+            finally:
+                tokens.close()
+        if remember:
+            remember(''.join(answer))
+    except Exception as e:
+        yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        return
+    yield json.dumps({'type': 'done', 'cached': False}) + '\n'
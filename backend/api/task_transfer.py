@@ -0,0 +1,290 @@
+"""
+Bulk export and import of tasks for Go Do List.
+
+The interchange format is NDJSON: one JSON object per line with a ``type`` of
+``folder``, ``task`` or ``file``. Exports list folders, then tasks, then file
+metadata, so an import can remap IDs in a single pass.
+"""
+
+import json
+from .task_queries import TASK_FIELDS, row_to_task
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 10000
+
+# Rows fetched from SQLite per round trip while exporting
+EXPORT_FETCH_SIZE = 1000
+
+
+class TransferError(ValueError):
+    """Raised when an import stream contains an invalid record."""
+
+
+def _dump(record):
+    """
+    Serialize one record as an NDJSON line.
+
+    Args:
+        record (dict): Record to serialize
+
+    Returns:
+        str: JSON text terminated by a newline
+    """
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def _iter_rows(conn, sql):
+    """
+    Iterate over a query's rows without loading them all at once.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        sql (str): Query to run
+
+    Yields:
+        sqlite3.Row: Result rows
+    """
+    cursor = conn.execute(sql)
+    while True:
+        rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def export_records(conn):
+    """
+    Stream every folder, task and file record as NDJSON lines.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Yields:
+        str: One NDJSON line per record
+    """
+    for row in _iter_rows(conn, 'SELECT id, name FROM folders ORDER BY id'):
+        yield _dump({'type': 'folder', 'id': row['id'], 'name': row['name']})
+
+    columns = ', '.join(TASK_FIELDS.values())
+    for row in _iter_rows(conn, f'SELECT {columns} FROM tasks ORDER BY id'):
+        yield _dump({'type': 'task', **row_to_task(row)})
+
+    file_sql = 'SELECT id, task_id, filename, file_path, embedding_id, status FROM task_files ORDER BY id'
+    for row in _iter_rows(conn, file_sql):
+        yield _dump({'type': 'file', **dict(row)})
+
+
+def reserve_ids(conn, table, count):
+    """
+    Reserve a contiguous block of primary keys in an AUTOINCREMENT table.
+
+    Must be called inside a write transaction so no other writer can claim
+    the same IDs before they are inserted.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name
+        count (int): Number of IDs to reserve
+
+    Returns:
+        range: Reserved IDs
+    """
+    row = conn.execute(
+        f'''SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                       COALESCE((SELECT MAX(id) FROM {table}), 0))''',
+        (table,)
+    ).fetchone()
+    return range(row[0] + 1, row[0] + 1 + count)
+
+
+class TaskImporter:
+    """
+    Insert exported records in batched transactions.
+
+    Records are buffered per type and written with one ``executemany`` per
+    batch. IDs are reassigned on import; references from tasks to folders and
+    from files to tasks are rewritten using the IDs allocated earlier in the
+    same import. A task whose folder was not part of the import becomes
+    unassigned, and a file whose task was not imported is skipped.
+
+    Attributes:
+        conn (sqlite3.Connection): Database connection
+        batch_size (int): Number of records written per transaction
+        counts (dict): Number of records imported or skipped, by type
+    """
+
+    def __init__(self, conn, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Initialize the importer.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            batch_size (int): Number of records written per transaction
+        """
+        self.conn = conn
+        self.batch_size = batch_size
+        self.counts = {'folders': 0, 'tasks': 0, 'files': 0, 'skipped': 0}
+        self._folders = []
+        self._tasks = []
+        self._files = []
+        self._folder_ids = {}
+        self._task_ids = {}
+
+    def add(self, record):
+        """
+        Buffer one record, flushing its batch when full.
+
+        Args:
+            record (dict): Parsed NDJSON record
+
+        Raises:
+            TransferError: If the record is malformed
+        """
+        if not isinstance(record, dict):
+            raise TransferError('Record must be a JSON object')
+        kind = record.get('type')
+        if kind == 'folder':
+            if 'name' not in record:
+                raise TransferError('Folder record requires a name')
+            self._folders.append(record)
+            if len(self._folders) >= self.batch_size:
+                self._flush_folders()
+        elif kind == 'task':
+            if 'title' not in record:
+                raise TransferError('Task record requires a title')
+            self._tasks.append(record)
+            if len(self._tasks) >= self.batch_size:
+                self._flush_tasks()
+        elif kind == 'file':
+            if 'task_id' not in record or 'filename' not in record or 'file_path' not in record:
+                raise TransferError('File record requires task_id, filename and file_path')
+            self._files.append(record)
+            if len(self._files) >= self.batch_size:
+                self._flush_files()
+        else:
+            raise TransferError(f'Unknown record type: {kind}')
+
+    def _write(self, table, columns, rows):
+        """
+        Insert rows with freshly reserved IDs in one transaction.
+
+        Args:
+            table (str): Target table
+            columns (list[str]): Columns after ``id``
+            rows (list[tuple]): Values for ``columns``
+
+        Returns:
+            range: IDs assigned to the rows, in order
+        """
+        self.conn.commit()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            ids = reserve_ids(self.conn, table, len(rows))
+            placeholders = ', '.join('?' * (len(columns) + 1))
+            self.conn.executemany(
+                f"INSERT INTO {table} (id, {', '.join(columns)}) VALUES ({placeholders})",
+                [(new_id, *row) for new_id, row in zip(ids, rows)]
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return ids
+
+    def _flush_folders(self):
+        """Write buffered folders."""
+        if not self._folders:
+            return
+        ids = self._write('folders', ['name'], [(folder['name'],) for folder in self._folders])
+        for folder, new_id in zip(self._folders, ids):
+            if folder.get('id') is not None:
+                self._folder_ids[folder['id']] = new_id
+        self.counts['folders'] += len(self._folders)
+        self._folders = []
+
+    def _flush_tasks(self):
+        """Write buffered tasks, after any folders they may reference."""
+        self._flush_folders()
+        if not self._tasks:
+            return
+        rows = [
+            (
+                self._folder_ids.get(task.get('folder_id')),
+                task['title'],
+                bool(task.get('completed', False)),
+                bool(task.get('isImportant', False)),
+                task.get('notes', ''),
+                task.get('dueDate'),
+                task.get('createdAt') or '2025-04-14T13:00:00'
+            )
+            for task in self._tasks
+        ]
+        columns = ['folder_id', 'title', 'completed', 'is_important', 'notes', 'due_date', 'created_at']
+        ids = self._write('tasks', columns, rows)
+        for task, new_id in zip(self._tasks, ids):
+            if task.get('id') is not None:
+                self._task_ids[task['id']] = new_id
+        self.counts['tasks'] += len(self._tasks)
+        self._tasks = []
+
+    def _flush_files(self):
+        """Write buffered file records, after any tasks they may reference."""
+        self._flush_tasks()
+        if not self._files:
+            return
+        rows = []
+        for record in self._files:
+            task_id = self._task_ids.get(record['task_id'])
+            if task_id is None:
+                self.counts['skipped'] += 1
+                continue
+            embedding_id = record.get('embedding_id')
+            status = 'ready' if embedding_id is not None else 'failed'
+            rows.append((task_id, record['filename'], record['file_path'], embedding_id, status))
+        if rows:
+            columns = ['task_id', 'filename', 'file_path', 'embedding_id', 'status']
+            self._write('task_files', columns, rows)
+            self.counts['files'] += len(rows)
+        self._files = []
+
+    def finish(self):
+        """
+        Write any remaining buffered records.
+
+        Returns:
+            dict: Number of records imported or skipped, by type
+        """
+        self._flush_files()
+        return self.counts
+
+
+def import_lines(conn, lines, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Import NDJSON lines incrementally.
+
+    Batches already written are kept if a later line turns out to be invalid.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        lines (Iterable[bytes|str]): NDJSON lines, e.g. a request stream
+        batch_size (int): Number of records written per transaction
+
+    Returns:
+        dict: Number of records imported or skipped, by type
+
+    Raises:
+        TransferError: If a line is not valid JSON or not a valid record
+    """
+    importer = TaskImporter(conn, batch_size)
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise TransferError(f'Line {number}: invalid JSON ({e})')
+        try:
+            importer.add(record)
+        except TransferError as e:
+            raise TransferError(f'Line {number}: {e}')
+    return importer.finish()
@@ -0,0 +1,329 @@
+"""
+SQLite FTS5 full-text index over tasks and document chunks.
+
+Task titles and notes are indexed by ``tasks_fts``, an external-content FTS5
+table kept up to date by triggers on ``tasks`` (see migrations).
+
+Chunk text is written by the ingestion path: each distinct chunk is stored
+once in ``chunk_text`` under the same content-addressed point ID it has in
+the vector store, ``file_chunks`` records which file contents (by SHA-256)
+contain it, and triggers copy the text into ``chunks_fts``. Like the vector
+tags, chunk lookups are keyed by file content hash, so files skipped as
+duplicates are searchable without being indexed again.
+
+Queries are ranked with FTS5's built-in BM25.
+"""
+
+import json
+import os
+import re
+import click
+from .connection import get_connection
+from .embedding_cache import point_id
+
+CHUNK_WRITE_BATCH = 500
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMS = 500
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query matching any of its words.
+
+    Every word is quoted, so FTS5 operators and punctuation in user input are
+    searched for literally instead of being parsed.
+
+    Args:
+        text (str): Search text
+
+    Returns:
+        str|None: FTS5 query, or None if the text has no words
+    """
+    terms = list(dict.fromkeys(token.lower() for token in _TOKEN.findall(text or '')))
+    if not terms:
+        return None
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+
+def _placeholders(values):
+    """
+    Build a parameter list for an IN clause.
+
+    Args:
+        values (list): Values to bind
+
+    Returns:
+        str: Comma-separated ``?`` placeholders
+    """
+    return ', '.join('?' * len(values))
+
+
+def record_chunks(conn, file_hash, chunks, start=0):
+    """
+    Add a file's chunks to the full-text index.
+
+    Chunks already indexed for another file are linked rather than stored
+    again. Runs in the caller's transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_hash (str): SHA-256 of the file
+        chunks (list[Document]): Chunks of the file, in order
+        start (int): Position of the first chunk in the file
+
+    Returns:
+        int: Number of chunks recorded
+    """
+    rows = {}
+    for position, chunk in enumerate(chunks, start=start):
+        rows.setdefault(point_id(chunk.content), (position, chunk))
+    if not rows:
+        return 0
+    conn.executemany(
+        'INSERT OR IGNORE INTO chunk_text (point_id, name, meta_data, content) VALUES (?, ?, ?, ?)',
+        [
+            (id_, chunk.name, json.dumps(chunk.meta_data or {}), chunk.content.replace('\x00', '\ufffd'))
+            for id_, (_position, chunk) in rows.items()
+        ]
+    )
+    ids = list(rows)
+    chunk_ids = {}
+    for offset in range(0, len(ids), _MAX_PARAMS):
+        batch = ids[offset:offset + _MAX_PARAMS]
+        chunk_ids.update(conn.execute(
+            f'SELECT point_id, id FROM chunk_text WHERE point_id IN ({_placeholders(batch)})', batch
+        ).fetchall())
+    conn.executemany(
+        'INSERT OR IGNORE INTO file_chunks (file_hash, chunk_id, position) VALUES (?, ?, ?)',
+        [(file_hash, chunk_ids[id_], position) for id_, (position, _chunk) in rows.items()]
+    )
+    return len(rows)
+
+
+def recording(file_hash, chunks, batch_size=CHUNK_WRITE_BATCH):
+    """
+    Pass chunks through while adding them to the full-text index.
+
+    Lets the embedding pipeline and the text index consume one extraction:
+    chunks are written in batches of ``batch_size``, each in its own
+    transaction, as they stream past.
+
+    Args:
+        file_hash (str): SHA-256 of the file
+        chunks (Iterable[Document]): Chunks of the file, in order
+        batch_size (int): Chunks per write
+
+    Yields:
+        Document: The same chunks
+    """
+    conn = get_connection()
+    batch = []
+    position = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        yield chunk
+        if len(batch) >= batch_size:
+            with conn:
+                record_chunks(conn, file_hash, batch, position)
+            position += len(batch)
+            batch = []
+    if batch:
+        with conn:
+            record_chunks(conn, file_hash, batch, position)
+
+
+def has_chunks(conn, file_hash):
+    """
+    Check whether a file's chunks are in the full-text index.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_hash (str): SHA-256 of the file
+
+    Returns:
+        bool: True if at least one chunk is recorded
+    """
+    return conn.execute('SELECT 1 FROM file_chunks WHERE file_hash = ? LIMIT 1', (file_hash,)).fetchone() is not None
+
+
+def forget_files(conn, file_hashes):
+    """
+    Remove file contents from the full-text index.
+
+    Chunks no other file contains are deleted too. Runs in the caller's
+    transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_hashes (list[str]): SHA-256 of the files
+
+    Returns:
+        int: Number of chunks deleted
+    """
+    file_hashes = list(file_hashes)
+    deleted = 0
+    for offset in range(0, len(file_hashes), _MAX_PARAMS):
+        batch = file_hashes[offset:offset + _MAX_PARAMS]
+        chunk_ids = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT chunk_id FROM file_chunks WHERE file_hash IN ({_placeholders(batch)})', batch
+        )]
+        conn.execute(f'DELETE FROM file_chunks WHERE file_hash IN ({_placeholders(batch)})', batch)
+        for start in range(0, len(chunk_ids), _MAX_PARAMS):
+            ids = chunk_ids[start:start + _MAX_PARAMS]
+            deleted += conn.execute(
+                f'''DELETE FROM chunk_text WHERE id IN ({_placeholders(ids)})
+                    AND NOT EXISTS (SELECT 1 FROM file_chunks WHERE chunk_id = chunk_text.id)''',
+                ids
+            ).rowcount
+    return deleted
+
+
+def orphaned_files(conn):
+    """
+    List indexed file contents no task file has any more.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        list[str]: SHA-256 of the files
+    """
+    return [row[0] for row in conn.execute(
+        '''SELECT DISTINCT file_hash FROM file_chunks
+           WHERE file_hash NOT IN (SELECT content_hash FROM task_files WHERE content_hash IS NOT NULL)'''
+    )]
+
+
+def search_tasks(conn, query, limit, folder_id=None):
+    """
+    Rank tasks by BM25 over their title and notes.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        query (str): Search text
+        limit (int): Number of hits
+        folder_id (int, optional): Only search this folder's tasks
+
+    Returns:
+        list[sqlite3.Row]: Task rows with a ``score`` column, best first
+    """
+    match = fts_query(query)
+    if match is None:
+        return []
+    where, params = 'tasks_fts MATCH ?', [match]
+    if folder_id is not None:
+        where += ' AND t.folder_id = ?'
+        params.append(folder_id)
+    return conn.execute(
+        f'''SELECT t.*, bm25(tasks_fts) AS score
+            FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+            WHERE {where}
+            ORDER BY score LIMIT ?''',
+        [*params, limit]
+    ).fetchall()
+
+
+def search_chunks(conn, query, limit, file_hashes=None):
+    """
+    Rank document chunks by BM25.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        query (str): Search text
+        limit (int): Number of hits
+        file_hashes (list[str], optional): Only search chunks of these files
+
+    Returns:
+        list[sqlite3.Row]: ``point_id``, ``name``, ``meta_data``,
+            ``content``, ``snippet`` and ``score`` of each hit, best first
+    """
+    match = fts_query(query)
+    if match is None or (file_hashes is not None and not file_hashes):
+        return []
+    where, params = 'chunks_fts MATCH ?', [match]
+    if file_hashes is not None:
+        # One JSON parameter, however many files are in scope
+        where += ' AND c.id IN (SELECT chunk_id FROM file_chunks WHERE file_hash IN (SELECT value FROM json_each(?)))'
+        params.append(json.dumps(list(file_hashes)))
+    return conn.execute(
+        f'''SELECT c.point_id, c.name, c.meta_data, c.content,
+                   snippet(chunks_fts, 0, '[', ']', '…', 24) AS snippet, bm25(chunks_fts) AS score
+            FROM chunks_fts JOIN chunk_text c ON c.id = chunks_fts.rowid
+            WHERE {where}
+            ORDER BY score LIMIT ?''',
+        [*params, limit]
+    ).fetchall()
+
+
+def chunk_files(conn, point_ids):
+    """
+    Find the task files containing some chunks.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        point_ids (list[str]): Chunk point IDs
+
+    Returns:
+        dict: Point ID -> list of file dicts with ``id``, ``task_id`` and
+            ``filename``
+    """
+    files = {}
+    point_ids = list(point_ids)
+    for offset in range(0, len(point_ids), _MAX_PARAMS):
+        batch = point_ids[offset:offset + _MAX_PARAMS]
+        rows = conn.execute(
+            f'''SELECT c.point_id, f.id, f.task_id, f.filename
+                FROM chunk_text c
+                JOIN file_chunks fc ON fc.chunk_id = c.id
+                JOIN task_files f ON f.content_hash = fc.file_hash
+                WHERE c.point_id IN ({_placeholders(batch)})
+                ORDER BY f.id''',
+            batch
+        )
+        for row in rows:
+            files.setdefault(row[0], []).append({'id': row[1], 'task_id': row[2], 'filename': row[3]})
+    return files
+
+
+def backfill_chunks(conn):
+    """
+    Index the chunks of files ingested before the full-text index existed.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Number of files indexed
+    """
+    from .pdf_extraction import iter_chunks
+
+    files = conn.execute(
+        '''SELECT content_hash, MIN(file_path) AS file_path FROM task_files
+           WHERE embedding_id IS NOT NULL AND content_hash IS NOT NULL
+           GROUP BY content_hash'''
+    ).fetchall()
+    indexed = 0
+    for row in files:
+        if has_chunks(conn, row['content_hash']) or not os.path.exists(row['file_path']):
+            continue
+        with conn:
+            record_chunks(conn, row['content_hash'], list(iter_chunks(row['file_path'])))
+        indexed += 1
+    return indexed
+
+
+def init_app(app):
+    """
+    Register the full-text index CLI command.
+
+    Args:
+        app (Flask): Application to register with
+    """
+    @app.cli.command('index-text')
+    def index_text_command():
+        """Add files ingested before full-text search to the index."""
+        count = backfill_chunks(get_connection())
+        click.echo(f'Indexed the chunks of {count} files')
@@ -0,0 +1,531 @@
+"""
+Content-addressed storage and resumable uploads for Go Do List.
+
+Uploads are streamed to ``UPLOAD_FOLDER/incoming`` while their SHA-256 is
+computed, then moved to ``UPLOAD_FOLDER/objects/<2 hex digits>/<sha256>``.
+Every ``task_files`` row with the same contents points at the same object, so
+the rows sharing a ``file_path`` are its reference count: a duplicate costs
+no extra disk (files stored under their upload name before content
+addressing are shared the same way), and the file is deleted together with
+its last row (see remove_unreferenced()). Since the row is created with its
+``content_hash``, ingesting a duplicate only tags the chunks already indexed
+for it.
+
+Resumable uploads go through an ``upload_sessions`` row: create_session()
+reserves the upload, write_chunk() appends a chunk at the session's offset
+(keeping whatever arrived before a dropped connection) and finalize() moves
+the completed file into storage and attaches it to the task. Sessions left
+unfinished for ``UPLOAD_SESSION_TTL`` seconds are discarded.
+
+Moving an object into place and inserting its row happen under one SQLite
+write lock, as does checking and deleting an unreferenced object, so a
+concurrent delete never removes an object a new upload has just claimed.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from . import ingest_queue
+from .database import UPLOAD_FOLDER
+from .embedding_cache import file_hash
+
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', str(1024 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = float(os.getenv('UPLOAD_SESSION_TTL', '86400'))
+
+OBJECTS_FOLDER = os.path.join(UPLOAD_FOLDER, 'objects')
+INCOMING_FOLDER = os.path.join(UPLOAD_FOLDER, 'incoming')
+
+_BLOCK_SIZE = 1024 * 1024
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMS = 500
+
+# Running SHA-256 of each session written through this process, as
+# (offset hashed up to, hash object); other processes rehash on finalize
+_hashes = {}
+_session_locks = {}
+_lock = threading.Lock()
+
+
+class UploadError(ValueError):
+    """
+    Raised when an upload request cannot be honoured.
+
+    Attributes:
+        status (int): HTTP status to answer with
+        offset (int|None): Bytes the server holds, for the client to resume from
+    """
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def object_path(digest):
+    """
+    Path of the stored object with some contents.
+
+    Args:
+        digest (str): Hex SHA-256 of the contents
+
+    Returns:
+        str: Path under OBJECTS_FOLDER
+    """
+    return os.path.join(OBJECTS_FOLDER, digest[:2], digest)
+
+
+def _part_path(upload_id):
+    """
+    Path of an upload session's partial file.
+
+    Args:
+        upload_id (str): Session ID
+
+    Returns:
+        str: Path under INCOMING_FOLDER
+    """
+    return os.path.join(INCOMING_FOLDER, f'{upload_id}.part')
+
+
+def _session_lock(upload_id):
+    """
+    Lock serializing the writes to one session in this process.
+
+    Args:
+        upload_id (str): Session ID
+
+    Returns:
+        threading.Lock: The session's lock
+    """
+    with _lock:
+        return _session_locks.setdefault(upload_id, threading.Lock())
+
+
+def _forget_session(upload_id):
+    """
+    Drop a session's in-process state.
+
+    Args:
+        upload_id (str): Session ID
+    """
+    with _lock:
+        _hashes.pop(upload_id, None)
+        _session_locks.pop(upload_id, None)
+
+
+def _copy(stream, f, length, digest=None):
+    """
+    Copy up to ``length`` bytes of a stream to a file in blocks.
+
+    Args:
+        stream: Readable binary stream, e.g. the request body
+        f: File to write to
+        length (int|None): Bytes to copy, or None to copy until the stream ends
+        digest (hashlib object, optional): Hash to update with the bytes
+
+    Returns:
+        tuple: Bytes copied, and the error that cut the stream short or None
+    """
+    copied = 0
+    try:
+        while length is None or copied < length:
+            size = _BLOCK_SIZE if length is None else min(_BLOCK_SIZE, length - copied)
+            block = stream.read(size)
+            if not block:
+                break
+            f.write(block)
+            if digest is not None:
+                digest.update(block)
+            copied += len(block)
+    except Exception as e:
+        # The client went away mid-chunk; what was written can be kept
+        return copied, e
+    return copied, None
+
+
+def _lock_database(conn):
+    """
+    Start a write transaction, waiting for other writers to finish.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+
+
+def _check_target(conn, task_id, filename):
+    """
+    Check that a task exists and has no file with a name.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_id (int): ID of the task
+        filename (str): Name of the file being added
+
+    Raises:
+        UploadError: If the task is missing or already has the file
+    """
+    if not conn.execute('SELECT 1 FROM tasks WHERE id = ?', (task_id,)).fetchone():
+        raise UploadError('Task not found', 404)
+    if conn.execute(
+        'SELECT 1 FROM task_files WHERE task_id = ? AND filename = ?', (task_id, filename)
+    ).fetchone():
+        raise UploadError('File already exists for this task')
+
+
+def add_file(conn, task_id, filename, temp_path, digest, upload_id=None):
+    """
+    Move a received file into storage, attach it to a task and queue it.
+
+    Commits; the caller should notify the ingestion worker afterwards.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_id (int): ID of the task
+        filename (str): Name of the file
+        temp_path (str): Received file, moved into storage
+        digest (str): Hex SHA-256 of the file
+        upload_id (str, optional): Upload session to close in the same transaction
+
+    Returns:
+        dict: The new file, with ``deduplicated`` telling whether the
+            contents were already stored
+
+    Raises:
+        UploadError: If the task is missing or already has the file
+    """
+    path = object_path(digest)
+    _lock_database(conn)
+    try:
+        _check_target(conn, task_id, filename)
+        # Files uploaded before content addressing keep their own path
+        stored = conn.execute(
+            'SELECT file_path FROM task_files WHERE content_hash = ? ORDER BY file_path = ? DESC LIMIT 1',
+            (digest, path)
+        ).fetchone()
+        deduplicated = stored is not None and os.path.exists(stored['file_path'])
+        if deduplicated:
+            path = stored['file_path']
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        file_id = conn.execute(
+            '''INSERT INTO task_files (task_id, filename, file_path, content_hash, status)
+               VALUES (?, ?, ?, ?, 'queued')''',
+            (task_id, filename, path, digest)
+        ).lastrowid
+        ingest_queue.enqueue(conn, file_id)
+        if upload_id is not None:
+            conn.execute('DELETE FROM upload_sessions WHERE id = ?', (upload_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {
+        'id': file_id,
+        'task_id': task_id,
+        'filename': filename,
+        'file_path': path,
+        'content_hash': digest,
+        'embedding_id': None,
+        'status': 'queued',
+        'deduplicated': deduplicated
+    }
+
+
+def store_upload(conn, task_id, filename, stream):
+    """
+    Stream a whole upload to disk, hashing it on the way, and add it.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_id (int): ID of the task
+        filename (str): Name of the file
+        stream: Readable binary stream with the file's contents
+
+    Returns:
+        dict: The new file, see add_file()
+
+    Raises:
+        UploadError: If the task is missing, already has the file, or the
+            upload is too large or cut short
+    """
+    os.makedirs(INCOMING_FOLDER, exist_ok=True)
+    temp_path = _part_path(uuid.uuid4().hex)
+    try:
+        digest = hashlib.sha256()
+        with open(temp_path, 'wb') as f:
+            copied, error = _copy(stream, f, MAX_UPLOAD_SIZE + 1, digest)
+        if error is not None:
+            raise UploadError(f'Upload interrupted: {error}')
+        if copied > MAX_UPLOAD_SIZE:
+            raise UploadError(f'File is larger than {MAX_UPLOAD_SIZE} bytes', 413)
+        return add_file(conn, task_id, filename, temp_path, digest.hexdigest())
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def session_to_dict(session):
+    """
+    Describe an upload session to the client.
+
+    Args:
+        session (sqlite3.Row): upload_sessions row
+
+    Returns:
+        dict: Session ID, target, size, offset to send next and expiry time
+    """
+    return {
+        'upload_id': session['id'],
+        'task_id': session['task_id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'offset': session['received'],
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'expires_at': session['updated_at'] + UPLOAD_SESSION_TTL
+    }
+
+
+def get_session(conn, upload_id):
+    """
+    Look up an unexpired upload session.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        upload_id (str): Session ID
+
+    Returns:
+        sqlite3.Row: The session
+
+    Raises:
+        UploadError: If there is no such session
+    """
+    session = conn.execute(
+        'SELECT * FROM upload_sessions WHERE id = ? AND updated_at > ?',
+        (upload_id, time.time() - UPLOAD_SESSION_TTL)
+    ).fetchone()
+    if session is None:
+        raise UploadError('Upload not found', 404)
+    return session
+
+
+def create_session(conn, task_id, filename, size):
+    """
+    Start a resumable upload.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_id (int): ID of the task
+        filename (str): Name of the file
+        size (int): Size of the file in bytes
+
+    Returns:
+        sqlite3.Row: The new session
+
+    Raises:
+        UploadError: If the task is missing, already has the file, or the
+            size is out of range
+    """
+    if not 0 < size <= MAX_UPLOAD_SIZE:
+        raise UploadError(f'size must be between 1 and {MAX_UPLOAD_SIZE} bytes', 413 if size > 0 else 400)
+    _check_target(conn, task_id, filename)
+    expire_sessions(conn)
+    upload_id = uuid.uuid4().hex
+    os.makedirs(INCOMING_FOLDER, exist_ok=True)
+    open(_part_path(upload_id), 'wb').close()
+    now = time.time()
+    with conn:
+        conn.execute(
+            '''INSERT INTO upload_sessions (id, task_id, filename, size, received, created_at, updated_at)
+               VALUES (?, ?, ?, ?, 0, ?, ?)''',
+            (upload_id, task_id, filename, size, now, now)
+        )
+    return get_session(conn, upload_id)
+
+
+def write_chunk(conn, upload_id, offset, stream, length):
+    """
+    Write a chunk of a resumable upload.
+
+    The chunk must start where the bytes received so far end. If the stream
+    is cut short, the bytes that did arrive are kept and the error carries
+    the offset to resume from.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        upload_id (str): Session ID
+        offset (int): Position of the chunk in the file
+        stream: Readable binary stream with the chunk
+        length (int|None): Length of the chunk
+
+    Returns:
+        sqlite3.Row: The updated session
+
+    Raises:
+        UploadError: If the session is missing, the offset is not the
+            session's, the chunk does not fit or it was cut short
+    """
+    if length is None:
+        raise UploadError('Content-Length is required', 411)
+    with _session_lock(upload_id):
+        session = get_session(conn, upload_id)
+        received = session['received']
+        if offset != received:
+            raise UploadError(f'Expected offset {received}', 409, received)
+        if offset + length > session['size']:
+            raise UploadError(f"Chunk ends past the declared size of {session['size']} bytes", 413, received)
+
+        # Keep hashing only if this process saw every byte so far
+        with _lock:
+            hashed, digest = _hashes.pop(upload_id, (0, hashlib.sha256()))
+        if hashed != offset:
+            digest = None
+        with open(_part_path(upload_id), 'r+b') as f:
+            f.seek(offset)
+            f.truncate()
+            copied, error = _copy(stream, f, length, digest)
+            f.flush()
+            os.fsync(f.fileno())
+        if digest is not None:
+            with _lock:
+                _hashes[upload_id] = (offset + copied, digest)
+
+        with conn:
+            conn.execute(
+                'UPDATE upload_sessions SET received = ?, updated_at = ? WHERE id = ? AND received = ?',
+                (offset + copied, time.time(), upload_id, offset)
+            )
+        if error is not None or copied < length:
+            raise UploadError(f'Upload interrupted after {offset + copied} bytes', 400, offset + copied)
+        return get_session(conn, upload_id)
+
+
+def finalize(conn, upload_id):
+    """
+    Complete a resumable upload, storing the file and attaching it to its task.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        upload_id (str): Session ID
+
+    Returns:
+        dict: The new file, see add_file()
+
+    Raises:
+        UploadError: If the session is missing or incomplete, or the task is
+            gone or already has the file
+    """
+    with _session_lock(upload_id):
+        session = get_session(conn, upload_id)
+        if session['received'] != session['size']:
+            raise UploadError('Upload is incomplete', 409, session['received'])
+        with _lock:
+            hashed, digest = _hashes.get(upload_id, (0, None))
+        part = _part_path(upload_id)
+        digest = digest.hexdigest() if digest is not None and hashed == session['size'] else file_hash(part)
+        file = add_file(conn, session['task_id'], session['filename'], part, digest, upload_id)
+    _forget_session(upload_id)
+    return file
+
+
+def abort(conn, upload_id):
+    """
+    Cancel a resumable upload and delete what was received.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        upload_id (str): Session ID
+
+    Raises:
+        UploadError: If there is no such session
+    """
+    with _session_lock(upload_id):
+        get_session(conn, upload_id)
+        with conn:
+            conn.execute('DELETE FROM upload_sessions WHERE id = ?', (upload_id,))
+        if os.path.exists(_part_path(upload_id)):
+            os.remove(_part_path(upload_id))
+    _forget_session(upload_id)
+
+
+def expire_sessions(conn):
+    """
+    Discard upload sessions left unfinished for ``UPLOAD_SESSION_TTL`` seconds.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Sessions discarded
+    """
+    with conn:
+        expired = [row['id'] for row in conn.execute(
+            'SELECT id FROM upload_sessions WHERE updated_at <= ?', (time.time() - UPLOAD_SESSION_TTL,)
+        )]
+        for start in range(0, len(expired), _MAX_PARAMS):
+            chunk = expired[start:start + _MAX_PARAMS]
+            conn.execute(f"DELETE FROM upload_sessions WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+    for upload_id in expired:
+        if os.path.exists(_part_path(upload_id)):
+            os.remove(_part_path(upload_id))
+        _forget_session(upload_id)
+    return len(expired)
+
+
+def remove_unreferenced(conn, paths):
+    """
+    Delete stored files that no task_files row refers to any more.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        paths (Iterable[str]): Candidate file paths
+
+    Returns:
+        int: Bytes freed
+    """
+    freed = 0
+    _lock_database(conn)
+    try:
+        for path in set(paths):
+            if conn.execute('SELECT 1 FROM task_files WHERE file_path = ?', (path,)).fetchone():
+                continue
+            if os.path.exists(path):
+                freed += os.path.getsize(path)
+                os.remove(path)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return freed
+
+
+def sweep(conn):
+    """
+    Delete expired upload sessions and stored objects with no file rows.
+
+    Objects can be left behind when a delete fails after committing or a
+    process dies while adding a file.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Bytes freed by deleting objects
+    """
+    expire_sessions(conn)
+    paths = [
+        os.path.join(folder, name)
+        for folder, _dirs, names in os.walk(OBJECTS_FOLDER)
+        for name in names
+    ]
+    freed = 0
+    for start in range(0, len(paths), _MAX_PARAMS):
+        freed += remove_unreferenced(conn, paths[start:start + _MAX_PARAMS])
+    return freed
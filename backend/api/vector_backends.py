@@ -0,0 +1,899 @@
+"""
+Vector store backends for Go Do List.
+
+TaskQdrant and LocalVectorDb, with the point-level methods described in
+vector_store. They live apart from vector_store because they pull in agno's
+vector stores, qdrant-client and NumPy, which are only imported once the
+application first uses its store (see database.get_vector_db()).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import warnings
+from typing import Any, Dict, List, Optional
+import numpy as np
+from agno.document import Document
+from agno.vectordb.base import VectorDb
+from agno.vectordb.qdrant import Qdrant
+from qdrant_client.http import models
+from .embedding_cache import point_id
+from .vector_store import INDEXED_FIELDS
+
+HNSW_M = int(os.getenv('HNSW_M', '16'))
+HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', '200'))
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', '128'))
+
+# Filtered searches over at most this many points are answered exactly
+BRUTE_FORCE_LIMIT = 20000
+
+
+def hits_to_documents(hits, embedder):
+    """
+    Turn search hits into agno documents.
+
+    Args:
+        hits (list[tuple]): Point ID, score and payload of each hit
+        embedder (Embedder): Embedder to attach to the documents
+
+    Returns:
+        list[Document]: Documents, best match first
+    """
+    return [
+        Document(
+            id=id_,
+            name=payload.get('name'),
+            meta_data=payload.get('meta_data') or {},
+            content=payload.get('content', ''),
+            embedder=embedder,
+            usage=payload.get('usage')
+        )
+        for id_, _score, payload in hits
+    ]
+
+
+class TaskQdrant(Qdrant):
+    """agno's Qdrant store with payload indexes, filtered search and point-level access."""
+
+    def create(self) -> None:
+        """Create the collection if needed, and the payload indexes used by filters."""
+        super().create()
+        with warnings.catch_warnings():
+            # In-memory Qdrant filters without indexes and warns that they are ignored
+            warnings.filterwarnings('ignore', message='Payload indexes have no effect')
+            for field, schema in INDEXED_FIELDS.items():
+                self.client.create_payload_index(
+                    collection_name=self.collection,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD if schema == 'keyword'
+                    else models.PayloadSchemaType.INTEGER
+                )
+
+    @staticmethod
+    def _filter(filters):
+        """
+        Translate a filters dict into a Qdrant filter.
+
+        Args:
+            filters (dict|None): Field -> value, or list of values any of which may match
+
+        Returns:
+            models.Filter|None: Qdrant filter
+        """
+        if not filters:
+            return None
+        return models.Filter(must=[
+            models.FieldCondition(
+                key=field,
+                match=models.MatchAny(any=list(value)) if isinstance(value, (list, tuple, set)) else models.MatchValue(value=value)
+            )
+            for field, value in filters.items()
+        ])
+
+    def _query(self, vector, limit, filters):
+        """
+        Build the arguments of a nearest-neighbour query.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict|None): Field -> value or list of values
+
+        Returns:
+            dict: Keyword arguments for ``query_points()``
+        """
+        return {
+            'collection_name': self.collection,
+            'query': vector,
+            'query_filter': self._filter(filters),
+            'limit': limit,
+            'with_payload': True,
+            'with_vectors': False
+        }
+
+    def search_by_vector(self, vector, limit=5, filters=None):
+        """
+        Find the points nearest to a vector.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict, optional): Field -> value or list of values
+
+        Returns:
+            list[tuple]: Point ID, score and payload of each hit, best first
+        """
+        response = self.client.query_points(**self._query(vector, limit, filters))
+        return [(str(point.id), point.score, point.payload or {}) for point in response.points]
+
+    async def async_search_by_vector(self, vector, limit=5, filters=None):
+        """
+        Find the points nearest to a vector without blocking the event loop.
+
+        Uses the shared async client when the store has a server, and a
+        worker thread otherwise.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict, optional): Field -> value or list of values
+
+        Returns:
+            list[tuple]: Point ID, score and payload of each hit, best first
+        """
+        from .async_clients import async_qdrant_client
+
+        client = async_qdrant_client(self)
+        if client is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.search_by_vector, vector, limit, filters
+            )
+        response = await client.query_points(**self._query(vector, limit, filters))
+        return [(str(point.id), point.score, point.payload or {}) for point in response.points]
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search for the chunks most similar to a query.
+
+        Unlike agno's implementation this applies ``filters`` and does not
+        download the stored vectors.
+
+        Args:
+            query (str): Query text
+            limit (int): Number of results
+            filters (dict, optional): Field -> value or list of values
+
+        Returns:
+            list[Document]: Matching chunks, best first
+        """
+        documents = hits_to_documents(
+            self.search_by_vector(self.embedder.get_embedding(query), limit, filters), self.embedder
+        )
+        if self.reranker:
+            documents = self.reranker.rerank(query=query, documents=documents)
+        return documents
+
+    async def async_search(self, query: str, limit: int = 5,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search for the chunks most similar to a query, applying ``filters``, without blocking."""
+        from .async_clients import embed
+
+        vector, _usage = await embed(self.embedder, query)
+        documents = hits_to_documents(await self.async_search_by_vector(vector, limit, filters), self.embedder)
+        if self.reranker:
+            documents = self.reranker.rerank(query=query, documents=documents)
+        return documents
+
+    def upsert_points(self, points):
+        """
+        Write points, replacing any with the same ID.
+
+        Waits until Qdrant has applied them, so a file is only marked ready
+        once its chunks can be searched.
+
+        Args:
+            points (list[tuple]): Point ID, vector and payload of each point
+        """
+        self.client.upsert(
+            collection_name=self.collection,
+            points=[models.PointStruct(id=id_, vector=vector, payload=payload) for id_, vector, payload in points],
+            wait=True
+        )
+
+    def get_payloads(self, ids):
+        """
+        Read the payloads of existing points.
+
+        Args:
+            ids (list[str]): Point IDs
+
+        Returns:
+            dict: Point ID -> payload, for the points that exist
+        """
+        if not ids or not self.exists():
+            return {}
+        records = self.client.retrieve(collection_name=self.collection, ids=list(ids), with_payload=True, with_vectors=False)
+        return {str(record.id): record.payload or {} for record in records}
+
+    def set_payloads(self, payloads):
+        """
+        Set payload fields of existing points, leaving other fields alone.
+
+        Args:
+            payloads (dict): Point ID -> fields to set
+        """
+        if not payloads:
+            return
+        self.client.batch_update_points(
+            collection_name=self.collection,
+            update_operations=[
+                models.SetPayloadOperation(set_payload=models.SetPayload(payload=payload, points=[id_]))
+                for id_, payload in payloads.items()
+            ]
+        )
+
+    def find_ids(self, field, value):
+        """
+        List the points whose ``field`` equals or contains ``value``.
+
+        Args:
+            field (str): Payload field
+            value: Value to match
+
+        Returns:
+            list[str]: Point IDs
+        """
+        ids = []
+        offset = None
+        if not self.exists():
+            return ids
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=self._filter({field: value}),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids.extend(str(record.id) for record in records)
+            if offset is None:
+                return ids
+
+    def delete_points(self, ids):
+        """
+        Delete points.
+
+        Args:
+            ids (list[str]): Point IDs
+        """
+        if ids:
+            self.client.delete(collection_name=self.collection, points_selector=models.PointIdsList(points=list(ids)))
+
+    def iter_points(self, batch_size=1000):
+        """
+        Scan every point's payload in batches.
+
+        Args:
+            batch_size (int): Points per batch
+
+        Yields:
+            list[tuple]: Point ID and payload of each point in the batch
+        """
+        if not self.exists():
+            return
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            if records:
+                yield [(str(record.id), record.payload or {}) for record in records]
+            if offset is None:
+                return
+
+    def compact(self):
+        """
+        Reclaim the space of deleted points; Qdrant's optimizer does this itself.
+
+        Returns:
+            int: Number of rows reclaimed here, always 0
+        """
+        return 0
+
+    def count(self):
+        """
+        Count the stored points.
+
+        Returns:
+            int: Number of points
+        """
+        return self.client.count(collection_name=self.collection).count if self.exists() else 0
+
+
+class LocalVectorDb(VectorDb):
+    """
+    In-process vector store searched with NumPy, or with hnswlib.
+
+    Vectors are kept normalized in one float32 matrix, so cosine similarity
+    is a matrix-vector product. Tag fields are indexed in memory, so a
+    task-scoped search only scores that task's chunks. Rows of deleted points
+    are left unused until compact() or the next load.
+
+    With a ``path``, every write is appended to a log there and replayed on
+    load, so the store survives restarts. The log is only written by this
+    process: run ingestion in threads (``INGEST_EXECUTOR=thread``).
+
+    Attributes:
+        collection (str): Collection name, also the log file name
+        embedder (Embedder): Embedder for documents and queries
+        dimensions (int): Vector size
+        index (str): ``numpy`` or ``hnsw``
+        path (str|None): Directory holding the log, or None to keep
+            everything in memory
+    """
+
+    def __init__(self, collection, embedder, index='numpy', path=None, hnsw_m=HNSW_M,
+                 hnsw_ef_construction=HNSW_EF_CONSTRUCTION, hnsw_ef_search=HNSW_EF_SEARCH):
+        """
+        Open the store, replaying its log if there is one.
+
+        Args:
+            collection (str): Collection name
+            embedder (Embedder): Embedder for documents and queries
+            index (str): ``numpy`` for exact search or ``hnsw`` for hnswlib
+            path (str, optional): Directory for the log
+            hnsw_m (int): hnswlib graph degree
+            hnsw_ef_construction (int): hnswlib build-time beam width
+            hnsw_ef_search (int): hnswlib query-time beam width
+
+        Raises:
+            ValueError: If ``index`` is unknown
+            ImportError: If ``index`` is ``hnsw`` and hnswlib is not installed
+        """
+        if index not in ('numpy', 'hnsw'):
+            raise ValueError(f'Unknown vector index: {index}')
+        if index == 'hnsw':
+            import hnswlib  # noqa: F401 -- fail at startup rather than at the first search
+        self.collection = collection
+        self.embedder = embedder
+        self.dimensions = embedder.dimensions
+        self.index = index
+        self.path = path
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self._lock = threading.RLock()
+        self._reset()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    @property
+    def _log_path(self):
+        """str: Path of the write log."""
+        return os.path.join(self.path, f'{self.collection}.jsonl')
+
+    def _reset(self):
+        """Forget every point."""
+        self._vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids = []
+        self._payloads = []
+        self._rows = {}
+        self._tags = {field: {} for field in INDEXED_FIELDS}
+        self._hnsw = None
+        self._created = False
+
+    # Storage
+
+    def _grow(self, needed):
+        """
+        Make room for ``needed`` more rows.
+
+        Args:
+            needed (int): Rows about to be added
+        """
+        capacity = len(self._vectors)
+        if self._size + needed <= capacity:
+            return
+        capacity = max(self._size + needed, capacity * 2, 1024)
+        vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._vectors, self._alive = vectors, alive
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+
+    def _index_tags(self, row, payload, add):
+        """
+        Add or remove a row from the in-memory tag indexes.
+
+        Args:
+            row (int): Row number
+            payload (dict): Payload of the row
+            add (bool): True to add, False to remove
+        """
+        for field, index in self._tags.items():
+            values = payload.get(field)
+            if values is None:
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                rows = index.setdefault(value, set())
+                if add:
+                    rows.add(row)
+                else:
+                    rows.discard(row)
+                    if not rows:
+                        del index[value]
+
+    def _apply_upsert(self, points):
+        """
+        Write points into memory.
+
+        Args:
+            points (list[tuple]): Point ID, vector and payload of each point
+        """
+        vectors = np.asarray([vector for _id, vector, _payload in points], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        self._grow(len(points))
+        rows = []
+        for (id_, _vector, payload), vector in zip(points, vectors):
+            row = self._rows.get(id_)
+            if row is None:
+                row = self._rows[id_] = self._size
+                self._size += 1
+                self._ids.append(id_)
+                self._payloads.append(payload)
+            else:
+                self._index_tags(row, self._payloads[row], add=False)
+                self._payloads[row] = payload
+            self._vectors[row] = vector
+            self._alive[row] = True
+            self._index_tags(row, payload, add=True)
+            rows.append(row)
+        if self._hnsw is not None:
+            self._hnsw.add_items(vectors, rows)
+        self._created = True
+
+    def _apply_payloads(self, payloads):
+        """
+        Set payload fields in memory.
+
+        Args:
+            payloads (dict): Point ID -> fields to set
+        """
+        for id_, fields in payloads.items():
+            row = self._rows.get(id_)
+            if row is None or not self._alive[row]:
+                continue
+            self._index_tags(row, self._payloads[row], add=False)
+            self._payloads[row] = {**self._payloads[row], **fields}
+            self._index_tags(row, self._payloads[row], add=True)
+
+    def _apply_delete(self, ids):
+        """
+        Delete points from memory.
+
+        Args:
+            ids (list[str]): Point IDs
+        """
+        for id_ in ids:
+            row = self._rows.pop(id_, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._index_tags(row, self._payloads[row], add=False)
+            self._payloads[row] = {}
+            if self._hnsw is not None:
+                self._hnsw.mark_deleted(row)
+
+    def _log(self, records):
+        """
+        Append records to the write log.
+
+        Args:
+            records (list[dict]): Operations to record
+        """
+        if not self.path:
+            return
+        with open(self._log_path, 'a', encoding='utf-8') as log:
+            log.writelines(json.dumps(record) + '\n' for record in records)
+            log.flush()
+            os.fsync(log.fileno())
+
+    def _load(self):
+        """Replay the write log, compacting it when mostly superseded."""
+        if not os.path.exists(self._log_path):
+            return
+        operations = 0
+        with open(self._log_path, encoding='utf-8') as log:
+            for line in log:
+                record = json.loads(line)
+                operations += 1
+                if record['op'] == 'upsert':
+                    vector = np.frombuffer(base64.b64decode(record['vector']), dtype=np.float32)
+                    self._apply_upsert([(record['id'], vector, record['payload'])])
+                elif record['op'] == 'payload':
+                    self._apply_payloads({record['id']: record['payload']})
+                elif record['op'] == 'delete':
+                    self._apply_delete([record['id']])
+                elif record['op'] == 'drop':
+                    self._reset()
+        if operations > 2 * len(self._rows) + 1000:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log with one record per live point and reload it."""
+        temporary = self._log_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as log:
+            for id_, row in self._rows.items():
+                log.write(json.dumps({
+                    'op': 'upsert',
+                    'id': id_,
+                    'vector': base64.b64encode(self._vectors[row].tobytes()).decode('ascii'),
+                    'payload': self._payloads[row]
+                }) + '\n')
+        os.replace(temporary, self._log_path)
+        self._reset()
+        self._load()
+
+    def _build_hnsw(self):
+        """Build the hnswlib index over every live row."""
+        import hnswlib
+
+        index = hnswlib.Index(space='ip', dim=self.dimensions)
+        index.init_index(max_elements=max(len(self._vectors), 1), ef_construction=self.hnsw_ef_construction,
+                         M=self.hnsw_m)
+        index.set_ef(self.hnsw_ef_search)
+        rows = np.flatnonzero(self._alive[:self._size])
+        if len(rows):
+            index.add_items(self._vectors[rows], rows)
+        self._hnsw = index
+
+    # Point-level interface shared with TaskQdrant
+
+    def upsert_points(self, points):
+        """
+        Write points, replacing any with the same ID.
+
+        Args:
+            points (list[tuple]): Point ID, vector and payload of each point
+        """
+        if not points:
+            return
+        with self._lock:
+            self._apply_upsert(points)
+            self._log([
+                {'op': 'upsert', 'id': id_,
+                 'vector': base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode('ascii'),
+                 'payload': payload}
+                for id_, vector, payload in points
+            ])
+
+    def get_payloads(self, ids):
+        """
+        Read the payloads of existing points.
+
+        Args:
+            ids (list[str]): Point IDs
+
+        Returns:
+            dict: Point ID -> payload, for the points that exist
+        """
+        with self._lock:
+            return {id_: dict(self._payloads[self._rows[id_]]) for id_ in ids if id_ in self._rows}
+
+    def set_payloads(self, payloads):
+        """
+        Set payload fields of existing points, leaving other fields alone.
+
+        Args:
+            payloads (dict): Point ID -> fields to set
+        """
+        if not payloads:
+            return
+        with self._lock:
+            self._apply_payloads(payloads)
+            self._log([{'op': 'payload', 'id': id_, 'payload': fields} for id_, fields in payloads.items()])
+
+    def find_ids(self, field, value):
+        """
+        List the points whose ``field`` equals or contains ``value``.
+
+        Args:
+            field (str): Payload field
+            value: Value to match
+
+        Returns:
+            list[str]: Point IDs
+        """
+        with self._lock:
+            if field in self._tags:
+                return [self._ids[row] for row in sorted(self._tags[field].get(value, ()))]
+            return [
+                id_ for id_, row in self._rows.items()
+                if value == self._payloads[row].get(field) or value in (self._payloads[row].get(field) or [])
+            ]
+
+    def delete_points(self, ids):
+        """
+        Delete points.
+
+        Args:
+            ids (list[str]): Point IDs
+        """
+        if not ids:
+            return
+        with self._lock:
+            self._apply_delete(ids)
+            self._log([{'op': 'delete', 'id': id_} for id_ in ids])
+
+    def iter_points(self, batch_size=1000):
+        """
+        Scan every point's payload in batches.
+
+        The point IDs are read up front, so points may be deleted while the
+        scan is running.
+
+        Args:
+            batch_size (int): Points per batch
+
+        Yields:
+            list[tuple]: Point ID and payload of each point in the batch
+        """
+        with self._lock:
+            ids = list(self._rows)
+        for start in range(0, len(ids), batch_size):
+            payloads = self.get_payloads(ids[start:start + batch_size])
+            if payloads:
+                yield list(payloads.items())
+
+    def compact(self):
+        """
+        Drop the rows of deleted points from memory and from the write log.
+
+        Returns:
+            int: Number of rows reclaimed
+        """
+        with self._lock:
+            reclaimed = self._size - len(self._rows)
+            if not reclaimed:
+                return 0
+            if self.path:
+                self._compact()
+            else:
+                points = [(id_, self._vectors[row].copy(), self._payloads[row]) for id_, row in self._rows.items()]
+                self._reset()
+                if points:
+                    self._apply_upsert(points)
+            self._created = True
+            return reclaimed
+
+    def count(self):
+        """
+        Count the stored points.
+
+        Returns:
+            int: Number of points
+        """
+        return len(self._rows)
+
+    def _candidate_rows(self, filters):
+        """
+        Find the rows a filtered search may return.
+
+        Args:
+            filters (dict): Indexed field -> value or list of values
+
+        Returns:
+            np.ndarray: Row numbers
+        """
+        selected = None
+        for field, value in filters.items():
+            index = self._tags.get(field)
+            if index is None:
+                raise ValueError(f'Cannot filter on unindexed field: {field}')
+            rows = set()
+            for item in value if isinstance(value, (list, tuple, set)) else [value]:
+                rows |= index.get(item, set())
+            selected = rows if selected is None else selected & rows
+        return np.fromiter(selected, dtype=np.int64, count=len(selected))
+
+    def search_by_vector(self, vector, limit=5, filters=None):
+        """
+        Find the points nearest to a vector by cosine similarity.
+
+        Unfiltered searches, and filtered ones over more than
+        BRUTE_FORCE_LIMIT points, use the HNSW index when there is one;
+        everything else is scored exactly.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict, optional): Indexed field -> value or list of values
+
+        Returns:
+            list[tuple]: Point ID, score and payload of each hit, best first
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        with self._lock:
+            rows = self._candidate_rows(filters) if filters else None
+            if rows is not None and not len(rows):
+                return []
+
+            if self.index == 'hnsw' and (rows is None or len(rows) > BRUTE_FORCE_LIMIT):
+                if self._hnsw is None:
+                    self._build_hnsw()
+                allowed = None if rows is None else set(rows.tolist())
+                k = min(limit, len(self._rows) if allowed is None else len(allowed))
+                if not k:
+                    return []
+                labels, distances = self._hnsw.knn_query(
+                    query, k=k, filter=None if allowed is None else allowed.__contains__
+                )
+                hits = zip(labels[0].tolist(), (1 - distances[0]).tolist())
+            else:
+                if rows is None:
+                    rows = np.flatnonzero(self._alive[:self._size])
+                scores = self._vectors[rows] @ query
+                top = np.argpartition(-scores, limit - 1)[:limit] if len(rows) > limit else np.arange(len(rows))
+                top = top[np.argsort(-scores[top])]
+                hits = zip(rows[top].tolist(), scores[top].tolist())
+            return [(self._ids[row], score, self._payloads[row]) for row, score in hits]
+
+    async def async_search_by_vector(self, vector, limit=5, filters=None):
+        """
+        Find the points nearest to a vector on a worker thread.
+
+        Args:
+            vector (list[float]): Query vector
+            limit (int): Number of hits
+            filters (dict, optional): Indexed field -> value or list of values
+
+        Returns:
+            list[tuple]: Point ID, score and payload of each hit, best first
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.search_by_vector, vector, limit, filters)
+
+    # agno VectorDb interface
+
+    def create(self) -> None:
+        """Mark the collection as created; storage is allocated on first write."""
+        self._created = True
+
+    async def async_create(self) -> None:
+        """Mark the collection as created."""
+        self.create()
+
+    def exists(self) -> bool:
+        """bool: Whether the collection has been created."""
+        return self._created
+
+    async def async_exists(self) -> bool:
+        """bool: Whether the collection has been created."""
+        return self.exists()
+
+    def doc_exists(self, document: Document) -> bool:
+        """
+        Check whether a chunk with the same content is stored.
+
+        Args:
+            document (Document): Chunk to look for
+
+        Returns:
+            bool: True if stored
+        """
+        return point_id(document.content) in self._rows
+
+    async def async_doc_exists(self, document: Document) -> bool:
+        """bool: Whether a chunk with the same content is stored."""
+        return self.doc_exists(document)
+
+    def name_exists(self, name: str) -> bool:
+        """
+        Check whether any chunk of a named document is stored.
+
+        Args:
+            name (str): Document name
+
+        Returns:
+            bool: True if stored
+        """
+        with self._lock:
+            return any(self._payloads[row].get('name') == name for row in self._rows.values())
+
+    async def async_name_exists(self, name: str) -> bool:
+        """bool: Whether any chunk of a named document is stored."""
+        return self.name_exists(name)
+
+    def id_exists(self, id: str) -> bool:
+        """bool: Whether a point ID is stored."""
+        return id in self._rows
+
+    def insert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Embed and store documents with agno's payload layout.
+
+        Args:
+            documents (list[Document]): Documents to store
+            filters (dict, optional): Ignored, as by agno's Qdrant store
+        """
+        points = []
+        for document in documents:
+            document.embed(embedder=self.embedder)
+            points.append((point_id(document.content), document.embedding, {
+                'name': document.name,
+                'meta_data': document.meta_data,
+                'content': document.content.replace('\x00', '\ufffd'),
+                'usage': document.usage,
+                'content_hash': hashlib.sha256(document.content.encode('utf-8')).hexdigest()
+            }))
+        self.upsert_points(points)
+
+    async def async_insert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        """Embed and store documents."""
+        self.insert(documents, filters)
+
+    def upsert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        """Embed and store documents, replacing those with the same content."""
+        self.insert(documents, filters)
+
+    async def async_upsert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        """Embed and store documents, replacing those with the same content."""
+        self.insert(documents, filters)
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search for the chunks most similar to a query.
+
+        Args:
+            query (str): Query text
+            limit (int): Number of results
+            filters (dict, optional): Indexed field -> value or list of values
+
+        Returns:
+            list[Document]: Matching chunks, best first
+        """
+        return hits_to_documents(
+            self.search_by_vector(self.embedder.get_embedding(query), limit, filters), self.embedder
+        )
+
+    async def async_search(self, query: str, limit: int = 5,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search for the chunks most similar to a query, embedding it without blocking."""
+        from .async_clients import embed
+
+        vector, _usage = await embed(self.embedder, query)
+        return hits_to_documents(await self.async_search_by_vector(vector, limit, filters), self.embedder)
+
+    def drop(self) -> None:
+        """Delete every point."""
+        with self._lock:
+            self._reset()
+            self._log([{'op': 'drop'}])
+
+    async def async_drop(self) -> None:
+        """Delete every point."""
+        self.drop()
+
+    def delete(self) -> bool:
+        """
+        Delete every point.
+
+        Returns:
+            bool: True
+        """
+        self.drop()
+        return True
@@ -0,0 +1,409 @@
+"""
+Vector cleanup for deleted files and tasks.
+
+Deleting a file or task removes its ``task_files`` rows (and ingestion jobs)
+in the same transaction as the delete itself; release_files() then removes
+the uploads from disk and updates the vector store and the full-text index.
+Chunks are shared between files with the same content, so a chunk is only
+deleted once no remaining file contains it; otherwise the deleted file and
+task are dropped from its tags.
+
+Anything a delete leaves behind (the vector store was unreachable, an
+ingestion job finished after its file was deleted, tasks deleted before this
+cleanup existed) is found by reconcile(), which scans the whole store in
+batches and compares each point's tags with ``task_files``. It runs every
+``VECTOR_GC_INTERVAL`` seconds in the background and as ``flask vectors gc``.
+
+Points indexed before chunks carried document tags are left alone; run
+``flask vectors backfill-tags`` first to make them collectable.
+"""
+
+import json
+import os
+import threading
+from .connection import open_connection
+from .text_index import forget_files, orphaned_files
+from .upload_store import remove_unreferenced, sweep
+from .vector_store import TAG_FIELDS
+
+VECTOR_GC_INTERVAL = float(os.getenv('VECTOR_GC_INTERVAL', '3600'))
+VECTOR_GC_BATCH = int(os.getenv('VECTOR_GC_BATCH', '1000'))
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMS = 500
+
+
+def _delete_file_rows(conn, where, params):
+    """
+    Delete task_files rows and their ingestion jobs.
+
+    Args:
+        conn (sqlite3.Connection): Database connection, in the caller's transaction
+        where (str): Condition selecting the rows
+        params (tuple): Parameters of the condition
+
+    Returns:
+        list[sqlite3.Row]: ``id``, ``task_id``, ``file_path`` and
+            ``content_hash`` of the deleted rows
+    """
+    files = conn.execute(
+        f'SELECT id, task_id, file_path, content_hash FROM task_files WHERE {where}', params
+    ).fetchall()
+    for start in range(0, len(files), _MAX_PARAMS):
+        ids = [row['id'] for row in files[start:start + _MAX_PARAMS]]
+        placeholders = ', '.join('?' * len(ids))
+        conn.execute(f'DELETE FROM ingest_jobs WHERE file_id IN ({placeholders})', ids)
+        conn.execute(f'DELETE FROM task_files WHERE id IN ({placeholders})', ids)
+    return files
+
+
+def delete_file(conn, file_id):
+    """
+    Delete a file's row and ingestion jobs.
+
+    Runs in the caller's transaction; call release_files() with the result
+    once it is committed.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        file_id (int): ID of the task_files row
+
+    Returns:
+        list[sqlite3.Row]: The deleted row, or nothing if it did not exist
+    """
+    return _delete_file_rows(conn, 'id = ?', (file_id,))
+
+
+def delete_task_files(conn, task_ids):
+    """
+    Delete the file rows and ingestion jobs of tasks being deleted.
+
+    Runs in the caller's transaction; call release_files() with the result
+    once it is committed.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        task_ids (list[int]): IDs of the tasks
+
+    Returns:
+        list[sqlite3.Row]: The deleted rows
+    """
+    task_ids = list(task_ids)
+    files = []
+    for start in range(0, len(task_ids), _MAX_PARAMS):
+        chunk = task_ids[start:start + _MAX_PARAMS]
+        files += _delete_file_rows(conn, f"task_id IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+    return files
+
+
+def _new_report():
+    """
+    Start an empty cleanup report.
+
+    Returns:
+        dict: Counters, all zero
+    """
+    return {
+        'files_deleted': 0,
+        'points_scanned': 0,
+        'points_deleted': 0,
+        'points_retagged': 0,
+        'points_untagged': 0,
+        'text_chunks_deleted': 0,
+        'bytes_reclaimed': 0,
+        'upload_bytes_freed': 0
+    }
+
+
+def _live_files(conn, hashes):
+    """
+    Find the remaining files with some contents.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        hashes (set[str]): File content hashes
+
+    Returns:
+        dict: Content hash -> list of (file ID, task ID)
+    """
+    hashes = list(hashes)
+    live = {}
+    for start in range(0, len(hashes), _MAX_PARAMS):
+        chunk = hashes[start:start + _MAX_PARAMS]
+        rows = conn.execute(
+            f"SELECT id, task_id, content_hash FROM task_files WHERE content_hash IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        for row in rows:
+            live.setdefault(row['content_hash'], []).append((row['id'], row['task_id']))
+    return live
+
+
+def _live_tags(payload, live):
+    """
+    Work out a point's tags from the files that still contain it.
+
+    Args:
+        payload (dict): Point payload
+        live (dict): Content hash -> list of (file ID, task ID)
+
+    Returns:
+        dict: Field from TAG_FIELDS -> sorted values
+    """
+    hashes = sorted(digest for digest in payload.get('file_hashes') or [] if digest in live)
+    files = [file for digest in hashes for file in live[digest]]
+    return {
+        'file_hashes': hashes,
+        'task_ids': sorted({task_id for _, task_id in files}),
+        'file_ids': sorted({file_id for file_id, _ in files})
+    }
+
+
+def _point_bytes(vector_db, payload):
+    """
+    Estimate the storage a point takes.
+
+    Args:
+        vector_db (VectorDb): Store holding the point
+        payload (dict): Point payload
+
+    Returns:
+        int: float32 vector size plus JSON payload size, in bytes
+    """
+    return 4 * (vector_db.embedder.dimensions or 0) + len(json.dumps(payload))
+
+
+def _reconcile_points(conn, vector_db, points, report, dry_run=False):
+    """
+    Bring some points' tags in line with ``task_files``.
+
+    Payloads are read before ``task_files``, and ingestion records a file's
+    content hash before it tags any chunk with it, so a file being indexed
+    while this runs is never mistaken for a deleted one.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        vector_db (VectorDb): Store holding the points
+        points (list[tuple]): Point ID and payload of each point
+        report (dict): Counters to update
+        dry_run (bool): Count changes without making them
+    """
+    tagged = [(id_, payload) for id_, payload in points if 'file_hashes' in payload]
+    report['points_scanned'] += len(points)
+    report['points_untagged'] += len(points) - len(tagged)
+    hashes = {digest for _, payload in tagged for digest in payload['file_hashes'] or []}
+    live = _live_files(conn, hashes)
+
+    deleted, retagged = [], {}
+    for id_, payload in tagged:
+        tags = _live_tags(payload, live)
+        if not tags['file_hashes']:
+            deleted.append(id_)
+            report['bytes_reclaimed'] += _point_bytes(vector_db, payload)
+        elif any(sorted(payload.get(field) or []) != tags[field] for field in TAG_FIELDS):
+            retagged[id_] = tags
+    report['points_deleted'] += len(deleted)
+    report['points_retagged'] += len(retagged)
+    if dry_run:
+        return
+
+    vector_db.delete_points(deleted)
+    vector_db.set_payloads(retagged)
+    # Files whose contents are gone must be embedded again if uploaded again
+    dead = list(hashes - set(live))
+    with conn:
+        for start in range(0, len(dead), _MAX_PARAMS):
+            chunk = dead[start:start + _MAX_PARAMS]
+            conn.execute(
+                f"DELETE FROM embedded_files WHERE collection = ? AND content_hash IN ({', '.join('?' * len(chunk))})",
+                [vector_db.collection, *chunk]
+            )
+        report['text_chunks_deleted'] += forget_files(conn, dead)
+
+
+def remove_uploads(conn, files):
+    """
+    Delete uploaded files from disk once no other file row shares them.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        files (list[sqlite3.Row]): Deleted task_files rows
+
+    Returns:
+        int: Bytes freed
+    """
+    return remove_unreferenced(conn, [row['file_path'] for row in files])
+
+
+def release_files(conn, vector_db, files):
+    """
+    Clean up after committed file deletes.
+
+    Removes the uploads no other file shares from disk, deletes the chunks no remaining file
+    contains and untags the rest. Errors are reported rather than raised,
+    since the delete itself has succeeded; the reconciler removes whatever is
+    left behind.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        vector_db (VectorDb|None): Store holding the files' chunks, or None
+            to only remove the uploads
+        files (list[sqlite3.Row]): Rows returned by delete_file() or
+            delete_task_files()
+
+    Returns:
+        dict: Cleanup report
+    """
+    report = _new_report()
+    report['files_deleted'] = len(files)
+    try:
+        report['upload_bytes_freed'] = remove_uploads(conn, files)
+        if vector_db is None or not files:
+            return report
+        ids = set()
+        for row in files:
+            ids.update(vector_db.find_ids('file_ids', row['id']))
+            if row['content_hash']:
+                ids.update(vector_db.find_ids('file_hashes', row['content_hash']))
+        payloads = vector_db.get_payloads(list(ids))
+        _reconcile_points(conn, vector_db, list(payloads.items()), report)
+    except Exception as e:
+        print(f"Error releasing deleted files: {str(e)}")
+    return report
+
+
+def reconcile(conn, vector_db, batch_size=VECTOR_GC_BATCH, dry_run=False):
+    """
+    Remove file rows, uploads and chunks that no task refers to.
+
+    First deletes the file rows of tasks that no longer exist, then scans
+    every point in batches of ``batch_size``, deleting those whose files are
+    all gone and untagging deleted files and tasks from the rest. Finally the
+    full-text index drops the chunks of vanished files, stored uploads no row
+    refers to and expired upload sessions are deleted, and the store is
+    compacted if anything was deleted.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        vector_db (VectorDb): Store to clean up
+        batch_size (int): Points read per batch
+        dry_run (bool): Report what would be removed without removing it
+
+    Returns:
+        dict: Counts of file rows deleted, points scanned, deleted,
+            retagged and left alone for lack of tags, and full-text chunks
+            deleted, the approximate bytes reclaimed from the store and the
+            bytes of uploads deleted
+    """
+    report = _new_report()
+    orphaned = 'task_id NOT IN (SELECT id FROM tasks)'
+    if dry_run:
+        report['files_deleted'] = conn.execute(f'SELECT COUNT(*) FROM task_files WHERE {orphaned}').fetchone()[0]
+    else:
+        with conn:
+            files = _delete_file_rows(conn, orphaned, ())
+        report['upload_bytes_freed'] = remove_uploads(conn, files)
+        report['files_deleted'] = len(files)
+
+    for points in vector_db.iter_points(batch_size):
+        _reconcile_points(conn, vector_db, points, report, dry_run)
+
+    if not dry_run:
+        with conn:
+            report['text_chunks_deleted'] += forget_files(conn, orphaned_files(conn))
+        report['upload_bytes_freed'] += sweep(conn)
+
+    if report['points_deleted'] and not dry_run:
+        vector_db.compact()
+    return report
+
+
+class VectorReconciler:
+    """
+    Runs reconcile() periodically on a background thread.
+
+    Attributes:
+        interval (float): Seconds between runs
+        batch_size (int): Points read per batch
+        last_report (dict|None): Report of the latest run
+    """
+
+    def __init__(self, interval=VECTOR_GC_INTERVAL, batch_size=VECTOR_GC_BATCH, vector_db=None):
+        """
+        Configure the reconciler; nothing runs until start().
+
+        Args:
+            interval (float): Seconds between runs
+            batch_size (int): Points read per batch
+            vector_db (VectorDb, optional): Store to clean up, defaults to the
+                application's
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_report = None
+        self._vector_db = vector_db
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='vector-gc', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the background thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a running pass
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        """
+        Reconcile the vector store now.
+
+        Returns:
+            dict: Cleanup report
+        """
+        vector_db = self._vector_db
+        if vector_db is None:
+            from .database import get_vector_db
+            vector_db = get_vector_db()
+        conn = open_connection()
+        try:
+            self.last_report = reconcile(conn, vector_db, self.batch_size)
+        finally:
+            conn.close()
+        return self.last_report
+
+    def _run(self):
+        """Reconcile every ``interval`` seconds until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error reconciling vector store: {str(e)}")
+
+
+reconciler = VectorReconciler()
+
+
+def init_app(app):
+    """
+    Start the background reconciler.
+
+    It is not started when ``VECTOR_GC_INTERVAL`` is 0 or when the app is in
+    testing mode; ``flask vectors gc`` runs a pass on demand.
+
+    Args:
+        app (Flask): Application to configure
+    """
+    if reconciler.interval > 0 and not app.testing:
+        reconciler.start()
@@ -0,0 +1,204 @@
+"""
+Vector stores for Go Do List, with task-scoped retrieval.
+
+Chunks are stored under content-addressed point IDs (see
+embedding_cache.point_id), so a chunk that occurs in several files, or a
+file attached to several tasks, is stored once. Each point's payload records
+which documents it belongs to as lists that are merged on every write:
+
+* ``file_hashes``: SHA-256 of every file containing the chunk,
+* ``task_ids`` and ``file_ids``: tasks and task_files rows it was indexed for,
+* ``content_hash``: SHA-256 of the chunk text.
+
+Retrieval for a task filters on the content hashes of the task's files, which
+stays correct when a file is skipped because identical content was already
+indexed for another task.
+
+``VECTOR_BACKEND`` selects the store database.get_vector_db() creates:
+
+* ``qdrant`` (default): TaskQdrant, agno's Qdrant store with payload
+  indexes and filtered search,
+* ``numpy``: LocalVectorDb with exact brute-force search, no server needed,
+* ``hnsw``: LocalVectorDb with an approximate hnswlib index (``pip install
+  hnswlib``).
+
+Besides agno's VectorDb interface, both stores provide the point-level
+methods the ingestion pipeline and maintenance code use: upsert_points(),
+get_payloads(), set_payloads(), find_ids(), iter_points(), delete_points(),
+compact(), count() and search_by_vector(). The stores themselves are in
+vector_backends, imported only when a store is created; their names can
+still be imported from here.
+"""
+
+import os
+import click
+from .embedding_cache import point_id
+
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'qdrant')
+LOCAL_VECTOR_PATH = os.getenv('LOCAL_VECTOR_PATH', 'vectors')
+
+# Payload fields listing the documents a point belongs to, and their index types
+TAG_FIELDS = {'file_hashes': 'keyword', 'task_ids': 'integer', 'file_ids': 'integer'}
+INDEXED_FIELDS = {**TAG_FIELDS, 'content_hash': 'keyword'}
+
+# Names served lazily from vector_backends by __getattr__()
+_BACKEND_NAMES = ('TaskQdrant', 'LocalVectorDb', 'BRUTE_FORCE_LIMIT', 'HNSW_M', 'HNSW_EF_CONSTRUCTION',
+                  'HNSW_EF_SEARCH')
+
+
+def __getattr__(name):
+    """
+    Import the store classes on first access.
+
+    Args:
+        name (str): Attribute name
+
+    Returns:
+        The attribute from vector_backends
+
+    Raises:
+        AttributeError: If the name is not a backend name
+    """
+    if name in _BACKEND_NAMES:
+        from . import vector_backends
+        return getattr(vector_backends, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def merge_tags(payload, tags):
+    """
+    Add document tags to a point's payload without dropping existing ones.
+
+    Args:
+        payload (dict|None): Current payload
+        tags (dict): Field from TAG_FIELDS -> value to add
+
+    Returns:
+        dict: Tag fields with the values merged in, sorted
+    """
+    payload = payload or {}
+    return {
+        field: sorted(set(payload.get(field) or []) | {value})
+        for field, value in tags.items()
+    }
+
+
+def tag_points(vector_db, field, value, tags):
+    """
+    Add document tags to every point whose ``field`` contains ``value``.
+
+    Args:
+        vector_db (VectorDb): Store to update
+        field (str): Payload field to match, e.g. ``file_hashes``
+        value: Value the field must contain
+        tags (dict): Field from TAG_FIELDS -> value to add
+
+    Returns:
+        int: Number of points updated
+    """
+    ids = vector_db.find_ids(field, value)
+    payloads = vector_db.get_payloads(ids)
+    vector_db.set_payloads({id_: merge_tags(payloads.get(id_), tags) for id_ in ids})
+    return len(ids)
+
+def create_vector_db(collection, embedder, backend=None, **kwargs):
+    """
+    Create the vector store selected by ``VECTOR_BACKEND``.
+
+    Args:
+        collection (str): Collection name
+        embedder (Embedder): Embedder for documents and queries
+        backend (str, optional): ``qdrant``, ``numpy`` or ``hnsw``; defaults
+            to ``VECTOR_BACKEND``
+        **kwargs: Qdrant connection settings, ignored by the local backends
+
+    Returns:
+        VectorDb: TaskQdrant or LocalVectorDb
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    from .vector_backends import LocalVectorDb, TaskQdrant
+
+    backend = backend or VECTOR_BACKEND
+    if backend == 'qdrant':
+        return TaskQdrant(collection=collection, embedder=embedder, **kwargs)
+    if backend in ('numpy', 'hnsw'):
+        return LocalVectorDb(collection, embedder, index=backend, path=LOCAL_VECTOR_PATH)
+    raise ValueError(f'Unknown vector backend: {backend}')
+
+
+def backfill_tags(conn, vector_db):
+    """
+    Tag the chunks of files indexed before points carried document tags.
+
+    Re-extracts each indexed file to find its chunks' point IDs; nothing is
+    embedded again. Files without a content hash get one.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        vector_db (VectorDb): Store to update
+
+    Returns:
+        int: Number of files tagged
+    """
+    from .embedding_cache import file_hash
+    from .pdf_extraction import iter_chunks
+
+    files = conn.execute(
+        'SELECT id, task_id, file_path, content_hash FROM task_files WHERE embedding_id IS NOT NULL'
+    ).fetchall()
+    tagged = 0
+    for row in files:
+        if not os.path.exists(row['file_path']):
+            continue
+        digest = row['content_hash']
+        if digest is None:
+            digest = file_hash(row['file_path'])
+            with conn:
+                conn.execute('UPDATE task_files SET content_hash = ? WHERE id = ?', (digest, row['id']))
+        tags = {'file_hashes': digest, 'task_ids': row['task_id'], 'file_ids': row['id']}
+        ids = list(dict.fromkeys(point_id(chunk.content) for chunk in iter_chunks(row['file_path'])))
+        payloads = vector_db.get_payloads(ids)
+        vector_db.set_payloads({id_: merge_tags(payload, tags) for id_, payload in payloads.items()})
+        tagged += 1
+    return tagged
+
+
+def init_app(app):
+    """
+    Register the vector maintenance CLI commands.
+
+    Args:
+        app (Flask): Application to register with
+    """
+    @app.cli.group('vectors')
+    def vectors_command():
+        """Maintain the vector store."""
+
+    @vectors_command.command('backfill-tags')
+    def backfill_tags_command():
+        """Tag chunks indexed before task-scoped search."""
+        from .connection import get_connection
+        from .database import get_vector_db
+
+        count = backfill_tags(get_connection(), get_vector_db())
+        click.echo(f'Tagged the chunks of {count} files')
+
+    @vectors_command.command('gc')
+    @click.option('--batch-size', type=int, default=None, help='Points read per batch')
+    @click.option('--dry-run', is_flag=True, help='Report what would be removed without removing it')
+    def gc_command(batch_size, dry_run):
+        """Remove chunks and file rows no task refers to any more."""
+        from .connection import get_connection
+        from .database import get_vector_db
+        from .vector_gc import VECTOR_GC_BATCH, reconcile
+
+        report = reconcile(get_connection(), get_vector_db(), batch_size or VECTOR_GC_BATCH, dry_run=dry_run)
+        verb = 'Would remove' if dry_run else 'Removed'
+        click.echo(
+            f"{verb} {report['points_deleted']} of {report['points_scanned']} points "
+            f"(~{report['bytes_reclaimed'] / 1e6:.1f} MB) and {report['files_deleted']} orphaned file rows; "
+            f"retagged {report['points_retagged']} points, {report['points_untagged']} untagged points left alone"
+            + ('' if dry_run else f"; freed {report['upload_bytes_freed'] / 1e6:.1f} MB of uploads")
+        )
@@ -0,0 +1,8 @@
+"""
+ASGI entry point for Go Do List backend API.
+Serve with ``uvicorn asgi:app``; see api.asgi.
+"""
+
+from api.asgi import create_asgi_app
+
+app = create_asgi_app()
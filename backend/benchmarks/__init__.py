@@ -0,0 +1,6 @@
+"""
+Benchmarks for Go Do List backend.
+
+Each module is runnable on its own from the backend directory, e.g.
+``python -m benchmarks.db_load``.
+"""
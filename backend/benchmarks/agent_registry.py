@@ -0,0 +1,133 @@
+"""
+Benchmark of /process-task latency with and without the agent registry.
+
+Indexes a sample PDF into an in-memory Qdrant collection through a local
+fake OpenAI API, then times requests that build everything per request
+(the old behaviour: a fresh OpenAI client, model, knowledge base and agent)
+against requests served from a shared registry, and finally runs
+concurrent requests to check that no agent is used by two of them at once.
+
+Usage:
+    python -m benchmarks.agent_registry --requests 20 --latency 0.05
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.ingest_queue import SAMPLE_PDFS
+
+DIMENSIONS = 256
+
+
+def _timed(registry, file_paths, file_hashes):
+    """
+    Serve one request and time it.
+
+    Args:
+        registry (AgentRegistry): Registry to check an agent out of
+        file_paths (list[str]): Files of the task
+        file_hashes (list[str]): Content hashes of the files
+
+    Returns:
+        float: Milliseconds taken
+    """
+    start = time.perf_counter()
+    with registry.agent('review', 'Review the document', file_paths, file_hashes) as agent:
+        agent.process_task('Summarize the key points')
+    return (time.perf_counter() - start) * 1000
+
+
+def _summary(label, timings, server, connections_before):
+    """
+    Print latency percentiles and connections opened.
+
+    Args:
+        label (str): Row label
+        timings (list[float]): Request latencies in milliseconds
+        server (FakeOpenAIServer): Fake API
+        connections_before (int): Connections accepted before the run
+    """
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f'  {label:<10} median {statistics.median(timings):7.1f} ms  p95 {p95:7.1f} ms  '
+          f'{server.connections - connections_before:3d} connections opened')
+
+
+def run(requests, latency, concurrency):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        requests (int): Requests per mode
+        latency (float): Seconds the fake API adds per request
+        concurrency (int): Threads in the concurrent run
+    """
+    server = FakeOpenAIServer(latency=latency).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+
+    from agno.embedder.openai import OpenAIEmbedder
+    from api.vector_store import TaskQdrant
+    from agents.registry import AgentRegistry
+    from api.embedding_cache import file_hash
+    from api.embedding_pipeline import EmbeddingPipeline
+    from api.pdf_extraction import iter_chunks
+
+    vector_db = TaskQdrant(
+        collection='bench',
+        location=':memory:',
+        embedder=OpenAIEmbedder(id='text-embedding-3-small', dimensions=DIMENSIONS, api_key='test',
+                                base_url=server.base_url)
+    )
+    pdf = sorted(glob.glob(SAMPLE_PDFS))[0]
+    file_paths, file_hashes = [pdf], [file_hash(pdf)]
+    EmbeddingPipeline(vector_db.embedder).index(vector_db, iter_chunks(pdf), tags={'file_hashes': file_hashes[0]})
+
+    print(f'{requests} requests, {latency * 1000:.0f} ms per API call')
+    before = server.connections
+    cold = [_timed(AgentRegistry(vector_db=vector_db), file_paths, file_hashes) for _ in range(requests)]
+    _summary('cold', cold, server, before)
+
+    registry = AgentRegistry(vector_db=vector_db)
+    _timed(registry, file_paths, file_hashes)
+    before = server.connections
+    warm = [_timed(registry, file_paths, file_hashes) for _ in range(requests)]
+    _summary('warm', warm, server, before)
+
+    # Every checkout must hand out an agent nobody else is using
+    busy = set()
+    lock = threading.Lock()
+    overlaps = []
+
+    def concurrent_request(_):
+        with registry.agent('review', 'Review the document', file_paths, file_hashes) as agent:
+            with lock:
+                if id(agent) in busy:
+                    overlaps.append(id(agent))
+                busy.add(id(agent))
+            agent.process_task('Summarize the key points')
+            with lock:
+                busy.discard(id(agent))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(concurrent_request, range(requests * 2)))
+    stats = registry.stats()
+    print(f"  concurrent {concurrency} threads: {stats['created']} agents built, {stats['reused']} reuses, "
+          f'{len(overlaps)} shared checkouts')
+    assert not overlaps, 'an agent was checked out twice at once'
+    assert stats['created'] <= concurrency + 1, 'registry built more agents than requests in flight'
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+    run(args.requests, args.latency, args.concurrency)
@@ -0,0 +1,290 @@
+"""
+Concurrency benchmark: CRUD latency while hundreds of agent calls are in flight.
+
+Serves the app with OpenAI replaced by benchmarks.fake_openai (each model call
+takes ``--model-latency`` seconds) and Qdrant by benchmarks.fake_qdrant, then
+for each server:
+
+* measures task CRUD latency (list a page, create, update, delete) from
+  ``--crud-clients`` clients for ``--seconds`` seconds with no other load;
+* keeps ``--agents`` ``POST /process-task`` calls in flight and measures the
+  same CRUD latency again, plus how many agent calls completed.
+
+``--server wsgi`` serves the Flask app from ``--threads`` threads, like
+gunicorn's threaded workers, so agent calls queue CRUD requests behind them
+once every thread is waiting on the model. ``--server asgi`` serves
+api.asgi's app with uvicorn, where agent calls wait on the event loop and the
+Flask routes keep ``--threads`` threads to themselves. ``both`` (the default)
+runs one after the other.
+
+Usage:
+    python -m benchmarks.asgi_concurrency --agents 300 --model-latency 2 --seconds 10
+"""
+
+import argparse
+import glob
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_qdrant import fake_qdrant
+from benchmarks.load import SAMPLE_PDFS, Recorder, summarize, upload_and_wait
+
+DIMENSIONS = 64
+
+
+def _free_port():
+    """
+    Find a free local port.
+
+    Returns:
+        int: Port number
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30):
+    """
+    Wait until a server accepts connections.
+
+    Args:
+        port (int): Server port
+        timeout (float): Seconds to wait
+
+    Raises:
+        RuntimeError: If the server did not start in time
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+def _serve_wsgi(app, threads):
+    """
+    Serve a WSGI app from a fixed pool of threads.
+
+    Args:
+        app (Flask): Application to serve
+        threads (int): Request threads
+
+    Returns:
+        tuple: Port and a function that stops the server
+    """
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(socketserver.ThreadingMixIn, BaseWSGIServer):
+        """Werkzeug server handling requests on a bounded thread pool."""
+
+        request_queue_size = 1024
+
+        def process_request(self, request, client_address):
+            """Queue the request for the next free thread."""
+            pool.submit(self.process_request_thread, request, client_address)
+
+    pool = ThreadPoolExecutor(max_workers=threads)
+    server = PooledWSGIServer('127.0.0.1', _free_port(), app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return server.server_port, stop
+
+
+def _serve_asgi(app, threads):
+    """
+    Serve the ASGI app with uvicorn on a background thread.
+
+    Args:
+        app (Flask): Application to wrap
+        threads (int): Threads for the Flask routes
+
+    Returns:
+        tuple: Port and a function that stops the server
+    """
+    import uvicorn
+    from api.asgi import AsgiApp
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(AsgiApp(app, wsgi_threads=threads), host='127.0.0.1', port=port,
+                                           log_level='warning', backlog=2048))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    _wait_for_port(port)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+    return port, stop
+
+
+def _crud_probe(port, clients, seconds):
+    """
+    Time task CRUD requests for a while.
+
+    Args:
+        port (int): App port
+        clients (int): Concurrent clients
+        seconds (float): How long to keep sending requests
+
+    Returns:
+        Recorder: Latencies of each kind of request
+    """
+    recorder = Recorder()
+    deadline = time.monotonic() + seconds
+
+    def client(number):
+        while time.monotonic() < deadline:
+            recorder.request(port, 'GET /tasks page', 'GET', '/tasks?limit=50')
+            status, task = recorder.request(port, 'POST /tasks', 'POST', '/tasks', {'title': f'Probe {number}'})
+            if status != 201:
+                continue
+            recorder.request(port, 'PATCH /tasks', 'PATCH', f"/tasks?id={task['id']}", {'completed': True})
+            recorder.request(port, 'DELETE /tasks', 'DELETE', f"/tasks?id={task['id']}")
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    return recorder
+
+
+def _print_probe(label, recorder):
+    """
+    Print CRUD latency percentiles.
+
+    Args:
+        label (str): Row label
+        recorder (Recorder): Result of _crud_probe()
+    """
+    everything = summarize([seconds for latencies in recorder.latencies.values() for seconds in latencies])
+    errors = sum(recorder.errors.values())
+    print(f"  CRUD {label:<22} {everything['count']:6d} requests  p50 {everything['p50_ms'] or 0:8.1f} ms  "
+          f"p95 {everything['p95_ms'] or 0:8.1f} ms  p99 {everything['p99_ms'] or 0:8.1f} ms  errors {errors}")
+
+
+def run_server(server, app, threads, task_id, agents, crud_clients, seconds):
+    """
+    Measure CRUD latency with and without agent calls in flight.
+
+    Args:
+        server (str): ``wsgi`` or ``asgi``
+        app (Flask): Application to serve
+        threads (int): Request threads for the Flask routes
+        task_id (int): Task with an ingested PDF for the agent calls
+        agents (int): Agent calls kept in flight
+        crud_clients (int): Concurrent CRUD clients
+        seconds (float): Length of each measurement
+    """
+    port, stop = (_serve_asgi if server == 'asgi' else _serve_wsgi)(app, threads)
+    print(f'{server} ({threads} threads for Flask routes)')
+    try:
+        _print_probe('idle', _crud_probe(port, crud_clients, seconds))
+
+        agent_calls = Recorder()
+        stopping = threading.Event()
+
+        def agent_client():
+            while not stopping.is_set():
+                agent_calls.request(port, 'POST /process-task', 'POST', '/process-task',
+                                    {'task_id': task_id, 'task_type': 'review', 'no_cache': True})
+
+        callers = [threading.Thread(target=agent_client, daemon=True) for _ in range(agents)]
+        for caller in callers:
+            caller.start()
+        # Let the agent calls reach the server before measuring
+        time.sleep(1)
+        start = time.perf_counter()
+        _print_probe(f'{agents} agent calls', _crud_probe(port, crud_clients, seconds))
+        elapsed = time.perf_counter() - start
+        stopping.set()
+        for caller in callers:
+            caller.join()
+
+        calls = summarize(agent_calls.latencies.get('POST /process-task', []))
+        errors = sum(agent_calls.errors.values())
+        print(f"  agent calls completed {calls['count']} ({calls['count'] / elapsed:.1f}/s)  "
+              f"p50 {calls['p50_ms'] or 0:.0f} ms  errors {errors}")
+    finally:
+        stop()
+
+
+def run(servers, agents, model_latency, threads, crud_clients, seconds):
+    """
+    Run the benchmark for each server and print the results.
+
+    Args:
+        servers (list[str]): ``wsgi`` and/or ``asgi``
+        agents (int): Agent calls kept in flight
+        model_latency (float): Seconds each fake model call takes
+        threads (int): Request threads for the Flask routes
+        crud_clients (int): Concurrent CRUD clients
+        seconds (float): Length of each measurement
+    """
+    pdfs = sorted(glob.glob(os.path.join(SAMPLE_PDFS, '*.pdf')))
+    if not pdfs:
+        raise SystemExit(f'No sample PDFs in {SAMPLE_PDFS}')
+
+    openai = FakeOpenAIServer(latency=model_latency).start()
+    os.environ['OPENAI_BASE_URL'] = openai.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['VECTOR_GC_INTERVAL'] = '0'
+    # The fake Qdrant only exists in this process, so ingestion must run in threads
+    os.environ['INGEST_EXECUTOR'] = 'thread'
+    # Let every agent call have its own connection to the model
+    os.environ['OPENAI_MAX_CONNECTIONS'] = str(agents)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from agno.embedder.openai import OpenAIEmbedder
+        from api import create_app
+        from api.database import set_vector_db
+        from api.embedding_cache import CachedEmbedder
+
+        set_vector_db(fake_qdrant('godolist', CachedEmbedder(embedder=OpenAIEmbedder(
+            id='text-embedding-3-small', dimensions=DIMENSIONS, api_key='test', base_url=openai.base_url
+        ))))
+        app = create_app()
+
+        # Ingest a document for the agent to review
+        setup_server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=setup_server.serve_forever, daemon=True).start()
+        setup = Recorder()
+        port = setup_server.server_port
+        setup.request(port, 'setup', 'POST', '/tasks/batch', {'operations': [
+            {'op': 'create', 'task': {'title': f'Task {i}'}} for i in range(500)
+        ]})
+        _status, task = setup.request(port, 'setup', 'POST', '/tasks', {'title': 'Review the sample document'})
+        ingested = upload_and_wait(setup, port, task['id'], pdfs[0])
+        setup_server.shutdown()
+        if not ingested:
+            raise SystemExit('Could not ingest the sample PDF')
+
+        print(f'{agents} agent calls in flight, {model_latency:.1f} s per model call, '
+              f'{crud_clients} CRUD clients, {seconds:.0f} s per measurement')
+        for server in servers:
+            run_server(server, app, threads, task['id'], agents, crud_clients, seconds)
+    openai.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=('wsgi', 'asgi', 'both'), default='both')
+    parser.add_argument('--agents', type=int, default=200, help='agent calls kept in flight')
+    parser.add_argument('--model-latency', type=float, default=2.0, help='seconds per model call')
+    parser.add_argument('--threads', type=int, default=32, help='request threads for the Flask routes')
+    parser.add_argument('--crud-clients', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0, help='length of each measurement')
+    args = parser.parse_args()
+    run(['wsgi', 'asgi'] if args.server == 'both' else [args.server], args.agents, args.model_latency,
+        args.threads, args.crud_clients, args.seconds)
@@ -0,0 +1,114 @@
+"""
+SQLite load benchmark for the task API.
+
+Drives the Flask app in several worker processes (standing in for gunicorn
+workers), each running several threads, and reports read and write throughput
+so the effect of the pooled WAL connection layer can be compared across
+worker/thread counts.
+
+Usage:
+    python -m benchmarks.db_load --workers 4 --threads 8 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def _worker(workdir, threads, seconds, write_ratio, results):
+    """
+    Run one worker process and put its (reads, writes, errors) on the queue.
+
+    Args:
+        workdir (str): Directory holding the benchmark database
+        threads (int): Number of client threads in this process
+        seconds (float): Duration of the run
+        write_ratio (float): Fraction of requests that are writes
+        results (multiprocessing.Queue): Queue receiving the counters
+    """
+    os.chdir(workdir)
+    from api import create_app
+
+    app = create_app()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client_loop():
+        client = app.test_client()
+        reads = writes = errors = 0
+        while time.monotonic() < deadline:
+            if random.random() < write_ratio:
+                response = client.post('/tasks', json={'title': 'bench task'})
+                if response.status_code == 201:
+                    task_id = response.get_json()['id']
+                    response = client.patch(f'/tasks?id={task_id}', json={'completed': True})
+                writes += 1
+            else:
+                response = client.get('/tasks?folder_id=1')
+                reads += 1
+            if response.status_code >= 400:
+                errors += 1
+        with lock:
+            counts['reads'] += reads
+            counts['writes'] += writes
+            counts['errors'] += errors
+
+    pool = [threading.Thread(target=client_loop) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(counts)
+
+
+def run(workers, threads, seconds, write_ratio):
+    """
+    Run the benchmark and print throughput figures.
+
+    Args:
+        workers (int): Number of worker processes
+        threads (int): Number of threads per worker
+        seconds (float): Duration of the run
+        write_ratio (float): Fraction of requests that are writes
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        # Create the schema once before the workers race to do it
+        os.chdir(workdir)
+        from api.database import init_db
+        init_db()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=_worker, args=(workdir, threads, seconds, write_ratio, results)
+            )
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        totals = {'reads': 0, 'writes': 0, 'errors': 0}
+        for _ in procs:
+            for key, value in results.get().items():
+                totals[key] += value
+        for proc in procs:
+            proc.join()
+
+    print(f"workers={workers} threads={threads} seconds={seconds}")
+    print(f"  reads:  {totals['reads']:>8}  ({totals['reads'] / seconds:,.0f}/s)")
+    print(f"  writes: {totals['writes']:>8}  ({totals['writes'] / seconds:,.0f}/s)")
+    print(f"  errors: {totals['errors']:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+    run(args.workers, args.threads, args.seconds, args.write_ratio)
@@ -0,0 +1,94 @@
+"""
+Check of the content-hash embedding cache with a counting fake embedder.
+
+Indexes a sample PDF, then the same bytes under another name, then the same
+file into a second collection, then again after evicting the cache, and
+reports how many times the embedder was actually called in each step.
+
+Usage:
+    python -m benchmarks.embedding_cache
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from benchmarks.ingest_queue import SAMPLE_PDFS, FakeEmbedder
+
+
+@dataclass
+class CountingEmbedder(FakeEmbedder):
+    """Fake embedder that counts how often it is called."""
+
+    calls: int = 0
+
+    def get_embedding_and_usage(self, text):
+        """
+        Embed text and count the call.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            tuple: Vector and empty usage
+        """
+        self.calls += 1
+        return super().get_embedding_and_usage(text)
+
+
+def run(pdf):
+    """
+    Run the check and print embedder calls per step.
+
+    Args:
+        pdf (str): PDF to index
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api.vector_store import TaskQdrant
+        from api.database import init_db
+        from api.connection import get_connection
+        from api.embedding_cache import CachedEmbedder, cache_stats, evict
+        from api.file_handler import process_file
+
+        init_db()
+        counting = CountingEmbedder()
+        embedder = CachedEmbedder(embedder=counting)
+        first = shutil.copy(pdf, 'first.pdf')
+        second = shutil.copy(pdf, 'second.pdf')
+
+        stores = {}
+
+        def step(label, file_path, collection):
+            if collection not in stores:
+                stores[collection] = TaskQdrant(collection=collection, location=':memory:', embedder=embedder)
+            vector_db = stores[collection]
+            before = counting.calls
+            start = time.perf_counter()
+            process_file(file_path, 1, vector_db=vector_db)
+            elapsed = time.perf_counter() - start
+            calls = counting.calls - before
+            print(f'  {label:<28} {calls:5d} embedder calls  {elapsed * 1000:8.1f} ms')
+            return calls
+
+        print(os.path.basename(pdf))
+        cold = step('cold', first, 'a')
+        duplicate = step('same bytes, other task', second, 'a')
+        other = step('other collection', second, 'b')
+        evict(get_connection(), 0)
+        evicted = step('after eviction', first, 'c')
+
+        for row in cache_stats(get_connection()):
+            print(f"  hit rate {row['hit_rate']:.2f}, {row['calls_saved']} embedding calls saved")
+
+    assert cold > 0 and duplicate == 0 and other == 0 and evicted == cold, 'unexpected embedder calls'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pdf', default=None, help='PDF to index (defaults to the first sample PDF)')
+    args = parser.parse_args()
+    run(os.path.abspath(args.pdf) if args.pdf else sorted(glob.glob(SAMPLE_PDFS))[0])
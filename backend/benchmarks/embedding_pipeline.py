@@ -0,0 +1,113 @@
+"""
+Benchmark of the batched embedding pipeline against agno's serial upsert.
+
+Embeds synthetic 1000-character chunks through a local fake embeddings API
+that adds latency to every request, first with agno's one-call-per-chunk
+Qdrant upsert and then with the pipeline. A last run points the pipeline at
+a server enforcing a much lower request rate than the pipeline is configured
+for, to show it backing off on 429s instead of failing.
+
+Usage:
+    python -m benchmarks.embedding_pipeline --chunks 200 --latency 0.05
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.fake_openai import FakeOpenAIServer
+
+DIMENSIONS = 256
+
+
+def make_documents(count):
+    """
+    Build distinct chunk-sized documents.
+
+    Args:
+        count (int): Number of documents
+
+    Returns:
+        list[Document]: Documents
+    """
+    from agno.document import Document
+
+    return [
+        Document(name='bench', id=f'bench_{i}', meta_data={'chunk': i}, content=f'Chunk {i}. ' + 'lorem ipsum ' * 82)
+        for i in range(count)
+    ]
+
+
+def run(chunks, latency, batch_size, concurrency):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        chunks (int): Number of chunks to embed
+        latency (float): Seconds the fake API adds per request
+        batch_size (int): Texts per pipeline request
+        concurrency (int): Pipeline requests in flight
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from agno.embedder.openai import OpenAIEmbedder
+        from api.vector_store import TaskQdrant
+        from api.embedding_pipeline import EmbeddingPipeline, RateLimiter
+
+        def embedder_for(server):
+            return OpenAIEmbedder(
+                id='text-embedding-3-small',
+                dimensions=DIMENSIONS,
+                api_key='fake',
+                base_url=server.base_url,
+                client_params={'max_retries': 0}
+            )
+
+        def timed(label, server, index):
+            vector_db = TaskQdrant(collection='bench', location=':memory:', embedder=embedder_for(server))
+            vector_db.create()
+            start = time.perf_counter()
+            index(vector_db, make_documents(chunks))
+            elapsed = time.perf_counter() - start
+            count = vector_db.get_count()
+            print(f'  {label:<22} {elapsed * 1000:9.1f} ms  {server.requests:4d} requests  '
+                  f'{server.throttled:3d} throttled  {count} points')
+            return elapsed
+
+        print(f'{chunks} chunks, {latency * 1000:.0f} ms per request')
+        server = FakeOpenAIServer(latency=latency).start()
+        serial = timed('agno serial upsert', server, lambda db, docs: db.upsert(docs))
+
+        server = FakeOpenAIServer(latency=latency).start()
+        pipeline = EmbeddingPipeline(None, concurrency=concurrency, limiter=RateLimiter(), max_size=batch_size)
+        batched = timed('pipeline', server, lambda db, docs: _index(pipeline, db, docs))
+
+        # Server allows 4 requests per second; the pipeline believes it may send far more
+        server = FakeOpenAIServer(latency=latency, limit=4, window=1.0).start()
+        pipeline = EmbeddingPipeline(None, concurrency=concurrency, limiter=RateLimiter(), max_size=batch_size)
+        timed('pipeline, rate limited', server, lambda db, docs: _index(pipeline, db, docs))
+
+    print(f'  speedup: {serial / batched:.1f}x')
+
+
+def _index(pipeline, vector_db, documents):
+    """
+    Index documents with a pipeline bound to the vector store's embedder.
+
+    Args:
+        pipeline (EmbeddingPipeline): Pipeline to use
+        vector_db (TaskQdrant): Vector store
+        documents (list[Document]): Documents to index
+    """
+    pipeline.embedder = vector_db.embedder
+    pipeline.index(vector_db, documents)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+    run(args.chunks, args.latency, args.batch_size, args.concurrency)
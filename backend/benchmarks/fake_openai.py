@@ -0,0 +1,288 @@
+"""
+Local stand-in for the OpenAI embeddings and chat completions APIs.
+
+Serves ``POST /v1/embeddings`` with deterministic vectors and
+``POST /v1/chat/completions`` with a canned answer after an injected delay,
+and answers 429 with a ``Retry-After`` header once a request limit per time
+window is exceeded, or 500 for a random ``error_rate`` fraction of requests,
+so ingestion and agents can be benchmarked without
+network access or an API key. Connections are kept alive, and counted, so
+clients that reuse them can be told apart from clients that do not.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the fake API's settings and counters.
+
+    Attributes:
+        latency (float): Seconds added to every request
+        per_input_latency (float): Seconds added per embedded text
+        limit (int|None): Requests per window before answering 429
+        window (float): Rate limit window in seconds
+        requests (int): Successful requests served
+        inputs (int): Texts embedded
+        throttled (int): Requests answered with 429
+        token_latency (float): Seconds between streamed answer tokens
+        answer_tokens (int): Tokens in each answer
+        connections (int): TCP connections accepted
+        completions (int): Chat completions served
+        cancelled (int): Streamed completions the client hung up on
+        error_rate (float): Fraction of requests answered with a 500 error
+        errors (int): Requests answered with an injected error
+    """
+
+    daemon_threads = True
+    # Hundreds of clients may connect at once
+    request_queue_size = 1024
+
+    def __init__(self, latency=0.05, per_input_latency=0.0, limit=None, window=60.0,
+                 token_latency=0.0, answer_tokens=8, error_rate=0.0, seed=0):
+        """
+        Bind to a free local port.
+
+        Args:
+            latency (float): Seconds added to every request
+            per_input_latency (float): Seconds added per embedded text
+            limit (int, optional): Requests per window before answering 429
+            window (float): Rate limit window in seconds
+            token_latency (float): Seconds between streamed answer tokens
+            answer_tokens (int): Tokens in each answer
+            error_rate (float): Fraction of requests answered with a 500 error
+            seed (int): Seed for choosing which requests fail
+        """
+        super().__init__(('127.0.0.1', 0), FakeOpenAIHandler)
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.limit = limit
+        self.window = window
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.error_rate = error_rate
+        self.requests = 0
+        self.inputs = 0
+        self.throttled = 0
+        self.connections = 0
+        self.completions = 0
+        self.cancelled = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """str: Base URL to pass to the OpenAI client."""
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def admit(self):
+        """
+        Record a request against the rate limit.
+
+        Returns:
+            float|None: Seconds the client should wait, or None if admitted
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= self.window:
+                self._recent.popleft()
+            if self.limit is not None and len(self._recent) >= self.limit:
+                self.throttled += 1
+                return self.window - (now - self._recent[0])
+            self._recent.append(now)
+            return None
+
+    def fail(self):
+        """
+        Decide whether to answer a request with an injected error.
+
+        Returns:
+            bool: True if the request should fail
+        """
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def start(self):
+        """
+        Serve requests on a daemon thread.
+
+        Returns:
+            FakeOpenAIServer: This server
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def fake_vector(text, dimensions):
+    """
+    Derive a deterministic vector from text.
+
+    Args:
+        text (str): Embedded text
+        dimensions (int): Vector length
+
+    Returns:
+        list[float]: Vector
+    """
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [digest[i % len(digest)] / 255.0 for i in range(dimensions)]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler for the fake embeddings and chat endpoints."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        """Count each new connection."""
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        """Keep benchmark output quiet."""
+
+    def _send_json(self, status, body, headers=None):
+        """
+        Write a JSON response.
+
+        Args:
+            status (int): HTTP status code
+            body (dict): Response body
+            headers (dict, optional): Extra headers
+        """
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        """Serve ``POST /v1/embeddings`` and ``POST /v1/chat/completions``."""
+        path = self.path.rstrip('/')
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if path not in ('/v1/embeddings', '/v1/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+        wait = self.server.admit()
+        if wait is not None:
+            self._send_json(
+                429,
+                {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                {'Retry-After': f'{wait:.3f}'}
+            )
+            return
+        if self.server.fail():
+            self._send_json(500, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+            return
+
+        if path == '/v1/chat/completions':
+            self._complete(request)
+            return
+
+        texts = request['input'] if isinstance(request['input'], list) else [request['input']]
+        time.sleep(self.server.latency + self.server.per_input_latency * len(texts))
+        dimensions = request.get('dimensions', 1536)
+        tokens = sum(len(text) // 4 + 1 for text in texts)
+        with self.server._lock:
+            self.server.requests += 1
+            self.server.inputs += len(texts)
+        self._send_json(200, {
+            'object': 'list',
+            'model': request.get('model'),
+            'data': [
+                {'object': 'embedding', 'index': index, 'embedding': fake_vector(text, dimensions)}
+                for index, text in enumerate(texts)
+            ],
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        })
+
+    def _complete(self, request):
+        """
+        Answer a chat completion about the last message, streamed if asked.
+
+        Args:
+            request (dict): Chat completion request
+        """
+        time.sleep(self.server.latency)
+        prompt = request['messages'][-1].get('content') or ''
+        if isinstance(prompt, list):
+            prompt = ' '.join(part.get('text', '') for part in prompt)
+        words = ['Reviewed:'] + prompt.split()[:8]
+        tokens = [f'{words[i % len(words)]} ' for i in range(self.server.answer_tokens)]
+        with self.server._lock:
+            self.server.requests += 1
+            self.server.completions += 1
+            completion_id = f'chatcmpl-{self.server.completions}'
+        usage = {'prompt_tokens': len(prompt) // 4 + 1, 'completion_tokens': len(tokens),
+                 'total_tokens': len(prompt) // 4 + 1 + len(tokens)}
+
+        if request.get('stream'):
+            self._stream(request, completion_id, tokens, usage)
+            return
+        time.sleep(self.server.token_latency * len(tokens))
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        })
+
+    def _stream(self, request, completion_id, tokens, usage):
+        """
+        Stream a completion as server-sent events, one token at a time.
+
+        Args:
+            request (dict): Chat completion request
+            completion_id (str): Completion ID
+            tokens (list[str]): Answer tokens
+            usage (dict): Token usage for the final chunk
+        """
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            body = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': request.get('model'),
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}] if delta is not None else [],
+                'usage': chunk_usage
+            }
+            return f'data: {json.dumps(body)}\n\n'.encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(chunk({'role': 'assistant', 'content': ''}))
+            for token in tokens:
+                self.wfile.write(chunk({'content': token}))
+                self.wfile.flush()
+                time.sleep(self.server.token_latency)
+            self.wfile.write(chunk({}, 'stop'))
+            self.wfile.write(chunk(None, chunk_usage=usage))
+            self.wfile.write(b'data: [DONE]\n\n')
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server._lock:
+                self.server.cancelled += 1
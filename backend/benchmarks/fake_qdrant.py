@@ -0,0 +1,86 @@
+"""
+Local stand-in for a Qdrant server.
+
+Wraps qdrant-client's in-process ``:memory:`` mode, which implements the same
+client API without a server, and adds a configurable delay to every call and
+a random ``error_rate`` fraction of failures, so the app's vector store sees
+the latency and errors of a remote Qdrant without network access.
+"""
+
+import random
+import threading
+import time
+
+
+class InjectedQdrantError(Exception):
+    """Raised by the fake client for a call chosen to fail."""
+
+
+class FakeQdrantClient:
+    """
+    Proxy for a QdrantClient that delays and sometimes fails its calls.
+
+    Attributes:
+        latency (float): Seconds added to every call
+        error_rate (float): Fraction of calls that raise InjectedQdrantError
+        calls (int): Calls made
+        errors (int): Calls failed on purpose
+    """
+
+    def __init__(self, client, latency=0.0, error_rate=0.0, seed=0):
+        """
+        Wrap a client.
+
+        Args:
+            client (QdrantClient): Client that does the work
+            latency (float): Seconds added to every call
+            error_rate (float): Fraction of calls that raise InjectedQdrantError
+            seed (int): Seed for choosing which calls fail
+        """
+        self._client = client
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        """Return the wrapped client's attribute, delaying and failing its methods."""
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+                fail = self.error_rate and self._random.random() < self.error_rate
+                if fail:
+                    self.errors += 1
+            time.sleep(self.latency)
+            if fail:
+                raise InjectedQdrantError(f'Injected failure in {name}')
+            return attribute(*args, **kwargs)
+        return call
+
+
+def fake_qdrant(collection, embedder, latency=0.0, error_rate=0.0, seed=0):
+    """
+    Create the app's Qdrant store backed by an in-process fake.
+
+    Args:
+        collection (str): Collection name
+        embedder (Embedder): Embedder for the store
+        latency (float): Seconds added to every Qdrant call
+        error_rate (float): Fraction of Qdrant calls that fail
+        seed (int): Seed for choosing which calls fail
+
+    Returns:
+        TaskQdrant: Store whose ``client`` is a FakeQdrantClient
+    """
+    from api.vector_backends import TaskQdrant
+
+    vector_db = TaskQdrant(collection=collection, location=':memory:', embedder=embedder)
+    vector_db._client = FakeQdrantClient(vector_db.client, latency, error_rate, seed)
+    vector_db.create()
+    return vector_db
@@ -0,0 +1,214 @@
+"""
+Throughput benchmark for file downloads.
+
+Creates ``--files`` files of ``--size-mb`` MB attached to one task, serves
+the app over HTTP and downloads them with ``--concurrency`` parallel clients,
+first whole and then as random 1 MB ranges (what a PDF viewer fetches).
+Reports MB/s and checks that range bodies match the file and that
+revalidating with the ETag returns 304.
+
+``--server werkzeug`` (the default) serves from a threaded development
+server in this process. ``--server gunicorn`` starts gunicorn, whose
+``wsgi.file_wrapper`` sends both full and partial bodies with sendfile().
+
+Usage:
+    python -m benchmarks.file_download --files 8 --size-mb 64 --concurrency 16
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+READ_SIZE = 1024 * 1024
+RANGE_SIZE = 1024 * 1024
+
+
+def _get(port, path, headers=None):
+    """
+    Make one GET request and read the body.
+
+    Args:
+        port (int): Server port
+        path (str): Request path
+        headers (dict, optional): Request headers
+
+    Returns:
+        tuple: Status, response headers and body length, plus the body
+            itself when it is at most RANGE_SIZE bytes
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        length = 0
+        small = []
+        while True:
+            block = response.read(READ_SIZE)
+            if not block:
+                break
+            length += len(block)
+            if length <= RANGE_SIZE:
+                small.append(block)
+        body = b''.join(small) if length <= RANGE_SIZE else None
+        return response.status, dict(response.getheaders()), length, body
+    finally:
+        connection.close()
+
+
+def _free_port():
+    """
+    Find a free local port.
+
+    Returns:
+        int: Port number
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_gunicorn(workdir, concurrency):
+    """
+    Serve the app with gunicorn from a working directory.
+
+    Args:
+        workdir (str): Directory holding the database and uploads
+        concurrency (int): Threads to serve with
+
+    Returns:
+        tuple: Process and port
+    """
+    port = _free_port()
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=backend)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', '2', '--threads', str(concurrency),
+         '--bind', f'127.0.0.1:{port}', '--chdir', workdir, 'api:create_app()'],
+        env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('gunicorn did not start')
+
+
+def _throughput(label, port, requests, concurrency):
+    """
+    Run requests in parallel and print the throughput.
+
+    Args:
+        label (str): Row label
+        port (int): Server port
+        requests (list[tuple]): Path and headers of each request
+        concurrency (int): Parallel clients
+
+    Returns:
+        list[tuple]: Result of each request, from _get()
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda request: _get(port, *request), requests))
+    elapsed = time.perf_counter() - start
+    total = sum(length for _status, _headers, length, _body in results)
+    print(f'  {label:<14} {len(requests):4d} requests  {total / 1e6:9.1f} MB  {total / 1e6 / elapsed:8.1f} MB/s')
+    return results
+
+
+def run(files, size_mb, concurrency, server):
+    """
+    Run the benchmark and print throughput.
+
+    Args:
+        files (int): Number of files
+        size_mb (int): Size of each file in MB
+        concurrency (int): Parallel clients
+        server (str): ``werkzeug`` or ``gunicorn``
+    """
+    os.environ['INGEST_WORKERS'] = '0'
+    os.environ['VECTOR_GC_INTERVAL'] = '0'
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from api import create_app
+        from api.connection import get_connection
+        from api.database import UPLOAD_FOLDER
+
+        app = create_app()
+        task_id = app.test_client().post('/tasks', json={'title': 'Read the reports'}).json['id']
+        size = size_mb * 1024 * 1024
+        contents = {}
+        with get_connection() as conn:
+            for i in range(files):
+                path = os.path.join(UPLOAD_FOLDER, f'{task_id}_report{i}.pdf')
+                with open(path, 'wb') as f:
+                    for _ in range(size_mb):
+                        f.write(os.urandom(1024 * 1024))
+                file_id = conn.execute(
+                    "INSERT INTO task_files (task_id, filename, file_path, status) VALUES (?, ?, ?, 'ready')",
+                    (task_id, f'report{i}.pdf', path)
+                ).lastrowid
+                contents[file_id] = path
+            conn.commit()
+
+        if server == 'gunicorn':
+            process, port = _start_gunicorn(workdir, concurrency)
+        else:
+            http_server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=http_server.serve_forever, daemon=True).start()
+            port = http_server.server_port
+
+        try:
+            print(f'{files} files of {size_mb} MB, {concurrency} clients, {server}')
+            ids = list(contents)
+            whole = [(f'/files/{file_id}', None) for file_id in ids * max(1, concurrency // files)]
+            results = _throughput('whole files', port, whole, concurrency)
+            assert all(status == 200 and length == size for status, _headers, length, _body in results), \
+                'incomplete download'
+
+            ranges = []
+            for _ in range(concurrency * 16):
+                file_id = random.choice(ids)
+                start = random.randrange(0, size - RANGE_SIZE)
+                ranges.append((file_id, start))
+            results = _throughput('1 MB ranges', port, [
+                (f'/files/{file_id}?inline=1', {'Range': f'bytes={start}-{start + RANGE_SIZE - 1}'})
+                for file_id, start in ranges
+            ], concurrency)
+            for (file_id, start), (status, _headers, _length, body) in zip(ranges, results):
+                with open(contents[file_id], 'rb') as f:
+                    f.seek(start)
+                    assert status == 206 and body == f.read(RANGE_SIZE), 'range body differs from the file'
+
+            status, headers, _length, _body = _get(port, f'/files/{ids[0]}')
+            revalidated = _get(port, f'/files/{ids[0]}', {'If-None-Match': headers['ETag']})
+            print(f"  revalidation   {revalidated[0]} with ETag {headers['ETag']}")
+            assert revalidated[0] == 304, 'revalidation did not return 304'
+        finally:
+            if server == 'gunicorn':
+                process.terminate()
+                process.wait()
+            else:
+                http_server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--server', choices=['werkzeug', 'gunicorn'], default='werkzeug')
+    args = parser.parse_args()
+    run(args.files, args.size_mb, args.concurrency, args.server)
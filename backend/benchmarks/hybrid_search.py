@@ -0,0 +1,158 @@
+"""
+Latency benchmark of GET /search's hybrid retrieval on a synthetic corpus.
+
+Writes ``--chunks`` synthetic chunks (Zipf-distributed words from a made-up
+vocabulary) to the FTS5 index and an in-memory NumPy LocalVectorDb, grouped
+into files and tasks, then times hybrid_search() over the whole corpus and
+limited to one task, in lexical, vector and hybrid mode. Query embeddings
+come from a deterministic fake embedder, so no API key is needed.
+
+Usage:
+    python -m benchmarks.hybrid_search --chunks 1000000
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.ingest_queue import FakeEmbedder
+
+DIMENSIONS = 64
+VOCABULARY = 20000
+WORDS_PER_CHUNK = 80
+INSERT_BATCH = 10000
+
+
+def _words(rng):
+    """
+    Make up a vocabulary.
+
+    Args:
+        rng (np.random.Generator): Random source
+
+    Returns:
+        np.ndarray: Words, most frequent first
+    """
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    return np.array([''.join(rng.choice(letters, rng.integers(3, 10))) for _ in range(VOCABULARY)])
+
+
+def _texts(rng, words, count):
+    """
+    Draw chunk texts with Zipf-distributed word frequencies.
+
+    Args:
+        rng (np.random.Generator): Random source
+        words (np.ndarray): Vocabulary
+        count (int): Number of texts
+
+    Returns:
+        list[str]: Texts
+    """
+    ranks = np.minimum(rng.zipf(1.2, size=(count, WORDS_PER_CHUNK)), VOCABULARY) - 1
+    return [' '.join(row) for row in words[ranks]]
+
+
+def _fill(conn, store, rng, words, chunks, chunks_per_file, files_per_task):
+    """
+    Write the corpus to the database and the vector store.
+
+    Rows go straight into the tables text_index.record_chunks() writes, in
+    large batches, so building a million chunks stays practical.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        store (LocalVectorDb): Vector store
+        rng (np.random.Generator): Random source
+        words (np.ndarray): Vocabulary
+        chunks (int): Number of chunks
+        chunks_per_file (int): Consecutive chunks sharing a file
+        files_per_task (int): Consecutive files sharing a task
+
+    Returns:
+        int: Number of tasks
+    """
+    files = -(-chunks // chunks_per_file)
+    tasks = -(-files // files_per_task)
+    digest = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(files)]
+    with conn:
+        conn.executemany('INSERT INTO tasks (id, title, notes) VALUES (?, ?, ?)', [
+            (task, text[:40], text) for task, text in enumerate(_texts(rng, words, tasks), start=1)
+        ])
+        conn.executemany(
+            'INSERT INTO task_files (task_id, filename, file_path, embedding_id, content_hash) VALUES (?, ?, ?, ?, ?)',
+            [(i // files_per_task + 1, f'{i}.pdf', f'{i}.pdf', '1', digest[i]) for i in range(files)]
+        )
+    for offset in range(0, chunks, INSERT_BATCH):
+        texts = _texts(rng, words, min(INSERT_BATCH, chunks - offset))
+        ids = [f'{offset + i:032x}' for i in range(len(texts))]
+        with conn:
+            conn.executemany(
+                'INSERT INTO chunk_text (id, point_id, name, meta_data, content) VALUES (?, ?, ?, ?, ?)',
+                [(offset + i + 1, id_, 'doc', '{}', text) for i, (id_, text) in enumerate(zip(ids, texts))]
+            )
+            conn.executemany(
+                'INSERT INTO file_chunks (file_hash, chunk_id, position) VALUES (?, ?, ?)',
+                [(digest[(offset + i) // chunks_per_file], offset + i + 1, i) for i in range(len(texts))]
+            )
+        vectors = rng.normal(size=(len(texts), DIMENSIONS)).astype(np.float32)
+        store.upsert_points([
+            (id_, vector, {'file_hashes': [digest[(offset + i) // chunks_per_file]], 'name': 'doc', 'content': ''})
+            for i, (id_, vector) in enumerate(zip(ids, vectors))
+        ])
+    return tasks
+
+
+def run(chunks, queries, chunks_per_file, files_per_task, seed):
+    """
+    Run the benchmark and print latency percentiles.
+
+    Args:
+        chunks (int): Corpus size in chunks
+        queries (int): Queries per measurement
+        chunks_per_file (int): Chunks in each synthetic file
+        files_per_task (int): Files attached to each synthetic task
+        seed (int): Random seed
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api.connection import get_connection
+        from api.database import init_db
+        from api.hybrid_search import hybrid_search
+        from api.vector_store import LocalVectorDb
+
+        init_db()
+        conn = get_connection()
+        rng = np.random.default_rng(seed)
+        words = _words(rng)
+        store = LocalVectorDb('bench', FakeEmbedder(dimensions=DIMENSIONS))
+        start = time.perf_counter()
+        tasks = _fill(conn, store, rng, words, chunks, chunks_per_file, files_per_task)
+        print(f'{chunks} chunks, {tasks} tasks of {chunks_per_file * files_per_task} chunks, '
+              f'built in {time.perf_counter() - start:.1f} s')
+
+        # Two mid-frequency words per query
+        samples = [' '.join(words[rng.integers(50, 2000, 2)]) for _ in range(queries)]
+        scopes = rng.integers(1, tasks + 1, queries)
+        for mode in ('lexical', 'vector', 'hybrid'):
+            for label, task_ids in (('whole corpus', [None] * queries), ('one task', scopes)):
+                timings = []
+                for query, task_id in zip(samples, task_ids):
+                    start = time.perf_counter()
+                    hybrid_search(conn, store, query, mode=mode, task_id=None if task_id is None else int(task_id))
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(f'  {mode:<8} {label:<13} p50 {np.percentile(timings, 50):8.2f} ms  '
+                      f'p95 {np.percentile(timings, 95):8.2f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--chunks-per-file', type=int, default=50)
+    parser.add_argument('--files-per-task', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.chunks, args.queries, args.chunks_per_file, args.files_per_task, args.seed)
@@ -0,0 +1,155 @@
+"""
+Benchmark for background PDF ingestion.
+
+Uploads the sample PDFs to one task and reports how long the upload requests
+took (they return 202 as soon as the file is queued) and how long the queue
+took to make every file ready. Embeddings come from a deterministic fake
+embedder and are stored in an in-memory Qdrant collection, so no API key or
+server is needed. With ``--fail-rate`` the processor fails randomly to
+exercise retries.
+
+Usage:
+    python -m benchmarks.ingest_queue --workers 2 --copies 3
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import partial
+from agno.embedder.base import Embedder
+
+SAMPLE_PDFS = os.path.join(os.path.dirname(__file__), '..', '..', 'docs', 'sample-pdf', '*.pdf')
+
+
+@dataclass
+class FakeEmbedder(Embedder):
+    """Deterministic embedder deriving vectors from a hash of the text."""
+
+    dimensions: int = 64
+
+    def get_embedding(self, text):
+        """
+        Embed text without calling a model.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list[float]: Vector of ``dimensions`` floats
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [digest[i % len(digest)] / 255.0 for i in range(self.dimensions)]
+
+    def get_embedding_and_usage(self, text):
+        """
+        Embed text without calling a model.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            tuple: Vector and empty usage
+        """
+        return self.get_embedding(text), None
+
+
+def flaky(processor, fail_rate, file_path, task_id, file_id=None):
+    """
+    Call a processor, failing at random first.
+
+    Args:
+        processor (Callable): Processor to wrap
+        fail_rate (float): Probability of failing each attempt
+        file_path (str): Path to the uploaded file
+        task_id (int): ID of the task the file belongs to
+        file_id (int, optional): ID of the file's ``task_files`` row
+
+    Returns:
+        str: Embedding ID from the processor
+    """
+    if random.random() < fail_rate:
+        raise RuntimeError('Simulated embedding failure')
+    return processor(file_path, task_id, file_id=file_id)
+
+
+def run(workers, copies, fail_rate):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        workers (int): Size of the ingestion pool
+        copies (int): Number of times each sample PDF is uploaded
+        fail_rate (float): Probability of a simulated failure per attempt
+    """
+    pdfs = sorted(glob.glob(SAMPLE_PDFS))
+    if not pdfs:
+        raise SystemExit('No sample PDFs found')
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.environ['INGEST_WORKERS'] = '0'
+        from api.vector_store import TaskQdrant
+        from api import create_app, ingest_queue
+        from api.file_handler import process_file
+
+        vector_db = TaskQdrant(collection='bench', location=':memory:', embedder=FakeEmbedder())
+        processor = partial(process_file, vector_db=vector_db)
+        if fail_rate:
+            processor = partial(flaky, processor, fail_rate)
+        worker = ingest_queue.IngestWorker(
+            workers=workers, processor=processor, executor='thread', poll_interval=0.05, backoff_base=0.05
+        )
+        ingest_queue.worker = worker
+
+        app = create_app()
+        client = app.test_client()
+        task_id = client.post('/tasks', json={'title': 'Ingest'}).get_json()['id']
+
+        sources = []
+        for copy in range(copies):
+            for pdf in pdfs:
+                name = f'{copy}_{os.path.basename(pdf)}'
+                shutil.copy(pdf, name)
+                sources.append(name)
+
+        worker.start()
+        start = time.perf_counter()
+        file_ids = []
+        for name in sources:
+            with open(name, 'rb') as f:
+                response = client.post(f'/tasks/{task_id}/files', data={'file': (f, name)})
+            assert response.status_code == 202, response.get_json()
+            file_ids.append(response.get_json()['id'])
+        uploaded = time.perf_counter() - start
+
+        pending = set(file_ids)
+        statuses = {}
+        while pending:
+            time.sleep(0.05)
+            for file_id in list(pending):
+                status = client.get(f'/files/{file_id}/status').get_json()
+                if status['status'] in ('ready', 'failed'):
+                    statuses[file_id] = status
+                    pending.discard(file_id)
+        ready = time.perf_counter() - start
+        worker.stop()
+
+    attempts = sum(status['attempts'] for status in statuses.values())
+    failed = sum(1 for status in statuses.values() if status['status'] == 'failed')
+    print(f'{len(file_ids)} uploads, {workers} workers')
+    print(f'  upload requests: {uploaded * 1000:8.1f} ms total')
+    print(f'  all processed:   {ready * 1000:8.1f} ms  ({attempts} attempts, {failed} failed)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--copies', type=int, default=3)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    run(args.workers, args.copies, args.fail_rate)
@@ -0,0 +1,500 @@
+"""
+Load benchmark of the whole app against local stand-ins for OpenAI and Qdrant.
+
+Serves the app over HTTP with OpenAI replaced by benchmarks.fake_openai and
+Qdrant by benchmarks.fake_qdrant, both with configurable latency and error
+injection, so no keys or network are needed. Then runs each scenario with
+``--requests`` operations spread over ``--concurrency`` client threads:
+
+* ``crud``: create, update, list and delete a task;
+* ``folders``: list folders, one folder's first page of tasks and the counts;
+* ``upload``: upload a PDF from docs/sample-pdf to a new task and wait until
+  it is ingested (repeats of a file are shared with the first upload and
+  reuse its chunks, as they would in production);
+* ``process``: ``POST /process-task`` for a task with an ingested PDF,
+  bypassing the response cache.
+
+Prints throughput, p50/p95/p99 latency per operation and per request, and the
+process's peak RSS (the app and the clients share the process). Results are
+written as JSON to ``--output`` with the commit they were measured at, and
+``--compare`` prints the change from an earlier results file.
+
+Usage:
+    python -m benchmarks.load --concurrency 8 --requests 200 --output load.json
+    python -m benchmarks.load --scenarios crud,folders --compare load.json
+"""
+
+import argparse
+import glob
+import http.client
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_qdrant import fake_qdrant
+
+SCENARIOS = ('crud', 'folders', 'upload', 'process')
+DIMENSIONS = 64
+INGEST_TIMEOUT = 120
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDFS = os.path.join(os.path.dirname(BACKEND), 'docs', 'sample-pdf')
+
+
+class Recorder:
+    """
+    Thread-safe collection of request latencies and failures.
+
+    Attributes:
+        latencies (dict): Request label -> list of seconds
+        errors (dict): Request label -> number of failed requests
+    """
+
+    def __init__(self):
+        """Initialize an empty recorder."""
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def request(self, port, label, method, path, body=None, headers=None):
+        """
+        Make one timed request and decode its JSON response.
+
+        Args:
+            port (int): App port
+            label (str): Name the request is reported under
+            method (str): HTTP method
+            path (str): Request path
+            body (bytes|dict, optional): Request body; dicts are sent as JSON
+            headers (dict, optional): Request headers
+
+        Returns:
+            tuple: Status (0 if the request failed) and decoded body
+        """
+        headers = dict(headers or {})
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+            status = response.status
+        except OSError:
+            status, data = 0, b''
+        finally:
+            connection.close()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if 200 <= status < 400:
+                self.latencies.setdefault(label, []).append(elapsed)
+            else:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    def record(self, label, seconds):
+        """
+        Record a latency measured outside request().
+
+        Args:
+            label (str): Name the measurement is reported under
+            seconds (float): Latency
+        """
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+
+    def fail(self, label):
+        """
+        Record a failure detected outside request().
+
+        Args:
+            label (str): Name the failure is reported under
+        """
+        with self._lock:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+
+def summarize(latencies):
+    """
+    Summarize latencies as percentiles.
+
+    Args:
+        latencies (list[float]): Seconds
+
+    Returns:
+        dict: ``count`` and ``p50_ms``, ``p95_ms``, ``p99_ms`` (None when empty)
+    """
+    if not latencies:
+        return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    if len(latencies) == 1:
+        cuts = latencies * 99
+    else:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'count': len(latencies),
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3)
+    }
+
+
+def peak_rss_mb():
+    """
+    Read this process's peak resident set size.
+
+    Returns:
+        float: Peak RSS in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _multipart(path):
+    """
+    Encode a file as a multipart form upload.
+
+    Args:
+        path (str): File to upload
+
+    Returns:
+        tuple: Body and headers
+    """
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as file:
+        contents = file.read()
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+        f'filename="{os.path.basename(path)}"\r\nContent-Type: application/pdf\r\n\r\n'
+    ).encode() + contents + f'\r\n--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def upload_and_wait(recorder, port, task_id, path):
+    """
+    Upload a PDF and wait for its ingestion to finish.
+
+    Args:
+        recorder (Recorder): Recorder for the requests
+        port (int): App port
+        task_id (int): Task to attach the file to
+        path (str): PDF to upload
+
+    Returns:
+        bool: Whether the file was ingested
+    """
+    start = time.perf_counter()
+    body, headers = _multipart(path)
+    status, file = recorder.request(port, 'POST /tasks/<id>/files', 'POST', f'/tasks/{task_id}/files', body, headers)
+    if status != 202:
+        return False
+    deadline = time.monotonic() + INGEST_TIMEOUT
+    while time.monotonic() < deadline:
+        _status, state = recorder.request(port, 'GET /files/<id>/status', 'GET', f"/files/{file['id']}/status")
+        if state and state['status'] == 'ready':
+            recorder.record('upload to ingested', time.perf_counter() - start)
+            return True
+        if state and state['status'] == 'failed':
+            break
+        time.sleep(0.05)
+    recorder.fail('upload to ingested')
+    return False
+
+
+def _crud(recorder, port, index, context):
+    """Create, update, list and delete a task."""
+    status, task = recorder.request(port, 'POST /tasks', 'POST', '/tasks', {'title': f'Load task {index}'})
+    if status != 201:
+        return False
+    recorder.request(port, 'PATCH /tasks', 'PATCH', f"/tasks?id={task['id']}", {'completed': True})
+    recorder.request(port, 'GET /tasks page', 'GET', '/tasks?limit=100')
+    status, _ = recorder.request(port, 'DELETE /tasks', 'DELETE', f"/tasks?id={task['id']}")
+    return status == 204
+
+
+def _folders(recorder, port, index, context):
+    """List folders, one folder's tasks and the counts."""
+    folder_id = context['folders'][index % len(context['folders'])]
+    recorder.request(port, 'GET /folders', 'GET', '/folders')
+    recorder.request(port, 'GET /tasks?folder_id', 'GET', f'/tasks?folder_id={folder_id}&limit=100')
+    status, _ = recorder.request(port, 'GET /tasks/stats', 'GET', '/tasks/stats')
+    return status == 200
+
+
+def _upload(recorder, port, index, context):
+    """Upload a sample PDF to a new task and wait until it is ingested."""
+    status, task = recorder.request(port, 'POST /tasks', 'POST', '/tasks', {'title': f'Review upload {index}'})
+    if status != 201:
+        return False
+    return upload_and_wait(recorder, port, task['id'], context['pdfs'][index % len(context['pdfs'])])
+
+
+def _process(recorder, port, index, context):
+    """Ask the agent about a task with an ingested PDF."""
+    status, _ = recorder.request(port, 'POST /process-task', 'POST', '/process-task', {
+        'task_id': context['process_task'], 'task_type': 'review', 'no_cache': True
+    })
+    return status == 200
+
+
+SCENARIO_RUNNERS = {'crud': _crud, 'folders': _folders, 'upload': _upload, 'process': _process}
+
+
+def _prepare(port, scenarios, pdfs):
+    """
+    Create the data the scenarios read.
+
+    Args:
+        port (int): App port
+        scenarios (list[str]): Scenarios that will run
+        pdfs (list[str]): Sample PDFs
+
+    Returns:
+        dict: Scenario context
+    """
+    setup = Recorder()
+    context = {'pdfs': pdfs, 'folders': []}
+    if 'folders' in scenarios:
+        for number in range(10):
+            _status, folder = setup.request(port, 'setup', 'POST', '/folders', {'name': f'Folder {number}'})
+            context['folders'].append(folder['id'])
+        setup.request(port, 'setup', 'POST', '/tasks/batch', {'operations': [
+            {'op': 'create', 'task': {'title': f'Task {i}', 'folder_id': context['folders'][i % 10]}}
+            for i in range(2000)
+        ]})
+    if 'process' in scenarios:
+        _status, task = setup.request(port, 'setup', 'POST', '/tasks', {'title': 'Review the sample document'})
+        if not upload_and_wait(setup, port, task['id'], pdfs[0]):
+            raise SystemExit('Could not ingest the sample PDF for the process scenario')
+        context['process_task'] = task['id']
+    return context
+
+
+def run_scenario(port, name, requests, concurrency, context):
+    """
+    Run one scenario and summarize it.
+
+    Args:
+        port (int): App port
+        name (str): Scenario name
+        requests (int): Operations to run
+        concurrency (int): Client threads
+        context (dict): Scenario context from _prepare()
+
+    Returns:
+        dict: Operation throughput and latency, per-request latency, errors
+            and peak RSS
+    """
+    recorder = Recorder()
+    runner = SCENARIO_RUNNERS[name]
+    operations = []
+    lock = threading.Lock()
+
+    def operation(index):
+        start = time.perf_counter()
+        ok = runner(recorder, port, index, context)
+        with lock:
+            operations.append((ok, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(operation, range(requests)))
+    seconds = time.perf_counter() - start
+
+    succeeded = [elapsed for ok, elapsed in operations if ok]
+    return {
+        'operations': len(operations),
+        'errors': len(operations) - len(succeeded),
+        'seconds': round(seconds, 3),
+        'throughput': round(len(succeeded) / seconds, 2),
+        **summarize(succeeded),
+        'requests': {
+            label: {**summarize(latencies), 'errors': recorder.errors.get(label, 0)}
+            for label, latencies in sorted(recorder.latencies.items())
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _commit():
+    """
+    Identify the checked-out commit.
+
+    Returns:
+        str|None: Short commit hash, with ``-dirty`` for uncommitted changes
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    """
+    Print a results summary.
+
+    Args:
+        results (dict): Results from run()
+    """
+    settings = results['settings']
+    print(f"commit {results['commit']}, concurrency {settings['concurrency']}, "
+          f"{settings['requests']} operations per scenario")
+    for name, scenario in results['scenarios'].items():
+        print(f"{name:<8} {scenario['throughput']:8.1f} ops/s  p50 {scenario['p50_ms'] or 0:8.1f} ms  "
+              f"p95 {scenario['p95_ms'] or 0:8.1f} ms  p99 {scenario['p99_ms'] or 0:8.1f} ms  "
+              f"errors {scenario['errors']}  peak RSS {scenario['peak_rss_mb']:.0f} MB")
+        for label, request in scenario['requests'].items():
+            print(f"    {label:<26} p50 {request['p50_ms']:8.1f} ms  p95 {request['p95_ms']:8.1f} ms  "
+                  f"p99 {request['p99_ms']:8.1f} ms  errors {request['errors']}")
+
+
+def compare(results, baseline):
+    """
+    Print the change in throughput and p95 latency from a baseline run.
+
+    Args:
+        results (dict): Results from run()
+        baseline (dict): Results loaded from an earlier run
+    """
+    print(f"compared with {baseline['commit']} ({baseline['timestamp']})")
+    for name, scenario in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before or not before['throughput'] or not before['p95_ms'] or not scenario['p95_ms']:
+            continue
+        throughput = (scenario['throughput'] / before['throughput'] - 1) * 100
+        p95 = (scenario['p95_ms'] / before['p95_ms'] - 1) * 100
+        print(f'{name:<8} throughput {throughput:+6.1f}%  p95 {p95:+6.1f}%')
+
+
+def run(scenarios, requests, concurrency, openai_latency, openai_error_rate, token_latency, answer_tokens,
+        qdrant_latency, qdrant_error_rate):
+    """
+    Run the scenarios against a freshly served app.
+
+    Args:
+        scenarios (list[str]): Scenarios to run, in order
+        requests (int): Operations per scenario
+        concurrency (int): Client threads
+        openai_latency (float): Seconds before each fake OpenAI response
+        openai_error_rate (float): Fraction of OpenAI requests that fail
+        token_latency (float): Seconds between answer tokens
+        answer_tokens (int): Tokens in each answer
+        qdrant_latency (float): Seconds added to each Qdrant call
+        qdrant_error_rate (float): Fraction of Qdrant calls that fail
+
+    Returns:
+        dict: Settings, environment and per-scenario results
+    """
+    pdfs = sorted(glob.glob(os.path.join(SAMPLE_PDFS, '*.pdf')))
+    if not pdfs and {'upload', 'process'} & set(scenarios):
+        raise SystemExit(f'No sample PDFs in {SAMPLE_PDFS}')
+
+    openai = FakeOpenAIServer(latency=openai_latency, token_latency=token_latency, answer_tokens=answer_tokens,
+                              error_rate=openai_error_rate).start()
+    os.environ['OPENAI_BASE_URL'] = openai.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['VECTOR_GC_INTERVAL'] = '0'
+    # The fake Qdrant only exists in this process, so ingestion must run in threads
+    os.environ['INGEST_EXECUTOR'] = 'thread'
+
+    results = {
+        'commit': _commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'settings': {
+            'scenarios': scenarios, 'requests': requests, 'concurrency': concurrency,
+            'openai_latency': openai_latency, 'openai_error_rate': openai_error_rate,
+            'token_latency': token_latency, 'answer_tokens': answer_tokens,
+            'qdrant_latency': qdrant_latency, 'qdrant_error_rate': qdrant_error_rate
+        },
+        'scenarios': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from agno.embedder.openai import OpenAIEmbedder
+        from api import create_app
+        from api.database import set_vector_db
+        from api.embedding_cache import CachedEmbedder
+
+        vector_db = fake_qdrant(
+            'godolist',
+            CachedEmbedder(embedder=OpenAIEmbedder(id='text-embedding-3-small', dimensions=DIMENSIONS,
+                                                   api_key='test', base_url=openai.base_url)),
+            latency=qdrant_latency, error_rate=qdrant_error_rate
+        )
+        set_vector_db(vector_db)
+        app = create_app()
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            context = _prepare(server.server_port, scenarios, pdfs)
+            for name in scenarios:
+                results['scenarios'][name] = run_scenario(server.server_port, name, requests, concurrency, context)
+        finally:
+            server.shutdown()
+            openai.shutdown()
+
+    results['fakes'] = {
+        'openai_requests': openai.requests, 'openai_errors': openai.errors,
+        'qdrant_calls': vector_db.client.calls, 'qdrant_errors': vector_db.client.errors
+    }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated, from {', '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=100, help='operations per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--openai-latency', type=float, default=0.05)
+    parser.add_argument('--openai-error-rate', type=float, default=0.0)
+    parser.add_argument('--token-latency', type=float, default=0.0)
+    parser.add_argument('--answer-tokens', type=int, default=32)
+    parser.add_argument('--qdrant-latency', type=float, default=0.002)
+    parser.add_argument('--qdrant-error-rate', type=float, default=0.0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='results JSON from an earlier run to compare with')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    # Resolve paths before the run changes directory
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = run(names, args.requests, args.concurrency, args.openai_latency, args.openai_error_rate,
+                  args.token_latency, args.answer_tokens, args.qdrant_latency, args.qdrant_error_rate)
+    print_results(results)
+    if baseline_path:
+        with open(baseline_path) as file:
+            compare(results, json.load(file))
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'results written to {output}')
@@ -0,0 +1,68 @@
+"""
+Benchmark of what instrumentation adds to SQLite statements and spans.
+
+Runs ``--queries`` primary-key SELECTs against a plain connection and against
+one whose statements are timed for GET /metrics, and times empty spans, so
+the cost of leaving METRICS_ENABLED on can be compared with the hot paths it
+measures.
+
+Usage:
+    python -m benchmarks.metrics_overhead --queries 100000
+"""
+
+import argparse
+import sqlite3
+import time
+from api.metrics import TimedConnection, span
+
+
+def _select_loop(conn, queries):
+    """
+    Time point lookups on a connection.
+
+    Args:
+        conn (sqlite3.Connection): Connection with a filled ``tasks`` table
+        queries (int): Number of SELECTs
+
+    Returns:
+        float: Microseconds per SELECT
+    """
+    start = time.perf_counter()
+    for index in range(queries):
+        conn.execute('SELECT id, title FROM tasks WHERE id = ?', (index % 1000 + 1,)).fetchone()
+    return (time.perf_counter() - start) * 1e6 / queries
+
+
+def run(queries):
+    """
+    Run the benchmark and print per-call costs.
+
+    Args:
+        queries (int): Number of SELECTs per connection
+    """
+    timings = {}
+    for label, factory in (('plain', sqlite3.Connection), ('timed', TimedConnection)):
+        conn = sqlite3.connect(':memory:', factory=factory)
+        conn.execute('CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT)')
+        conn.executemany('INSERT INTO tasks (title) VALUES (?)', [(f'Task {i}',) for i in range(1000)])
+        timings[label] = _select_loop(conn, queries)
+        conn.close()
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        with span('benchmark'):
+            pass
+    span_us = (time.perf_counter() - start) * 1e6 / queries
+
+    print(f'{queries} primary-key SELECTs')
+    print(f"  plain connection: {timings['plain']:6.2f} us per query")
+    print(f"  timed connection: {timings['timed']:6.2f} us per query  "
+          f"(+{timings['timed'] - timings['plain']:.2f} us)")
+    print(f'  empty span:       {span_us:6.2f} us')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.queries)
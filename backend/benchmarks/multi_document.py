@@ -0,0 +1,218 @@
+"""
+Benchmark of agent latency as the number of files attached to a task grows.
+
+Serves the app with OpenAI replaced by benchmarks.fake_openai and Qdrant by
+benchmarks.fake_qdrant (each Qdrant call takes ``--qdrant-latency``
+seconds, like a round trip to a remote server). For each count in
+``--files`` it attaches that many distinct generated PDFs to a task, waits
+for them to be ingested, and then, searching the files one at a time
+concurrently and with one filtered query:
+
+* times ``--runs`` ``POST /process-task`` calls end to end;
+* times the knowledge base search alone, and reports how many chunks and
+  estimated tokens it hands to the model (bounded by
+  ``AGENT_CONTEXT_TOKENS``).
+
+Usage:
+    python -m benchmarks.multi_document --files 1 2 5 10 20 --runs 10
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_qdrant import fake_qdrant
+from benchmarks.load import Recorder, summarize, upload_and_wait
+
+DIMENSIONS = 64
+PAGES = 3
+LINES_PER_PAGE = 40
+
+WORDS = (
+    'budget risk schedule contract supplier review audit policy security network access control incident '
+    'response training compliance privacy data retention backup recovery vendor assessment governance '
+    'report finding action owner deadline funding grant milestone evaluation stakeholder consultation '
+    'legislation amendment clause provider resident care quality standard workforce'
+).split()
+
+
+def synthetic_pdf(path, seed):
+    """
+    Write a small text PDF whose content depends on a seed.
+
+    Args:
+        path (str): File to write
+        seed (int): Seed for the text, so every file has distinct chunks
+    """
+    rng = random.Random(seed)
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    }
+    kids = []
+    number = 4
+    for _page in range(PAGES):
+        lines = [
+            f'Document {seed}: ' + ' '.join(rng.choice(WORDS) for _ in range(12))
+            for _ in range(LINES_PER_PAGE)
+        ]
+        stream = 'BT /F1 10 Tf 12 TL 50 790 Td ' + ' '.join(f'({line}) Tj T*' for line in lines) + ' ET'
+        objects[number] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {number + 1} 0 R >>'
+        ).encode()
+        objects[number + 1] = f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream'.encode()
+        kids.append(number)
+        number += 2
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for key in sorted(objects):
+        offsets[key] = len(output)
+        output += f'{key} 0 obj\n'.encode() + objects[key] + b'\nendobj\n'
+    xref = len(output)
+    output += f'xref\n0 {number}\n0000000000 65535 f \n'.encode()
+    for key in range(1, number):
+        output += f'{offsets[key]:010d} 00000 n \n'.encode()
+    output += f'trailer\n<< /Size {number} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    with open(path, 'wb') as file:
+        file.write(output)
+
+
+def _attach(port, count, pdf_dir):
+    """
+    Create a task with ``count`` distinct PDFs and wait for their ingestion.
+
+    Args:
+        port (int): App port
+        count (int): Number of files
+        pdf_dir (str): Directory to write the PDFs to
+
+    Returns:
+        tuple: Task and the content hashes of its files
+    """
+    from api.embedding_cache import file_hash
+
+    setup = Recorder()
+    _status, task = setup.request(port, 'setup', 'POST', '/tasks', {'title': f'Review {count} documents'})
+    paths = []
+    for seed in range(count):
+        path = os.path.join(pdf_dir, f'document-{seed}.pdf')
+        if not os.path.exists(path):
+            synthetic_pdf(path, seed)
+        paths.append(path)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        ingested = list(executor.map(lambda path: upload_and_wait(setup, port, task['id'], path), paths))
+    if not all(ingested):
+        raise SystemExit(f'Could not ingest the files for {count} documents')
+    return task, [file_hash(path) for path in paths]
+
+
+def _measure(port, task, file_hashes, per_file, runs):
+    """
+    Time agent calls and knowledge base searches for one task.
+
+    Args:
+        port (int): App port
+        task (dict): Task with ingested files
+        file_hashes (list[str]): Content hashes of the task's files
+        per_file (bool): Search the files one at a time, concurrently
+        runs (int): Timed calls of each kind
+
+    Returns:
+        dict: End-to-end and search percentiles, chunks and estimated tokens
+    """
+    import agents.registry
+    from agents.registry import AgentRegistry
+    from api import knowledge
+    from api.database import get_vector_db
+    from api.embedding_pipeline import estimate_tokens
+
+    # Fresh agents and knowledge bases built with this retrieval mode
+    knowledge.AGENT_PER_FILE_RETRIEVAL = per_file
+    agents.registry.registry = AgentRegistry()
+
+    calls = Recorder()
+    body = {'task_id': task['id'], 'task_type': 'review', 'no_cache': True}
+    calls.request(port, 'warm-up', 'POST', '/process-task', body)
+    for _ in range(runs):
+        calls.request(port, 'POST /process-task', 'POST', '/process-task', body)
+
+    scope = knowledge.task_knowledge(get_vector_db(), file_hashes, per_file=per_file)
+    searches = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        documents = scope.search(task['title'])
+        searches.append(time.perf_counter() - start)
+    return {
+        'end_to_end': summarize(calls.latencies.get('POST /process-task', [])),
+        'errors': sum(calls.errors.values()),
+        'search': summarize(searches),
+        'chunks': len(documents),
+        'tokens': sum(estimate_tokens(document.content) for document in documents)
+    }
+
+
+def run(file_counts, runs, openai_latency, qdrant_latency):
+    """
+    Run the benchmark and print a table of latencies.
+
+    Args:
+        file_counts (list[int]): Numbers of attached files to measure
+        runs (int): Timed calls of each kind per measurement
+        openai_latency (float): Seconds each fake OpenAI request takes
+        qdrant_latency (float): Seconds each fake Qdrant call takes
+    """
+    openai = FakeOpenAIServer(latency=openai_latency).start()
+    os.environ['OPENAI_BASE_URL'] = openai.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['VECTOR_GC_INTERVAL'] = '0'
+    # The fake Qdrant only exists in this process, so ingestion must run in threads
+    os.environ['INGEST_EXECUTOR'] = 'thread'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from agno.embedder.openai import OpenAIEmbedder
+        from api import create_app
+        from api.database import set_vector_db
+        from api.embedding_cache import CachedEmbedder
+
+        set_vector_db(fake_qdrant('godolist', CachedEmbedder(embedder=OpenAIEmbedder(
+            id='text-embedding-3-small', dimensions=DIMENSIONS, api_key='test', base_url=openai.base_url
+        )), latency=qdrant_latency))
+        server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        pdf_dir = os.path.join(workdir, 'pdfs')
+        os.makedirs(pdf_dir)
+
+        print(f'{runs} runs each, OpenAI latency {openai_latency * 1000:.0f} ms, '
+              f'Qdrant latency {qdrant_latency * 1000:.0f} ms')
+        print(f"{'files':>5}  {'retrieval':<10} {'e2e p50':>9} {'e2e p95':>9} {'search p50':>11} "
+              f"{'chunks':>6} {'tokens':>6}  errors")
+        try:
+            for count in file_counts:
+                task, file_hashes = _attach(server.server_port, count, pdf_dir)
+                for label, per_file in (('per file', True), ('one query', False)):
+                    result = _measure(server.server_port, task, file_hashes, per_file, runs)
+                    print(f"{count:5d}  {label:<10} {result['end_to_end']['p50_ms'] or 0:7.1f}ms "
+                          f"{result['end_to_end']['p95_ms'] or 0:7.1f}ms {result['search']['p50_ms']:9.1f}ms "
+                          f"{result['chunks']:6d} {result['tokens']:6d}  {result['errors']}")
+        finally:
+            server.shutdown()
+            openai.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, nargs='+', default=[1, 2, 5, 10, 20])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--openai-latency', type=float, default=0.05)
+    parser.add_argument('--qdrant-latency', type=float, default=0.01)
+    args = parser.parse_args()
+    run(args.files, args.runs, args.openai_latency, args.qdrant_latency)
@@ -0,0 +1,105 @@
+"""
+Benchmark of streaming, page-parallel PDF extraction against agno's PDFReader.
+
+Checks that both produce identical chunks for every PDF in
+``docs/sample-pdf/``, then extracts them ``--repeat`` times in a fresh
+process per mode and reports pages/s, time to first chunk and peak RSS
+(including any extraction pool processes).
+
+Usage:
+    python -m benchmarks.pdf_extraction --repeat 5 --workers 4
+"""
+
+import argparse
+import glob
+import multiprocessing
+import resource
+import time
+from pathlib import Path
+from benchmarks.ingest_queue import SAMPLE_PDFS
+
+
+def agno_chunks(file_path):
+    """
+    Chunk a PDF the way PDFKnowledgeBase did before.
+
+    Args:
+        file_path (str): Path to the PDF
+
+    Returns:
+        list[Document]: Chunks
+    """
+    from agno.document.chunking.document import DocumentChunking
+    from agno.knowledge.pdf import PDFReader
+
+    reader = PDFReader(chunking_strategy=DocumentChunking(chunk_size=1000, overlap=200))
+    return reader.read(pdf=Path(file_path))
+
+
+def _measure(mode, pdfs, repeat, workers, results):
+    """
+    Extract every PDF and report timings from a fresh process.
+
+    Args:
+        mode (str): ``agno`` or ``stream``
+        pdfs (list[str]): PDFs to extract
+        repeat (int): Passes over the PDFs
+        workers (int): Extraction processes for ``stream``
+        results (multiprocessing.Queue): Receives the measurements
+    """
+    from api.pdf_extraction import count_pages, iter_chunks
+
+    pages = sum(count_pages(pdf) for pdf in pdfs) * repeat
+    first = None
+    chunks = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pdf in pdfs:
+            source = agno_chunks(pdf) if mode == 'agno' else iter_chunks(pdf, workers=workers, pages_per_task=2)
+            for _chunk in source:
+                if first is None:
+                    first = time.perf_counter() - start
+                chunks += 1
+    elapsed = time.perf_counter() - start
+    rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    results.put((pages, chunks, elapsed, first, rss))
+
+
+def run(repeat, workers):
+    """
+    Run the equivalence check and the benchmark.
+
+    Args:
+        repeat (int): Passes over the sample PDFs
+        workers (int): Extraction processes for the parallel run
+    """
+    from api.pdf_extraction import iter_chunks
+
+    pdfs = sorted(glob.glob(SAMPLE_PDFS))
+    for pdf in pdfs:
+        expected = [(c.id, c.name, c.meta_data, c.content) for c in agno_chunks(pdf)]
+        actual = [(c.id, c.name, c.meta_data, c.content) for c in iter_chunks(pdf, workers=workers, pages_per_task=2)]
+        assert actual == expected, f'Chunks differ for {pdf}'
+    print(f'{len(pdfs)} PDFs: chunks identical to PDFReader + DocumentChunking')
+
+    context = multiprocessing.get_context('spawn')
+    for label, mode, pool in (('agno PDFReader', 'agno', 1), ('streaming', 'stream', 1),
+                              (f'streaming, {workers} workers', 'stream', workers)):
+        results = context.Queue()
+        process = context.Process(target=_measure, args=(mode, pdfs, repeat, pool, results))
+        process.start()
+        pages, chunks, elapsed, first, rss = results.get()
+        process.join()
+        print(f'  {label:<22} {pages / elapsed:7.1f} pages/s  first chunk {first * 1000:7.1f} ms  '
+              f'peak RSS {rss / 1024:6.1f} MiB  ({chunks} chunks)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.repeat, args.workers)
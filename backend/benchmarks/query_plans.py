@@ -0,0 +1,122 @@
+"""
+EXPLAIN QUERY PLAN regression check for the hot task and file queries.
+
+Builds a fresh, migrated database and fails (exit status 1) if any of the
+queries below would fall back to a full table scan. Scanning a partial or
+covering index ("SCAN tasks USING INDEX ...") is accepted.
+
+Usage:
+    python -m benchmarks.query_plans
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+HOT_QUERIES = {
+    'tasks by folder': (
+        'SELECT id, folder_id, title FROM tasks WHERE folder_id = ?', (1,)
+    ),
+    'tasks page': (
+        '''SELECT id, title FROM tasks WHERE folder_id = ? AND (created_at, id) > (?, ?)
+           ORDER BY created_at, id LIMIT 101''',
+        (1, '2025-04-14T13:00:00', 0)
+    ),
+    'open tasks': (
+        'SELECT id FROM tasks WHERE completed = 0', ()
+    ),
+    'important tasks': (
+        'SELECT id FROM tasks WHERE is_important = 1', ()
+    ),
+    'tasks due today': (
+        'SELECT id FROM tasks WHERE completed = 0 AND due_date >= ? AND due_date < ?',
+        ('2025-04-14', '2025-04-15')
+    ),
+    'overdue tasks': (
+        "SELECT id FROM tasks WHERE completed = 0 AND due_date != '' AND due_date < ?", ('2025-04-14',)
+    ),
+    'task due counts': (
+        'SELECT folder_id, due_date, open FROM task_due_counts WHERE due_date <= ?', ('2025-04-14',)
+    ),
+    'files by task': (
+        'SELECT id, filename, file_path, embedding_id FROM task_files WHERE task_id = ?', (1,)
+    ),
+    'file hash update': (
+        'SELECT id FROM task_files WHERE file_path = ?', ('uploads/x.pdf',)
+    ),
+    'embedding cache': (
+        'SELECT vector, last_used_at FROM embedding_cache WHERE model = ? AND content_hash = ?',
+        ('m', 'h')
+    ),
+    'embedding cache eviction': (
+        'SELECT rowid FROM embedding_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?', (10,)
+    ),
+    'response cache': (
+        'SELECT response, last_used_at FROM response_cache WHERE key = ? AND created_at > ?', ('k', 0)
+    ),
+    'response cache near-duplicates': (
+        '''SELECT key, query_vector, response FROM response_cache
+           WHERE scope = ? AND created_at > ? AND query_vector IS NOT NULL
+           ORDER BY last_used_at DESC LIMIT ?''',
+        ('s', 0, 200)
+    ),
+    'response cache invalidation': (
+        'DELETE FROM response_cache WHERE task_id = ?', (1,)
+    ),
+    'ingest claim': (
+        '''SELECT j.id, j.file_id, j.attempts, f.file_path, f.task_id
+           FROM ingest_jobs j JOIN task_files f ON f.id = j.file_id
+           WHERE (j.status = 'queued' AND j.next_attempt_at <= ?)
+              OR (j.status = 'processing' AND j.updated_at <= ?)
+           ORDER BY j.next_attempt_at, j.id LIMIT 1''',
+        (0, 0)
+    ),
+}
+
+# A bare "SCAN <table>" (no index) is a full table scan
+FULL_SCAN = re.compile(r'^SCAN \w+(?: AS \w+)?$')
+
+
+def check(conn, queries=HOT_QUERIES):
+    """
+    Explain each query and collect the ones that scan a whole table.
+
+    Args:
+        conn (sqlite3.Connection): Migrated database connection
+        queries (dict): Mapping of label to (sql, params)
+
+    Returns:
+        list[tuple[str, str]]: (label, plan detail) for each offending query
+    """
+    failures = []
+    for label, (sql, params) in queries.items():
+        for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+            detail = row[3]
+            if FULL_SCAN.match(detail):
+                failures.append((label, detail))
+    return failures
+
+
+def main():
+    """Run the check against a temporary database and report the result."""
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api.database import init_db
+        from api.connection import get_connection
+
+        init_db()
+        conn = get_connection()
+        failures = check(conn)
+        for label, (sql, params) in HOT_QUERIES.items():
+            plan = '; '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+            print(f'{label:<20} {plan}')
+
+    if failures:
+        for label, detail in failures:
+            print(f'FULL SCAN in {label!r}: {detail}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Check of the agent response cache against a fake OpenAI API.
+
+Processes a task through the app, then repeats it verbatim, with a
+differently spelled title, with a reworded title (near-duplicate lookup), after
+attaching a file (invalidation) and after the entries expire, reporting the
+latency and number of chat completions of each request.
+
+Usage:
+    python -m benchmarks.response_cache --latency 0.5
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.ingest_queue import FakeEmbedder
+
+DIMENSIONS = 64
+
+
+@dataclass
+class WordEmbedder(FakeEmbedder):
+    """Fake embedder whose vectors are bags of hashed words, so rewordings stay close."""
+
+    def get_embedding(self, text):
+        """
+        Embed text as a normalized word count vector.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list[float]: Vector of ``dimensions`` floats
+        """
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r'[a-z]+', text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+
+def run(latency, similarity):
+    """
+    Run the check and print each request's outcome.
+
+    Args:
+        latency (float): Seconds the fake API adds per request
+        similarity (float): Threshold for near-duplicate hits
+    """
+    server = FakeOpenAIServer(latency=latency).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['INGEST_WORKERS'] = '0'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from agno.embedder.openai import OpenAIEmbedder
+        from api.vector_store import TaskQdrant
+        from agents.registry import registry
+        from api import create_app
+        from api.connection import get_connection
+        from api.database import init_db
+        from api.response_cache import response_cache
+
+        registry._vector_db = TaskQdrant(
+            collection='bench',
+            location=':memory:',
+            embedder=OpenAIEmbedder(dimensions=DIMENSIONS, api_key='test', base_url=server.base_url)
+        )
+        registry._vector_db.create()
+        response_cache.similarity = similarity
+        response_cache.embedder = WordEmbedder(dimensions=DIMENSIONS)
+        init_db()
+        client = create_app().test_client()
+        task_id = client.post('/tasks', json={
+            'title': 'Summarize the key points of the report', 'notes': 'Quarterly report', 'folder_id': None
+        }).json['id']
+
+        def step(label, title=None, stream=False):
+            if title:
+                client.patch(f'/tasks?id={task_id}', json={'title': title})
+            before = server.completions
+            start = time.perf_counter()
+            response = client.post('/process-task' + ('?stream=1' if stream else ''),
+                                   json={'task_id': task_id, 'task_type': 'summarize'})
+            body = response.get_data(as_text=True)
+            elapsed = time.perf_counter() - start
+            completions = server.completions - before
+            cached = '"cached": true' in body or '"cached":true' in body
+            print(f'  {label:<28} {elapsed * 1000:8.1f} ms  {completions} completions  cached={cached}')
+            return completions
+
+        print(f'{latency * 1000:.0f} ms per API call, near-duplicate threshold {similarity}')
+        results = [
+            step('cold'),
+            step('repeat'),
+            step('repeat, streamed', stream=True),
+            step('respelled title', '  summarize the KEY points of the report. '),
+            step('reworded title', 'Summarize the report key points'),
+        ]
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO task_files (task_id, filename, file_path, status) VALUES (?, ?, ?, ?)',
+                (task_id, 'notes.pdf', 'uploads/notes.pdf', 'queued')
+            )
+        results.append(step('after attaching a file'))
+        response_cache.ttl = 0
+        results.append(step('after expiry'))
+        print(f"  stats: {client.get('/process-task/cache').json}")
+
+    assert results == [1, 0, 0, 0, 0 if similarity else 1, 1, 1], f'unexpected completions: {results}'
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--similarity', type=float, default=0.85)
+    args = parser.parse_args()
+    run(args.latency, args.similarity)
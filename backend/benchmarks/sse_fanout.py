@@ -0,0 +1,118 @@
+"""
+Fan-out latency benchmark for the server-sent events channel.
+
+Serves the app on a local threaded server, holds a few hundred idle
+``GET /events`` streams open, then creates tasks and measures how long each
+change takes to reach every subscriber.
+
+Usage:
+    python -m benchmarks.sse_fanout --subscribers 300 --writes 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+
+
+def _listen(url, ready, received, stop):
+    """
+    Read one event stream and record when each change arrives.
+
+    Args:
+        url (str): Events URL
+        ready (threading.Semaphore): Released once the stream is open
+        received (dict): Task title -> list of arrival times
+        stop (threading.Event): Set when the benchmark is over
+    """
+    with urllib.request.urlopen(url) as response:
+        for raw in response:
+            line = raw.decode().rstrip()
+            if line.startswith('event: hello'):
+                ready.release()
+            elif line.startswith('data: ') and '"entity":"task"' in line:
+                change = json.loads(line[len('data: '):])
+                received.setdefault(change['data']['title'], []).append(time.perf_counter())
+            if stop.is_set():
+                return
+
+
+def run(subscribers, writes, port):
+    """
+    Run the benchmark and print fan-out latency percentiles.
+
+    Args:
+        subscribers (int): Number of idle event streams
+        writes (int): Number of tasks created
+        port (int): Local port to serve on
+    """
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api import create_app
+
+        app = create_app()
+        server = make_server('127.0.0.1', port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{port}'
+
+        ready = threading.Semaphore(0)
+        received = {}
+        stop = threading.Event()
+        for _ in range(subscribers):
+            threading.Thread(
+                target=_listen, args=(f'{base}/events', ready, received, stop), daemon=True
+            ).start()
+        for _ in range(subscribers):
+            ready.acquire()
+        print(f'{subscribers} subscribers connected')
+
+        sent = {}
+        for i in range(writes):
+            title = f'fanout {i}'
+            request = urllib.request.Request(
+                f'{base}/tasks',
+                data=json.dumps({'title': title}).encode(),
+                headers={'Content-Type': 'application/json'}
+            )
+            sent[title] = time.perf_counter()
+            urllib.request.urlopen(request).read()
+            time.sleep(0.05)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if all(len(received.get(title, [])) >= subscribers for title in sent):
+                break
+            time.sleep(0.05)
+        stop.set()
+        server.shutdown()
+
+    latencies = [
+        (arrival - sent[title]) * 1000
+        for title, arrivals in received.items() if title in sent
+        for arrival in arrivals
+    ]
+    delivered = len(latencies)
+    expected = subscribers * writes
+    last_arrivals = [
+        (max(received[title]) - sent[title]) * 1000 for title in sent if title in received
+    ]
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'delivered {delivered}/{expected} events')
+    print(f'per-event latency p50={quantiles[49]:.1f}ms p95={quantiles[94]:.1f}ms p99={quantiles[98]:.1f}ms')
+    print(f'time to reach all subscribers: median {statistics.median(last_arrivals):.1f}ms, '
+          f'max {max(last_arrivals):.1f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--writes', type=int, default=20)
+    parser.add_argument('--port', type=int, default=5098)
+    args = parser.parse_args()
+    run(args.subscribers, args.writes, args.port)
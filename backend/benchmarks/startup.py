@@ -0,0 +1,120 @@
+"""
+Startup-time check: importing the app and calling create_app().
+
+Starts fresh interpreters that import ``api`` and create the app, with
+Qdrant pointed at a closed port and no OpenAI key, and prints the median
+time over ``--runs`` runs plus the slowest imports reported by
+``python -X importtime``. Exits with status 1 when the median exceeds
+``--budget-ms`` or when startup loaded any of the heavy packages that should
+only load on first use (agno's vector stores, knowledge and agents,
+qdrant-client, openai, NumPy, pypdf), so it can gate CI.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Packages that must not be imported by create_app()
+HEAVY_MODULES = (
+    'agno.vectordb', 'agno.knowledge', 'agno.agent', 'agno.models', 'agno.embedder.openai',
+    'qdrant_client', 'openai', 'numpy', 'pypdf'
+)
+
+STARTUP = f'''
+import json, sys, time
+start = time.perf_counter()
+from api import create_app
+create_app()
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in sys.modules if any(m == h or m.startswith(h + '.') for h in {HEAVY_MODULES!r}))
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': heavy}}))
+'''
+
+
+def _start(workdir, importtime=False):
+    """
+    Start the app in a fresh interpreter.
+
+    Args:
+        workdir (str): Working directory for the database and uploads
+        importtime (bool): Run with ``-X importtime``
+
+    Returns:
+        subprocess.CompletedProcess: Finished process, with output captured
+    """
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=backend, INGEST_WORKERS='0', VECTOR_GC_INTERVAL='0',
+               QDRANT_URL='http://127.0.0.1:9')
+    env.pop('OPENAI_API_KEY', None)
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', STARTUP]
+    process = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise SystemExit(f'Startup failed:\n{process.stderr}')
+    return process
+
+
+def _slowest_imports(stderr, count):
+    """
+    Find the top-level imports that took longest.
+
+    Args:
+        stderr (str): ``-X importtime`` output
+        count (int): Number of imports to return
+
+    Returns:
+        list[tuple]: Module and cumulative microseconds, slowest first
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that imported them
+        if name.startswith('  '):
+            continue
+        imports.append((name.strip(), int(cumulative)))
+    return sorted(imports, key=lambda item: -item[1])[:count]
+
+
+def run(runs, budget_ms):
+    """
+    Run the check and print startup times.
+
+    Args:
+        runs (int): Timed startups
+        budget_ms (float): Largest acceptable median startup time, in ms
+
+    Returns:
+        bool: Whether startup is within budget and stayed light
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        # The first start creates the database; time the ones after it
+        _start(workdir)
+        results = [json.loads(_start(workdir).stdout.splitlines()[-1]) for _ in range(runs)]
+        profile = _start(workdir, importtime=True)
+
+    median = statistics.median(result['ms'] for result in results)
+    print(f'create_app() in a fresh interpreter: median {median:.0f} ms over {runs} runs (budget {budget_ms:.0f} ms)')
+    print('  slowest imports:')
+    for name, microseconds in _slowest_imports(profile.stderr, 10):
+        print(f'    {microseconds / 1000:8.1f} ms  {name}')
+
+    heavy = results[-1]['heavy']
+    if heavy:
+        print(f"  loaded at startup but should load on first use: {', '.join(heavy)}")
+    return median <= budget_ms and not heavy
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.budget_ms) else 1)
@@ -0,0 +1,134 @@
+"""
+Benchmark of time to first token for buffered and streamed /process-task.
+
+Serves the app over HTTP against a fake OpenAI API that streams its answer
+a token at a time, then measures a buffered request, a streamed request
+(time to the first token record and to the end), and a streamed request the
+client abandons after its first token, checking that the model stream was
+cancelled and the agent returned to the registry.
+
+Usage:
+    python -m benchmarks.streaming --latency 0.2 --tokens 100 --token-latency 0.02
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from benchmarks.fake_openai import FakeOpenAIServer
+
+DIMENSIONS = 64
+
+
+def _request(port, task_id, stream):
+    """
+    Post to /process-task and open the response.
+
+    Args:
+        port (int): App port
+        task_id (int): Task to process
+        stream (bool): Whether to ask for NDJSON
+
+    Returns:
+        tuple: Connection, its socket and the response
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request(
+        'POST', '/process-task' + ('?stream=1' if stream else ''),
+        # Bypass the response cache so every request runs the model
+        body=json.dumps({'task_id': task_id, 'task_type': 'review', 'no_cache': True}),
+        headers={'Content-Type': 'application/json'}
+    )
+    sock = connection.sock
+    return connection, sock, connection.getresponse()
+
+
+def run(latency, tokens, token_latency):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        latency (float): Seconds before the fake model answers
+        tokens (int): Tokens in each answer
+        token_latency (float): Seconds between answer tokens
+    """
+    server = FakeOpenAIServer(latency=latency, token_latency=token_latency, answer_tokens=tokens).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['INGEST_WORKERS'] = '0'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from agno.embedder.openai import OpenAIEmbedder
+        from api.vector_store import TaskQdrant
+        from agents.registry import registry
+        from api import create_app
+        from api.database import init_db
+
+        registry._vector_db = TaskQdrant(
+            collection='bench',
+            location=':memory:',
+            embedder=OpenAIEmbedder(dimensions=DIMENSIONS, api_key='test', base_url=server.base_url)
+        )
+        registry._vector_db.create()
+        init_db()
+        app = create_app()
+        task_id = app.test_client().post('/tasks', json={'title': 'Review the report', 'folder_id': None}).json['id']
+        http_server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        port = http_server.server_port
+
+        print(f'{tokens} tokens, {latency * 1000:.0f} ms to first token, {token_latency * 1000:.0f} ms per token')
+        start = time.perf_counter()
+        connection, _sock, response = _request(port, task_id, stream=False)
+        answer = json.loads(response.read())['content']
+        buffered = time.perf_counter() - start
+        connection.close()
+        print(f'  buffered   first token {buffered * 1000:7.1f} ms  complete {buffered * 1000:7.1f} ms')
+
+        start = time.perf_counter()
+        connection, _sock, response = _request(port, task_id, stream=True)
+        first = None
+        streamed = []
+        for line in response:
+            record = json.loads(line)
+            if record['type'] == 'token':
+                if first is None:
+                    first = time.perf_counter() - start
+                streamed.append(record['content'])
+        complete = time.perf_counter() - start
+        connection.close()
+        print(f'  streamed   first token {first * 1000:7.1f} ms  complete {complete * 1000:7.1f} ms')
+        assert ''.join(streamed) == answer, 'streamed answer differs from the buffered one'
+
+        # Hang up after the first token; the model stream must be cancelled
+        cancelled = server.cancelled
+        connection, sock, response = _request(port, task_id, stream=True)
+        for line in response:
+            if json.loads(line)['type'] == 'token':
+                break
+        sock.shutdown(socket.SHUT_RDWR)
+        connection.close()
+        deadline = time.monotonic() + tokens * token_latency + 5
+        while server.cancelled == cancelled and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = registry.stats()
+        print(f"  abandoned  model stream cancelled: {server.cancelled > cancelled}, "
+              f"idle agents: {stats['idle_agents']}")
+        assert server.cancelled > cancelled, 'model stream kept running after the client left'
+        http_server.shutdown()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--tokens', type=int, default=100)
+    parser.add_argument('--token-latency', type=float, default=0.02)
+    args = parser.parse_args()
+    run(args.latency, args.tokens, args.token_latency)
@@ -0,0 +1,58 @@
+"""
+Benchmark comparing per-item task PATCHes with one ``POST /tasks/batch``.
+
+Creates a folder's worth of tasks, then marks them all complete twice: once
+with one ``PATCH /tasks?id=`` per task (what the frontend used to do) and
+once with a single batch request.
+
+Usage:
+    python -m benchmarks.task_batch --tasks 200
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def run(tasks):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        tasks (int): Number of tasks to update
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api import create_app
+
+        app = create_app()
+        client = app.test_client()
+        response = client.post('/tasks/batch', json={
+            'operations': [{'op': 'create', 'task': {'title': f'Task {i}'}} for i in range(tasks)]
+        })
+        ids = [result['task']['id'] for result in response.get_json()['results']]
+
+        start = time.perf_counter()
+        for task_id in ids:
+            client.patch(f'/tasks?id={task_id}', json={'completed': True})
+        per_item = time.perf_counter() - start
+
+        start = time.perf_counter()
+        client.post('/tasks/batch', json={
+            'operations': [
+                {'op': 'patch', 'id': task_id, 'changes': {'completed': False}} for task_id in ids
+            ]
+        })
+        batched = time.perf_counter() - start
+
+    print(f'{tasks} updates')
+    print(f'  per-item PATCH: {per_item * 1000:8.1f} ms')
+    print(f'  batch:          {batched * 1000:8.1f} ms  ({per_item / batched:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200)
+    args = parser.parse_args()
+    run(args.tasks)
@@ -0,0 +1,116 @@
+"""
+Benchmark of GET /tasks/stats against counting the tasks table directly.
+
+Fills a database with ``--tasks`` tasks spread over ``--folders`` folders,
+with due dates over the past and next few months, then times reading the
+per-folder and per-view counts from the trigger-maintained summary tables
+against the equivalent GROUP BY over tasks, and checks that both agree. Also
+reports what the triggers add to single-task writes.
+
+Usage:
+    python -m benchmarks.task_stats --tasks 200000 --folders 20
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+TODAY = '2025-04-14'
+
+# The same counts computed from tasks, for comparison
+DIRECT_STATS = '''
+    SELECT COALESCE(folder_id, 0) AS folder_id,
+           COUNT(*) AS total,
+           SUM(completed = 1) AS completed,
+           SUM(is_important = 1) AS important,
+           COALESCE(SUM(completed = 0 AND substr(due_date, 1, 10) = :today), 0) AS due_today,
+           COALESCE(SUM(completed = 0 AND due_date != '' AND substr(due_date, 1, 10) < :today), 0) AS overdue
+    FROM tasks GROUP BY COALESCE(folder_id, 0)
+'''
+
+
+def _timed(function, repeat):
+    """
+    Time a function over several calls.
+
+    Args:
+        function (callable): Function to call
+        repeat (int): Number of calls
+
+    Returns:
+        tuple: Result of the last call and median milliseconds per call
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, sorted(timings)[len(timings) // 2] * 1000
+
+
+def run(tasks, folders, repeat):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        tasks (int): Number of tasks to create
+        folders (int): Number of folders to spread them over
+        repeat (int): Timed reads of each kind
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api.database import init_db
+        from api.connection import get_connection
+        from api.task_queries import task_stats
+
+        init_db()
+        conn = get_connection()
+        rng = random.Random(0)
+        base = date.fromisoformat(TODAY)
+        conn.executemany('INSERT INTO folders (name) VALUES (?)', [(f'Folder {i}',) for i in range(folders)])
+
+        def task():
+            due = rng.choice([None, (base + timedelta(days=rng.randint(-90, 90))).isoformat()])
+            return (rng.choice([None, *range(1, folders + 1)]), 'Task', rng.random() < 0.4,
+                    rng.random() < 0.2, due)
+
+        start = time.perf_counter()
+        conn.executemany(
+            'INSERT INTO tasks (folder_id, title, completed, is_important, due_date) VALUES (?, ?, ?, ?, ?)',
+            (task() for _ in range(tasks))
+        )
+        conn.commit()
+        loaded = time.perf_counter() - start
+
+        stats, summary_ms = _timed(lambda: task_stats(conn, TODAY), repeat)
+        rows, direct_ms = _timed(lambda: conn.execute(DIRECT_STATS, {'today': TODAY}).fetchall(), repeat)
+        for row in rows:
+            counts = stats['folders'].get(str(row['folder_id'])) or stats['unassigned']
+            expected = {'all': row['total'], 'completed': row['completed'], 'important': row['important'],
+                        'due_today': row['due_today'], 'overdue': row['overdue']}
+            assert counts == expected, (row['folder_id'], counts, expected)
+
+        writes = 1000
+        start = time.perf_counter()
+        for _ in range(writes):
+            conn.execute('UPDATE tasks SET completed = NOT completed, folder_id = ? WHERE id = ?',
+                         (rng.randint(1, folders), rng.randint(1, tasks)))
+            conn.commit()
+        update_ms = (time.perf_counter() - start) * 1000 / writes
+
+    print(f'{tasks} tasks in {folders} folders (loaded in {loaded:.1f} s, counts kept by triggers)')
+    print(f"  summary tables: {summary_ms:8.3f} ms per read  ({stats['views']['all']} tasks counted)")
+    print(f'  GROUP BY tasks: {direct_ms:8.3f} ms per read  ({direct_ms / summary_ms:.0f}x slower)')
+    print(f'  committed single-task update with triggers: {update_ms:.3f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--folders', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.tasks, args.folders, args.repeat)
@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for the NDJSON task export and import endpoints.
+
+Seeds a temporary database with synthetic folders, tasks and file records,
+streams ``GET /tasks/export`` and feeds the result back through
+``POST /tasks/import``, reporting rows/s for each direction.
+
+Usage:
+    python -m benchmarks.task_transfer --tasks 50000 --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def synthetic_records(tasks, folders=50):
+    """
+    Generate NDJSON lines for a synthetic dataset.
+
+    Args:
+        tasks (int): Number of tasks
+        folders (int): Number of folders
+
+    Yields:
+        str: NDJSON lines
+    """
+    for folder_id in range(1, folders + 1):
+        yield json.dumps({'type': 'folder', 'id': folder_id, 'name': f'Folder {folder_id}'}) + '\n'
+    for task_id in range(1, tasks + 1):
+        yield json.dumps({
+            'type': 'task',
+            'id': task_id,
+            'folder_id': task_id % folders + 1,
+            'title': f'Task {task_id}',
+            'notes': 'x' * 200,
+            'completed': task_id % 3 == 0,
+            'isImportant': task_id % 7 == 0,
+            'createdAt': f'2025-04-14T13:{task_id // 60 % 60:02d}:{task_id % 60:02d}'
+        }) + '\n'
+    for task_id in range(1, tasks + 1, 10):
+        yield json.dumps({
+            'type': 'file',
+            'task_id': task_id,
+            'filename': 'doc.pdf',
+            'file_path': f'uploads/{task_id}_doc.pdf'
+        }) + '\n'
+
+
+def run(tasks, batch_size):
+    """
+    Run the benchmark and print throughput figures.
+
+    Args:
+        tasks (int): Number of synthetic tasks
+        batch_size (int): Import batch size
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from api import create_app
+        from api.connection import get_connection
+        from api.task_transfer import import_lines
+
+        app = create_app()
+        client = app.test_client()
+        with app.app_context():
+            import_lines(get_connection(), synthetic_records(tasks), batch_size)
+
+        start = time.perf_counter()
+        response = client.get('/tasks/export', buffered=False)
+        lines = 0
+        body = []
+        for chunk in response.response:
+            lines += 1
+            body.append(chunk)
+        export_time = time.perf_counter() - start
+        print(f'export: {lines} rows in {export_time:.2f}s ({lines / export_time:,.0f} rows/s)')
+
+        data = b''.join(c if isinstance(c, bytes) else c.encode() for c in body)
+        start = time.perf_counter()
+        response = client.post(
+            f'/tasks/import?batch_size={batch_size}',
+            data=data,
+            content_type='application/x-ndjson'
+        )
+        import_time = time.perf_counter() - start
+        counts = response.get_json()
+        imported = counts['folders'] + counts['tasks'] + counts['files']
+        print(f'import: {imported} rows in {import_time:.2f}s ({imported / import_time:,.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    run(args.tasks, args.batch_size)
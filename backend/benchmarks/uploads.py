@@ -0,0 +1,161 @@
+"""
+Check and benchmark of resumable, content-addressed uploads.
+
+Serves the app over HTTP and sends a ``--size-mb`` MB file to one task in
+``--chunk-mb`` MB chunks, dropping the connection halfway through one chunk
+and resuming from the offset the server reports. Prints the throughput and
+the peak Python memory allocated meanwhile, which stays near the chunk size
+(the client's slice plus the server's copy block) rather than the file size.
+The same file is then uploaded to a second task with a plain multipart POST,
+which must share the stored object, and both files are deleted, which must
+delete the object with the last one.
+
+Usage:
+    python -m benchmarks.uploads --size-mb 256 --chunk-mb 8
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+
+
+def _request(port, method, path, body=None, headers=None):
+    """
+    Make one request and decode the JSON response.
+
+    Args:
+        port (int): App port
+        method (str): HTTP method
+        path (str): Request path
+        body (bytes, optional): Request body
+        headers (dict, optional): Request headers
+
+    Returns:
+        tuple: Status and decoded body (None if empty)
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        data = response.read()
+        return response.status, json.loads(data) if data else None
+    finally:
+        connection.close()
+
+
+def _drop_mid_chunk(port, upload_id, offset, chunk):
+    """
+    Start sending a chunk and hang up halfway through it.
+
+    Args:
+        port (int): App port
+        upload_id (str): Upload session
+        offset (int): Offset of the chunk
+        chunk (bytes): The whole chunk, of which half is sent
+    """
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(
+            f'PUT /uploads/{upload_id} HTTP/1.1\r\nHost: localhost\r\nUpload-Offset: {offset}\r\n'
+            f'Content-Length: {len(chunk)}\r\nConnection: close\r\n\r\n'.encode()
+        )
+        sock.sendall(chunk[:len(chunk) // 2])
+    # Let the server notice the disconnect and record what arrived
+    time.sleep(0.5)
+
+
+def run(size_mb, chunk_mb):
+    """
+    Run the check and print throughput and memory.
+
+    Args:
+        size_mb (int): Size of the uploaded file in MB
+        chunk_mb (int): Chunk size in MB
+    """
+    os.environ['INGEST_WORKERS'] = '0'
+    os.environ['VECTOR_GC_INTERVAL'] = '0'
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from werkzeug.serving import make_server
+        from api import create_app
+        from api.upload_store import OBJECTS_FOLDER
+
+        app = create_app()
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+        try:
+            first, second = (
+                _request(port, 'POST', '/tasks', json.dumps({'title': title}).encode(),
+                         {'Content-Type': 'application/json'})[1]['id']
+                for title in ('Read the report', 'Review the report')
+            )
+            size = size_mb * 1024 * 1024
+            chunk_size = chunk_mb * 1024 * 1024
+            contents = b'%PDF-1.4\n' + os.urandom(size - 9)
+            digest = hashlib.sha256(contents).hexdigest()
+
+            status, session = _request(
+                port, 'POST', f'/tasks/{first}/uploads',
+                json.dumps({'filename': 'report.pdf', 'size': size}).encode(), {'Content-Type': 'application/json'}
+            )
+            assert status == 201, session
+            upload_id = session['upload_id']
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            offset, dropped = 0, False
+            while offset < size:
+                chunk = contents[offset:offset + chunk_size]
+                if not dropped and offset >= size // 2:
+                    _drop_mid_chunk(port, upload_id, offset, chunk)
+                    dropped = True
+                    offset = _request(port, 'GET', f'/uploads/{upload_id}')[1]['offset']
+                    print(f'  dropped mid-chunk, resuming at {offset / 1e6:.1f} MB')
+                    continue
+                status, session = _request(port, 'PUT', f'/uploads/{upload_id}', chunk,
+                                           {'Upload-Offset': str(offset)})
+                assert status == 200, session
+                offset = session['offset']
+            status, file = _request(port, 'POST', f'/uploads/{upload_id}/complete')
+            elapsed = time.perf_counter() - start
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert status == 202, file
+            assert file['content_hash'] == digest, 'stored file differs from the upload'
+            print(f'{size_mb} MB in {chunk_mb} MB chunks: {size / 1e6 / elapsed:8.1f} MB/s, '
+                  f'peak {peak / 1e6:.1f} MB allocated in Python')
+
+            body = (
+                b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="copy.pdf"\r\n'
+                b'Content-Type: application/pdf\r\n\r\n' + contents + b'\r\n--boundary--\r\n'
+            )
+            status, copy = _request(port, 'POST', f'/tasks/{second}/files', body,
+                                    {'Content-Type': 'multipart/form-data; boundary=boundary'})
+            assert status == 202 and copy['deduplicated'], copy
+            assert copy['file_path'] == file['file_path'], 'duplicate stored twice'
+            objects = [name for _, _, names in os.walk(OBJECTS_FOLDER) for name in names]
+            print(f'  duplicate upload shared the stored file ({len(objects)} object on disk)')
+            assert objects == [digest]
+
+            _request(port, 'DELETE', f"/files/{file['id']}")
+            assert os.path.exists(file['file_path']), 'shared file deleted while still referenced'
+            _request(port, 'DELETE', f"/files/{copy['id']}")
+            assert not os.path.exists(file['file_path']), 'file left after its last reference'
+            print('  stored file kept until its last reference was deleted')
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    args = parser.parse_args()
+    run(args.size_mb, args.chunk_mb)
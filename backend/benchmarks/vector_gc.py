@@ -0,0 +1,86 @@
+"""
+Check of vector cleanup when files and tasks are deleted.
+
+Indexes the sample PDFs into an in-memory LocalVectorDb for two tasks, one
+of which has two copies of the same PDF, then deletes one copy, deletes that
+task, and finally deletes the other task the way the API used to (leaving
+its file rows and chunks behind) and lets the reconciler collect them. The
+number of points left after each step is checked against what should
+remain.
+
+Usage:
+    python -m benchmarks.vector_gc
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+import time
+from benchmarks.ingest_queue import SAMPLE_PDFS, FakeEmbedder
+
+
+def run():
+    """Run the check and print the points left after each step."""
+    pdfs = sorted(glob.glob(SAMPLE_PDFS))
+    if len(pdfs) < 2:
+        raise SystemExit(f'Need two sample PDFs in {SAMPLE_PDFS}')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.environ['INGEST_WORKERS'] = '0'
+        os.environ['VECTOR_GC_INTERVAL'] = '0'
+        from api import create_app, database
+        from api.connection import get_connection
+        from api.embedding_cache import CachedEmbedder
+        from api.file_handler import process_file
+        from api.vector_gc import reconcile
+        from api.vector_store import LocalVectorDb
+
+        vector_db = LocalVectorDb('bench', CachedEmbedder(embedder=FakeEmbedder()))
+        database.set_vector_db(vector_db)
+        client = create_app().test_client()
+
+        def attach(task_id, pdf, name):
+            path = shutil.copy(pdf, os.path.join(database.UPLOAD_FOLDER, f'{task_id}_{name}'))
+            with get_connection() as conn:
+                file_id = conn.execute(
+                    'INSERT INTO task_files (task_id, filename, file_path, embedding_id) VALUES (?, ?, ?, ?)',
+                    (task_id, name, path, str(task_id))
+                ).lastrowid
+                conn.commit()
+            process_file(path, task_id, vector_db=vector_db)
+            return file_id
+
+        def step(label, action, expected):
+            start = time.perf_counter()
+            action()
+            elapsed = time.perf_counter() - start
+            print(f'  {label:<34} {vector_db.count():6d} points  {elapsed * 1000:8.1f} ms')
+            assert vector_db.count() == expected, f'expected {expected} points after: {label}'
+
+        first, second = (client.post('/tasks', json={'title': title}).get_json()['id'] for title in ('First', 'Second'))
+        attach(first, pdfs[0], 'a.pdf')
+        copy = attach(first, pdfs[0], 'copy.pdf')
+        shared = vector_db.count()
+        attach(second, pdfs[1], 'b.pdf')
+        total = vector_db.count()
+        print(f'{shared} chunks in {os.path.basename(pdfs[0])}, {total - shared} in {os.path.basename(pdfs[1])}')
+
+        step('indexed', lambda: None, total)
+        step('deleted one of two copies', lambda: client.delete(f'/files/{copy}'), total)
+        step('deleted the first task', lambda: client.delete(f'/tasks?id={first}'), total - shared)
+
+        with get_connection() as conn:
+            conn.execute('DELETE FROM tasks WHERE id = ?', (second,))
+            conn.commit()
+        step('deleted the second task, files left', lambda: None, total - shared)
+        report = {}
+        step('reconciled', lambda: report.update(reconcile(get_connection(), vector_db)), 0)
+        print(f"  reclaimed {report['points_deleted']} points, ~{report['bytes_reclaimed'] / 1e6:.2f} MB, "
+              f"{report['files_deleted']} file rows")
+        assert not any(names for _, _, names in os.walk(database.UPLOAD_FOLDER)), 'uploads left on disk'
+
+
+if __name__ == '__main__':
+    run()
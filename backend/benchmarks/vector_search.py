@@ -0,0 +1,181 @@
+"""
+Benchmark of the local vector backends at growing collection sizes.
+
+Fills a LocalVectorDb with synthetic clustered vectors spread over many
+files, then times searches over the whole collection and searches limited to
+one task's files (the scope an agent retrieves from), for exact NumPy search
+and, when hnswlib is installed, the HNSW index. HNSW recall@10 is measured
+against the exact results.
+
+Usage:
+    python -m benchmarks.vector_search --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+import numpy as np
+from benchmarks.ingest_queue import FakeEmbedder
+
+DIMENSIONS = 256
+CLUSTERS = 200
+INSERT_BATCH = 10000
+K = 10
+
+
+def _vectors(rng, size, centers):
+    """
+    Draw clustered vectors, so nearest neighbours are meaningful.
+
+    Args:
+        rng (np.random.Generator): Random source
+        size (int): Number of vectors
+        centers (np.ndarray): Cluster centres
+
+    Returns:
+        np.ndarray: ``size`` x DIMENSIONS float32 vectors
+    """
+    labels = rng.integers(0, len(centers), size)
+    return (centers[labels] + rng.normal(scale=0.35, size=(size, DIMENSIONS))).astype(np.float32)
+
+
+def _fill(store, rng, size, centers, chunks_per_file, files_per_task):
+    """
+    Insert ``size`` points tagged like indexed document chunks.
+
+    Args:
+        store (LocalVectorDb): Store to fill
+        rng (np.random.Generator): Random source
+        size (int): Number of points
+        centers (np.ndarray): Cluster centres
+        chunks_per_file (int): Consecutive points sharing a file
+        files_per_task (int): Consecutive files sharing a task
+
+    Returns:
+        float: Seconds taken
+    """
+    start = time.perf_counter()
+    for offset in range(0, size, INSERT_BATCH):
+        vectors = _vectors(rng, min(INSERT_BATCH, size - offset), centers)
+        store.upsert_points([
+            (f'p{offset + i}', vector, {
+                'file_hashes': [f'f{(offset + i) // chunks_per_file}'],
+                'task_ids': [(offset + i) // (chunks_per_file * files_per_task)]
+            })
+            for i, vector in enumerate(vectors)
+        ])
+    return time.perf_counter() - start
+
+
+def _time_queries(store, queries, filters):
+    """
+    Run queries and time each one.
+
+    Args:
+        store (LocalVectorDb): Store to search
+        queries (np.ndarray): Query vectors
+        filters (list[dict|None]): Filters for each query
+
+    Returns:
+        tuple: Latencies in milliseconds and the hit IDs of each query
+    """
+    timings, results = [], []
+    for query, query_filters in zip(queries, filters):
+        start = time.perf_counter()
+        hits = store.search_by_vector(query, K, query_filters)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append([id_ for id_, _score, _payload in hits])
+    return timings, results
+
+
+def _report(label, timings):
+    """
+    Print latency percentiles.
+
+    Args:
+        label (str): Row label
+        timings (list[float]): Latencies in milliseconds
+    """
+    print(f'  {label:<26} p50 {np.percentile(timings, 50):8.2f} ms  p95 {np.percentile(timings, 95):8.2f} ms')
+
+
+def _recall(results, exact):
+    """
+    Fraction of the exact top K found, averaged over queries.
+
+    Args:
+        results (list[list[str]]): Approximate hit IDs per query
+        exact (list[list[str]]): Exact hit IDs per query
+
+    Returns:
+        float: Mean recall@K
+    """
+    return float(np.mean([len(set(found) & set(truth)) / len(truth) for found, truth in zip(results, exact)]))
+
+
+def run(sizes, queries, chunks_per_file, files_per_task, seed):
+    """
+    Run the benchmark and print timings.
+
+    Args:
+        sizes (list[int]): Collection sizes to test
+        queries (int): Queries per measurement
+        chunks_per_file (int): Chunks in each synthetic file
+        files_per_task (int): Files attached to each synthetic task
+        seed (int): Random seed
+    """
+    from api.vector_store import LocalVectorDb
+
+    try:
+        import hnswlib  # noqa: F401
+        indexes = ['numpy', 'hnsw']
+    except ImportError:
+        indexes = ['numpy']
+        print('hnswlib is not installed, skipping the HNSW index (pip install hnswlib)')
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(CLUSTERS, DIMENSIONS))
+    embedder = FakeEmbedder(dimensions=DIMENSIONS)
+    task_size = chunks_per_file * files_per_task
+    print(f'{DIMENSIONS} dimensions, {queries} queries, top {K}, '
+          f'{chunks_per_file} chunks per file, {files_per_task} files per task')
+
+    for size in sizes:
+        query_vectors = _vectors(rng, queries, centers)
+        tasks = rng.integers(0, max(1, size // task_size), queries)
+        scoped = [
+            {'file_hashes': [f'f{task * files_per_task + i}' for i in range(files_per_task)]}
+            for task in tasks
+        ]
+        print(f'{size} chunks')
+        exact = {}
+        for index in indexes:
+            store = LocalVectorDb(f'bench_{index}', embedder, index=index)
+            # Same seed for every index, so each searches identical data
+            built = _fill(store, np.random.default_rng(seed + size), size, centers, chunks_per_file, files_per_task)
+            if index == 'hnsw':
+                start = time.perf_counter()
+                store._build_hnsw()
+                built += time.perf_counter() - start
+            print(f'  {index}: built in {built:.1f} s')
+
+            timings, results = _time_queries(store, query_vectors, [None] * queries)
+            _report(f'{index} whole collection', timings)
+            scoped_timings, scoped_results = _time_queries(store, query_vectors, scoped)
+            _report(f'{index} one task ({task_size})', scoped_timings)
+            if index == 'numpy':
+                exact = {'all': results, 'scoped': scoped_results}
+            else:
+                print(f"  {index} recall@{K}: whole collection {_recall(results, exact['all']):.3f}, "
+                      f"one task {_recall(scoped_results, exact['scoped']):.3f}")
+            del store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--chunks-per-file', type=int, default=50)
+    parser.add_argument('--files-per-task', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.chunks_per_file, args.files_per_task, args.seed)
@@ -0,0 +1,79 @@
+/**
+ * Server-sent events client that keeps the store in sync with the API
+ * @module services/events
+ */
+
+import axios from 'axios'
+
+/**
+ * Base URL of the API
+ * @type {string}
+ */
+const API_URL = 'http://127.0.0.1:5000'
+
+/**
+ * Dispatch one pushed change to the store module that owns it
+ * @param {Object} store - Vuex store
+ * @param {Object} change - Change from the events stream or GET /changes
+ */
+function applyChange(store, change) {
+  if (change.entity === 'task' || change.entity === 'file') {
+    store.dispatch('tasks/applyChange', change)
+  } else if (change.entity === 'folder') {
+    store.dispatch('lists/applyChange', change)
+  }
+}
+
+/**
+ * Create a Vuex plugin that subscribes to `GET /events` and applies pushed
+ * task, folder and file changes instead of refetching
+ * @returns {Function} Vuex plugin
+ */
+export function createEventsPlugin() {
+  return (store) => {
+    if (typeof EventSource === 'undefined') return
+
+    let revision = null
+    const source = new EventSource(`${API_URL}/events`)
+
+    /**
+     * Catch up through GET /changes after missing pushed events
+     */
+    const resync = async () => {
+      if (revision === null) return
+      try {
+        let hasMore = true
+        while (hasMore) {
+          const response = await axios.get(`${API_URL}/changes`, { params: { since: revision } })
+          response.data.changes.forEach(change => applyChange(store, change))
+          revision = response.data.revision
+          hasMore = response.data.has_more
+        }
+      } catch (error) {
+        if (error.response?.status === 410) {
+          // Too far behind for the change log, reload everything
+          revision = error.response.data.revision
+          store.dispatch('tasks/refreshViews')
+          store.dispatch('lists/fetchLists')
+        } else {
+          console.error('Error resyncing changes:', error)
+        }
+      }
+    }
+
+    source.addEventListener('hello', (event) => {
+      const data = JSON.parse(event.data)
+      if (revision === null) {
+        revision = data.revision
+      }
+    })
+
+    source.addEventListener('change', (event) => {
+      const change = JSON.parse(event.data)
+      applyChange(store, change)
+      revision = Math.max(revision ?? 0, change.revision)
+    })
+
+    source.addEventListener('resync', resync)
+  }
+}
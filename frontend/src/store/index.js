@@ -3,6 +3,7 @@ import auth from './modules/auth'
 import tasks from './modules/tasks'
 import lists from './modules/lists'
 import chats from './modules/chats'
+import { createEventsPlugin } from '../services/events'
 
 export default createStore({
   modules: {
@@ -10,5 +11,6 @@ export default createStore({
     tasks,
     lists,
     chats
-  }
+  },
+  plugins: [createEventsPlugin()]
 })
\ No newline at end of file
@@ -121,7 +121,7 @@ const actions = {
    * @param {Object} payload - Payload containing list ID and updates
    * @throws {Error} If list update fails
    */
-  async updateList({ commit }, { id, updates }) {
+  async updateList({ commit, dispatch }, { id, updates }) {
     commit('setLoading', true)
     try {
       // First update the folder name
@@ -132,16 +132,13 @@ const actions = {
         })
       }
       
-      // Then update any tasks in this folder
-      if (updates.tasks) {
-        const tasks = updates.tasks
-        for (const task of tasks) {
-          await axios.patch('http://127.0.0.1:5000/tasks', {
-            id: task.id,
-            folder_id: id,
-            dueDate: task.dueDate
-          })
-        }
+      // Then move any tasks into this folder in a single batch
+      if (updates.tasks?.length) {
+        await dispatch('tasks/batchTasks', updates.tasks.map(task => ({
+          op: 'patch',
+          id: task.id,
+          changes: { folder_id: id, dueDate: task.dueDate }
+        })), { root: true })
       }
       
       commit('updateList', { id, updates })
@@ -153,6 +150,19 @@ const actions = {
     }
   },
   
+  /**
+   * Apply a folder change pushed by the server
+   * @param {Object} context - Vuex context
+   * @param {Object} change - Change with entity, id, op and data
+   */
+  applyChange({ commit }, change) {
+    if (change.op === 'delete') {
+      commit('deleteList', change.id)
+    } else {
+      commit('upsertList', change.data)
+    }
+  },
+  
   /**
    * Delete a list
    * @param {Object} context - Vuex context
@@ -164,15 +174,16 @@ const actions = {
     try {
       // First get all tasks in this folder
       const response = await axios.get('http://127.0.0.1:5000/tasks', {
-        params: { folder_id: id }
+        params: { folder_id: id, fields: 'id' }
       })
       
-      // Move all tasks to unassigned (null folder_id)
-      for (const task of response.data) {
-        await axios.patch('http://127.0.0.1:5000/tasks', {
+      // Move all tasks to unassigned (null folder_id) in a single batch
+      if (response.data.length) {
+        await dispatch('tasks/batchTasks', response.data.map(task => ({
+          op: 'patch',
           id: task.id,
-          folder_id: null
-        })
+          changes: { folder_id: null }
+        })), { root: true })
       }
       
       // Delete the folder
@@ -208,7 +219,23 @@ const mutations = {
    * @param {Object} list - List to add
    */
   addList(state, list) {
-    state.lists.push(list)
+    if (!state.lists.some(existing => existing.id === list.id)) {
+      state.lists.push(list)
+    }
+  },
+  
+  /**
+   * Add a list or merge it into the existing copy
+   * @param {Object} state - Module state
+   * @param {Object} list - List to add or update
+   */
+  upsertList(state, list) {
+    const index = state.lists.findIndex(existing => existing.id === list.id)
+    if (index === -1) {
+      state.lists.push(list)
+    } else {
+      state.lists[index] = { ...state.lists[index], ...list }
+    }
   },
   
   /**
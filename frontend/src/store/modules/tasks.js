@@ -6,15 +6,44 @@
 import { v4 as uuidv4 } from 'uuid'
 import axios from 'axios'
 
+/**
+ * Number of tasks requested per page when fetching
+ * @type {number}
+ */
+const TASK_PAGE_SIZE = 500
+
+/**
+ * Number of results requested for a search
+ * @type {number}
+ */
+const SEARCH_LIMIT = 100
+
+/**
+ * Views the server filters by itself; any other list ID is a folder
+ * @type {Array<string>}
+ */
+const SERVER_VIEWS = ['all', 'important', 'completed', 'due_today', 'overdue']
+
+/**
+ * Delay before refreshing counts after a change, so bursts share one request
+ * @type {number}
+ */
+const STATS_REFRESH_DELAY = 250
+
+let statsTimer = null
+
 /**
  * Initial state for the tasks module
  * @type {Object}
  */
 const state = {
   tasks: [],
+  views: {},
+  stats: null,
   loading: false,
   error: null,
-  selectedTask: null
+  selectedTask: null,
+  lastFileChange: null
 }
 
 /**
@@ -30,48 +59,47 @@ const getters = {
   allTasks: (state) => state.tasks,
   
   /**
-   * Tasks filtered by list ID
+   * Tasks keyed by ID
    * @param {Object} state - Module state
-   * @returns {Function} Function that takes listId and returns filtered tasks
-   */
-  tasksByList: (state) => (listId) => {
-    if (listId === 'important') {
-      return state.tasks.filter(task => task.isImportant)
-    } else if (listId === 'completed') {
-      return state.tasks.filter(task => task.completed)
-    } else if (listId === 'all') {
-      return state.tasks
-    } else if (listId) {
-      const folderId = parseInt(listId)
-      return state.tasks.filter(task => task.folder_id === folderId)
-    }
-    return state.tasks
+   * @returns {Object} Map of task ID to task object
+   */
+  tasksById: (state) => Object.fromEntries(state.tasks.map(task => [task.id, task])),
+  
+  /**
+   * Tasks in a list, in the order the server returned them
+   * @param {Object} state - Module state
+   * @param {Object} getters - Module getters
+   * @returns {Function} Function that takes listId and returns the list's loaded tasks
+   */
+  tasksByList: (state, getters) => (listId = 'all') => {
+    const view = state.views[listId]
+    if (!view) return []
+    return view.ids.map(id => getters.tasksById[id]).filter(Boolean)
   },
   
   /**
-   * Search tasks by query and list ID
+   * Whether a list's tasks have been fetched
    * @param {Object} state - Module state
-   * @returns {Function} Function that takes query and listId and returns filtered tasks
-   */
-  searchTasks: (state) => (query, listId) => {
-    if (!query) {
-      // When no search query, respect the current list filter
-      if (listId === 'important') {
-        return state.tasks.filter(task => task.isImportant)
-      } else if (listId === 'completed') {
-        return state.tasks.filter(task => task.completed)
-      } else if (listId) {
-        return state.tasks.filter(task => task.folder_id === listId)
-      }
-      return state.tasks
-    }
-    
-    const searchTerm = query.toLowerCase()
-    return state.tasks.filter(task => {
-      const titleMatch = task.title.toLowerCase().includes(searchTerm)
-      const descriptionMatch = task.notes?.toLowerCase().includes(searchTerm) || false
-      return titleMatch || descriptionMatch
-    })
+   * @returns {Function} Function that takes listId and returns true once it is loaded
+   */
+  isViewLoaded: (state) => (listId) => Boolean(state.views[listId]?.loaded),
+  
+  /**
+   * Task counts per view and per folder from the server
+   * @param {Object} state - Module state
+   * @returns {Object|null} Counts or null before they are fetched
+   */
+  taskStats: (state) => state.stats,
+  
+  /**
+   * Number of tasks in a list
+   * @param {Object} state - Module state
+   * @returns {Function} Function that takes listId and returns its task count
+   */
+  listCount: (state) => (listId) => {
+    if (!state.stats) return 0
+    if (SERVER_VIEWS.includes(listId)) return state.stats.views[listId]
+    return state.stats.folders[listId]?.all || 0
   },
   
   /**
@@ -88,6 +116,13 @@ const getters = {
    */
   error: (state) => state.error,
   
+  /**
+   * Most recent file change pushed by the server
+   * @param {Object} state - Module state
+   * @returns {Object|null} File change or null
+   */
+  lastFileChange: (state) => state.lastFileChange,
+  
   /**
    * Currently selected task
    * @param {Object} state - Module state
@@ -98,16 +133,18 @@ const getters = {
   /**
    * Completed tasks
    * @param {Object} state - Module state
+   * @param {Object} getters - Module getters
    * @returns {Array} Array of completed tasks
    */
-  completedTasks: (state) => state.tasks.filter(task => task.completed),
+  completedTasks: (state, getters) => getters.tasksByList('completed'),
   
   /**
    * Important tasks
    * @param {Object} state - Module state
+   * @param {Object} getters - Module getters
    * @returns {Array} Array of important tasks
    */
-  importantTasks: (state) => state.tasks.filter(task => task.isImportant),
+  importantTasks: (state, getters) => getters.tasksByList('important'),
   
   /**
    * Get task by ID
@@ -125,17 +162,27 @@ const getters = {
  */
 const actions = {
   /**
-   * Fetch tasks from the API
+   * Fetch a list's tasks from the API one keyset page at a time; the
+   * server does the filtering
    * @param {Object} context - Vuex context
-   * @param {string|null} folderId - Optional folder ID to filter by
+   * @param {string} [listId='all'] - View name or folder ID
    */
-  async fetchTasks({ commit }, folderId = null) {
+  async fetchTasks({ state, commit, dispatch }, listId = 'all') {
     commit('setLoading', true)
     try {
-      const response = await axios.get('http://127.0.0.1:5000/tasks', {
-        params: { folder_id: folderId }
-      })
-      commit('setTasks', response.data)
+      const ids = []
+      let cursor = null
+      do {
+        const response = await axios.get('http://127.0.0.1:5000/tasks', {
+          params: { ...listParams(listId), limit: TASK_PAGE_SIZE, cursor }
+        })
+        const tasks = response.data.tasks.map(toFrontendTask)
+        commit('mergeTasks', tasks)
+        ids.push(...tasks.map(task => task.id))
+        cursor = response.data.next_cursor
+      } while (cursor)
+      commit('setView', { listId, ids })
+      if (!state.stats) dispatch('fetchStats')
     } catch (error) {
       console.error('Error fetching tasks:', error)
       commit('setError', error.response?.data?.error || error.message)
@@ -144,6 +191,62 @@ const actions = {
     }
   },
   
+  /**
+   * Fetch every list fetched so far again, with its counts
+   * @param {Object} context - Vuex context
+   */
+  async refreshViews({ state, dispatch }) {
+    await Promise.all(Object.keys(state.views).map(listId => dispatch('fetchTasks', listId)))
+    await dispatch('fetchStats')
+  },
+  
+  /**
+   * Fetch task counts per view and per folder
+   * @param {Object} context - Vuex context
+   */
+  async fetchStats({ commit }) {
+    try {
+      const response = await axios.get('http://127.0.0.1:5000/tasks/stats', {
+        params: { today: localDate() }
+      })
+      commit('setStats', response.data)
+    } catch (error) {
+      console.error('Error fetching task counts:', error)
+    }
+  },
+  
+  /**
+   * Refresh task counts shortly, once for a burst of changes
+   * @param {Object} context - Vuex context
+   */
+  scheduleStatsRefresh({ dispatch }) {
+    clearTimeout(statsTimer)
+    statsTimer = setTimeout(() => dispatch('fetchStats'), STATS_REFRESH_DELAY)
+  },
+  
+  /**
+   * Search task titles and notes on the server
+   * @param {Object} context - Vuex context
+   * @param {Object} payload - Payload containing the query and list ID
+   * @param {string} payload.query - Search text
+   * @param {string} [payload.listId='all'] - View name or folder ID to search within
+   * @returns {Promise<Array>} Matching tasks
+   */
+  async searchTasks({ commit }, { query, listId = 'all' }) {
+    try {
+      const response = await axios.get('http://127.0.0.1:5000/tasks', {
+        params: { ...listParams(listId), q: query, limit: SEARCH_LIMIT }
+      })
+      const tasks = response.data.tasks.map(toFrontendTask)
+      commit('mergeTasks', tasks)
+      return tasks
+    } catch (error) {
+      console.error('Error searching tasks:', error)
+      commit('setError', error.response?.data?.error || error.message)
+      return []
+    }
+  },
+  
   /**
    * Add a new task
    * @param {Object} context - Vuex context
@@ -151,7 +254,7 @@ const actions = {
    * @returns {Promise<Object>} Added task
    * @throws {Error} If task addition fails
    */
-  async addTask({ commit }, task) {
+  async addTask({ commit, dispatch }, task) {
     commit('setLoading', true)
     try {
       const apiTask = {
@@ -175,6 +278,7 @@ const actions = {
       }
       
       commit('addTask', newTask)
+      dispatch('scheduleStatsRefresh')
       return newTask
     } catch (error) {
       console.error('Error adding task:', error)
@@ -192,7 +296,7 @@ const actions = {
    * @returns {Promise<Object>} Updated task
    * @throws {Error} If task update fails
    */
-  async updateTask({ commit }, { id, updates }) {
+  async updateTask({ commit, dispatch }, { id, updates }) {
     commit('setLoading', true)
     try {
       const apiUpdates = {
@@ -216,6 +320,7 @@ const actions = {
       }
       
       commit('updateTask', { id, updates: frontendUpdates })
+      dispatch('scheduleStatsRefresh')
       return frontendUpdates
     } catch (error) {
       console.error('Error updating task:', error)
@@ -232,11 +337,12 @@ const actions = {
    * @param {string} id - Task ID to delete
    * @throws {Error} If task deletion fails
    */
-  async deleteTask({ commit }, id) {
+  async deleteTask({ commit, dispatch }, id) {
     commit('setLoading', true)
     try {
       await axios.delete(`http://127.0.0.1:5000/tasks?id=${id}`)
       commit('deleteTask', id)
+      dispatch('scheduleStatsRefresh')
     } catch (error) {
       console.error('Error deleting task:', error)
       commit('setError', error.response?.data?.error || error.message)
@@ -246,6 +352,60 @@ const actions = {
     }
   },
   
+  /**
+   * Apply several task creates, patches and deletes in one request
+   * @param {Object} context - Vuex context
+   * @param {Array<Object>} operations - Operations of the form
+   *   `{ op: 'create', task }`, `{ op: 'patch', id, changes }` or `{ op: 'delete', id }`
+   * @returns {Promise<Array<Object>>} Per-operation results from the API
+   * @throws {Error} If the batch request fails
+   */
+  async batchTasks({ commit, dispatch }, operations) {
+    commit('setLoading', true)
+    try {
+      const response = await axios.post('http://127.0.0.1:5000/tasks/batch', { operations })
+      const results = response.data.results
+      
+      results.forEach((result, index) => {
+        const operation = operations[index]
+        if (result.status === 201) {
+          commit('addTask', toFrontendTask(result.task))
+        } else if (result.status === 200 && result.task) {
+          commit('updateTask', { id: operation.id, updates: toFrontendTask(result.task) })
+        } else if (result.status === 204) {
+          commit('deleteTask', operation.id)
+        }
+      })
+      dispatch('scheduleStatsRefresh')
+      
+      return results
+    } catch (error) {
+      console.error('Error applying task batch:', error)
+      commit('setError', error.response?.data?.error || error.message)
+      throw error
+    } finally {
+      commit('setLoading', false)
+    }
+  },
+  
+  /**
+   * Apply a task or file change pushed by the server
+   * @param {Object} context - Vuex context
+   * @param {Object} change - Change with entity, id, op and data
+   */
+  applyChange({ commit, dispatch }, change) {
+    if (change.entity === 'file') {
+      commit('setLastFileChange', change)
+      return
+    }
+    if (change.op === 'delete') {
+      commit('deleteTask', change.id)
+    } else {
+      commit('upsertTask', toFrontendTask(change.data))
+    }
+    dispatch('scheduleStatsRefresh')
+  },
+  
   /**
    * Toggle task completion status
    * @param {Object} context - Vuex context
@@ -285,34 +445,67 @@ const actions = {
     commit('setSelectedTask', task)
   },
 
-  async processTaskWithAgent({ state }, task) {
-    try {
-      // First, fetch any associated files for the task
-      const files = await axios.get(`http://127.0.0.1:5000/tasks/${task.id}/files`);
-      
-      // Prepare the request payload
-      const payload = {
+  /**
+   * Process a task with the agent, streaming the answer as it is generated
+   * @param {Object} context - Vuex context
+   * @param {Object} payload - Payload containing the task, a token callback and an abort signal
+   * @param {Object} payload.task - Task to process
+   * @param {Function} [payload.onToken] - Called with each piece of the answer as it arrives
+   * @param {AbortSignal} [payload.signal] - Aborts the request, which also stops the model on the server
+   * @returns {Promise<Object>} The task and the complete answer
+   * @throws {Error} If the request fails or the agent reports an error
+   */
+  async processTaskWithAgent(context, { task, onToken, signal }) {
+    const response = await fetch('http://127.0.0.1:5000/process-task?stream=1', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'application/x-ndjson'
+      },
+      body: JSON.stringify({
         task_id: task.id,
         task_title: task.title,
-        task_type: getTaskType(task.title),
-        files: files.data
-      };
+        task_type: getTaskType(task.title)
+      }),
+      signal
+    })
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}))
+      throw new Error(body.error || `Request failed with status ${response.status}`)
+    }
 
-      // Send the request to the backend
-      const response = await axios.post(
-        'http://127.0.0.1:5000/process-task',
-        payload
-      );
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    const result = { task, content: '' }
 
-      // Extract just the content from the RunResponse
-      return {
-        task: response.data.task,
-        content: response.data.content.match(/content="([^"]*)"/)?.[1] || response.data.content
-      };
-    } catch (error) {
-      console.error('Error processing task with agent:', error);
-      throw error;
+    /**
+     * Apply one NDJSON record from the stream
+     * @param {string} line - Record line
+     */
+    const handleLine = (line) => {
+      if (!line.trim()) return
+      const record = JSON.parse(line)
+      if (record.type === 'task') {
+        result.task = record.task
+      } else if (record.type === 'token') {
+        result.content += record.content
+        if (onToken) onToken(record.content)
+      } else if (record.type === 'error') {
+        throw new Error(record.error)
+      }
+    }
+
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      lines.forEach(handleLine)
     }
+    handleLine(buffer + decoder.decode())
+    return result
   },
   
   /**
@@ -414,12 +607,36 @@ const actions = {
  */
 const mutations = {
   /**
-   * Set all tasks
+   * Add fetched tasks to the task cache, replacing older copies
    * @param {Object} state - Module state
    * @param {Array} tasks - Array of task objects
    */
-  setTasks(state, tasks) {
-    state.tasks = tasks
+  mergeTasks(state, tasks) {
+    const fetched = new Map(tasks.map(task => [task.id, task]))
+    state.tasks = state.tasks.map(task => {
+      const update = fetched.get(task.id)
+      fetched.delete(task.id)
+      return update || task
+    })
+    state.tasks.push(...fetched.values())
+  },
+  
+  /**
+   * Set the task IDs in a list, as returned by the server
+   * @param {Object} state - Module state
+   * @param {Object} payload - Payload containing list ID and task IDs
+   */
+  setView(state, { listId, ids }) {
+    state.views = { ...state.views, [listId]: { ids, loaded: true } }
+  },
+  
+  /**
+   * Set task counts per view and per folder
+   * @param {Object} state - Module state
+   * @param {Object} stats - Counts from GET /tasks/stats
+   */
+  setStats(state, stats) {
+    state.stats = stats
   },
   
   /**
@@ -428,7 +645,37 @@ const mutations = {
    * @param {Object} task - Task to add
    */
   addTask(state, task) {
-    state.tasks.push(task)
+    if (!state.tasks.some(existing => existing.id === task.id)) {
+      state.tasks.push(task)
+    }
+    syncViews(state, task)
+  },
+  
+  /**
+   * Add a task or merge it into the existing copy
+   * @param {Object} state - Module state
+   * @param {Object} task - Task to add or update
+   */
+  upsertTask(state, task) {
+    const index = state.tasks.findIndex(existing => existing.id === task.id)
+    if (index === -1) {
+      state.tasks.push(task)
+    } else {
+      state.tasks[index] = { ...state.tasks[index], ...task }
+      if (state.selectedTask && state.selectedTask.id === task.id) {
+        state.selectedTask = { ...state.selectedTask, ...task }
+      }
+    }
+    syncViews(state, index === -1 ? task : state.tasks[index])
+  },
+  
+  /**
+   * Record the latest file change pushed by the server
+   * @param {Object} state - Module state
+   * @param {Object} change - File change
+   */
+  setLastFileChange(state, change) {
+    state.lastFileChange = change
   },
   
   /**
@@ -445,6 +692,7 @@ const mutations = {
       if (state.selectedTask && state.selectedTask.id === id) {
         state.selectedTask = { ...state.selectedTask, ...updates }
       }
+      syncViews(state, state.tasks[index])
     }
   },
   
@@ -455,6 +703,10 @@ const mutations = {
    */
   deleteTask(state, id) {
     state.tasks = state.tasks.filter(task => task.id !== id)
+    Object.values(state.views).forEach(view => {
+      const index = view.ids.indexOf(id)
+      if (index !== -1) view.ids.splice(index, 1)
+    })
     
     // Clear selected task if it's the one being deleted
     if (state.selectedTask && state.selectedTask.id === id) {
@@ -490,6 +742,81 @@ const mutations = {
   }
 }
 
+/**
+ * Today's date in the browser's timezone, as the server's `today` parameter
+ * @returns {string} Date in YYYY-MM-DD form
+ */
+function localDate() {
+  const now = new Date()
+  const pad = (value) => String(value).padStart(2, '0')
+  return `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}`
+}
+
+/**
+ * Query parameters selecting a list's tasks on the server
+ * @param {string} listId - View name or folder ID
+ * @returns {Object} Parameters for GET /tasks
+ */
+function listParams(listId) {
+  if (listId === 'all') return {}
+  if (SERVER_VIEWS.includes(listId)) return { view: listId, today: localDate() }
+  return { folder_id: listId }
+}
+
+/**
+ * Whether a task belongs in a list, matching the server's view filters
+ * @param {Object} task - Task to check
+ * @param {string} listId - View name or folder ID
+ * @param {string} today - Today's date in YYYY-MM-DD form
+ * @returns {boolean} True if the list should show the task
+ */
+function matchesList(task, listId, today) {
+  const due = task.dueDate ? task.dueDate.slice(0, 10) : ''
+  switch (listId) {
+    case 'all': return true
+    case 'important': return Boolean(task.isImportant)
+    case 'completed': return Boolean(task.completed)
+    case 'due_today': return !task.completed && due === today
+    case 'overdue': return !task.completed && due !== '' && due < today
+    default: return task.folder_id === parseInt(listId)
+  }
+}
+
+/**
+ * Add a created or changed task to the fetched lists it now belongs to and
+ * remove it from the ones it has left
+ * @param {Object} state - Module state
+ * @param {Object} task - Task as stored after the change
+ */
+function syncViews(state, task) {
+  const today = localDate()
+  Object.entries(state.views).forEach(([listId, view]) => {
+    const index = view.ids.indexOf(task.id)
+    const belongs = matchesList(task, listId, today)
+    if (belongs && index === -1) {
+      view.ids.push(task.id)
+    } else if (!belongs && index !== -1) {
+      view.ids.splice(index, 1)
+    }
+  })
+}
+
+/**
+ * Add the frontend's alias fields to a task returned by the API
+ * @param {Object} task - Task from the API
+ * @returns {Object} Task with description, important and listId aliases
+ */
+function toFrontendTask(task) {
+  return {
+    ...task,
+    description: task.notes,
+    important: task.isImportant,
+    listId: task.folder_id,
+    dueDate: task.dueDate,
+    createdAt: task.createdAt
+  }
+}
+
 // Helper function to determine task type
  function getTaskType(title) {
    const titleLower = title.toLowerCase();